@@ -2,12 +2,20 @@
 Authentication module for WebSocket server.
 
 This module provides JWT-based authentication for the WebSocket server.
+
+Verified tokens are cached by digest until they expire, so reconnects and
+repeated checks of the same token skip signature verification; recently
+rejected tokens are cached too, so floods of a bad token stay cheap. Both
+caches are cleared when the key or validation settings change.
 """
 
+import hashlib
 import json
 import logging
 import os
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple, List, Set, Union
 
@@ -20,6 +28,7 @@ except ImportError:
 from .logging_config import (
     get_logger, LogLevel, LogCategory
 )
+from .monitoring import MetricsRegistry, MetricType
 
 
 # Configure logger
@@ -57,7 +66,13 @@ class JWTAuthenticator:
                 audience: Optional[str] = None,
                 issuer: Optional[str] = None,
                 required_claims: Optional[List[str]] = None,
-                env_secret_key: str = "JWT_SECRET_KEY"):
+                env_secret_key: str = "JWT_SECRET_KEY",
+                token_cache_size: int = 10000,
+                token_cache_ttl: float = 300.0,
+                negative_cache_size: int = 10000,
+                negative_cache_ttl: float = 10.0,
+                metrics_registry: Optional[MetricsRegistry] = None,
+                metrics_interval: float = 1.0):
         """
         Initialize the JWT authenticator.
         
@@ -70,6 +85,14 @@ class JWTAuthenticator:
             issuer: Expected issuer claim
             required_claims: List of required claims
             env_secret_key: Environment variable name for secret key
+            token_cache_size: Maximum number of cached verified tokens (0
+                disables caching)
+            token_cache_ttl: Seconds a verified token without an expiry
+                (or verified without checking it) stays cached
+            negative_cache_size: Maximum number of cached rejected tokens
+            negative_cache_ttl: Seconds a rejected token stays cached
+            metrics_registry: Registry receiving token cache metrics
+            metrics_interval: Minimum seconds between metric updates
         """
         # Get secret key from environment or parameter
         self.secret_key = secret_key or os.environ.get(env_secret_key)
@@ -85,6 +108,45 @@ class JWTAuthenticator:
         self.issuer = issuer
         self.required_claims = required_claims or ["sub", "exp"]
         
+        # Token caches: (token digest, verify_exp) -> (claims, expiry) and
+        # -> (error type, message, expiry), least recently used first
+        self.token_cache_size = token_cache_size
+        self.token_cache_ttl = token_cache_ttl
+        self.negative_cache_size = negative_cache_size
+        self.negative_cache_ttl = negative_cache_ttl
+        self._token_cache: "OrderedDict[Tuple[bytes, bool], Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._rejected_tokens: "OrderedDict[Tuple[bytes, bool], Tuple[type, str, float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_config = self._validation_config()
+        
+        # Token cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.negative_hits = 0
+        
+        self.metrics_registry = metrics_registry
+        self.metrics_interval = metrics_interval
+        self._next_metrics_update = 0.0
+        if metrics_registry is not None:
+            metrics_registry.register_metric(
+                "auth.token_cache.hit_rate",
+                MetricType.GAUGE,
+                "Share of token verifications answered from the verified-token cache",
+                "percent"
+            )
+            metrics_registry.register_metric(
+                "auth.token_cache.negative_hit_rate",
+                MetricType.GAUGE,
+                "Share of token verifications rejected from the rejected-token cache",
+                "percent"
+            )
+            metrics_registry.register_metric(
+                "auth.token_cache.size",
+                MetricType.GAUGE,
+                "Cached verified tokens",
+                "count"
+            )
+        
         logger.structured_log(
             LogLevel.INFO,
             "JWT authenticator initialized",
@@ -156,6 +218,150 @@ class JWTAuthenticator:
         """
         Verify a JWT token.
         
+        Tokens verified before are answered from the cache until they expire,
+        and recently rejected tokens are rejected again without decoding.
+        
+        Args:
+            token: JWT token string
+            verify_exp: Whether to verify token expiration
+            
+        Returns:
+            JWT claims dictionary
+            
+        Raises:
+            TokenExpiredError: If token has expired
+            InvalidTokenError: If token is invalid
+            MissingClaimError: If required claim is missing
+        """
+        if not self.token_cache_size:
+            return self._decode_token(token, verify_exp)
+        
+        now = time.time()
+        key = (hashlib.sha256(token.encode("utf-8")).digest(), verify_exp)
+        
+        with self._cache_lock:
+            if self._cache_config != self._validation_config():
+                self._clear_caches()
+            config = self._cache_config
+            
+            entry = self._token_cache.get(key)
+            if entry is not None and now < entry[1]:
+                self._token_cache.move_to_end(key)
+                self.cache_hits += 1
+                claims = dict(entry[0])
+            else:
+                claims = None
+                rejection = self._rejected_tokens.get(key)
+                if rejection is not None and now < rejection[2]:
+                    self.negative_hits += 1
+                else:
+                    rejection = None
+                    self.cache_misses += 1
+        
+        if now >= self._next_metrics_update:
+            self._report_cache_metrics(now)
+        
+        if claims is not None:
+            return claims
+        if rejection is not None:
+            raise rejection[0](rejection[1])
+        
+        # Decoded outside the lock, so the key may be rotated meanwhile; the
+        # result is then only cached if the settings it was checked against
+        # are still current.
+        try:
+            claims = self._decode_token(token, verify_exp)
+        except AuthError as e:
+            with self._cache_lock:
+                if config != self._validation_config():
+                    raise
+                self._token_cache.pop(key, None)
+                self._rejected_tokens[key] = (type(e), str(e), now + self.negative_cache_ttl)
+                self._rejected_tokens.move_to_end(key)
+                if len(self._rejected_tokens) > self.negative_cache_size:
+                    self._rejected_tokens.popitem(last=False)
+            raise
+        
+        # Cached until the token expires (PyJWT rejects it from exp on)
+        expires_at = now + self.token_cache_ttl
+        if verify_exp and isinstance(claims.get("exp"), (int, float)):
+            expires_at = claims["exp"]
+        
+        with self._cache_lock:
+            if config != self._validation_config():
+                return claims
+            self._token_cache[key] = (dict(claims), expires_at)
+            self._token_cache.move_to_end(key)
+            self._rejected_tokens.pop(key, None)
+            if len(self._token_cache) > self.token_cache_size:
+                self._token_cache.popitem(last=False)
+        
+        return claims
+    
+    def rotate_key(self, secret_key: str) -> None:
+        """
+        Switch to a new signing key.
+        
+        Tokens verified with the old key must be verified again.
+        
+        Args:
+            secret_key: New secret key
+        """
+        with self._cache_lock:
+            self.secret_key = secret_key
+            self._clear_caches()
+        
+        logger.structured_log(
+            LogLevel.INFO,
+            "JWT signing key rotated",
+            LogCategory.SECURITY,
+            component="jwt_auth"
+        )
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get token cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, negative hits, cache sizes and the
+            hit rates in percent of all verifications
+        """
+        total = self.cache_hits + self.cache_misses + self.negative_hits
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "negative_hits": self.negative_hits,
+            "size": len(self._token_cache),
+            "negative_size": len(self._rejected_tokens),
+            "hit_rate": 100.0 * self.cache_hits / total if total else 0.0,
+            "negative_hit_rate": 100.0 * self.negative_hits / total if total else 0.0
+        }
+    
+    def _validation_config(self) -> Tuple[Any, ...]:
+        """Get the settings a cached verification depends on."""
+        return (self.secret_key, self.algorithm, self.audience, self.issuer, tuple(self.required_claims))
+    
+    def _clear_caches(self) -> None:
+        """Drop all cached verifications (caller holds the cache lock)."""
+        self._token_cache.clear()
+        self._rejected_tokens.clear()
+        self._cache_config = self._validation_config()
+    
+    def _report_cache_metrics(self, now: float) -> None:
+        """Publish token cache metrics."""
+        self._next_metrics_update = now + self.metrics_interval
+        if self.metrics_registry is None:
+            return
+        
+        stats = self.cache_stats()
+        self.metrics_registry.update_metric("auth.token_cache.hit_rate", stats["hit_rate"])
+        self.metrics_registry.update_metric("auth.token_cache.negative_hit_rate", stats["negative_hit_rate"])
+        self.metrics_registry.update_metric("auth.token_cache.size", stats["size"])
+    
+    def _decode_token(self, token: str, verify_exp: bool) -> Dict[str, Any]:
+        """
+        Decode and validate a JWT token.
+        
         Args:
             token: JWT token string
             verify_exp: Whether to verify token expiration
@@ -0,0 +1,380 @@
+"""
+Message codecs for the progress WebSocket protocol.
+
+JSON text frames remain the default. Clients can negotiate a binary codec,
+either with the WebSocket subprotocol (``rfm.msgpack``, ``rfm.cbor``) or with
+the ``codec`` query parameter (``?codec=msgpack``). Binary codecs need the
+optional ``msgpack`` or ``cbor2`` packages; when the requested codec isn't
+available the connection falls back to JSON.
+
+Text frames are always JSON and binary frames always use the negotiated
+codec, so either side can decode a frame without further state.
+
+Binary codecs pack the hot message types (``progress_update``,
+``operation_started`` and ``pong``) schema-aware: instead of a map with
+string keys, the known fields are sent positionally behind a presence
+bitmask, and unknown fields travel in an overflow map, so packing is lossless.
+
+Several encoded messages can be framed together in a batch envelope,
+``{"type": "batch", "messages": [...]}``. Codecs build the envelope by
+concatenating the already encoded messages, so batching never re-serializes.
+"""
+
+import json
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import cbor2
+    CBOR_AVAILABLE = True
+except ImportError:
+    cbor2 = None
+    CBOR_AVAILABLE = False
+
+
+# Subprotocol name prefix, e.g. "rfm.msgpack"
+SUBPROTOCOL_PREFIX = "rfm."
+
+# Type of the envelope carrying several messages in one frame
+BATCH_MESSAGE_TYPE = "batch"
+
+
+class CodecError(ValueError):
+    """Raised when a message can't be decoded."""
+
+
+class _Schema:
+    """Positional layout of a hot message type."""
+
+    __slots__ = ("code", "message_type", "body_key", "fields", "field_set")
+
+    def __init__(self, code: int, message_type: str, body_key: Optional[str], fields: Tuple[str, ...]):
+        self.code = code
+        self.message_type = message_type
+        self.body_key = body_key
+        self.fields = fields
+        self.field_set = frozenset(fields)
+
+
+# Field order is part of the wire format: only append new fields
+_PROGRESS_FIELDS = (
+    "operation_id", "operation_type", "name", "timestamp", "progress", "status",
+    "current_step", "total_steps", "current_step_progress", "estimated_time_remaining_ms",
+    "memory_usage_mb", "progress_per_second", "units_per_second", "parent_id", "details"
+)
+
+_SCHEMAS = (
+    _Schema(1, "progress_update", "data", _PROGRESS_FIELDS + ("trace_id",)),
+    _Schema(2, "operation_started", "operation", _PROGRESS_FIELDS + ("start_time", "trace_id")),
+    _Schema(3, "pong", None, ("timestamp", "client_timestamp")),
+)
+
+_SCHEMAS_BY_TYPE = {schema.message_type: schema for schema in _SCHEMAS}
+_SCHEMAS_BY_CODE = {schema.code: schema for schema in _SCHEMAS}
+
+
+def _plain(value: Any) -> Any:
+    """Convert enum values for serializers that only accept builtin types."""
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def pack_message(message: Dict[str, Any]) -> Union[Dict[str, Any], List[Any]]:
+    """
+    Pack a message schema-aware if its type has a schema.
+
+    Packed form: ``[code, mask, [values...], body_extra, message_extra]``.
+
+    Args:
+        message: Message to pack
+
+    Returns:
+        Packed list, or the message unchanged if its type has no schema
+    """
+    message_type = message.get("type")
+    if isinstance(message_type, Enum):
+        message_type = message_type.value
+
+    schema = _SCHEMAS_BY_TYPE.get(message_type)
+    if schema is None:
+        return message
+
+    body = message.get(schema.body_key) if schema.body_key else message
+    if not isinstance(body, dict):
+        return message
+
+    mask = 0
+    values = []
+    for index, name in enumerate(schema.fields):
+        if name in body:
+            mask |= 1 << index
+            value = body[name]
+            values.append(value.value if isinstance(value, Enum) else value)
+
+    if schema.body_key:
+        body_extra = {key: value for key, value in body.items() if key not in schema.field_set}
+        message_extra = {key: value for key, value in message.items()
+                         if key not in ("type", schema.body_key)}
+    else:
+        body_extra = {key: value for key, value in body.items()
+                      if key != "type" and key not in schema.field_set}
+        message_extra = {}
+
+    return [schema.code, mask, values, body_extra or None, message_extra or None]
+
+
+def unpack_message(packed: Any) -> Dict[str, Any]:
+    """
+    Reverse :func:`pack_message`.
+
+    Args:
+        packed: Decoded frame content
+
+    Returns:
+        Message dictionary
+
+    Raises:
+        CodecError: If the content is not a message
+    """
+    if isinstance(packed, dict):
+        return packed
+
+    if not isinstance(packed, (list, tuple)) or len(packed) != 5:
+        raise CodecError("Malformed packed message")
+
+    code, mask, values, body_extra, message_extra = packed
+    schema = _SCHEMAS_BY_CODE.get(code)
+    if schema is None:
+        raise CodecError(f"Unknown message schema: {code}")
+
+    body = {}
+    value_iter = iter(values)
+    try:
+        for index, name in enumerate(schema.fields):
+            if mask & (1 << index):
+                body[name] = next(value_iter)
+    except StopIteration:
+        raise CodecError("Packed message is missing values") from None
+
+    if body_extra:
+        body.update(body_extra)
+
+    if schema.body_key is None:
+        return dict(body, type=schema.message_type)
+
+    message = {"type": schema.message_type, schema.body_key: body}
+    if message_extra:
+        message.update(message_extra)
+    return message
+
+
+class MessageCodec:
+    """Base class for message codecs."""
+
+    name = ""
+    binary = False
+
+    @property
+    def subprotocol(self) -> str:
+        """WebSocket subprotocol announcing this codec."""
+        return SUBPROTOCOL_PREFIX + self.name
+
+    def encode(self, message: Dict[str, Any]) -> Union[str, bytes]:
+        """
+        Encode a message for sending.
+
+        Args:
+            message: Message to encode
+
+        Returns:
+            Frame payload (str for text frames, bytes for binary frames)
+        """
+        raise NotImplementedError
+
+    def encode_batch(self, payloads: List[Union[str, bytes]]) -> Union[str, bytes]:
+        """
+        Frame encoded messages in a batch envelope.
+
+        Args:
+            payloads: Messages encoded with this codec
+
+        Returns:
+            Encoded batch envelope
+        """
+        return self.encode({
+            "type": BATCH_MESSAGE_TYPE,
+            "messages": [self._loads(payload) for payload in payloads]
+        })
+
+    def decode(self, payload: Union[str, bytes]) -> Dict[str, Any]:
+        """
+        Decode a received frame.
+
+        Text frames are always JSON, whatever codec was negotiated.
+
+        Args:
+            payload: Frame payload
+
+        Returns:
+            Message dictionary
+
+        Raises:
+            CodecError: If the payload can't be decoded
+        """
+        if isinstance(payload, str) or not self.binary:
+            try:
+                message = json.loads(payload)
+            except ValueError as e:
+                raise CodecError(f"Invalid JSON: {e}") from e
+        else:
+            try:
+                message = unpack_message(self._loads(payload))
+                if message.get("type") == BATCH_MESSAGE_TYPE:
+                    message["messages"] = [unpack_message(item) for item in message.get("messages", [])]
+            except CodecError:
+                raise
+            except Exception as e:
+                raise CodecError(f"Invalid {self.name} payload: {e}") from e
+
+        if not isinstance(message, dict):
+            raise CodecError("Message is not an object")
+        return message
+
+    def _loads(self, payload: bytes) -> Any:
+        """Deserialize a binary payload."""
+        raise NotImplementedError
+
+
+class JsonCodec(MessageCodec):
+    """JSON text codec (the default)."""
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        return json.dumps(message)
+
+    def encode_batch(self, payloads: List[str]) -> str:
+        return '{"type": "batch", "messages": [' + ", ".join(payloads) + "]}"
+
+    def _loads(self, payload: str) -> Any:
+        return json.loads(payload)
+
+
+class MsgpackCodec(MessageCodec):
+    """MessagePack binary codec."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(pack_message(message), default=_plain, use_bin_type=True)
+
+    def encode_batch(self, payloads: List[bytes]) -> bytes:
+        # fixmap(2) {"type": "batch", "messages": array(n)} followed by the raw items
+        count = len(payloads)
+        if count < 16:
+            header = bytes((0x90 | count,))
+        elif count < 0x10000:
+            header = b"\xdc" + count.to_bytes(2, "big")
+        else:
+            header = b"\xdd" + count.to_bytes(4, "big")
+        prefix = b"\x82" + b"".join(msgpack.packb(s) for s in ("type", BATCH_MESSAGE_TYPE, "messages"))
+        return prefix + header + b"".join(payloads)
+
+    def _loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+
+class CborCodec(MessageCodec):
+    """CBOR binary codec."""
+
+    name = "cbor"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return cbor2.dumps(pack_message(message), default=lambda encoder, value: encoder.encode(_plain(value)))
+
+    def encode_batch(self, payloads: List[bytes]) -> bytes:
+        # map(2) {"type": "batch", "messages": array(n)} followed by the raw items
+        count = len(payloads)
+        if count < 24:
+            header = bytes((0x80 | count,))
+        elif count < 0x100:
+            header = b"\x98" + count.to_bytes(1, "big")
+        elif count < 0x10000:
+            header = b"\x99" + count.to_bytes(2, "big")
+        else:
+            header = b"\x9a" + count.to_bytes(4, "big")
+        prefix = b"\xa2" + b"".join(cbor2.dumps(s) for s in ("type", BATCH_MESSAGE_TYPE, "messages"))
+        return prefix + header + b"".join(payloads)
+
+    def _loads(self, payload: bytes) -> Any:
+        return cbor2.loads(payload)
+
+
+JSON_CODEC = JsonCodec()
+
+_CODECS: Dict[str, MessageCodec] = {JSON_CODEC.name: JSON_CODEC}
+if MSGPACK_AVAILABLE:
+    _CODECS[MsgpackCodec.name] = MsgpackCodec()
+if CBOR_AVAILABLE:
+    _CODECS[CborCodec.name] = CborCodec()
+
+
+def available_codecs() -> List[str]:
+    """
+    Get the names of the codecs usable in this environment.
+
+    Returns:
+        Codec names, binary codecs first
+    """
+    return sorted(_CODECS, key=lambda name: (not _CODECS[name].binary, name))
+
+
+def get_codec(name: Optional[str]) -> Optional[MessageCodec]:
+    """
+    Get a codec by name or subprotocol.
+
+    Args:
+        name: Codec name (``"msgpack"``) or subprotocol (``"rfm.msgpack"``)
+
+    Returns:
+        Codec, or None if unknown or unavailable
+    """
+    if not name:
+        return None
+    if name.startswith(SUBPROTOCOL_PREFIX):
+        name = name[len(SUBPROTOCOL_PREFIX):]
+    return _CODECS.get(name.lower())
+
+
+def supported_subprotocols() -> List[str]:
+    """
+    Get the subprotocols a server should accept, in order of preference.
+
+    Returns:
+        List of subprotocol names
+    """
+    return [_CODECS[name].subprotocol for name in available_codecs()]
+
+
+def negotiate_codec(subprotocol: Optional[str] = None, requested: Optional[str] = None) -> MessageCodec:
+    """
+    Select the codec of a connection.
+
+    Args:
+        subprotocol: Subprotocol agreed in the handshake, if any
+        requested: Codec requested with the ``codec`` query parameter, if any
+
+    Returns:
+        Negotiated codec (JSON if nothing usable was requested)
+    """
+    return get_codec(subprotocol) or get_codec(requested) or JSON_CODEC
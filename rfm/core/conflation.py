@@ -0,0 +1,163 @@
+"""
+Update conflation for high-frequency progress streams.
+
+Renderers may report progress far more often than anyone can watch it. The
+conflator keeps only the latest pending update per key (operation ID) and
+flushes all pending updates on a fixed tick, so the outbound rate is bounded
+by the number of active operations times the tick rate instead of by how fast
+producers report.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .logging_config import get_logger, LogLevel, LogCategory
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+
+# Callback receiving one flushed (key, update) pair
+FlushCallback = Callable[[Hashable, Any], Awaitable[None]]
+
+
+class UpdateConflator:
+    """
+    Latest-value-wins buffer flushed on a tick.
+
+    Pending updates are flushed in the order their keys first became pending.
+    A newer update for a pending key replaces it without changing its place.
+    """
+
+    def __init__(self, flush_callback: FlushCallback, interval: float = 0.05):
+        """
+        Initialize the conflator.
+
+        Args:
+            flush_callback: Coroutine function called with (key, update) for each flushed update
+            interval: Flush interval in seconds (0.05 for 20 Hz)
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.flush_callback = flush_callback
+        self.interval = interval
+        self._pending: Dict[Hashable, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.offered = 0
+        self.conflated = 0
+
+    def pending_count(self) -> int:
+        """
+        Get the number of pending updates.
+
+        Returns:
+            Number of keys with a pending update
+        """
+        return len(self._pending)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Get the pending update of a key without removing it.
+
+        Args:
+            key: Update key
+
+        Returns:
+            Pending update, or None
+        """
+        return self._pending.get(key)
+
+    def offer(self, key: Hashable, update: Any) -> None:
+        """
+        Queue an update, replacing a pending update with the same key.
+
+        Args:
+            key: Update key
+            update: Update to deliver on the next flush
+        """
+        self.offered += 1
+        if key in self._pending:
+            self.conflated += 1
+
+        self._pending[key] = update
+        self._ensure_running()
+
+    def take(self, key: Hashable) -> Optional[Any]:
+        """
+        Remove and return the pending update of a key.
+
+        Used to deliver an update ahead of the tick, e.g. before a status
+        transition of the same operation.
+
+        Args:
+            key: Update key
+
+        Returns:
+            Pending update, or None
+        """
+        return self._pending.pop(key, None)
+
+    async def flush(self) -> int:
+        """
+        Deliver all pending updates.
+
+        Returns:
+            Number of updates delivered
+        """
+        pending, self._pending = self._pending, {}
+
+        for key, update in pending.items():
+            try:
+                await self.flush_callback(key, update)
+            except Exception as e:
+                logger.structured_log(
+                    LogLevel.ERROR,
+                    f"Error flushing conflated update for {key}: {e}",
+                    LogCategory.OPERATION,
+                    component="conflation",
+                    error=str(e)
+                )
+
+        return len(pending)
+
+    def _ensure_running(self) -> None:
+        """Start the flush task if an event loop is running and no task serves it."""
+        if self._task is not None and not self._task.done():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop in this thread; updates are flushed once started
+            return
+
+        self._task = loop.create_task(self._run())
+
+    def start(self) -> None:
+        """Start the flush task on the running event loop."""
+        self._ensure_running()
+
+    async def stop(self) -> None:
+        """Stop the flush task and deliver the remaining updates."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        """Background task flushing on each tick; exits once idle."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+            if not self._pending:
+                return
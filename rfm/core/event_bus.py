@@ -0,0 +1,657 @@
+"""
+Event bus shared by the workers of a multi-worker progress server.
+
+In multi-worker mode several server processes accept connections on the same
+port (SO_REUSEPORT), so the reporter of an operation and the clients watching
+it may be connected to different workers. Each worker publishes the operation
+events it receives on the bus and relays events published by other workers to
+its own clients.
+
+The bus also keeps an operation registry: the latest lifecycle events of each
+operation (started, latest progress, finished). A worker that joins late
+replays the registry, so all workers share a consistent view of the
+operations.
+
+Backends:
+
+- :class:`UnixSocketEventBroker` / :class:`UnixSocketEventBus`: a broker in the
+  supervisor process relaying length-prefixed JSON frames over a Unix-domain
+  socket. No dependencies.
+- :class:`RedisEventBus`: Redis (or any server speaking the Redis protocol)
+  pub/sub plus a hash for the registry. Needs the optional ``redis`` package.
+- :class:`LocalEventBus`: in-process hub, for tests and embedding.
+"""
+
+import asyncio
+import json
+import os
+import struct
+import uuid
+from collections import OrderedDict, deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .logging_config import get_logger, LogLevel, LogCategory
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+
+# Callback receiving (message, topics) for events published by other workers
+EventCallback = Callable[[Dict[str, Any], Optional[List[str]]], Awaitable[None]]
+
+# Frame header: payload length, big-endian
+_FRAME_HEADER = struct.Struct(">I")
+
+# Largest accepted frame
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# Registry slots of an operation, in replay order
+REGISTRY_SLOTS = ("started", "progress", "final")
+
+_SLOT_BY_TYPE = {
+    "operation_started": "started",
+    "progress_update": "progress",
+    "operation_completed": "final",
+    "operation_failed": "final",
+    "operation_canceled": "final",
+}
+
+
+def registry_slot(message: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Get the registry slot an operation event is stored in.
+
+    Args:
+        message: Operation event message
+
+    Returns:
+        Tuple of (operation ID, slot), or None if the event isn't recorded
+    """
+    message_type = message.get("type")
+    if isinstance(message_type, Enum):
+        message_type = message_type.value
+
+    slot = _SLOT_BY_TYPE.get(message_type)
+    if slot is None:
+        return None
+
+    if slot == "started":
+        operation_id = message.get("operation", {}).get("operation_id")
+    elif slot == "progress":
+        operation_id = message.get("data", {}).get("operation_id")
+    else:
+        operation_id = message.get("operation_id")
+
+    return (operation_id, slot) if operation_id else None
+
+
+class OperationRegistry:
+    """Latest lifecycle events per operation, bounded to the most recent operations."""
+
+    def __init__(self, max_operations: int = 10000):
+        """
+        Initialize the registry.
+
+        Args:
+            max_operations: Maximum number of operations kept; the least
+                recently updated operations are evicted first
+        """
+        self.max_operations = max_operations
+        self._operations: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    def record(self, message: Dict[str, Any]) -> None:
+        """
+        Record an operation event.
+
+        Args:
+            message: Operation event message
+        """
+        slot = registry_slot(message)
+        if slot is None:
+            return
+
+        operation_id, name = slot
+        events = self._operations.get(operation_id)
+        if events is None or name == "started":
+            # A new start replaces the history of a restarted operation
+            events = {}
+            self._operations[operation_id] = events
+        else:
+            self._operations.move_to_end(operation_id)
+
+        events[name] = message
+
+        while len(self._operations) > self.max_operations:
+            self._operations.popitem(last=False)
+
+    def forget(self, operation_id: str) -> None:
+        """
+        Remove an operation.
+
+        Args:
+            operation_id: Operation ID
+        """
+        self._operations.pop(operation_id, None)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the recorded events in replay order.
+
+        Returns:
+            List of operation event messages
+        """
+        return [
+            events[name]
+            for events in self._operations.values()
+            for name in REGISTRY_SLOTS
+            if name in events
+        ]
+
+
+def encode_frame(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a length-prefixed JSON frame.
+
+    Args:
+        payload: Frame content
+
+    Returns:
+        Frame bytes
+    """
+    body = json.dumps(payload).encode("utf-8")
+    return _FRAME_HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Read the body of a length-prefixed frame.
+
+    Args:
+        reader: Stream to read from
+
+    Returns:
+        Frame body, or None at end of stream
+
+    Raises:
+        ValueError: If the frame is larger than MAX_FRAME_SIZE
+    """
+    try:
+        header = await reader.readexactly(_FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+
+    (length,) = _FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length} bytes")
+
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class EventBus:
+    """
+    Base class for event buses.
+
+    Subclasses implement the transport; delivery to the worker goes through
+    :meth:`_deliver`, which filters out the worker's own events.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        """
+        Initialize the bus.
+
+        Args:
+            worker_id: ID of this worker (generated if not given)
+        """
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self._callback: Optional[EventCallback] = None
+
+        # Statistics
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self, callback: EventCallback) -> None:
+        """
+        Connect to the bus.
+
+        Args:
+            callback: Coroutine function called with (message, topics) for
+                events published by other workers
+        """
+        self._callback = callback
+
+    async def stop(self) -> None:
+        """Disconnect from the bus."""
+        self._callback = None
+
+    async def publish(self, message: Dict[str, Any], topics: Optional[List[str]] = None) -> None:
+        """
+        Publish an operation event to the other workers.
+
+        Args:
+            message: Operation event message
+            topics: Topics of the operation
+        """
+        raise NotImplementedError
+
+    async def forget(self, operation_id: str) -> None:
+        """
+        Remove an expired operation from the shared registry.
+
+        Args:
+            operation_id: Operation ID
+        """
+        raise NotImplementedError
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the shared operation registry.
+
+        Returns:
+            Operation event messages in replay order
+        """
+        raise NotImplementedError
+
+    def _envelope(self, message: Dict[str, Any], topics: Optional[List[str]]) -> Dict[str, Any]:
+        """Wrap a message for the bus."""
+        self.published += 1
+        return {"kind": "event", "origin": self.worker_id, "message": message, "topics": topics}
+
+    async def _deliver(self, envelope: Dict[str, Any]) -> None:
+        """Pass an event published by another worker to the callback."""
+        if envelope.get("origin") == self.worker_id or self._callback is None:
+            return
+
+        self.delivered += 1
+        try:
+            await self._callback(envelope.get("message", {}), envelope.get("topics"))
+        except Exception as e:
+            logger.structured_log(
+                LogLevel.ERROR,
+                f"Error handling bus event: {e}",
+                LogCategory.SYSTEM,
+                component="event_bus",
+                context={"worker_id": self.worker_id},
+                error=str(e)
+            )
+
+
+class LocalEventHub:
+    """In-process hub connecting :class:`LocalEventBus` instances."""
+
+    def __init__(self, max_operations: int = 10000):
+        """
+        Initialize the hub.
+
+        Args:
+            max_operations: Maximum number of operations in the registry
+        """
+        self.registry = OperationRegistry(max_operations)
+        self.buses: Set["LocalEventBus"] = set()
+
+
+class LocalEventBus(EventBus):
+    """Event bus between servers in one process."""
+
+    def __init__(self, hub: LocalEventHub, worker_id: Optional[str] = None):
+        """
+        Initialize the bus.
+
+        Args:
+            hub: Hub shared by the connected buses
+            worker_id: ID of this worker
+        """
+        super().__init__(worker_id)
+        self.hub = hub
+
+    async def start(self, callback: EventCallback) -> None:
+        await super().start(callback)
+        self.hub.buses.add(self)
+
+    async def stop(self) -> None:
+        self.hub.buses.discard(self)
+        await super().stop()
+
+    async def publish(self, message: Dict[str, Any], topics: Optional[List[str]] = None) -> None:
+        # Round-trip through JSON so servers never share message objects
+        envelope = json.loads(json.dumps(self._envelope(message, topics)))
+        self.hub.registry.record(envelope["message"])
+
+        for bus in list(self.hub.buses):
+            await bus._deliver(envelope)
+
+    async def forget(self, operation_id: str) -> None:
+        self.hub.registry.forget(operation_id)
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        return self.hub.registry.snapshot()
+
+
+class UnixSocketEventBroker:
+    """
+    Broker relaying bus frames between workers over a Unix-domain socket.
+
+    Event frames are forwarded to the other workers unchanged, so each event
+    is serialized once by its publisher.
+    """
+
+    def __init__(self, path: str, max_operations: int = 10000):
+        """
+        Initialize the broker.
+
+        Args:
+            path: Socket path
+            max_operations: Maximum number of operations in the registry
+        """
+        self.path = path
+        self.registry = OperationRegistry(max_operations)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+        # Statistics
+        self.relayed = 0
+
+    @property
+    def worker_count(self) -> int:
+        """Number of connected workers."""
+        return len(self._writers)
+
+    async def start(self) -> None:
+        """Listen on the socket path, replacing a stale socket file."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._server = await asyncio.start_unix_server(self._handle_worker, path=self.path)
+
+        logger.structured_log(
+            LogLevel.INFO,
+            f"Event broker listening on {self.path}",
+            LogCategory.SYSTEM,
+            component="event_bus"
+        )
+
+    async def stop(self) -> None:
+        """Stop listening and disconnect all workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one worker connection."""
+        self._writers.add(writer)
+        try:
+            while True:
+                body = await read_frame(reader)
+                if body is None:
+                    break
+
+                frame = json.loads(body)
+                kind = frame.get("kind")
+
+                if kind == "event":
+                    self.registry.record(frame.get("message", {}))
+                    self._relay(writer, _FRAME_HEADER.pack(len(body)) + body)
+                elif kind == "forget":
+                    self.registry.forget(frame.get("operation_id"))
+                elif kind == "snapshot":
+                    writer.write(encode_frame({"kind": "snapshot", "messages": self.registry.snapshot()}))
+                    await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Dropping event bus worker connection: {e}",
+                LogCategory.SYSTEM,
+                component="event_bus",
+                error=str(e)
+            )
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _relay(self, source: asyncio.StreamWriter, frame: bytes) -> None:
+        """Forward a frame to every worker except its publisher."""
+        self.relayed += 1
+        for writer in list(self._writers):
+            if writer is not source and not writer.is_closing():
+                writer.write(frame)
+
+
+class UnixSocketEventBus(EventBus):
+    """Worker side of the Unix-domain socket event bus."""
+
+    def __init__(self, path: str, worker_id: Optional[str] = None, connect_timeout: float = 10.0):
+        """
+        Initialize the bus.
+
+        Args:
+            path: Broker socket path
+            worker_id: ID of this worker
+            connect_timeout: Seconds to keep retrying while the broker starts up
+        """
+        super().__init__(worker_id)
+        self.path = path
+        self.connect_timeout = connect_timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_waiters: Deque[asyncio.Future] = deque()
+
+    async def start(self, callback: EventCallback) -> None:
+        await super().start(callback)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        while True:
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if loop.time() >= deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        self._fail_snapshot_waiters()
+        await super().stop()
+
+    async def publish(self, message: Dict[str, Any], topics: Optional[List[str]] = None) -> None:
+        await self._send(self._envelope(message, topics))
+
+    async def forget(self, operation_id: str) -> None:
+        await self._send({"kind": "forget", "operation_id": operation_id})
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        waiter = asyncio.get_running_loop().create_future()
+        self._snapshot_waiters.append(waiter)
+        await self._send({"kind": "snapshot"})
+        return await waiter
+
+    async def _send(self, frame: Dict[str, Any]) -> None:
+        """Write a frame to the broker."""
+        if self._writer is None:
+            raise ConnectionError("Event bus is not connected")
+
+        self._writer.write(encode_frame(frame))
+        await self._writer.drain()
+
+    async def _run(self) -> None:
+        """Read frames from the broker."""
+        try:
+            while True:
+                body = await read_frame(self._reader)
+                if body is None:
+                    break
+
+                frame = json.loads(body)
+                if frame.get("kind") == "snapshot":
+                    if self._snapshot_waiters:
+                        waiter = self._snapshot_waiters.popleft()
+                        if not waiter.done():
+                            waiter.set_result(frame.get("messages", []))
+                else:
+                    await self._deliver(frame)
+        except (ConnectionError, ValueError) as e:
+            logger.structured_log(
+                LogLevel.ERROR,
+                f"Event bus connection lost: {e}",
+                LogCategory.SYSTEM,
+                component="event_bus",
+                context={"worker_id": self.worker_id},
+                error=str(e)
+            )
+        finally:
+            self._fail_snapshot_waiters()
+
+    def _fail_snapshot_waiters(self) -> None:
+        """Fail pending snapshot requests after a disconnect."""
+        while self._snapshot_waiters:
+            waiter = self._snapshot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(ConnectionError("Event bus disconnected"))
+
+
+class RedisEventBus(EventBus):
+    """
+    Event bus on a Redis-compatible server.
+
+    Events go through a pub/sub channel; the operation registry is a hash
+    with one field per operation slot (``<operation_id>:<slot>``).
+    """
+
+    def __init__(self,
+                 url: str = "redis://localhost:6379/0",
+                 channel: str = "rfm:progress:events",
+                 registry_key: str = "rfm:progress:operations",
+                 worker_id: Optional[str] = None):
+        """
+        Initialize the bus.
+
+        Args:
+            url: Server URL
+            channel: Pub/sub channel for events
+            registry_key: Key of the registry hash
+            worker_id: ID of this worker
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("RedisEventBus requires the 'redis' package")
+
+        super().__init__(worker_id)
+        self.url = url
+        self.channel = channel
+        self.registry_key = registry_key
+        self._redis = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, callback: EventCallback) -> None:
+        await super().start(callback)
+
+        self._redis = aioredis.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.close()
+            self._pubsub = None
+
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+        await super().stop()
+
+    async def publish(self, message: Dict[str, Any], topics: Optional[List[str]] = None) -> None:
+        payload = json.dumps(self._envelope(message, topics))
+
+        slot = registry_slot(message)
+        pipeline = self._redis.pipeline()
+        if slot is not None:
+            operation_id, name = slot
+            if name == "started":
+                pipeline.hdel(self.registry_key, *[f"{operation_id}:{s}" for s in REGISTRY_SLOTS])
+            pipeline.hset(self.registry_key, f"{operation_id}:{name}", json.dumps(message))
+        pipeline.publish(self.channel, payload)
+        await pipeline.execute()
+
+    async def forget(self, operation_id: str) -> None:
+        await self._redis.hdel(self.registry_key, *[f"{operation_id}:{s}" for s in REGISTRY_SLOTS])
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        fields = await self._redis.hgetall(self.registry_key)
+
+        operations: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for field_name, value in fields.items():
+            if isinstance(field_name, bytes):
+                field_name = field_name.decode("utf-8")
+            operation_id, _, name = field_name.rpartition(":")
+            operations.setdefault(operation_id, {})[name] = json.loads(value)
+
+        return [
+            events[name]
+            for events in operations.values()
+            for name in REGISTRY_SLOTS
+            if name in events
+        ]
+
+    async def _run(self) -> None:
+        """Read events from the channel."""
+        async for item in self._pubsub.listen():
+            if item.get("type") != "message":
+                continue
+
+            try:
+                envelope = json.loads(item["data"])
+            except ValueError:
+                continue
+
+            await self._deliver(envelope)
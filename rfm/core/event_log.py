@@ -0,0 +1,333 @@
+"""
+Durable, segmented append-only log of operation state.
+
+The progress server records every change to an operation; a background task
+commits the pending changes as a group (one write and one fsync per commit
+interval) to the active log segment. Changes are keyed by operation, so a
+burst of progress updates of one operation between two commits is written
+as a single record: write amplification per progress event is close to zero.
+
+Periodic snapshots of all operations bound recovery time: the newest snapshot
+is loaded and only the records after it are replayed. Segments covered by a
+snapshot are deleted.
+
+Layout of the log directory::
+
+    snapshot-<lsn>.json     {"lsn": ..., "timestamp": ..., "operations": {...}}
+    segment-<first lsn>.log one JSON record per line: [lsn, operation_id, state]
+
+A ``state`` of null records that the operation was removed. A torn record at
+the end of a segment (crash during a write) is ignored.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .logging_config import get_logger, LogLevel, LogCategory
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+SNAPSHOT_PREFIX = "snapshot-"
+SEGMENT_PREFIX = "segment-"
+
+SnapshotSource = Callable[[], Dict[str, Dict[str, Any]]]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _lsn_of(path: str) -> int:
+    """Get the log sequence number in a snapshot or segment file name."""
+    return int(os.path.basename(path).split("-", 1)[1].split(".", 1)[0])
+
+
+class EventLog:
+    """Append-only operation log with group commit and snapshots."""
+
+    def __init__(self,
+                 directory: str,
+                 commit_interval: float = 0.05,
+                 snapshot_interval: float = 60.0,
+                 segment_max_bytes: int = 16 * 1024 * 1024,
+                 fsync: bool = True):
+        """
+        Initialize the event log.
+
+        Args:
+            directory: Log directory (created if missing)
+            commit_interval: Seconds pending changes are collected before a
+                group commit
+            snapshot_interval: Minimum seconds between snapshots
+            segment_max_bytes: Size at which a new segment is started
+            fsync: Whether commits and snapshots are flushed to disk
+        """
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.snapshot_interval = snapshot_interval
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        self.last_lsn = 0
+        self.snapshot_lsn = 0
+
+        # Latest pending state per operation (None = removed)
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending_event = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_source: Optional[SnapshotSource] = None
+        self._last_snapshot_time = time.monotonic()
+
+        self._segment = None
+        self._segment_size = 0
+
+        # Statistics
+        self.changes = 0
+        self.records_written = 0
+        self.bytes_written = 0
+        self.commits = 0
+        self.snapshots = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def recover(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the newest snapshot and replay the records after it.
+
+        Returns:
+            Dictionary of operation ID to operation data
+        """
+        operations: Dict[str, Dict[str, Any]] = {}
+
+        snapshots = sorted(glob.glob(os.path.join(self.directory, SNAPSHOT_PREFIX + "*.json")), key=_lsn_of)
+        if snapshots:
+            with open(snapshots[-1], "rb") as f:
+                snapshot = json.loads(f.read())
+            operations = snapshot["operations"]
+            self.snapshot_lsn = self.last_lsn = snapshot["lsn"]
+
+        replayed = 0
+        for path in self._segments():
+            for lsn, operation_id, state in self._read_segment(path):
+                if lsn <= self.snapshot_lsn:
+                    continue
+                if state is None:
+                    operations.pop(operation_id, None)
+                else:
+                    operations[operation_id] = state
+                self.last_lsn = max(self.last_lsn, lsn)
+                replayed += 1
+
+        logger.structured_log(
+            LogLevel.INFO,
+            f"Recovered {len(operations)} operations from the event log",
+            LogCategory.SYSTEM,
+            component="event_log",
+            context={
+                "directory": self.directory,
+                "snapshot_lsn": self.snapshot_lsn,
+                "replayed_records": replayed,
+                "last_lsn": self.last_lsn
+            }
+        )
+        return operations
+
+    def record(self, operation_id: str, operation: Optional[Dict[str, Any]]) -> None:
+        """
+        Record the current state of an operation.
+
+        The state is serialized on the next commit, so only the latest change
+        of an operation between two commits is written.
+
+        Args:
+            operation_id: Operation ID
+            operation: Operation data (kept by reference), or None if the
+                operation was removed
+        """
+        self._pending[operation_id] = operation
+        self.changes += 1
+        self._pending_event.set()
+
+    async def start(self, snapshot_source: SnapshotSource) -> None:
+        """
+        Start the background committer.
+
+        Args:
+            snapshot_source: Function returning all operations for snapshots
+        """
+        self._snapshot_source = snapshot_source
+        self._last_snapshot_time = time.monotonic()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Commit pending changes, write a final snapshot and close the log."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        if self._snapshot_source is not None and self.last_lsn > self.snapshot_lsn:
+            await self.snapshot()
+
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    async def flush(self) -> None:
+        """Commit pending changes now."""
+        async with self._io_lock:
+            await self._commit()
+
+    async def snapshot(self) -> None:
+        """Write a snapshot of all operations and drop the segments it covers."""
+        async with self._io_lock:
+            # Every committed record is at or below this LSN, and the
+            # operations already reflect them (or newer, still pending, changes)
+            lsn = self.last_lsn
+            payload = _dumps({
+                "lsn": lsn,
+                "timestamp": time.time(),
+                "operations": self._snapshot_source()
+            }).encode("utf-8")
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_snapshot, payload, lsn)
+
+            self.snapshot_lsn = lsn
+            self.snapshots += 1
+            self._last_snapshot_time = time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get log statistics.
+
+        Returns:
+            Dictionary with recorded changes, written records and bytes,
+            commits and snapshots
+        """
+        return {
+            "changes": self.changes,
+            "records_written": self.records_written,
+            "bytes_written": self.bytes_written,
+            "commits": self.commits,
+            "snapshots": self.snapshots,
+            "last_lsn": self.last_lsn
+        }
+
+    async def _run(self) -> None:
+        """Commit pending changes in groups and take periodic snapshots."""
+        while True:
+            await self._pending_event.wait()
+            await asyncio.sleep(self.commit_interval)
+
+            try:
+                # Shielded so stopping never interrupts a write half-way
+                await asyncio.shield(self._flush_and_snapshot())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.structured_log(
+                    LogLevel.ERROR,
+                    f"Failed to write event log: {e}",
+                    LogCategory.SYSTEM,
+                    component="event_log",
+                    context={"directory": self.directory, "pending": len(self._pending)},
+                    error=str(e)
+                )
+                await asyncio.sleep(1.0)
+
+    async def _flush_and_snapshot(self) -> None:
+        """Commit pending changes and take a snapshot if one is due."""
+        await self.flush()
+        if time.monotonic() - self._last_snapshot_time >= self.snapshot_interval:
+            await self.snapshot()
+
+    async def _commit(self) -> None:
+        """Write all pending changes with a single write and fsync."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        self._pending_event.clear()
+
+        first_lsn = self.last_lsn + 1
+        lines = []
+        for operation_id, operation in pending.items():
+            self.last_lsn += 1
+            lines.append(_dumps([self.last_lsn, operation_id, operation]))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_segment, payload, first_lsn)
+
+        self.records_written += len(lines)
+        self.bytes_written += len(payload)
+        self.commits += 1
+
+    def _write_segment(self, payload: bytes, first_lsn: int) -> None:
+        """Append records to the active segment, starting a new one if needed."""
+        if self._segment is None or self._segment_size >= self.segment_max_bytes:
+            if self._segment is not None:
+                self._segment.close()
+            path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_lsn:020d}.log")
+            # A segment of this name can only hold a torn record
+            self._segment = open(path, "wb")
+            self._segment_size = 0
+
+        self._segment.write(payload)
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._segment_size += len(payload)
+
+    def _write_snapshot(self, payload: bytes, lsn: int) -> None:
+        """Atomically write a snapshot and remove the files it supersedes."""
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{lsn:020d}.json")
+        temp_path = path + ".tmp"
+
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        # All existing segments only hold records up to the snapshot LSN
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+        for old_path in self._segments():
+            os.remove(old_path)
+        for old_path in glob.glob(os.path.join(self.directory, SNAPSHOT_PREFIX + "*.json")):
+            if old_path != path:
+                os.remove(old_path)
+
+    def _segments(self) -> List[str]:
+        """Get the segment files in LSN order."""
+        return sorted(glob.glob(os.path.join(self.directory, SEGMENT_PREFIX + "*.log")), key=_lsn_of)
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Tuple[int, str, Optional[Dict[str, Any]]]]:
+        """Read the records of a segment, stopping at a torn record."""
+        records = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    lsn, operation_id, state = json.loads(line)
+                except (ValueError, TypeError):
+                    break
+                records.append((lsn, operation_id, state))
+        return records
@@ -0,0 +1,403 @@
+"""
+Per-client send queues for WebSocket fan-out.
+
+Broadcasting by awaiting each client's ``send`` in turn lets one slow client
+stall every other client. Instead, each connection gets a bounded queue of
+pre-serialized payloads drained by a dedicated writer task. Broadcasts encode
+a message once and enqueue the same payload for every recipient without
+waiting on the network.
+
+When a queue is full, its overflow policy decides what happens:
+
+- ``drop_oldest``: the oldest queued message is discarded.
+- ``conflate``: a queued message with the same conflation key (e.g. the
+  progress of one operation) is replaced in place by the newer one; without a
+  match the oldest message is discarded.
+- ``disconnect``: the client is disconnected, so it can reconnect and resync.
+
+Messages queued with ``droppable=False`` (e.g. image frames) are never
+discarded by ``drop_oldest`` or ``conflate``; their producers are expected to
+wait for room with ``wait_for_space`` instead.
+
+With batching enabled, the writer holds queued messages for a short deadline
+(or until a size threshold is reached) and writes everything that accumulated
+as one batch frame, so a burst of events costs one frame and one write
+instead of one per event.
+"""
+
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+import websockets.exceptions
+
+from .codec import BATCH_MESSAGE_TYPE
+from .logging_config import get_logger, LogLevel, LogCategory
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+
+# WebSocket close code used when a client can't keep up ("Try Again Later")
+OVERFLOW_CLOSE_CODE = 1013
+
+# Frames encoded messages as one batch payload
+BatchEncoder = Callable[[List[Union[str, bytes]]], Union[str, bytes]]
+
+
+def _payload_size(payload: Union[str, bytes]) -> int:
+    """Get the size of a payload on the wire (text frames are UTF-8)."""
+    if isinstance(payload, str) and not payload.isascii():
+        return len(payload.encode("utf-8"))
+    return len(payload)
+
+
+class OverflowPolicy(str, Enum):
+    """What to do when a client's send queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    CONFLATE = "conflate"
+    DISCONNECT = "disconnect"
+
+
+class ClientSendQueue:
+    """
+    Bounded send queue with a dedicated writer task for one connection.
+
+    ``put`` never blocks, so enqueueing for thousands of clients costs one
+    append each. With the ``conflate`` policy, messages sharing a conflation
+    key are conflated whenever the older one has not been written yet, not only
+    when the queue is full. This includes messages held for a batch.
+    """
+
+    def __init__(self,
+                 websocket: Any,
+                 max_size: int = 256,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.CONFLATE,
+                 on_sent: Optional[Callable[[Union[str, bytes], Optional[str], int], None]] = None,
+                 on_overflow: Optional[Callable[[OverflowPolicy], None]] = None,
+                 batch_encoder: Optional[BatchEncoder] = None,
+                 batch_delay: float = 0.005,
+                 batch_max_messages: int = 64,
+                 batch_max_bytes: int = 65536):
+        """
+        Initialize the send queue.
+
+        Args:
+            websocket: WebSocket connection to write to
+            max_size: Maximum number of queued messages
+            overflow_policy: Policy applied when the queue is full
+            on_sent: Optional callback called with (payload, message type, message count)
+                after each write; batch frames have the type "batch"
+            on_overflow: Optional callback called with the policy whenever the queue overflows
+            batch_encoder: Optional function framing several payloads as one batch;
+                batching is disabled without it
+            batch_delay: Maximum time in seconds a message is held for a batch
+            batch_max_messages: Number of queued messages that flushes a batch early
+            batch_max_bytes: Queued payload size that flushes a batch early
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        if batch_max_messages < 1 or batch_max_bytes < 1:
+            raise ValueError("batch thresholds must be positive")
+
+        self.websocket = websocket
+        self.max_size = max_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.on_sent = on_sent
+        self.on_overflow = on_overflow
+        self.batch_encoder = batch_encoder
+        self.batch_delay = batch_delay
+        self.batch_max_messages = batch_max_messages
+        self.batch_max_bytes = batch_max_bytes
+
+        # Entries are [payload, message type, conflation key, standalone, droppable]
+        self._queue: Deque[List[Any]] = deque()
+        self._pending_keys: Dict[Hashable, List[Any]] = {}
+        self._queued_bytes = 0
+        self._wakeup = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._space = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._overflowed = False
+
+        # Statistics
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.frames = 0
+
+    def qsize(self) -> int:
+        """
+        Get the number of queued messages.
+
+        Returns:
+            Number of messages waiting to be written
+        """
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the queue stopped accepting messages."""
+        return self._overflowed
+
+    def queued_bytes(self) -> int:
+        """
+        Get the size of the queued messages.
+
+        Returns:
+            Total payload size in bytes
+        """
+        return self._queued_bytes
+
+    async def wait_for_space(self, size: int, max_bytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a message of a given size fits in the queue.
+
+        A message fits when the queue is below ``max_size`` messages and the
+        queued payloads plus the message stay within ``max_bytes`` (an empty
+        queue always takes the message).
+
+        Args:
+            size: Payload size of the message in bytes
+            max_bytes: Byte budget of the queue
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the message fits, False if the queue was closed or
+            stopped, or the timeout expired
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while len(self._queue) >= self.max_size or (self._queue and self._queued_bytes + size > max_bytes):
+            if self._overflowed or self._task is None or self._task.done():
+                return False
+
+            self._space.clear()
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+
+        return not self._overflowed and self._task is not None and not self._task.done()
+
+    def put(self,
+            payload: Union[str, bytes],
+            message_type: Optional[str] = None,
+            conflation_key: Optional[Hashable] = None,
+            standalone: bool = False,
+            droppable: bool = True) -> bool:
+        """
+        Queue a serialized message.
+
+        Args:
+            payload: Serialized message
+            message_type: Optional message type (passed to ``on_sent``)
+            conflation_key: Optional key identifying messages that supersede each other
+            standalone: Always write the payload as its own frame, never in a
+                batch (e.g. binary image frames)
+            droppable: Whether the overflow policy may discard the message;
+                undroppable messages may take the queue past ``max_size``
+
+        Returns:
+            True if the message was queued (or replaced an older one), False
+            if it was rejected
+        """
+        if self._overflowed:
+            return False
+
+        if conflation_key is not None and self.overflow_policy == OverflowPolicy.CONFLATE:
+            pending = self._pending_keys.get(conflation_key)
+            if pending is not None:
+                self._queued_bytes += _payload_size(payload) - _payload_size(pending[0])
+                pending[0] = payload
+                pending[1] = message_type
+                self.conflated += 1
+                return True
+
+        if len(self._queue) >= self.max_size:
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                self._overflowed = True
+                self._clear()
+                self._wakeup.set()
+                self._batch_full.set()
+                self._notify_overflow()
+                return False
+
+            if self._evict():
+                self.dropped += 1
+                self._notify_overflow()
+
+        entry = [payload, message_type, conflation_key, standalone, droppable]
+        self._queue.append(entry)
+        self._queued_bytes += _payload_size(payload)
+        if conflation_key is not None:
+            self._pending_keys[conflation_key] = entry
+
+        self._idle.clear()
+        self._wakeup.set()
+        if len(self._queue) >= self.batch_max_messages or self._queued_bytes >= self.batch_max_bytes:
+            self._batch_full.set()
+        return True
+
+    def _pop(self) -> List[Any]:
+        """Remove and return the oldest queued entry."""
+        entry = self._queue.popleft()
+        self._forget(entry)
+        return entry
+
+    def _evict(self) -> bool:
+        """
+        Discard the oldest droppable entry.
+
+        Returns:
+            True if an entry was discarded
+        """
+        for index, entry in enumerate(self._queue):
+            if entry[4]:
+                del self._queue[index]
+                self._forget(entry)
+                return True
+        return False
+
+    def _forget(self, entry: List[Any]) -> None:
+        """Update the bookkeeping of an entry that left the queue."""
+        self._queued_bytes -= _payload_size(entry[0])
+        key = entry[2]
+        if key is not None and self._pending_keys.get(key) is entry:
+            del self._pending_keys[key]
+        self._space.set()
+
+    def _clear(self) -> None:
+        """Discard all queued entries."""
+        self._queue.clear()
+        self._pending_keys.clear()
+        self._queued_bytes = 0
+        self._space.set()
+
+    def _notify_overflow(self) -> None:
+        """Call the overflow callback."""
+        if self.on_overflow:
+            try:
+                self.on_overflow(self.overflow_policy)
+            except Exception as e:
+                logger.structured_log(
+                    LogLevel.ERROR,
+                    f"Error in send queue overflow callback: {e}",
+                    LogCategory.CONNECTION,
+                    component="fanout",
+                    error=str(e)
+                )
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer task. Queued messages are discarded."""
+        task, self._task = self._task, None
+        self._clear()
+        self._idle.set()
+
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def join(self) -> None:
+        """Wait until all queued messages have been written."""
+        await self._idle.wait()
+
+    async def _run(self) -> None:
+        """Writer task draining the queue."""
+        try:
+            while True:
+                while not self._queue and not self._overflowed:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                if self.batch_encoder is not None:
+                    await self._wait_for_batch()
+
+                if self._overflowed:
+                    await self.websocket.close(code=OVERFLOW_CLOSE_CODE, reason="send queue overflow")
+                    return
+
+                if not self._queue:
+                    continue
+
+                payload, message_type, count = self._next_frame()
+
+                try:
+                    await self.websocket.send(payload)
+                except websockets.exceptions.ConnectionClosed:
+                    return
+                except Exception as e:
+                    logger.structured_log(
+                        LogLevel.ERROR,
+                        f"Error writing queued message: {e}",
+                        LogCategory.CONNECTION,
+                        component="fanout",
+                        context={"message_type": message_type},
+                        error=str(e)
+                    )
+                    continue
+
+                self.sent += count
+                self.frames += 1
+                if self.on_sent:
+                    self.on_sent(payload, message_type, count)
+        finally:
+            self._clear()
+            self._idle.set()
+
+    async def _wait_for_batch(self) -> None:
+        """Hold queued messages until the batch deadline or a size threshold."""
+        if (
+            self.batch_delay <= 0
+            or len(self._queue) >= self.batch_max_messages
+            or self._queued_bytes >= self.batch_max_bytes
+        ):
+            return
+
+        self._batch_full.clear()
+        try:
+            await asyncio.wait_for(self._batch_full.wait(), timeout=self.batch_delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _next_frame(self) -> Tuple[Union[str, bytes], Optional[str], int]:
+        """
+        Dequeue the next frame to write.
+
+        Returns:
+            Tuple of (payload, message type, number of messages in the frame)
+        """
+        entry = self._pop()
+        if self.batch_encoder is None or not self._queue or entry[3]:
+            return entry[0], entry[1], 1
+
+        payloads = [entry[0]]
+        size = _payload_size(entry[0])
+        while self._queue and len(payloads) < self.batch_max_messages and not self._queue[0][3]:
+            size += _payload_size(self._queue[0][0])
+            if size > self.batch_max_bytes:
+                break
+            payloads.append(self._pop()[0])
+
+        if len(payloads) == 1:
+            return entry[0], entry[1], 1
+
+        return self.batch_encoder(payloads), BATCH_MESSAGE_TYPE, len(payloads)
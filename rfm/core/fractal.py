@@ -44,6 +44,8 @@ class LSystem:
             The expanded L-system string
         """
         result = self.axiom
+        # Characters rewritten over all iterations (the throughput unit)
+        items_processed = 0
         
         for i in range(self.depth):
             next_result = ""
@@ -62,7 +64,8 @@ class LSystem:
                         overall_progress * 50,  # 0-50% for generation
                         current_step=f"Generating L-system (iteration {i+1}/{self.depth})",
                         total_steps=self.depth,
-                        current_step_progress=iteration_progress * 100
+                        current_step_progress=iteration_progress * 100,
+                        details={"items_processed": items_processed + chars_processed}
                     )
                     
                     # Check for cancellation
@@ -71,6 +74,7 @@ class LSystem:
                         return result
             
             result = next_result
+            items_processed += total_chars
             logger.debug(f"L-system iteration {i+1}: length {len(result)}")
             
             # Report iteration completion
@@ -79,7 +83,8 @@ class LSystem:
                     (i + 1) / self.depth * 50,  # 0-50% for generation
                     current_step=f"L-system iteration {i+1} complete",
                     total_steps=self.depth,
-                    current_step_progress=100
+                    current_step_progress=100,
+                    details={"items_processed": items_processed}
                 )
                 
         return result
@@ -126,7 +131,8 @@ class LSystem:
                 progress_reporter.report_progress(
                     progress,
                     current_step="Calculating L-system coordinates",
-                    current_step_progress=(i / total_chars) * 100
+                    current_step_progress=(i / total_chars) * 100,
+                    details={"items_processed": i}
                 )
                 
                 # Check for cancellation
@@ -242,6 +248,8 @@ class MandelbrotSet:
         Z = np.zeros_like(C, dtype=complex)
         mask = np.ones_like(C, dtype=bool)
         iterations = np.zeros_like(C, dtype=int)
+        # Point iterations computed so far (the throughput unit)
+        points_iterated = 0
         
         # Report initial progress
         if progress_reporter:
@@ -255,6 +263,7 @@ class MandelbrotSet:
         # Compute the Mandelbrot set
         for i in range(self.max_iter):
             # Update only points that have not escaped
+            points_iterated += np.count_nonzero(mask)
             Z[mask] = Z[mask] ** 2 + C[mask]
             
             # Check which points have escaped
@@ -277,7 +286,8 @@ class MandelbrotSet:
                     details={
                         "remaining_points": int(remaining_points),
                         "escaped_points": int(escaped_points),
-                        "current_iteration": i+1
+                        "current_iteration": i+1,
+                        "items_processed": points_iterated
                     }
                 )
                 
@@ -418,7 +428,8 @@ class CantorDust:
                         current_step_progress=processed_rectangles[0] / total_rectangles[0] * 100,
                         details={
                             "processed_rectangles": processed_rectangles[0],
-                            "total_rectangles": total_rectangles[0]
+                            "total_rectangles": total_rectangles[0],
+                            "items_processed": processed_rectangles[0]
                         }
                     )
                     
@@ -597,6 +608,8 @@ class JuliaSet:
         # Initialize arrays
         mask = np.ones_like(Z, dtype=bool)
         iterations = np.zeros_like(Z, dtype=int)
+        # Point iterations computed so far (the throughput unit)
+        points_iterated = 0
         
         # Report initial progress
         if progress_reporter:
@@ -615,6 +628,7 @@ class JuliaSet:
         # Compute the Julia set
         for i in range(self.max_iter):
             # Update only points that have not escaped
+            points_iterated += np.count_nonzero(mask)
             Z[mask] = Z[mask] ** 2 + C
             
             # Check which points have escaped
@@ -637,7 +651,8 @@ class JuliaSet:
                     details={
                         "remaining_points": int(remaining_points),
                         "escaped_points": int(escaped_points),
-                        "current_iteration": i+1
+                        "current_iteration": i+1,
+                        "items_processed": points_iterated
                     }
                 )
                 
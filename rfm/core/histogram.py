@@ -0,0 +1,318 @@
+"""
+Streaming-quantile histograms for metrics.
+
+Values are counted in log-linear buckets, like an HDR histogram: every power
+of two is split into ``SUB_BUCKETS`` equal buckets, so a quantile is off by
+at most ``1 / SUB_BUCKETS`` of its value (under 1% with the default 128).
+Recording is O(1) and memory is bounded by the number of distinct buckets
+in use, independent of the number of values.
+
+Histograms of different threads or processes merge exactly by adding their
+bucket counts; :class:`HistogramSnapshot` is the serializable form.
+:class:`WindowedHistogram` keeps one histogram per time slice to answer
+quantiles over the last minute, five minutes or hour.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+SUB_BUCKETS = 128
+
+# Windowed views: name -> seconds
+WINDOWS: Dict[str, float] = {"1m": 60.0, "5m": 300.0, "1h": 3600.0}
+
+# Values at or below this count as zero
+_MIN_VALUE = 1e-12
+
+
+def bucket_index(value: float) -> int:
+    """
+    Get the bucket of a value.
+
+    Args:
+        value: Recorded value
+
+    Returns:
+        Bucket index (values at or below zero share the lowest bucket)
+    """
+    if value <= _MIN_VALUE:
+        return -(1 << 30)
+    mantissa, exponent = math.frexp(value)
+    return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def bucket_value(index: int) -> float:
+    """
+    Get the value representing a bucket (its midpoint).
+
+    Args:
+        index: Bucket index
+
+    Returns:
+        Representative value
+    """
+    if index == -(1 << 30):
+        return 0.0
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent)
+
+
+class HistogramSnapshot:
+    """Mergeable bucket counts and summary statistics of recorded values."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self,
+                 counts: Optional[Dict[int, int]] = None,
+                 count: int = 0,
+                 total: float = 0.0,
+                 min: float = math.inf,
+                 max: float = -math.inf):
+        self.counts: Dict[int, int] = counts if counts is not None else {}
+        self.count = count
+        self.total = total
+        self.min = min
+        self.max = max
+
+    def record(self, value: float, count: int = 1) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Value
+            count: Number of occurrences
+        """
+        index = bucket_index(value)
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        """
+        Add another histogram's counts to this one.
+
+        Args:
+            other: Histogram to merge
+
+        Returns:
+            This histogram
+        """
+        counts = self.counts
+        for index, count in other.counts.items():
+            counts[index] = counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def difference(self, earlier: "HistogramSnapshot") -> "HistogramSnapshot":
+        """
+        Get the values recorded since an earlier copy of this histogram.
+
+        The extremes of the difference are this histogram's extremes where
+        they fall into the same bucket, else bucket values.
+
+        Args:
+            earlier: Earlier copy of this histogram
+
+        Returns:
+            New snapshot of the values recorded in between
+        """
+        counts = {}
+        for index, count in self.counts.items():
+            delta = count - earlier.counts.get(index, 0)
+            if delta:
+                counts[index] = delta
+
+        if not counts:
+            return HistogramSnapshot()
+
+        first, last = min(counts), max(counts)
+        lowest = self.min if bucket_index(self.min) == first else bucket_value(first)
+        highest = self.max if bucket_index(self.max) == last else bucket_value(last)
+        return HistogramSnapshot(counts, sum(counts.values()), self.total - earlier.total,
+                                 min(lowest, highest), max(lowest, highest))
+
+    def copy(self) -> "HistogramSnapshot":
+        """Get an independent copy."""
+        return HistogramSnapshot(dict(self.counts), self.count, self.total, self.min, self.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Get a quantile of the recorded values.
+
+        Args:
+            q: Quantile (0.0 to 1.0)
+
+        Returns:
+            Approximate quantile, clamped to the recorded range, or None
+            if nothing was recorded
+        """
+        if not self.count:
+            return None
+        if q <= 0.0:
+            return self.min
+        if q >= 1.0:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen > rank:
+                return min(max(bucket_value(index), self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        """Get the mean of the recorded values, or None if there are none."""
+        return self.total / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Get count, mean, extremes and common percentiles.
+
+        Returns:
+            Dictionary of statistics
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Convert the snapshot to a JSON-compatible dictionary.
+
+        Returns:
+            Dictionary with bucket counts and statistics
+        """
+        return {
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "HistogramSnapshot":
+        """
+        Create a snapshot from :meth:`to_dict` output.
+
+        Args:
+            data: Dictionary form
+
+        Returns:
+            Snapshot
+        """
+        return cls(
+            {int(index): count for index, count in data["counts"].items()},
+            data["count"],
+            data["total"],
+            math.inf if data["min"] is None else data["min"],
+            -math.inf if data["max"] is None else data["max"]
+        )
+
+
+class WindowedHistogram:
+    """
+    Histogram over a sliding time window, kept in fixed time slices.
+
+    Quantiles over a window are computed from the slices it covers, so the
+    window edge is accurate to one slice.
+    """
+
+    def __init__(self, slice_seconds: float = 10.0, retention: float = 3600.0):
+        """
+        Initialize the histogram.
+
+        Args:
+            slice_seconds: Duration of one time slice
+            retention: Longest window that can be queried
+        """
+        self.slice_seconds = slice_seconds
+        self.max_slices = int(math.ceil(retention / slice_seconds))
+        self._slices: Deque[Tuple[int, HistogramSnapshot]] = deque()
+        self.lifetime = HistogramSnapshot()
+
+    def record(self, value: float, now: Optional[float] = None) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Value
+            now: Time of the value (defaults to the current time)
+        """
+        self._current(now).record(value)
+        self.lifetime.record(value)
+
+    def merge(self, snapshot: HistogramSnapshot, now: Optional[float] = None) -> None:
+        """
+        Add a snapshot from another thread or process as values of now.
+
+        Args:
+            snapshot: Histogram to merge
+            now: Time of the values (defaults to the current time)
+        """
+        self._current(now).merge(snapshot)
+        self.lifetime.merge(snapshot)
+
+    def _current(self, now: Optional[float]) -> HistogramSnapshot:
+        """Get the histogram of the current slice, dropping expired ones."""
+        slot = int((time.time() if now is None else now) // self.slice_seconds)
+        slices = self._slices
+
+        if not slices or slices[-1][0] != slot:
+            slices.append((slot, HistogramSnapshot()))
+            while slices[-1][0] - slices[0][0] >= self.max_slices:
+                slices.popleft()
+
+        return slices[-1][1]
+
+    def snapshot(self, window: Optional[float] = None, now: Optional[float] = None) -> HistogramSnapshot:
+        """
+        Get the merged histogram of a window.
+
+        Args:
+            window: Window in seconds (None for all values ever recorded)
+            now: End of the window (defaults to the current time)
+
+        Returns:
+            New snapshot
+        """
+        if window is None:
+            return self.lifetime.copy()
+
+        first = int(((time.time() if now is None else now) - window) // self.slice_seconds) + 1
+        merged = HistogramSnapshot()
+        for slot, histogram in self._slices:
+            if slot >= first:
+                merged.merge(histogram)
+        return merged
+
+    def windows(self, now: Optional[float] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get summaries of the standard windows.
+
+        Args:
+            now: End of the windows (defaults to the current time)
+
+        Returns:
+            Dictionary of window name ("1m", "5m", "1h") to summary
+        """
+        now = time.time() if now is None else now
+        return {name: self.snapshot(seconds, now).summary() for name, seconds in WINDOWS.items()}
@@ -0,0 +1,296 @@
+"""
+Binary image frames for render results.
+
+A frame carries one rectangular tile of an image of an operation: a fixed
+header, the operation ID, padding to an 8-byte boundary and the pixel data.
+Frames start with the magic ``RFMI``, which never begins a codec-encoded
+message, so clients can tell them apart from other binary messages.
+
+Pixels are uint16 iteration counts or uint8 RGBA, either raw (decoded as a
+view of the received message, ready to upload as a texture) or compressed
+with zstd, LZ4 or zlib. zstd and LZ4 need the optional ``zstandard`` and
+``lz4`` packages; zlib is always available.
+
+Header layout (little endian)::
+
+    magic    4s  b"RFMI"
+    version  B
+    dtype    B   DTYPE_* code
+    compr    B   COMPRESSION_* code
+    flags    B   reserved (0)
+    id_len   H   length of the UTF-8 operation ID
+    x, y     I   tile position in the image
+    width    I   tile width
+    height   I   tile height
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4 = None
+    LZ4_AVAILABLE = False
+
+
+FRAME_MAGIC = b"RFMI"
+FRAME_VERSION = 1
+
+_HEADER = struct.Struct("<4sBBBBHIIII")
+
+# Pixel formats: code -> (numpy dtype, channels)
+DTYPE_ITERATIONS = 1
+DTYPE_RGBA = 2
+
+_DTYPES = {
+    DTYPE_ITERATIONS: (np.dtype("<u2"), 1),
+    DTYPE_RGBA: (np.dtype("u1"), 4),
+}
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+COMPRESSIONS: Dict[str, int] = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+    "lz4": COMPRESSION_LZ4,
+}
+
+
+class ImageFrameError(ValueError):
+    """Raised for malformed image frames."""
+
+
+@dataclass
+class ImageFrame:
+    """A decoded image frame."""
+
+    operation_id: str
+    x: int
+    y: int
+    width: int
+    height: int
+    dtype: int
+    compression: int
+    data: np.ndarray
+
+    def blit(self, image: np.ndarray) -> None:
+        """
+        Copy the tile into a whole image (e.g. a texture buffer).
+
+        Args:
+            image: Destination array of the whole image
+        """
+        image[self.y:self.y + self.height, self.x:self.x + self.width] = self.data
+
+
+def available_compressions() -> List[str]:
+    """
+    Get the names of the compressions this installation supports.
+
+    Returns:
+        Compression names, fastest to decode first
+    """
+    names = []
+    if LZ4_AVAILABLE:
+        names.append("lz4")
+    if ZSTD_AVAILABLE:
+        names.append("zstd")
+    return names + ["zlib", "none"]
+
+
+def negotiate_compression(requested: Optional[Union[str, Sequence[str]]]) -> int:
+    """
+    Pick the compression of a client's frames.
+
+    Args:
+        requested: Compression name, or names in order of preference
+
+    Returns:
+        First requested compression that is available, else COMPRESSION_NONE
+
+    Raises:
+        ImageFrameError: If a requested name is unknown
+    """
+    if requested is None:
+        return COMPRESSION_NONE
+
+    names = [requested] if isinstance(requested, str) else list(requested)
+    available = available_compressions()
+
+    for name in names:
+        if name not in COMPRESSIONS:
+            raise ImageFrameError(f"Unknown compression: {name}")
+        if name in available:
+            return COMPRESSIONS[name]
+    return COMPRESSION_NONE
+
+
+def _compress(data: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compression == COMPRESSION_LZ4:
+        return lz4.frame.compress(data)
+    return zlib.compress(data, 1)
+
+
+def _decompress(data: Union[bytes, memoryview], compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ImageFrameError("zstd-compressed frame but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION_LZ4:
+        if not LZ4_AVAILABLE:
+            raise ImageFrameError("LZ4-compressed frame but lz4 is not installed")
+        return lz4.frame.decompress(data)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(data)
+    raise ImageFrameError(f"Unknown compression: {compression}")
+
+
+def is_image_frame(payload: Union[str, bytes]) -> bool:
+    """
+    Check whether a WebSocket message is an image frame.
+
+    Args:
+        payload: Received message
+
+    Returns:
+        True for binary messages starting with the frame magic
+    """
+    return isinstance(payload, (bytes, bytearray, memoryview)) and bytes(payload[:4]) == FRAME_MAGIC
+
+
+def _pixel_format(array: np.ndarray) -> int:
+    """Get the dtype code of an image array."""
+    if array.dtype == np.uint16 and array.ndim == 2:
+        return DTYPE_ITERATIONS
+    if array.dtype == np.uint8 and array.ndim == 3 and array.shape[2] == 4:
+        return DTYPE_RGBA
+    raise ImageFrameError(f"Unsupported image array: {array.dtype} {array.shape}")
+
+
+def encode_image_frame(operation_id: str,
+                       array: np.ndarray,
+                       x: int = 0,
+                       y: int = 0,
+                       compression: int = COMPRESSION_NONE) -> bytes:
+    """
+    Encode an image tile as a binary frame.
+
+    Args:
+        operation_id: Operation the image belongs to
+        array: uint16 iteration counts (height, width) or uint8 RGBA
+            (height, width, 4)
+        x: Tile column in the image
+        y: Tile row in the image
+        compression: COMPRESSION_* code; pixels that don't get smaller are
+            sent raw
+
+    Returns:
+        Frame bytes
+    """
+    dtype = _pixel_format(array)
+    height, width = array.shape[:2]
+    op_id = operation_id.encode("utf-8")
+
+    header_size = _HEADER.size + len(op_id)
+    padding = -header_size % 8
+
+    pixels = np.ascontiguousarray(array, dtype=_DTYPES[dtype][0]).tobytes()
+    if compression != COMPRESSION_NONE:
+        compressed = _compress(pixels, compression)
+        if len(compressed) < len(pixels):
+            pixels = compressed
+        else:
+            compression = COMPRESSION_NONE
+
+    header = _HEADER.pack(FRAME_MAGIC, FRAME_VERSION, dtype, compression, 0,
+                          len(op_id), x, y, width, height)
+
+    return b"".join((header, op_id, b"\0" * padding, pixels))
+
+
+def frame_operation_id(frame: Union[bytes, bytearray, memoryview]) -> str:
+    """
+    Read the operation ID of a frame without decoding its pixels.
+
+    Args:
+        frame: Frame bytes
+
+    Returns:
+        Operation ID
+
+    Raises:
+        ImageFrameError: If the frame is malformed
+    """
+    if len(frame) < _HEADER.size or bytes(frame[:4]) != FRAME_MAGIC:
+        raise ImageFrameError("Not an image frame")
+    id_len = _HEADER.unpack_from(frame)[5]
+    return bytes(frame[_HEADER.size:_HEADER.size + id_len]).decode("utf-8")
+
+
+def decode_image_frame(frame: Union[bytes, bytearray, memoryview]) -> ImageFrame:
+    """
+    Decode a binary image frame.
+
+    Raw pixels are a view of the frame (no copy), read-only for ``bytes``
+    frames; compressed pixels are decompressed once.
+
+    Args:
+        frame: Frame bytes
+
+    Returns:
+        Decoded frame
+
+    Raises:
+        ImageFrameError: If the frame is malformed
+    """
+    if len(frame) < _HEADER.size:
+        raise ImageFrameError("Frame shorter than its header")
+
+    magic, version, dtype, compression, _, id_len, x, y, width, height = _HEADER.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ImageFrameError("Not an image frame")
+    if version != FRAME_VERSION:
+        raise ImageFrameError(f"Unsupported frame version: {version}")
+    if dtype not in _DTYPES:
+        raise ImageFrameError(f"Unknown pixel format: {dtype}")
+    offset = _HEADER.size + id_len
+    operation_id = bytes(frame[_HEADER.size:offset]).decode("utf-8")
+    offset += -offset % 8
+
+    if compression != COMPRESSION_NONE:
+        try:
+            frame = _decompress(memoryview(frame)[offset:], compression)
+        except ImageFrameError:
+            raise
+        except Exception as e:
+            raise ImageFrameError(f"Corrupt compressed frame: {e}") from e
+        offset = 0
+
+    np_dtype, channels = _DTYPES[dtype]
+    expected = width * height * channels * np_dtype.itemsize
+    if len(frame) - offset != expected:
+        raise ImageFrameError(f"Frame payload has {len(frame) - offset} bytes, expected {expected}")
+
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    data = np.frombuffer(frame, dtype=np_dtype, offset=offset).reshape(shape)
+
+    return ImageFrame(operation_id, x, y, width, height, dtype, compression, data)
@@ -320,6 +320,10 @@ def get_logger(name: str) -> StructuredLogger:
     Returns:
         StructuredLogger instance
     """
+    # Module-level loggers are created at import time, before configure_logging()
+    # registers the logger class, so make sure they support structured_log()
+    if not issubclass(logging.getLoggerClass(), StructuredLogger):
+        logging.setLoggerClass(StructuredLogger)
     return logging.getLogger(name)
 
 
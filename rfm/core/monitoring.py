@@ -12,6 +12,7 @@ import threading
 import asyncio
 import json
 import psutil
+import numpy as np
 import logging
 from typing import Dict, Any, List, Optional, Set, Union, Tuple
 from dataclasses import dataclass, field
@@ -21,6 +22,9 @@ import socket
 import uuid
 
 from .logging_config import get_logger, log_timing, LogCategory, LogLevel, TimingContext
+from .histogram import HistogramSnapshot, WindowedHistogram
+from .timeseries import TimeSeries
+from .sharded_metrics import ShardedCounter, ShardedHistogram
 
 
 # Get logger
@@ -36,14 +40,6 @@ class MetricType(str, Enum):
     TIMER = "timer"           # Duration measurements (e.g., message processing time)
 
 
-@dataclass
-class MetricValue:
-    """Value for a metric with timestamp."""
-    
-    value: Union[int, float]
-    timestamp: float = field(default_factory=time.time)
-
-
 @dataclass
 class Metric:
     """Metric definition and current value."""
@@ -53,16 +49,22 @@ class Metric:
     description: str
     unit: str
     value: Any = None
-    values: List[MetricValue] = field(default_factory=list)
     tags: Dict[str, str] = field(default_factory=dict)
     max_history: int = 100  # Maximum number of historical values to keep
+    history: Optional[TimeSeries] = field(default=None, repr=False)
+    histogram: Optional[WindowedHistogram] = field(default=None, repr=False)
     
     def __post_init__(self):
         """Initialize metric based on type."""
         if self.type == MetricType.COUNTER:
             self.value = 0
-        elif self.type == MetricType.HISTOGRAM:
-            self.values = []
+        
+        if self.history is None:
+            self.history = TimeSeries(self.max_history)
+        
+        # Distributions keep every value in a bounded streaming histogram
+        if self.type in (MetricType.HISTOGRAM, MetricType.TIMER) and self.histogram is None:
+            self.histogram = WindowedHistogram()
             
     def update(self, value: Union[int, float]) -> None:
         """
@@ -76,12 +78,11 @@ class Metric:
         elif self.type == MetricType.GAUGE:
             self.value = value
         
-        # Add to history
-        self.values.append(MetricValue(value))
+        if self.histogram is not None:
+            self.histogram.record(value)
         
-        # Trim history if needed
-        if len(self.values) > self.max_history:
-            self.values = self.values[-self.max_history:]
+        # Add to history (replaces the oldest value when full)
+        self.history.append(value)
             
     def get_current_value(self) -> Union[int, float, None]:
         """
@@ -92,49 +93,107 @@ class Metric:
         """
         if self.type in (MetricType.COUNTER, MetricType.GAUGE):
             return self.value
-        elif self.type == MetricType.HISTOGRAM and self.values:
-            # Return average of recent values
-            return sum(v.value for v in self.values[-10:]) / min(10, len(self.values))
-        elif self.type == MetricType.TIMER and self.values:
+        elif self.type in (MetricType.HISTOGRAM, MetricType.TIMER) and len(self.history):
             # Return average of recent values
-            return sum(v.value for v in self.values[-10:]) / min(10, len(self.values))
+            return float(self.history.latest(10).mean())
         return None
     
-    def get_history(self) -> List[Tuple[float, Union[int, float]]]:
+    def get_history(self, window: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Get historical values with timestamps.
         
+        The arrays are read-only views of the metric's buffers, valid until
+        the next update.
+        
+        Args:
+            window: Only include values of the last this many seconds
+                (None for the whole history)
+        
         Returns:
-            List of (timestamp, value) tuples
+            Tuple of (timestamps, values) arrays, oldest first
         """
-        return [(v.timestamp, v.value) for v in self.values]
+        return self.history.arrays(window)
+    
+    def get_aggregate(self, window: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Get count, sum, mean, min, max and rate of the recent values.
+        
+        Args:
+            window: Only include values of the last this many seconds
+                (None for the whole history)
+        
+        Returns:
+            Dictionary of statistics (see TimeSeries.aggregate)
+        """
+        return self.history.aggregate(window)
         
-    def get_percentile(self, percentile: float) -> Optional[float]:
+    def get_percentile(self, percentile: float, window: Optional[float] = None) -> Optional[float]:
         """
-        Get a percentile value from the metric history.
+        Get a percentile value of the metric.
+        
+        Histograms and timers answer from their streaming histogram, covering
+        every recorded value; other metrics from the recent history.
         
         Args:
             percentile: Percentile to calculate (0.0 to 1.0)
+            window: Only consider values of the last this many seconds
+                (histograms and timers only; None for all values)
             
         Returns:
             Percentile value, or None if no values
         """
-        if not self.values:
+        if self.histogram is not None:
+            return self.histogram.snapshot(window).quantile(percentile)
+        
+        if not len(self.history):
             return None
             
         # Sort values
-        sorted_values = sorted(v.value for v in self.values)
+        sorted_values = np.sort(self.history.arrays()[1])
         
         # Calculate percentile index
         index = int(percentile * len(sorted_values))
         
         # Handle edge cases
         if index >= len(sorted_values):
-            return sorted_values[-1]
+            return float(sorted_values[-1])
         if index < 0:
-            return sorted_values[0]
+            return float(sorted_values[0])
             
-        return sorted_values[index]
+        return float(sorted_values[index])
+    
+    def get_snapshot(self, window: Optional[float] = None) -> Optional[HistogramSnapshot]:
+        """
+        Get a mergeable snapshot of the metric's distribution.
+        
+        Args:
+            window: Only include values of the last this many seconds
+                (None for all values)
+            
+        Returns:
+            Histogram snapshot, or None for counters and gauges
+        """
+        if self.histogram is None:
+            return None
+        return self.histogram.snapshot(window)
+    
+    def merge_snapshot(self, snapshot: HistogramSnapshot) -> None:
+        """
+        Add the values of a snapshot from another thread or process.
+        
+        Args:
+            snapshot: Histogram snapshot
+            
+        Raises:
+            ValueError: If the metric is not a histogram or timer
+        """
+        if self.histogram is None:
+            raise ValueError(f"Metric {self.name} of type {self.type.value} has no distribution")
+        self.histogram.merge(snapshot)
+        
+        # The batch enters the history as its mean
+        if snapshot.count:
+            self.history.append(snapshot.mean())
         
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -143,7 +202,7 @@ class Metric:
         Returns:
             Dictionary representation of the metric
         """
-        return {
+        result = {
             "name": self.name,
             "type": self.type,
             "description": self.description,
@@ -157,6 +216,13 @@ class Metric:
                 "p99": self.get_percentile(0.99)
             } if self.type in (MetricType.HISTOGRAM, MetricType.TIMER) else None
         }
+        
+        result["last_minute"] = self.get_aggregate(60.0)
+        
+        if self.histogram is not None:
+            result["windows"] = self.histogram.windows()
+            
+        return result
 
 
 class HealthStatus(str, Enum):
@@ -208,6 +274,12 @@ class MetricsRegistry:
         self.lock = threading.RLock()
         self.host = socket.gethostname()
         
+        # Lock-free recorders, folded into their metrics when read
+        self._sharded_counters: Dict[str, ShardedCounter] = {}
+        self._sharded_histograms: Dict[str, ShardedHistogram] = {}
+        self._flushed_counts: Dict[str, float] = {}
+        self._flushed_histograms: Dict[str, HistogramSnapshot] = {}
+        
         # System metrics collector
         self._system_metrics_interval = 10.0  # seconds
         self._stop_system_metrics = False
@@ -415,6 +487,10 @@ class MetricsRegistry:
                     thread_count = threading.active_count()
                     self.update_metric("system.threads.count", thread_count)
                     
+                    # Keep the windows of sharded metrics current
+                    with self.lock:
+                        self._flush_sharded()
+                    
                 except Exception as e:
                     logger.structured_log(
                         LogLevel.ERROR,
@@ -494,6 +570,111 @@ class MetricsRegistry:
                 
             metric = self.metrics[name]
             metric.update(value)
+    
+    def get_sharded_counter(self, name: str) -> ShardedCounter:
+        """
+        Get a lock-free recorder for a counter metric.
+        
+        Adding to the recorder costs an attribute update and takes no lock;
+        the additions reach the metric when metrics are read or exported.
+        
+        Args:
+            name: Counter metric name
+            
+        Returns:
+            Sharded counter of the metric
+            
+        Raises:
+            ValueError: If the metric does not exist or is not a counter
+        """
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None or metric.type != MetricType.COUNTER:
+                raise ValueError(f"Counter metric '{name}' not registered")
+                
+            if name not in self._sharded_counters:
+                self._sharded_counters[name] = ShardedCounter()
+                self._flushed_counts[name] = 0
+            return self._sharded_counters[name]
+    
+    def get_sharded_histogram(self, name: str) -> ShardedHistogram:
+        """
+        Get a lock-free recorder for a histogram or timer metric.
+        
+        Recorded values reach the metric, in one batch per thread, when
+        metrics are read or exported, and at every system metrics collection.
+        
+        Args:
+            name: Histogram or timer metric name
+            
+        Returns:
+            Sharded histogram of the metric
+            
+        Raises:
+            ValueError: If the metric does not exist or has no distribution
+        """
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None or metric.histogram is None:
+                raise ValueError(f"Histogram metric '{name}' not registered")
+                
+            if name not in self._sharded_histograms:
+                self._sharded_histograms[name] = ShardedHistogram()
+                self._flushed_histograms[name] = HistogramSnapshot()
+            return self._sharded_histograms[name]
+    
+    def _flush_sharded(self) -> None:
+        """Fold what sharded recorders recorded since the last flush into their metrics."""
+        for name, counter in self._sharded_counters.items():
+            total = counter.value
+            if total != self._flushed_counts[name]:
+                self.metrics[name].update(total - self._flushed_counts[name])
+                self._flushed_counts[name] = total
+                
+        for name, histogram in self._sharded_histograms.items():
+            current = histogram.snapshot()
+            recorded = current.difference(self._flushed_histograms[name])
+            if recorded.count:
+                self.metrics[name].merge_snapshot(recorded)
+                self._flushed_histograms[name] = current
+    
+    def get_histogram_snapshots(self, window: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Export the distributions of all histograms and timers.
+        
+        The result is JSON-compatible, so it can be sent to another process
+        and combined there with merge_histogram_snapshots().
+        
+        Args:
+            window: Only include values of the last this many seconds
+                (None for all values)
+            
+        Returns:
+            Dictionary of metric name to snapshot dictionary
+        """
+        with self.lock:
+            self._flush_sharded()
+            return {
+                name: metric.get_snapshot(window).to_dict()
+                for name, metric in self.metrics.items()
+                if metric.histogram is not None
+            }
+    
+    def merge_histogram_snapshots(self, snapshots: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Add distributions exported by another registry.
+        
+        Args:
+            snapshots: Output of get_histogram_snapshots()
+            
+        Raises:
+            ValueError: If a metric does not exist or has no distribution
+        """
+        with self.lock:
+            for name, data in snapshots.items():
+                if name not in self.metrics:
+                    raise ValueError(f"Metric '{name}' not registered")
+                self.metrics[name].merge_snapshot(HistogramSnapshot.from_dict(data))
         
     def get_metric(self, name: str) -> Optional[Metric]:
         """
@@ -506,6 +687,7 @@ class MetricsRegistry:
             Metric if found, None otherwise
         """
         with self.lock:
+            self._flush_sharded()
             return self.metrics.get(name)
         
     def get_metrics(self) -> Dict[str, Metric]:
@@ -516,6 +698,7 @@ class MetricsRegistry:
             Dictionary of metric name to metric
         """
         with self.lock:
+            self._flush_sharded()
             return self.metrics.copy()
         
     def get_metrics_report(self) -> Dict[str, Any]:
@@ -526,6 +709,7 @@ class MetricsRegistry:
             Dictionary with metric data
         """
         with self.lock:
+            self._flush_sharded()
             return {
                 "timestamp": time.time(),
                 "application": self.application_name,
@@ -630,6 +814,11 @@ class ConnectionMonitor:
         self._stop_monitor = False
         self._monitor_task = None
         
+        # Lock-free per-message metrics
+        self._messages_received = self.metrics_registry.get_sharded_counter("websocket.messages.received")
+        self._messages_sent = self.metrics_registry.get_sharded_counter("websocket.messages.sent")
+        self._message_sizes = self.metrics_registry.get_sharded_histogram("websocket.messages.size")
+        
         # Generate monitor ID
         self.monitor_id = str(uuid.uuid4())
         
@@ -808,49 +997,51 @@ class ConnectionMonitor:
         """
         Register a received message.
         
+        Takes no lock: the connection's counters are only updated by the
+        connection's own handler, and the metrics are sharded per thread.
+        
         Args:
             connection_id: Connection ID
             message: Message content
             message_type: Optional message type
         """
-        with self.lock:
-            if connection_id not in self.active_connections:
-                logger.structured_log(
-                    LogLevel.WARNING,
-                    f"Message received on unknown connection: {connection_id}",
-                    LogCategory.CONNECTION,
-                    component="connection_monitor",
-                    context={"monitor_id": self.monitor_id}
-                )
-                return
-                
-            # Update connection info
-            connection_info = self.active_connections[connection_id]
-            connection_info["last_activity_time"] = time.time()
-            connection_info["messages_received"] += 1
-            
-            # Calculate message size
-            size = len(message) if isinstance(message, (str, bytes)) else 0
-            connection_info["bytes_received"] += size
-            
-            # Update metrics
-            self.metrics_registry.update_metric("websocket.messages.received", 1)
-            self.metrics_registry.update_metric("websocket.messages.size", size)
+        connection_info = self.active_connections.get(connection_id)
+        if connection_info is None:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Message received on unknown connection: {connection_id}",
+                LogCategory.CONNECTION,
+                component="connection_monitor",
+                context={"monitor_id": self.monitor_id}
+            )
+            return
             
-            # Log high rate or large messages
-            if size > 10000:  # Log large messages (>10KB)
-                logger.structured_log(
-                    LogLevel.DEBUG,
-                    f"Large message received on connection {connection_id}",
-                    LogCategory.CONNECTION,
-                    component="connection_monitor",
-                    context={
-                        "connection_id": connection_id,
-                        "message_size": size,
-                        "message_type": message_type,
-                        "monitor_id": self.monitor_id
-                    }
-                )
+        # Update connection info
+        connection_info["last_activity_time"] = time.time()
+        connection_info["messages_received"] += 1
+        
+        # Calculate message size
+        size = len(message) if isinstance(message, (str, bytes)) else 0
+        connection_info["bytes_received"] += size
+        
+        # Update metrics
+        self._messages_received.add(1)
+        self._message_sizes.record(size)
+        
+        # Log high rate or large messages
+        if size > 10000:  # Log large messages (>10KB)
+            logger.structured_log(
+                LogLevel.DEBUG,
+                f"Large message received on connection {connection_id}",
+                LogCategory.CONNECTION,
+                component="connection_monitor",
+                context={
+                    "connection_id": connection_id,
+                    "message_size": size,
+                    "message_type": message_type,
+                    "monitor_id": self.monitor_id
+                }
+            )
         
     def message_sent(self, 
                    connection_id: str, 
@@ -859,48 +1050,49 @@ class ConnectionMonitor:
         """
         Register a sent message.
         
+        Takes no lock, like message_received().
+        
         Args:
             connection_id: Connection ID
             message: Message content
             message_type: Optional message type
         """
-        with self.lock:
-            if connection_id not in self.active_connections:
-                logger.structured_log(
-                    LogLevel.WARNING,
-                    f"Message sent on unknown connection: {connection_id}",
-                    LogCategory.CONNECTION,
-                    component="connection_monitor",
-                    context={"monitor_id": self.monitor_id}
-                )
-                return
-                
-            # Update connection info
-            connection_info = self.active_connections[connection_id]
-            connection_info["last_activity_time"] = time.time()
-            connection_info["messages_sent"] += 1
-            
-            # Calculate message size
-            size = len(message) if isinstance(message, (str, bytes)) else 0
-            connection_info["bytes_sent"] += size
-            
-            # Update metrics
-            self.metrics_registry.update_metric("websocket.messages.sent", 1)
+        connection_info = self.active_connections.get(connection_id)
+        if connection_info is None:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Message sent on unknown connection: {connection_id}",
+                LogCategory.CONNECTION,
+                component="connection_monitor",
+                context={"monitor_id": self.monitor_id}
+            )
+            return
             
-            # Log high rate or large messages
-            if size > 10000:  # Log large messages (>10KB)
-                logger.structured_log(
-                    LogLevel.DEBUG,
-                    f"Large message sent on connection {connection_id}",
-                    LogCategory.CONNECTION,
-                    component="connection_monitor",
-                    context={
-                        "connection_id": connection_id,
-                        "message_size": size,
-                        "message_type": message_type,
-                        "monitor_id": self.monitor_id
-                    }
-                )
+        # Update connection info
+        connection_info["last_activity_time"] = time.time()
+        connection_info["messages_sent"] += 1
+        
+        # Calculate message size
+        size = len(message) if isinstance(message, (str, bytes)) else 0
+        connection_info["bytes_sent"] += size
+        
+        # Update metrics
+        self._messages_sent.add(1)
+        
+        # Log high rate or large messages
+        if size > 10000:  # Log large messages (>10KB)
+            logger.structured_log(
+                LogLevel.DEBUG,
+                f"Large message sent on connection {connection_id}",
+                LogCategory.CONNECTION,
+                component="connection_monitor",
+                context={
+                    "connection_id": connection_id,
+                    "message_size": size,
+                    "message_type": message_type,
+                    "monitor_id": self.monitor_id
+                }
+            )
         
     async def _monitor_connections(self) -> None:
         """Monitor connections for timeouts and health."""
@@ -0,0 +1,187 @@
+"""
+Multi-worker mode for the progress server.
+
+A supervisor process runs the event broker and starts one server process per
+worker. All workers bind the same host and port with SO_REUSEPORT, so the
+kernel spreads incoming connections across them, and share operation events
+through the broker (see :mod:`rfm.core.event_bus`). Rate limits are shared
+through a shared-memory table (see :mod:`rfm.core.rate_limit_store`), so a
+limit applies to all workers together rather than to each one; shared limits
+use the GCRA, so workers switch the global rate limiter to it.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from .logging_config import get_logger, LogLevel, LogCategory
+from .event_bus import UnixSocketEventBroker, UnixSocketEventBus
+from .rate_limit_store import SharedRateLimitTable, SharedMemoryRateLimitStore
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+
+def default_broker_path(port: int) -> str:
+    """
+    Get the default broker socket path for a server port.
+
+    Args:
+        port: Server port
+
+    Returns:
+        Socket path in the temporary directory
+    """
+    return os.path.join(tempfile.gettempdir(), f"rfm-progress-{port}.sock")
+
+
+def check_multi_worker_support() -> None:
+    """
+    Check that the platform supports multi-worker mode.
+
+    Raises:
+        RuntimeError: If SO_REUSEPORT or Unix-domain sockets are unavailable
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("Multi-worker mode requires SO_REUSEPORT")
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Multi-worker mode requires Unix-domain sockets")
+
+
+async def _wait_for_signal(signals=(signal.SIGINT, signal.SIGTERM)) -> None:
+    """Wait until one of the given signals is received."""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in signals:
+        loop.add_signal_handler(sig, stop_event.set)
+    await stop_event.wait()
+
+
+async def _run_worker(worker_index: int,
+                      broker_path: str,
+                      rate_limit_table: str,
+                      server_config: Dict[str, Any]) -> None:
+    """Run one server worker until it is told to stop."""
+    # Import here so the supervisor doesn't set up server logging and metrics
+    from .websocket_server_enhanced import ProgressServer
+    from .rate_limiting import RateLimitAlgorithm, RateLimiter, get_rate_limiter, set_rate_limiter
+
+    rate_limiter = get_rate_limiter()
+    if rate_limiter.algorithm != RateLimitAlgorithm.GCRA:
+        rate_limiter = RateLimiter(rate_limiter.rules, algorithm=RateLimitAlgorithm.GCRA)
+        set_rate_limiter(rate_limiter)
+    rate_limiter.set_store(SharedMemoryRateLimitStore(rate_limit_table, worker_index))
+    await rate_limiter.start_sync()
+
+    # Each worker keeps its own event log (every worker sees all events)
+    server_config = dict(server_config)
+    server_config["event_log_dir"] = os.path.join(server_config.get("event_log_dir", "events"), f"worker-{worker_index}")
+
+    server = ProgressServer(
+        event_bus=UnixSocketEventBus(broker_path, worker_id=f"worker-{worker_index}-{os.getpid()}"),
+        reuse_port=True,
+        **server_config
+    )
+    await server.start()
+
+    try:
+        await _wait_for_signal()
+    finally:
+        await server.stop()
+        await rate_limiter.stop_sync()
+
+
+def _worker_main(worker_index: int,
+                 broker_path: str,
+                 rate_limit_table: str,
+                 server_config: Dict[str, Any]) -> None:
+    """Process entry point of a worker."""
+    asyncio.run(_run_worker(worker_index, broker_path, rate_limit_table, server_config))
+
+
+async def _supervise(workers: int,
+                     broker_path: str,
+                     server_config: Dict[str, Any],
+                     max_operations: int) -> int:
+    """Run the broker and the worker processes."""
+    broker = UnixSocketEventBroker(broker_path, max_operations=max_operations)
+    await broker.start()
+    rate_limit_table = SharedRateLimitTable.create(lanes=workers)
+
+    context = multiprocessing.get_context("spawn")
+    processes: List[multiprocessing.Process] = []
+    for worker_index in range(workers):
+        process = context.Process(
+            target=_worker_main,
+            args=(worker_index, broker_path, rate_limit_table.name, server_config),
+            name=f"rfm-progress-worker-{worker_index}",
+            daemon=False
+        )
+        process.start()
+        processes.append(process)
+
+    logger.structured_log(
+        LogLevel.INFO,
+        f"Started {workers} progress server workers on port {server_config.get('port')}",
+        LogCategory.SYSTEM,
+        component="multi_worker",
+        context={"workers": workers, "broker_path": broker_path, "pids": [p.pid for p in processes]}
+    )
+
+    loop = asyncio.get_running_loop()
+    stop_task = loop.create_task(_wait_for_signal())
+    exit_tasks = [loop.run_in_executor(None, process.join) for process in processes]
+
+    # Run until a signal arrives or any worker exits
+    await asyncio.wait([stop_task, *exit_tasks], return_when=asyncio.FIRST_COMPLETED)
+    stop_task.cancel()
+
+    failed = [process.name for process in processes if process.exitcode not in (None, 0)]
+    if failed:
+        logger.structured_log(
+            LogLevel.ERROR,
+            f"Worker exited unexpectedly: {', '.join(failed)}",
+            LogCategory.SYSTEM,
+            component="multi_worker"
+        )
+
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    await asyncio.gather(*exit_tasks)
+
+    await broker.stop()
+    rate_limit_table.close()
+    return 1 if failed else 0
+
+
+def run_multi_worker_server(workers: Optional[int] = None,
+                            broker_path: Optional[str] = None,
+                            max_operations: int = 10000,
+                            **server_config: Any) -> int:
+    """
+    Run the progress server with several worker processes.
+
+    Blocks until SIGINT or SIGTERM is received or a worker exits.
+
+    Args:
+        workers: Number of worker processes (defaults to the CPU count)
+        broker_path: Event broker socket path (defaults to a path derived from the port)
+        max_operations: Maximum number of operations in the shared registry
+        **server_config: Keyword arguments for each worker's ProgressServer
+
+    Returns:
+        Exit code (0 on a clean shutdown)
+    """
+    check_multi_worker_support()
+
+    workers = workers or os.cpu_count() or 1
+    port = server_config.setdefault("port", 8765)
+    broker_path = broker_path or default_broker_path(port)
+
+    return asyncio.run(_supervise(workers, broker_path, server_config, max_operations))
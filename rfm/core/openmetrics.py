@@ -0,0 +1,194 @@
+"""
+OpenMetrics exposition of a metrics registry.
+
+Counters, gauges, histograms and timers of a
+:class:`~rfm.core.monitoring.MetricsRegistry` are encoded in the OpenMetrics
+text format for Prometheus scrapes. Metric names replace dots with
+underscores (``websocket.connections.active`` becomes
+``websocket_connections_active``), counter samples end in ``_total`` and
+tags become labels. Histograms and
+timers are exported with fixed ``le`` buckets, so series of different
+server processes can be aggregated.
+
+Encoding is cached: each metric family is only encoded again when its value
+changed, and a whole scrape is reused for ``max_age`` seconds.
+"""
+
+import math
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .histogram import HistogramSnapshot, bucket_index
+from .monitoring import Metric, MetricsRegistry, MetricType
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Upper bounds of the exported histogram buckets: 1-2-5 steps from 1e-3 to 1e7
+DEFAULT_BUCKETS: Tuple[float, ...] = tuple(
+    mantissa * 10.0 ** exponent for exponent in range(-3, 7) for mantissa in (1, 2, 5)
+) + (1e7,)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def metric_name(name: str) -> str:
+    """
+    Convert a registry metric name to an OpenMetrics name.
+
+    Args:
+        name: Registry metric name
+
+    Returns:
+        Name with invalid characters replaced by underscores
+    """
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    return "_" + name if name[:1].isdigit() else name
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: str = "") -> str:
+    parts = [f'{metric_name(key)}="{_escape(str(value))}"' for key, value in sorted(labels.items())]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def encode_histogram_buckets(snapshot: HistogramSnapshot, bounds: Sequence[float]) -> List[int]:
+    """
+    Get the cumulative counts of a histogram at fixed upper bounds.
+
+    Each count includes the whole histogram bucket holding its bound, so it
+    is accurate to the histogram's bucket resolution.
+
+    Args:
+        snapshot: Histogram
+        bounds: Ascending upper bounds
+
+    Returns:
+        Cumulative count at each bound
+    """
+    counts = []
+    seen = 0
+    indices = sorted(snapshot.counts)
+    position = 0
+
+    for bound in bounds:
+        last = bucket_index(bound)
+        while position < len(indices) and indices[position] <= last:
+            seen += snapshot.counts[indices[position]]
+            position += 1
+        counts.append(seen)
+
+    return counts
+
+
+class OpenMetricsExporter:
+    """Encodes a metrics registry as OpenMetrics text, with cached encoding."""
+
+    def __init__(self,
+                 registry: MetricsRegistry,
+                 max_age: float = 0.5,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the exporter.
+
+        Args:
+            registry: Metrics registry to export
+            max_age: Seconds a rendered scrape is served again unchanged
+            buckets: Upper bounds of the exported histogram buckets
+        """
+        self.registry = registry
+        self.max_age = max_age
+        self.buckets = tuple(buckets)
+
+        # name -> (state, encoded family)
+        self._families: Dict[str, Tuple[Any, str]] = {}
+        self._body: Optional[bytes] = None
+        self._rendered_at = 0.0
+
+        self.renders = 0
+        self.families_encoded = 0
+
+    def render(self, now: Optional[float] = None) -> bytes:
+        """
+        Get the OpenMetrics text of the registry.
+
+        Args:
+            now: Current time (defaults to the current time)
+
+        Returns:
+            UTF-8 encoded exposition, ending with ``# EOF``
+        """
+        now = time.time() if now is None else now
+        if self._body is not None and now - self._rendered_at < self.max_age:
+            return self._body
+
+        metrics = self.registry.get_metrics()
+        families = {}
+
+        with self.registry.lock:
+            changed = []
+            for name, metric in sorted(metrics.items()):
+                state = self._state(metric)
+                cached = self._families.get(name)
+                if cached is not None and cached[0] == state:
+                    families[name] = cached
+                else:
+                    changed.append((name, metric, state, metric.value, metric.get_snapshot()))
+
+        for name, metric, state, value, snapshot in changed:
+            families[name] = (state, self._encode(metric, value, snapshot))
+            self.families_encoded += 1
+
+        self._families = families
+        self._body = ("".join(family for _, family in families.values()) + "# EOF\n").encode("utf-8")
+        self._rendered_at = now
+        self.renders += 1
+        return self._body
+
+    def _state(self, metric: Metric) -> Any:
+        """Get what the encoding of a metric depends on."""
+        labels = tuple(sorted(metric.tags.items()))
+        if metric.histogram is not None:
+            lifetime = metric.histogram.lifetime
+            return (labels, lifetime.count, lifetime.total)
+        return (labels, metric.value)
+
+    def _encode(self, metric: Metric, value: Any, snapshot: Optional[HistogramSnapshot]) -> str:
+        """Encode the family of one metric."""
+        name = metric_name(metric.name)
+        labels = metric.tags
+
+        if metric.type == MetricType.COUNTER:
+            kind = "counter"
+            if name.endswith("_total"):
+                name = name[:-len("_total")]
+            samples = [f"{name}_total{_format_labels(labels)} {_format_value(value)}\n"]
+        elif snapshot is not None:
+            kind = "histogram"
+            bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+            bucket_labels = [_format_labels(labels, 'le="%s"' % bound) for bound in bounds]
+            counts = encode_histogram_buckets(snapshot, self.buckets) + [snapshot.count]
+            samples = [f"{name}_bucket{label} {count}\n" for label, count in zip(bucket_labels, counts)]
+            samples.append(f"{name}_count{_format_labels(labels)} {snapshot.count}\n")
+            samples.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot.total)}\n")
+        else:
+            kind = "gauge"
+            samples = [] if value is None else [f"{name}{_format_labels(labels)} {_format_value(value)}\n"]
+
+        header = f"# TYPE {name} {kind}\n# HELP {name} {_escape(metric.description)}\n"
+        return header + "".join(samples)
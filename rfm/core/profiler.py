@@ -0,0 +1,359 @@
+"""
+Sampling profiler with folded-stack output.
+
+A :class:`SamplingProfiler` samples the Python stacks of all threads from a
+background thread at a fixed interval and counts identical stacks. The
+result is in the "folded" format of flame graph tools (``flamegraph.pl``,
+speedscope, inferno): one line per stack, frames from the root to the leaf
+separated by ``;``, followed by the number of samples.
+
+Work can be tagged, e.g. with the ``operation_id`` and render parameters of
+the job a thread is running. Tags become the root frames of the thread's
+samples (``operation_id=...;kind=mandelbrot;...``), so a flame graph groups
+the samples by job and :meth:`SamplingProfiler.folded` can select the
+samples of one operation.
+
+Profiling is opt-in: nothing is sampled until :meth:`SamplingProfiler.start`
+is called, and tagging costs a dictionary update when it is off. Work in
+other processes is profiled with :func:`profile_call`, whose samples are
+returned to the caller and added with :meth:`SamplingProfiler.add_samples`.
+"""
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from .logging_config import get_logger, LogCategory, LogLevel
+
+# Get logger
+logger = get_logger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+
+# Render parameters that tag profiler samples
+RENDER_TAGS = ("width", "height", "zoom", "max_iter")
+
+
+def format_tags(tags: Dict[str, Any]) -> str:
+    """
+    Format tags as folded-stack root frames.
+
+    Args:
+        tags: Tag names and values, outermost first
+
+    Returns:
+        Frames like ``operation_id=abc;kind=mandelbrot``
+    """
+    return ";".join(
+        f"{key}={value}".replace(";", ",").replace(" ", "_").replace("\n", "_")
+        for key, value in tags.items() if value is not None
+    )
+
+
+def parse_folded(text: str) -> Dict[str, int]:
+    """
+    Parse folded-stack text.
+
+    Args:
+        text: ``frames count`` lines, as returned by SamplingProfiler.folded()
+
+    Returns:
+        Folded stack -> number of samples
+    """
+    stacks: Dict[str, int] = {}
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] = stacks.get(stack, 0) + int(count)
+    return stacks
+
+
+class SamplingProfiler:
+    """Samples thread stacks in the background and aggregates folded stacks."""
+
+    def __init__(self,
+                 interval: float = DEFAULT_INTERVAL,
+                 max_stacks: int = 20000,
+                 max_depth: int = 128,
+                 threads: Optional[Set[int]] = None,
+                 thread_names: bool = True):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            max_stacks: Maximum number of distinct stacks kept; samples of
+                further stacks are counted as dropped
+            max_depth: Frames kept per stack, counted from the leaf
+            threads: Only sample these thread identifiers (None for all)
+            thread_names: Whether the thread name is the first frame after
+                the tags
+        """
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.threads = threads
+        self.thread_names = thread_names
+
+        self._stacks: Dict[str, int] = {}
+        self._tags: Dict[int, str] = {}
+        self._frame_names: Dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.samples = 0
+        self.dropped = 0
+        self.sampling_time = 0.0
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampling thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """
+        Start sampling.
+
+        Args:
+            interval: Seconds between samples (defaults to the current one)
+
+        Raises:
+            ValueError: If the interval is not positive
+        """
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError(f"Sampling interval must be positive, got {interval}")
+            self.interval = interval
+
+        if self.running:
+            return
+
+        self._launch()
+
+        logger.structured_log(
+            LogLevel.INFO,
+            "Started sampling profiler",
+            LogCategory.PERFORMANCE,
+            component="profiler",
+            context={"interval": self.interval}
+        )
+
+    def stop(self) -> None:
+        """Stop sampling; the collected samples are kept."""
+        if self._thread is None:
+            return
+
+        self._halt()
+
+        logger.structured_log(
+            LogLevel.INFO,
+            "Stopped sampling profiler",
+            LogCategory.PERFORMANCE,
+            component="profiler",
+            context=self.stats()
+        )
+
+    def reset(self) -> None:
+        """Discard the collected samples."""
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.dropped = 0
+            self.sampling_time = 0.0
+
+    def _launch(self) -> None:
+        """Start the sampling thread."""
+        self._stop_event.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SamplingProfiler")
+        self._thread.start()
+
+    def _halt(self) -> None:
+        """Stop the sampling thread."""
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        """Sampling loop of the background thread."""
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Take one sample of the stacks of the sampled threads."""
+        start = time.perf_counter()
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if self.thread_names else {}
+
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (self.threads is not None and ident not in self.threads):
+                continue
+            parts = [self._tags.get(ident), names.get(ident), self._fold(frame)]
+            stacks.append(";".join(part for part in parts if part))
+
+        with self._lock:
+            for stack in stacks:
+                self._count(stack, 1)
+            self.samples += 1
+            self.sampling_time += time.perf_counter() - start
+
+    def _fold(self, frame: Optional[FrameType]) -> str:
+        """Get the frames of a stack from the root to the leaf."""
+        frames = []
+        names = self._frame_names
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            name = names.get(code)
+            if name is None:
+                name = names[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+            frames.append(name)
+            frame = frame.f_back
+        frames.reverse()
+        return ";".join(frames)
+
+    def _count(self, stack: str, count: int) -> None:
+        """Add samples of a stack (lock held)."""
+        if stack in self._stacks:
+            self._stacks[stack] += count
+        elif len(self._stacks) < self.max_stacks:
+            self._stacks[stack] = count
+        else:
+            self.dropped += count
+
+    def add_samples(self, stacks: Dict[str, int], tags: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add samples taken elsewhere, e.g. by profile_call() in a worker process.
+
+        Args:
+            stacks: Folded stack -> number of samples
+            tags: Tags to prefix the stacks with
+        """
+        prefix = format_tags(tags) if tags else ""
+        with self._lock:
+            for stack, count in stacks.items():
+                self._count(f"{prefix};{stack}" if prefix else stack, count)
+
+    @contextmanager
+    def tag(self, **tags: Any) -> Iterator[None]:
+        """
+        Tag the samples of the calling thread.
+
+        Args:
+            **tags: Tags, outermost first (e.g. operation_id, then render
+                parameters)
+        """
+        ident = threading.get_ident()
+        previous = self._tags.get(ident)
+        self._tags[ident] = format_tags(tags)
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._tags.pop(ident, None)
+            else:
+                self._tags[ident] = previous
+
+    def stacks(self, operation_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get the collected samples.
+
+        Args:
+            operation_id: Only include samples tagged with this operation
+
+        Returns:
+            Folded stack -> number of samples
+        """
+        with self._lock:
+            stacks = dict(self._stacks)
+
+        if operation_id is None:
+            return stacks
+
+        prefix = format_tags({"operation_id": operation_id})
+        return {
+            stack: count for stack, count in stacks.items()
+            if stack == prefix or stack.startswith(prefix + ";")
+        }
+
+    def folded(self, operation_id: Optional[str] = None) -> str:
+        """
+        Get the collected samples in the folded format.
+
+        Args:
+            operation_id: Only include samples tagged with this operation
+
+        Returns:
+            One ``frames count`` line per stack, most sampled first
+        """
+        stacks = sorted(self.stacks(operation_id).items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get profiler statistics.
+
+        Returns:
+            Dictionary with the state, sample counts and the mean cost of a
+            sample in milliseconds
+        """
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+                "dropped": self.dropped,
+                "sample_cost_ms": 1000.0 * self.sampling_time / self.samples if self.samples else None,
+                "started_at": self.started_at
+            }
+
+
+def profile_call(func: Callable[..., Any],
+                 *args: Any,
+                 interval: float = DEFAULT_INTERVAL,
+                 **kwargs: Any) -> Tuple[Any, Dict[str, int]]:
+    """
+    Call a function while sampling the calling thread.
+
+    Used to profile work in worker processes, whose samples the caller adds
+    to its profiler.
+
+    Args:
+        func: Function to call
+        *args: Positional arguments
+        interval: Seconds between samples
+        **kwargs: Keyword arguments
+
+    Returns:
+        Tuple of (function result, folded stack -> number of samples)
+    """
+    profiler = SamplingProfiler(interval=interval, threads={threading.get_ident()}, thread_names=False)
+    profiler._launch()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler._halt()
+    return result, profiler.stacks()
+
+
+# Singleton instance
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """
+    Get the global profiler.
+
+    Returns:
+        SamplingProfiler instance (not started)
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
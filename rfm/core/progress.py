@@ -8,12 +8,16 @@ in the RFM Architecture. It enables real-time progress updates during complex co
 import asyncio
 import json
 import logging
+import threading
 import time
 import uuid
 from dataclasses import dataclass, asdict, field
 from enum import Enum
 from typing import Dict, Any, Optional, List, Callable, Coroutine, Set, Union
 
+from .timer_wheel import get_timer_wheel
+from .tracing import current_trace_id
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,7 +45,11 @@ class ProgressData:
     current_step_progress: Optional[float] = None
     estimated_time_remaining_ms: Optional[int] = None
     memory_usage_mb: Optional[float] = None
+    progress_per_second: Optional[float] = None  # Percentage points per second
+    units_per_second: Optional[float] = None     # Work items per second (if items are reported)
+    parent_id: Optional[str] = None              # Parent operation for sub-operations
     details: Dict[str, Any] = field(default_factory=dict)
+    trace_id: Optional[str] = None               # Trace the operation belongs to
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
@@ -53,23 +61,198 @@ class ProgressData:
         return data
 
 
+class ProgressEstimator:
+    """
+    Estimates remaining time and throughput for an operation.
+    
+    Progress is rarely linear: an L-system render spends 0-50% generating the
+    string and 50-80% computing coordinates, at very different speeds. The
+    estimator therefore keeps an exponentially weighted seconds-per-percent
+    rate for each progress band. Completed operations fold their band rates
+    into a profile shared by all operations of the same type, so later runs
+    can predict the cost of bands they haven't reached yet, scaled by how fast
+    the current run is compared to the profile.
+    
+    Work item throughput (``units_per_second``) is estimated from the
+    cumulative ``items_processed`` detail key. The built-in renderers report
+    it: characters for L-systems, point iterations for the escape-time
+    fractals and rectangles for Cantor dust. Other callers must supply it, or
+    throughput stays None. A count that goes down (a new phase) restarts the
+    measurement.
+    """
+    
+    # Shared per-operation-type band profiles (seconds per percentage point)
+    _profiles: Dict[str, List[Optional[float]]] = {}
+    _profiles_lock = threading.Lock()
+    
+    def __init__(self, operation_type: str, alpha: float = 0.3, bands: int = 20):
+        """
+        Initialize the estimator.
+        
+        Args:
+            operation_type: Type of operation, used to share band profiles
+            alpha: Smoothing factor for the exponentially weighted rates (0-1)
+            bands: Number of equal-width progress bands
+        """
+        self.operation_type = operation_type
+        self.alpha = alpha
+        self.bands = bands
+        self.band_width = 100.0 / bands
+        self.band_rates: List[Optional[float]] = [None] * bands
+        self.rate: Optional[float] = None        # Overall seconds per percentage point
+        self.items_rate: Optional[float] = None  # Work items per second
+        self.last_progress: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.last_items: Optional[float] = None
+    
+    def _band(self, progress: float) -> int:
+        """Get the band index containing a progress value."""
+        return min(self.bands - 1, max(0, int(progress / self.band_width)))
+    
+    def _smooth(self, previous: Optional[float], sample: float) -> float:
+        """Apply exponential smoothing."""
+        if previous is None:
+            return sample
+        return previous + self.alpha * (sample - previous)
+    
+    def start(self, timestamp: float) -> None:
+        """
+        Record the operation start.
+        
+        Args:
+            timestamp: Start time
+        """
+        self.last_progress = 0.0
+        self.last_time = timestamp
+    
+    def update(self, progress: float, timestamp: float, items_processed: Optional[float] = None) -> None:
+        """
+        Record a progress sample.
+        
+        Args:
+            progress: Overall progress percentage (0-100)
+            timestamp: Sample time
+            items_processed: Optional cumulative number of processed work items
+        """
+        if self.last_time is None:
+            self.start(timestamp)
+        
+        elapsed = timestamp - self.last_time
+        advanced = progress - self.last_progress
+        
+        if advanced > 0 and elapsed > 0:
+            seconds_per_percent = elapsed / advanced
+            self.rate = self._smooth(self.rate, seconds_per_percent)
+            
+            # Attribute the sample to every band it covered (the end point is exclusive)
+            last_band = self._band(max(self.last_progress, progress - 1e-9))
+            for band in range(self._band(self.last_progress), last_band + 1):
+                self.band_rates[band] = self._smooth(self.band_rates[band], seconds_per_percent)
+        
+        if items_processed is not None:
+            if self.last_items is not None and elapsed > 0 and items_processed >= self.last_items:
+                self.items_rate = self._smooth(self.items_rate, (items_processed - self.last_items) / elapsed)
+            self.last_items = items_processed
+        
+        if advanced >= 0:
+            self.last_progress = progress
+            self.last_time = timestamp
+    
+    def estimate_remaining_seconds(self, progress: float) -> Optional[float]:
+        """
+        Estimate the time remaining.
+        
+        Args:
+            progress: Current overall progress percentage
+            
+        Returns:
+            Estimated seconds remaining, or None if there isn't enough data yet
+        """
+        if progress >= 100.0:
+            return 0.0
+        
+        current_band = self._band(progress)
+        current_rate = self.band_rates[current_band] or self.rate
+        if current_rate is None:
+            return None
+        
+        with self._profiles_lock:
+            profile = self._profiles.get(self.operation_type)
+            profile = list(profile) if profile is not None else None
+        
+        # Scale the shared profile by how this run compares to it
+        scale = 1.0
+        if profile is not None and profile[current_band]:
+            scale = current_rate / profile[current_band]
+        
+        remaining = (min(100.0, (current_band + 1) * self.band_width) - progress) * current_rate
+        for band in range(current_band + 1, self.bands):
+            if profile is not None and profile[band]:
+                band_rate = profile[band] * scale
+            else:
+                band_rate = self.band_rates[band] or current_rate
+            remaining += self.band_width * band_rate
+        
+        return max(0.0, remaining)
+    
+    @property
+    def progress_per_second(self) -> Optional[float]:
+        """Smoothed progress rate in percentage points per second."""
+        if not self.rate:
+            return None
+        return 1.0 / self.rate
+    
+    def finish(self) -> None:
+        """Fold this run's band rates into the shared profile for its operation type."""
+        with self._profiles_lock:
+            profile = self._profiles.setdefault(self.operation_type, [None] * self.bands)
+            if len(profile) != self.bands:
+                return
+            
+            for band, rate in enumerate(self.band_rates):
+                if rate is not None:
+                    profile[band] = self._smooth(profile[band], rate)
+
+
 class ProgressReporter:
     """
     Reports progress updates for long-running operations.
     
     This class provides methods for reporting progress during operations,
     which can be consumed by progress listeners like the WebSocket server.
+    
+    Reporters can form a tree: a batch job or animation export creates one
+    child reporter per sub-render with :meth:`create_child`. The parent's
+    progress is the weighted mean of its children's progress, and parent
+    updates are rate-limited to ``aggregate_interval`` so listeners can follow
+    a large batch through the parent alone.
+    
+    An operation created inside a traced block (see :mod:`rfm.core.tracing`)
+    carries the block's trace ID in its progress data, and sub-operations
+    inherit their parent's trace ID.
     """
     
-    def __init__(self, operation_type: str, name: str = None):
+    def __init__(self,
+                 operation_type: str,
+                 name: str = None,
+                 operation_id: Optional[str] = None,
+                 parent: Optional["ProgressReporter"] = None,
+                 weight: float = 1.0,
+                 trace_id: Optional[str] = None):
         """
         Initialize a progress reporter.
         
         Args:
             operation_type: Type of operation (e.g., "fractal_render", "animation")
             name: Optional name for the operation
-        """
-        self.operation_id = str(uuid.uuid4())
+            operation_id: Optional existing operation ID (e.g. one allocated by a
+                parent process); a new UUID is generated if omitted
+            parent: Optional parent operation this is a sub-operation of
+            weight: Share of the parent's progress this operation accounts for
+            trace_id: Trace the operation belongs to (defaults to the parent's
+                trace, or the trace of the current span)
+        """
+        self.operation_id = operation_id or str(uuid.uuid4())
         self.operation_type = operation_type
         self.name = name or f"{operation_type}_{self.operation_id[:8]}"
         self.start_time = time.time()
@@ -82,6 +265,27 @@ class ProgressReporter:
         self.details = {}
         self.callbacks: List[Callable[[ProgressData], None]] = []
         self.finished = False
+        self.estimator = ProgressEstimator(operation_type)
+        self.estimator.start(self.start_time)
+        self.estimated_time_remaining_ms: Optional[int] = None
+        
+        # Operation tree
+        self.parent = parent
+        self.parent_id = parent.operation_id if parent is not None else None
+        self.trace_id = trace_id or (parent.trace_id if parent is not None else current_trace_id())
+        self.weight = weight
+        self.children: Dict[str, "ProgressReporter"] = {}
+        self.aggregate_interval = 0.1  # Minimum seconds between aggregate updates
+        self._child_lock = threading.Lock()
+        self._child_progress: Dict[str, float] = {}
+        self._child_weight_total = 0.0
+        self._child_weighted_progress = 0.0
+        self._expected_child_weight: Optional[float] = None
+        self._child_status_counts: Dict[str, int] = {}
+        self._last_aggregate_time = 0.0
+        
+        if parent is not None:
+            parent._attach_child(self)
         
         # Report initial status
         self.report_status(OperationStatus.PENDING)
@@ -114,8 +318,10 @@ class ProgressReporter:
             total_steps: Total number of steps
             current_step_progress: Progress within current step (0-100)
             estimated_time_remaining_ms: Estimated time remaining in milliseconds
+                (estimated from the observed progress rate if omitted)
             memory_usage_mb: Current memory usage in MB
-            details: Additional operation-specific details
+            details: Additional operation-specific details; a cumulative
+                ``items_processed`` count enables ``units_per_second``
         """
         if self.finished:
             return
@@ -124,6 +330,17 @@ class ProgressReporter:
         self.progress = max(0.0, min(100.0, progress))
         self.last_update_time = time.time()
         
+        # Update rate estimates
+        items_processed = details.get("items_processed") if details else None
+        self.estimator.update(self.progress, self.last_update_time, items_processed)
+        
+        if estimated_time_remaining_ms is None:
+            remaining_seconds = self.estimator.estimate_remaining_seconds(self.progress)
+            if remaining_seconds is not None:
+                estimated_time_remaining_ms = int(remaining_seconds * 1000)
+                
+        self.estimated_time_remaining_ms = estimated_time_remaining_ms
+        
         if current_step is not None:
             self.current_step = current_step
             
@@ -151,7 +368,11 @@ class ProgressReporter:
             current_step_progress=self.current_step_progress,
             estimated_time_remaining_ms=estimated_time_remaining_ms,
             memory_usage_mb=memory_usage_mb,
-            details=self.details.copy()
+            progress_per_second=self.estimator.progress_per_second,
+            units_per_second=self.estimator.items_rate,
+            parent_id=self.parent_id,
+            details=self.details.copy(),
+            trace_id=self.trace_id
         )
         
         # Call callbacks
@@ -161,6 +382,10 @@ class ProgressReporter:
             except Exception as e:
                 logger.error(f"Error in progress callback: {e}")
         
+        # Roll progress up to the parent
+        if self.parent is not None:
+            self.parent._child_updated(self, status_changed=False)
+        
         # Auto-complete if reached 100%
         if self.progress >= 100.0 and self.status == OperationStatus.RUNNING:
             self.report_completed()
@@ -189,7 +414,9 @@ class ProgressReporter:
             current_step=self.current_step,
             total_steps=self.total_steps,
             current_step_progress=self.current_step_progress,
-            details=self.details.copy()
+            parent_id=self.parent_id,
+            details=self.details.copy(),
+            trace_id=self.trace_id
         )
         
         # Call callbacks
@@ -202,6 +429,15 @@ class ProgressReporter:
         # Mark as finished if terminal state
         if status in (OperationStatus.COMPLETED, OperationStatus.FAILED, OperationStatus.CANCELED):
             self.finished = True
+            self.estimated_time_remaining_ms = None
+            
+            # Only successful runs are representative of the operation's phases
+            if status == OperationStatus.COMPLETED:
+                self.estimator.finish()
+        
+        # Status transitions always reach the parent
+        if self.parent is not None:
+            self.parent._child_updated(self, status_changed=True)
     
     def report_completed(self, details: Optional[Dict[str, Any]] = None) -> None:
         """
@@ -266,12 +502,91 @@ class ProgressReporter:
     
     def should_cancel(self) -> bool:
         """
-        Check if the operation has been marked for cancellation.
+        Check if the operation (or its parent) has been marked for cancellation.
         
         Returns:
             True if the operation should be canceled, False otherwise
         """
-        return self.status == OperationStatus.CANCELED
+        if self.status == OperationStatus.CANCELED:
+            return True
+        return self.parent is not None and self.parent.should_cancel()
+    
+    def create_child(self,
+                     operation_type: Optional[str] = None,
+                     name: Optional[str] = None,
+                     weight: float = 1.0) -> "ProgressReporter":
+        """
+        Create a sub-operation whose progress rolls up into this operation.
+        
+        Args:
+            operation_type: Type of the sub-operation (defaults to this operation's type)
+            name: Optional sub-operation name
+            weight: Share of this operation's progress the sub-operation accounts for
+            
+        Returns:
+            ProgressReporter for the sub-operation
+        """
+        return ProgressReporter(operation_type or self.operation_type, name, parent=self, weight=weight)
+    
+    def expect_children(self, total_weight: float) -> None:
+        """
+        Declare the total weight of all sub-operations up front.
+        
+        Without this, the parent's progress is relative to the children created
+        so far, which overstates progress when children are created lazily.
+        
+        Args:
+            total_weight: Combined weight of all sub-operations
+        """
+        with self._child_lock:
+            self._expected_child_weight = total_weight
+    
+    def _attach_child(self, child: "ProgressReporter") -> None:
+        """
+        Register a sub-operation.
+        
+        Args:
+            child: Child progress reporter
+        """
+        with self._child_lock:
+            self.children[child.operation_id] = child
+            self._child_progress[child.operation_id] = 0.0
+            self._child_weight_total += child.weight
+    
+    def _child_updated(self, child: "ProgressReporter", status_changed: bool) -> None:
+        """
+        Roll a sub-operation update up into this operation's progress.
+        
+        Args:
+            child: Child progress reporter that was updated
+            status_changed: Whether the update was a status transition; a child
+                finishing is always propagated, other updates are rate-limited
+        """
+        with self._child_lock:
+            previous = self._child_progress.get(child.operation_id, 0.0)
+            self._child_weighted_progress += (child.progress - previous) * child.weight
+            self._child_progress[child.operation_id] = child.progress
+            
+            child_finished = status_changed and child.is_finished()
+            if child_finished:
+                status = child.status.value
+                self._child_status_counts[status] = self._child_status_counts.get(status, 0) + 1
+            
+            now = time.time()
+            if not child_finished and now - self._last_aggregate_time < self.aggregate_interval:
+                return
+            self._last_aggregate_time = now
+            
+            total_weight = max(self._expected_child_weight or 0.0, self._child_weight_total)
+            aggregate = self._child_weighted_progress / total_weight if total_weight > 0 else 0.0
+            details = {
+                "children_total": len(self._child_progress),
+                "children_completed": self._child_status_counts.get(OperationStatus.COMPLETED.value, 0),
+                "children_failed": self._child_status_counts.get(OperationStatus.FAILED.value, 0),
+                "children_canceled": self._child_status_counts.get(OperationStatus.CANCELED.value, 0)
+            }
+        
+        self.report_progress(aggregate, details=details)
     
     def is_finished(self) -> bool:
         """
@@ -307,11 +622,18 @@ class ProgressManager:
     operations, and provides methods for querying operation status and progress.
     """
     
-    def __init__(self):
-        """Initialize the progress manager."""
+    def __init__(self, retention_seconds: float = 300.0):
+        """
+        Initialize the progress manager.
+        
+        Args:
+            retention_seconds: How long finished operations remain queryable
+        """
         self.operations: Dict[str, ProgressReporter] = {}
         self.callbacks: List[Callable[[ProgressData], None]] = []
+        self.detail_callbacks: List[Callable[[ProgressData], None]] = []
         self.lock = asyncio.Lock()
+        self.retention_seconds = retention_seconds
     
     async def add_operation(self, operation: ProgressReporter) -> None:
         """
@@ -350,9 +672,38 @@ class ProgressManager:
         async with self.lock:
             return self.operations.get(operation_id)
     
-    async def list_operations(self) -> List[Dict[str, Any]]:
+    async def add_child_operation(self,
+                                  parent_id: str,
+                                  operation_type: Optional[str] = None,
+                                  name: Optional[str] = None,
+                                  weight: float = 1.0) -> Optional[ProgressReporter]:
         """
-        List all tracked operations.
+        Create and track a sub-operation of a tracked operation.
+        
+        Args:
+            parent_id: ID of the parent operation
+            operation_type: Type of the sub-operation (defaults to the parent's type)
+            name: Optional sub-operation name
+            weight: Share of the parent's progress the sub-operation accounts for
+            
+        Returns:
+            ProgressReporter for the sub-operation, or None if the parent is unknown
+        """
+        parent = await self.get_operation(parent_id)
+        if parent is None:
+            return None
+            
+        child = parent.create_child(operation_type, name, weight)
+        await self.add_operation(child)
+        return child
+    
+    async def list_operations(self, include_children: bool = False) -> List[Dict[str, Any]]:
+        """
+        List tracked operations.
+        
+        Args:
+            include_children: Whether to include sub-operations; by default
+                only top-level operations are listed
         
         Returns:
             List of operation details
@@ -361,14 +712,19 @@ class ProgressManager:
             return [
                 {
                     "operation_id": op.operation_id,
+                    "parent_id": op.parent_id,
+                    "child_count": len(op.children),
                     "operation_type": op.operation_type,
                     "name": op.name,
                     "status": op.status.value,
                     "progress": op.progress,
                     "start_time": op.start_time,
-                    "last_update_time": op.last_update_time
+                    "last_update_time": op.last_update_time,
+                    "estimated_time_remaining_ms": op.estimated_time_remaining_ms,
+                    "progress_per_second": op.estimator.progress_per_second
                 }
                 for op in self.operations.values()
+                if include_children or op.parent_id is None
             ]
     
     async def cancel_operation(self, operation_id: str) -> bool:
@@ -390,18 +746,32 @@ class ProgressManager:
             # Only cancel if not already in a terminal state
             if operation.status not in (OperationStatus.COMPLETED, OperationStatus.FAILED, OperationStatus.CANCELED):
                 operation.report_status(OperationStatus.CANCELED)
+                
+                # Cancel unfinished sub-operations as well
+                pending = list(operation.children.values())
+                while pending:
+                    child = pending.pop()
+                    if not child.is_finished():
+                        child.report_status(OperationStatus.CANCELED)
+                    pending.extend(child.children.values())
+                    
                 return True
                 
             return False
     
-    def add_callback(self, callback: Callable[[ProgressData], None]) -> None:
+    def add_callback(self, callback: Callable[[ProgressData], None], include_children: bool = False) -> None:
         """
-        Add a global callback for all progress updates.
+        Add a global callback for progress updates.
         
         Args:
             callback: Function to call with progress updates
+            include_children: Whether to also receive sub-operation updates; by
+                default only top-level (aggregate) updates are delivered
         """
-        self.callbacks.append(callback)
+        if include_children:
+            self.detail_callbacks.append(callback)
+        else:
+            self.callbacks.append(callback)
     
     def remove_callback(self, callback: Callable[[ProgressData], None]) -> None:
         """
@@ -412,6 +782,8 @@ class ProgressManager:
         """
         if callback in self.callbacks:
             self.callbacks.remove(callback)
+        if callback in self.detail_callbacks:
+            self.detail_callbacks.remove(callback)
     
     def _progress_callback(self, progress_data: ProgressData) -> None:
         """
@@ -420,23 +792,37 @@ class ProgressManager:
         Args:
             progress_data: Progress update data
         """
-        # Call global callbacks
-        for callback in self.callbacks:
+        # Call global callbacks (sub-operation updates only reach detail callbacks)
+        callbacks = self.detail_callbacks
+        if progress_data.parent_id is None:
+            callbacks = self.callbacks + self.detail_callbacks
+            
+        for callback in callbacks:
             try:
                 callback(progress_data)
             except Exception as e:
                 logger.error(f"Error in global progress callback: {e}")
         
-        # Clean up completed operations (after a delay)
+        # Clean up completed operations (after a delay to allow final status to be queried)
         if progress_data.status in (OperationStatus.COMPLETED, OperationStatus.FAILED, OperationStatus.CANCELED):
-            operation_id = progress_data.operation_id
-            
-            async def _cleanup_later():
-                # Wait before cleanup to allow final status to be queried
-                await asyncio.sleep(300)  # 5 minutes
-                await self.remove_operation(operation_id)
-                
-            asyncio.create_task(_cleanup_later())
+            get_timer_wheel().schedule(
+                progress_data.operation_id,
+                self.retention_seconds,
+                self._expire_operations
+            )
+    
+    async def _expire_operations(self, operation_ids: List[str]) -> None:
+        """
+        Remove finished operations whose retention period has elapsed.
+        
+        Args:
+            operation_ids: IDs of the expired operations
+        """
+        async with self.lock:
+            for operation_id in operation_ids:
+                operation = self.operations.get(operation_id)
+                if operation is not None and operation.is_finished():
+                    del self.operations[operation_id]
 
 
 # Global progress manager instance
@@ -0,0 +1,190 @@
+"""
+Delta encoding for progress updates.
+
+Progress updates usually change only a couple of fields (``progress``,
+``timestamp``, ``current_step_progress``) while the rest of the state,
+including the ``details`` dictionary with render parameters, stays the same.
+This module provides the server-side encoder and client-side decoder for the
+delta protocol mode:
+
+- The first update of an operation is sent in full (``progress_update``).
+- Later updates only carry the changed fields (``progress_delta``), with a
+  per-operation sequence number.
+- A client that sees a sequence gap requests a full resync
+  (``resync_operation``) and receives a full ``progress_update``.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+
+
+def diff_progress(previous: Dict[str, Any], current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Compute the changed fields between two progress states.
+
+    The ``details`` dictionary is diffed one level deep.
+
+    Args:
+        previous: Previous full progress state
+        current: Current full progress state
+
+    Returns:
+        Dictionary of changed fields, or None if a field was removed (which a
+        delta cannot express, so the full state has to be sent)
+    """
+    if any(key not in current for key in previous):
+        return None
+
+    changes = {}
+    for key, value in current.items():
+        if key == "details" and isinstance(value, dict) and isinstance(previous.get(key), dict):
+            previous_details = previous[key]
+            if any(detail_key not in value for detail_key in previous_details):
+                return None
+
+            details_changes = {
+                detail_key: detail_value for detail_key, detail_value in value.items()
+                if detail_key not in previous_details or previous_details[detail_key] != detail_value
+            }
+            if details_changes:
+                changes[key] = details_changes
+        elif key not in previous or previous[key] != value:
+            changes[key] = value
+
+    return changes
+
+
+def apply_progress_delta(state: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply changed fields to a progress state.
+
+    Args:
+        state: Previous full progress state
+        changes: Changed fields produced by :func:`diff_progress`
+
+    Returns:
+        New full progress state (the previous state is not modified)
+    """
+    new_state = dict(state)
+    for key, value in changes.items():
+        if key == "details" and isinstance(value, dict) and isinstance(state.get(key), dict):
+            details = dict(state[key])
+            details.update(value)
+            new_state[key] = details
+        else:
+            new_state[key] = value
+    return new_state
+
+
+class ProgressDeltaEncoder:
+    """
+    Server-side delta encoder.
+
+    Keeps the latest full state and sequence number of each operation. The
+    delta is computed once per update and shared by all delta-mode clients.
+    """
+
+    def __init__(self):
+        """Initialize the encoder."""
+        self._states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def encode(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Record a new progress state.
+
+        Args:
+            data: Full progress state (``ProgressData.to_dict()`` form) with an ``operation_id``
+
+        Returns:
+            Tuple of (sequence number, full state, changed fields). Changed
+            fields are None for the first update of an operation or when the
+            state can't be expressed as a delta.
+        """
+        operation_id = data["operation_id"]
+        previous = self._states.get(operation_id)
+
+        if previous is None:
+            seq, changes = 1, None
+        else:
+            seq, changes = previous[0] + 1, diff_progress(previous[1], data)
+
+        self._states[operation_id] = (seq, data)
+        return seq, data, changes
+
+    def snapshot(self, operation_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Get the latest full state of an operation for a resync.
+
+        Args:
+            operation_id: Operation ID
+
+        Returns:
+            Tuple of (sequence number, full state), or None if unknown
+        """
+        return self._states.get(operation_id)
+
+    def forget(self, operation_id: str) -> None:
+        """
+        Drop the state of a finished operation.
+
+        Args:
+            operation_id: Operation ID
+        """
+        self._states.pop(operation_id, None)
+
+
+class ProgressDeltaDecoder:
+    """
+    Client-side delta decoder.
+
+    Reconstructs full progress states from full updates and deltas and
+    detects sequence gaps.
+    """
+
+    def __init__(self):
+        """Initialize the decoder."""
+        self._states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def apply_full(self, operation_id: str, seq: int, data: Dict[str, Any]) -> None:
+        """
+        Record a full progress state.
+
+        Args:
+            operation_id: Operation ID
+            seq: Sequence number of the update
+            data: Full progress state
+        """
+        self._states[operation_id] = (seq, data)
+
+    def apply_delta(self, operation_id: str, seq: int, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply a delta update.
+
+        Args:
+            operation_id: Operation ID
+            seq: Sequence number of the update
+            changes: Changed fields
+
+        Returns:
+            Reconstructed full state, or None if an update was missed and a
+            resync is required
+        """
+        previous = self._states.get(operation_id)
+        if previous is None or previous[0] != seq - 1:
+            return None
+
+        data = apply_progress_delta(previous[1], changes)
+        self._states[operation_id] = (seq, data)
+        return data
+
+    def forget(self, operation_id: str) -> None:
+        """
+        Drop the state of a finished operation.
+
+        Args:
+            operation_id: Operation ID
+        """
+        self._states.pop(operation_id, None)
+
+    def clear(self) -> None:
+        """Drop all states (e.g. after reconnecting)."""
+        self._states.clear()
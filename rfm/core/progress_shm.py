@@ -0,0 +1,735 @@
+"""
+Cross-process progress channel for RFM Architecture.
+
+Progress reporters and the progress manager only work inside one process, so a
+render moved into a worker process would otherwise lose its progress updates.
+This module provides a shared-memory ring that worker processes write fixed-size
+progress records into, and a bridge that drains those records in the parent
+process and feeds them into the :class:`ProgressManager`.
+
+The ring is split into lanes. Each lane is a single-producer/single-consumer
+queue, so a worker process writes to its own lane without any locking, pickling
+or pipes. Lanes are assigned explicitly (e.g. one lane per pool worker).
+
+Example::
+
+    # Parent process
+    ring = SharedProgressRing.create(lanes=4)
+    bridge = SharedProgressBridge(ring)
+    reporter = await bridge.register("fractal_render", "mandelbrot")
+    bridge.start()
+    pool.submit(render_worker, ring.name, 0, reporter.operation_id, config)
+
+    # Worker process
+    def render_worker(ring_name, lane, operation_id, config):
+        with ProgressRingWriter(ring_name, lane) as writer:
+            reporter = writer.create_reporter("fractal_render", operation_id)
+            with reporter:
+                MandelbrotSet(config).compute(800, 600, reporter)
+"""
+
+import asyncio
+import logging
+import math
+import struct
+import sys
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, List, Tuple
+
+from .progress import (
+    OperationStatus, ProgressData, ProgressReporter, ProgressManager, get_progress_manager
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Ring header: magic, version, lane count, lane capacity, record size
+_RING_MAGIC = b"RFMPRNG1"
+_RING_VERSION = 1
+_RING_HEADER = struct.Struct("<8sIIII")
+_RING_HEADER_SIZE = 64
+
+# Lane header: write sequence, read sequence, dropped records, canceled operation ID.
+# Padded to a cache line so producers and the consumer don't false-share.
+_LANE_HEADER = struct.Struct("<QQQ16s")
+_LANE_HEADER_SIZE = 64
+
+# Record: sequence, operation ID, timestamp, progress, step progress, status,
+# step index, total steps, items processed, items total, step label / error message
+_RECORD = struct.Struct("<Q16sdddBxxxiiQQ48s4x")
+_RECORD_SIZE = _RECORD.size
+
+_LABEL_SIZE = 48
+
+# Stable wire encoding for operation status
+_STATUS_CODES: List[OperationStatus] = [
+    OperationStatus.PENDING,
+    OperationStatus.RUNNING,
+    OperationStatus.PAUSED,
+    OperationStatus.COMPLETED,
+    OperationStatus.FAILED,
+    OperationStatus.CANCELED,
+]
+_STATUS_INDEX = {status: index for index, status in enumerate(_STATUS_CODES)}
+
+_TERMINAL_STATUSES = (OperationStatus.COMPLETED, OperationStatus.FAILED, OperationStatus.CANCELED)
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing shared memory block without taking ownership of it.
+
+    Before Python 3.13 attaching registers the block with the resource tracker,
+    which unlinks it when the attaching process exits.
+
+    Args:
+        name: Name of the shared memory block
+
+    Returns:
+        Attached SharedMemory instance
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+def _encode_operation_id(operation_id: str) -> bytes:
+    """
+    Encode an operation ID into its 16-byte record form.
+
+    Args:
+        operation_id: UUID string of the operation
+
+    Returns:
+        Raw UUID bytes
+
+    Raises:
+        ValueError: If the operation ID is not a UUID
+    """
+    return uuid.UUID(operation_id).bytes
+
+
+def _encode_label(label: Optional[str]) -> bytes:
+    """Encode a label into its fixed-size, UTF-8 safe record form."""
+    if not label:
+        return b""
+    encoded = label.encode("utf-8")[:_LABEL_SIZE]
+    # Drop a trailing partial multi-byte character
+    return encoded.decode("utf-8", errors="ignore").encode("utf-8")
+
+
+class ProgressRecord:
+    """A single progress record read from the ring."""
+
+    __slots__ = (
+        "operation_id", "timestamp", "progress", "current_step_progress", "status",
+        "step_index", "total_steps", "items_processed", "items_total", "label"
+    )
+
+    def __init__(self, operation_id: str, timestamp: float, progress: float,
+                 current_step_progress: Optional[float], status: OperationStatus,
+                 step_index: int, total_steps: Optional[int],
+                 items_processed: int, items_total: int, label: Optional[str]):
+        self.operation_id = operation_id
+        self.timestamp = timestamp
+        self.progress = progress
+        self.current_step_progress = current_step_progress
+        self.status = status
+        self.step_index = step_index
+        self.total_steps = total_steps
+        self.items_processed = items_processed
+        self.items_total = items_total
+        self.label = label
+
+    def __repr__(self) -> str:
+        return (f"ProgressRecord(operation_id={self.operation_id!r}, progress={self.progress:.1f}, "
+                f"status={self.status.value}, step_index={self.step_index})")
+
+
+class SharedProgressRing:
+    """
+    Shared-memory ring of fixed-size progress records.
+
+    The parent process creates the ring and passes its name to workers, which
+    attach to it by name. Each lane must have exactly one writing process at a
+    time; the parent is the only reader.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Initialize a ring over an existing shared memory block.
+
+        Use :meth:`create` or :meth:`attach` instead of calling this directly.
+
+        Args:
+            shm: Shared memory block holding the ring
+            owner: Whether this instance created (and should unlink) the block
+        """
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+
+        magic, version, lanes, capacity, record_size = _RING_HEADER.unpack_from(self._buf, 0)
+        if magic != _RING_MAGIC or version != _RING_VERSION or record_size != _RECORD_SIZE:
+            raise ValueError(f"Shared memory block {shm.name} is not a compatible progress ring")
+
+        self.lanes = lanes
+        self.capacity = capacity
+        self._lane_stride = _LANE_HEADER_SIZE + capacity * _RECORD_SIZE
+
+    @classmethod
+    def create(cls, lanes: int = 8, capacity: int = 1024, name: Optional[str] = None) -> "SharedProgressRing":
+        """
+        Create a new progress ring.
+
+        Args:
+            lanes: Number of independent producer lanes
+            capacity: Number of records each lane can buffer
+            name: Optional shared memory name (generated if omitted)
+
+        Returns:
+            Owning SharedProgressRing instance
+        """
+        if lanes < 1 or capacity < 1:
+            raise ValueError("lanes and capacity must be positive")
+
+        size = _RING_HEADER_SIZE + lanes * (_LANE_HEADER_SIZE + capacity * _RECORD_SIZE)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        # Fresh blocks are zero-filled, so every lane starts empty
+        _RING_HEADER.pack_into(shm.buf, 0, _RING_MAGIC, _RING_VERSION, lanes, capacity, _RECORD_SIZE)
+
+        logger.debug(f"Created shared progress ring {shm.name} ({lanes} lanes x {capacity} records)")
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedProgressRing":
+        """
+        Attach to an existing progress ring by name.
+
+        Args:
+            name: Shared memory name of the ring
+
+        Returns:
+            Non-owning SharedProgressRing instance
+        """
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        """Shared memory name used by workers to attach."""
+        return self._shm.name
+
+    def _lane_offset(self, lane: int) -> int:
+        if not 0 <= lane < self.lanes:
+            raise IndexError(f"Lane {lane} out of range (ring has {self.lanes} lanes)")
+        return _RING_HEADER_SIZE + lane * self._lane_stride
+
+    def write(self,
+              lane: int,
+              operation_id: str,
+              progress: float,
+              status: OperationStatus = OperationStatus.RUNNING,
+              current_step_progress: Optional[float] = None,
+              step_index: int = -1,
+              total_steps: Optional[int] = None,
+              items_processed: int = 0,
+              items_total: int = 0,
+              label: Optional[str] = None,
+              timeout: float = 1.0) -> bool:
+        """
+        Publish a progress record on a lane.
+
+        When the lane is full, progress records are dropped (the next one
+        supersedes them anyway), while terminal status records wait up to
+        ``timeout`` seconds for the reader to make room.
+
+        Args:
+            lane: Lane owned by the calling process
+            operation_id: UUID of the operation
+            progress: Overall progress percentage (0-100)
+            status: Operation status
+            current_step_progress: Progress within current step (0-100)
+            step_index: Index of the current step, or -1 if unknown
+            total_steps: Total number of steps
+            items_processed: Work items processed so far
+            items_total: Total work items
+            label: Step label, or error message for failed records (truncated to 48 bytes)
+            timeout: Maximum time to wait for space for terminal records
+
+        Returns:
+            True if the record was published, False if it was dropped
+        """
+        offset = self._lane_offset(lane)
+        buf = self._buf
+        write_seq, read_seq, dropped, _ = _LANE_HEADER.unpack_from(buf, offset)
+
+        if write_seq - read_seq >= self.capacity:
+            deadline = time.monotonic() + timeout if status in _TERMINAL_STATUSES else 0.0
+            while True:
+                if time.monotonic() >= deadline:
+                    struct.pack_into("<Q", buf, offset + 16, dropped + 1)
+                    return False
+                time.sleep(0.001)
+                read_seq = struct.unpack_from("<Q", buf, offset + 8)[0]
+                if write_seq - read_seq < self.capacity:
+                    break
+
+        slot = offset + _LANE_HEADER_SIZE + (write_seq % self.capacity) * _RECORD_SIZE
+        _RECORD.pack_into(
+            buf, slot,
+            write_seq + 1,
+            _encode_operation_id(operation_id),
+            time.time(),
+            float(progress),
+            float("nan") if current_step_progress is None else float(current_step_progress),
+            _STATUS_INDEX[OperationStatus(status)],
+            step_index,
+            -1 if total_steps is None else total_steps,
+            max(0, int(items_processed)),
+            max(0, int(items_total)),
+            _encode_label(label)
+        )
+
+        # Publish only after the record body is in place
+        struct.pack_into("<Q", buf, offset, write_seq + 1)
+        return True
+
+    def read(self, lane: int, max_records: Optional[int] = None) -> List[ProgressRecord]:
+        """
+        Consume published records from a lane.
+
+        Args:
+            lane: Lane to read from
+            max_records: Optional maximum number of records to consume
+
+        Returns:
+            Records in publication order
+        """
+        offset = self._lane_offset(lane)
+        buf = self._buf
+        write_seq, read_seq = struct.unpack_from("<QQ", buf, offset)
+
+        if max_records is not None:
+            write_seq = min(write_seq, read_seq + max_records)
+
+        records = []
+        seq = read_seq
+        while seq < write_seq:
+            slot = offset + _LANE_HEADER_SIZE + (seq % self.capacity) * _RECORD_SIZE
+            (record_seq, op_bytes, timestamp, progress, step_progress, status_code,
+             step_index, total_steps, items_processed, items_total, label) = _RECORD.unpack_from(buf, slot)
+
+            # Stop at a slot whose body has not been published yet
+            if record_seq != seq + 1:
+                break
+
+            label = label.rstrip(b"\0").decode("utf-8", errors="ignore")
+            records.append(ProgressRecord(
+                operation_id=str(uuid.UUID(bytes=op_bytes)),
+                timestamp=timestamp,
+                progress=progress,
+                current_step_progress=None if math.isnan(step_progress) else step_progress,
+                status=_STATUS_CODES[status_code],
+                step_index=step_index,
+                total_steps=None if total_steps < 0 else total_steps,
+                items_processed=items_processed,
+                items_total=items_total,
+                label=label or None
+            ))
+            seq += 1
+
+        if seq != read_seq:
+            struct.pack_into("<Q", buf, offset + 8, seq)
+
+        return records
+
+    def dropped(self, lane: int) -> int:
+        """
+        Get the number of records dropped on a lane because it was full.
+
+        Args:
+            lane: Lane index
+
+        Returns:
+            Dropped record count
+        """
+        return struct.unpack_from("<Q", self._buf, self._lane_offset(lane) + 16)[0]
+
+    def request_cancel(self, lane: int, operation_id: str) -> None:
+        """
+        Ask the worker writing on a lane to cancel an operation.
+
+        Args:
+            lane: Lane the operation is reported on
+            operation_id: UUID of the operation to cancel
+        """
+        struct.pack_into("<16s", self._buf, self._lane_offset(lane) + 24, _encode_operation_id(operation_id))
+
+    def cancel_requested(self, lane: int, operation_id: str) -> bool:
+        """
+        Check whether cancellation was requested for an operation on a lane.
+
+        Args:
+            lane: Lane the operation is reported on
+            operation_id: UUID of the operation
+
+        Returns:
+            True if the parent requested cancellation
+        """
+        requested = struct.unpack_from("<16s", self._buf, self._lane_offset(lane) + 24)[0]
+        return requested == _encode_operation_id(operation_id)
+
+    def close(self) -> None:
+        """Detach from the ring, unlinking it if this instance created it."""
+        if self._shm is None:
+            return
+
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+class _RingProgressReporter(ProgressReporter):
+    """Worker-side progress reporter that also honours cancellation from the parent."""
+
+    def __init__(self, writer: "ProgressRingWriter", operation_type: str, operation_id: str,
+                 name: Optional[str] = None):
+        self._writer = writer
+        super().__init__(operation_type, name, operation_id=operation_id)
+
+    def should_cancel(self) -> bool:
+        """Check for local or parent-requested cancellation."""
+        if super().should_cancel():
+            return True
+
+        if self._writer.cancel_requested(self.operation_id):
+            # The parent already reported the cancellation, so stop writing
+            self.status = OperationStatus.CANCELED
+            self.finished = True
+            return True
+
+        return False
+
+
+class ProgressRingWriter:
+    """
+    Worker-side writer for a single lane of a shared progress ring.
+
+    The writer can be used directly through :meth:`write`, or as a
+    :class:`ProgressReporter` callback so that existing renderers report
+    through the ring unchanged.
+    """
+
+    def __init__(self, ring_name: str, lane: int):
+        """
+        Attach a writer to a ring lane.
+
+        Args:
+            ring_name: Shared memory name of the ring
+            lane: Lane owned by this process
+        """
+        self.ring = SharedProgressRing.attach(ring_name)
+        if not 0 <= lane < self.ring.lanes:
+            self.ring.close()
+            raise IndexError(f"Lane {lane} out of range (ring has {self.ring.lanes} lanes)")
+
+        self.lane = lane
+        self._step_indices: Dict[Tuple[str, str], int] = {}
+
+    def write(self, operation_id: str, progress: float, **kwargs) -> bool:
+        """
+        Publish a progress record on this writer's lane.
+
+        Args:
+            operation_id: UUID of the operation
+            progress: Overall progress percentage (0-100)
+            **kwargs: Additional record fields accepted by :meth:`SharedProgressRing.write`
+
+        Returns:
+            True if the record was published, False if it was dropped
+        """
+        return self.ring.write(self.lane, operation_id, progress, **kwargs)
+
+    def callback(self, progress_data: ProgressData) -> None:
+        """
+        ProgressReporter callback that forwards updates into the ring.
+
+        Step indices are assigned in the order distinct step labels are seen.
+        Work item counters are taken from the ``items_processed`` and
+        ``items_total`` detail keys when present.
+
+        Args:
+            progress_data: Progress update data
+        """
+        operation_id = progress_data.operation_id
+        status = OperationStatus(progress_data.status)
+        details = progress_data.details or {}
+
+        step_index = -1
+        label = progress_data.current_step
+        if label:
+            key = (operation_id, label)
+            step_index = self._step_indices.get(key, -1)
+            if step_index < 0:
+                step_index = sum(1 for op_id, _ in self._step_indices if op_id == operation_id)
+                self._step_indices[key] = step_index
+
+        if status == OperationStatus.FAILED:
+            label = details.get("error_message", label)
+
+        if status in _TERMINAL_STATUSES:
+            self._step_indices = {
+                key: index for key, index in self._step_indices.items() if key[0] != operation_id
+            }
+
+        self.ring.write(
+            self.lane,
+            operation_id,
+            progress_data.progress,
+            status=status,
+            current_step_progress=progress_data.current_step_progress,
+            step_index=step_index,
+            total_steps=progress_data.total_steps,
+            items_processed=details.get("items_processed", 0),
+            items_total=details.get("items_total", 0),
+            label=label
+        )
+
+    def create_reporter(self, operation_type: str, operation_id: str,
+                        name: Optional[str] = None) -> ProgressReporter:
+        """
+        Create a worker-side progress reporter bound to this lane.
+
+        Args:
+            operation_type: Type of operation
+            operation_id: Operation ID allocated by the parent process
+            name: Optional operation name
+
+        Returns:
+            ProgressReporter whose updates are written into the ring
+        """
+        reporter = _RingProgressReporter(self, operation_type, operation_id, name)
+        reporter.add_callback(self.callback)
+        return reporter
+
+    def cancel_requested(self, operation_id: str) -> bool:
+        """
+        Check whether the parent requested cancellation of an operation.
+
+        Args:
+            operation_id: UUID of the operation
+
+        Returns:
+            True if cancellation was requested
+        """
+        return self.ring.cancel_requested(self.lane, operation_id)
+
+    def close(self) -> None:
+        """Detach from the ring."""
+        self.ring.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+class SharedProgressBridge:
+    """
+    Drains a shared progress ring into the progress manager.
+
+    The bridge owns a parent-side :class:`ProgressReporter` per registered
+    operation. Records drained from the ring are conflated per operation (only
+    the latest state is applied per drain) and replayed through those reporters,
+    so progress manager callbacks and the WebSocket server see worker progress
+    exactly like in-process progress.
+    """
+
+    def __init__(self,
+                 ring: SharedProgressRing,
+                 progress_manager: Optional[ProgressManager] = None,
+                 poll_interval: float = 0.05):
+        """
+        Initialize the bridge.
+
+        Args:
+            ring: Ring to drain
+            progress_manager: Progress manager to register operations with
+                (defaults to the global progress manager)
+            poll_interval: Interval between drains in seconds
+        """
+        self.ring = ring
+        self.progress_manager = progress_manager or get_progress_manager()
+        self.poll_interval = poll_interval
+        self.reporters: Dict[str, ProgressReporter] = {}
+        self._operation_lanes: Dict[str, int] = {}
+        self._pending_cancels: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def register(self,
+                       operation_type: str,
+                       name: Optional[str] = None,
+                       parent: Optional[ProgressReporter] = None,
+                       weight: float = 1.0) -> ProgressReporter:
+        """
+        Register an operation that will be reported by a worker process.
+
+        Args:
+            operation_type: Type of operation
+            name: Optional operation name
+            parent: Optional parent operation (e.g. the batch job) to roll progress up into
+            weight: Share of the parent's progress the operation accounts for
+
+        Returns:
+            Parent-side ProgressReporter; pass its ``operation_id`` to the worker
+        """
+        if parent is not None:
+            reporter = parent.create_child(operation_type, name, weight)
+        else:
+            reporter = ProgressReporter(operation_type, name)
+        reporter.add_callback(self._parent_callback)
+        self.reporters[reporter.operation_id] = reporter
+        await self.progress_manager.add_operation(reporter)
+        return reporter
+
+    def _parent_callback(self, progress_data: ProgressData) -> None:
+        """Forward parent-side cancellation to the worker."""
+        if progress_data.status != OperationStatus.CANCELED:
+            return
+
+        operation_id = progress_data.operation_id
+        lane = self._operation_lanes.get(operation_id)
+        if lane is None:
+            # Worker hasn't reported yet; forward once its lane is known
+            self._pending_cancels.add(operation_id)
+        else:
+            self.ring.request_cancel(lane, operation_id)
+
+    def drain(self) -> int:
+        """
+        Drain all lanes and apply the latest state of each operation.
+
+        Returns:
+            Number of records consumed
+        """
+        consumed = 0
+        latest: Dict[str, ProgressRecord] = {}
+
+        for lane in range(self.ring.lanes):
+            records = self.ring.read(lane)
+            consumed += len(records)
+
+            for record in records:
+                operation_id = record.operation_id
+                if operation_id not in self._operation_lanes:
+                    self._operation_lanes[operation_id] = lane
+                    if operation_id in self._pending_cancels:
+                        self._pending_cancels.discard(operation_id)
+                        self.ring.request_cancel(lane, operation_id)
+
+                # Terminal records always win over later stray updates
+                previous = latest.get(operation_id)
+                if previous is None or previous.status not in _TERMINAL_STATUSES:
+                    latest[operation_id] = record
+
+        for operation_id, record in latest.items():
+            self._apply(record)
+
+        return consumed
+
+    def _apply(self, record: ProgressRecord) -> None:
+        """
+        Apply a drained record to its parent-side reporter.
+
+        Args:
+            record: Record to apply
+        """
+        reporter = self.reporters.get(record.operation_id)
+        if reporter is None:
+            logger.debug(f"Dropping progress record for unregistered operation {record.operation_id}")
+            return
+
+        details: Dict[str, Any] = {}
+        if record.items_total:
+            details["items_processed"] = record.items_processed
+            details["items_total"] = record.items_total
+        if record.step_index >= 0:
+            details["step_index"] = record.step_index
+
+        status = record.status
+        if status == OperationStatus.COMPLETED:
+            reporter.report_completed(details or None)
+        elif status == OperationStatus.FAILED:
+            reporter.report_failed(record.label or "Worker process reported failure", details=details or None)
+        elif status == OperationStatus.CANCELED:
+            if not reporter.is_finished():
+                reporter.report_canceled(details or None)
+        elif status == OperationStatus.PAUSED:
+            reporter.report_status(OperationStatus.PAUSED, details or None)
+        else:
+            reporter.report_progress(
+                record.progress,
+                current_step=record.label,
+                total_steps=record.total_steps,
+                current_step_progress=record.current_step_progress,
+                details=details or None
+            )
+
+        if reporter.is_finished():
+            self.reporters.pop(record.operation_id, None)
+            self._operation_lanes.pop(record.operation_id, None)
+            self._pending_cancels.discard(record.operation_id)
+
+    def start(self) -> None:
+        """Start draining the ring in a background task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain_loop())
+
+    async def stop(self) -> None:
+        """Stop the background drain task after a final drain."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        self.drain()
+
+    async def _drain_loop(self) -> None:
+        """Periodically drain the ring."""
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Error draining shared progress ring: {e}")
+
+            await asyncio.sleep(self.poll_interval)
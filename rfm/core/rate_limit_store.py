@@ -0,0 +1,509 @@
+"""
+Shared rate limit state for server worker processes.
+
+Each worker's :class:`~rfm.core.rate_limiting.RateLimiter` decides locally with
+its GCRA state and collects the emission intervals it granted since the last
+synchronization. A background task periodically hands these deltas to a store
+and merges the consumption of the other workers back in, so the store is
+never on the per-message path. Between two synchronizations workers can
+together exceed a limit by what they grant in one sync interval.
+
+Stores:
+
+- :class:`SharedMemoryRateLimitStore`: workers on one host exchange deltas
+  through a :class:`SharedRateLimitTable`. Each worker appends to its own lane
+  and reads the others' lanes, so no locks are needed.
+- :class:`RedisRateLimitStore`: workers on any host exchange deltas through a
+  stream on a Redis-compatible server. Needs the optional ``redis`` package.
+- :class:`LocalRateLimitStore`: in-process stand-in for the Redis store
+  (tests, several servers in one process).
+"""
+
+import json
+import struct
+import uuid
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .progress_shm import attach_shared_memory
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+# Rate limit key: (rule name, scope key)
+RateLimitKey = Tuple[str, str]
+
+# Table header: magic, version, lane count, lane capacity, record size
+_TABLE_MAGIC = b"RFMRLT01"
+_TABLE_VERSION = 1
+_TABLE_HEADER = struct.Struct("<8sIIII")
+_TABLE_HEADER_SIZE = 64
+
+# Lane header: write sequence, padded to a cache line
+_LANE_HEADER_SIZE = 64
+
+# Record: sequence, consumed seconds, key length, key ("<rule>\x1f<scope key>")
+_RECORD = struct.Struct("<QdH6x104s")
+_RECORD_SIZE = _RECORD.size
+
+MAX_KEY_BYTES = 104
+
+_KEY_SEPARATOR = "\x1f"
+
+
+def _encode_key(key: RateLimitKey) -> Optional[bytes]:
+    """Encode a key for the shared table, or None if it is too long."""
+    encoded = f"{key[0]}{_KEY_SEPARATOR}{key[1]}".encode("utf-8")
+    return encoded if len(encoded) <= MAX_KEY_BYTES else None
+
+
+def _merge_delta(tat: Dict[RateLimitKey, float], key: RateLimitKey, delta: float, now: float) -> None:
+    """Add consumption granted elsewhere to a key's arrival time."""
+    tat[key] = max(tat.get(key, now), now) + delta
+
+
+class SharedRateLimitTable:
+    """
+    Shared-memory table of rate limit deltas, one lane per worker.
+
+    A lane is a ring of records with a single writer (its worker) and any
+    number of readers. Readers keep their own cursor per lane; a reader that
+    falls more than a lane's capacity behind loses the overwritten records.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Initialize a table over an existing shared memory block.
+
+        Use :meth:`create` or :meth:`attach` instead of calling this directly.
+
+        Args:
+            shm: Shared memory block holding the table
+            owner: Whether this instance created (and should unlink) the block
+        """
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+
+        magic, version, lanes, capacity, record_size = _TABLE_HEADER.unpack_from(self._buf, 0)
+        if magic != _TABLE_MAGIC or version != _TABLE_VERSION or record_size != _RECORD_SIZE:
+            raise ValueError(f"Shared memory block {shm.name} is not a compatible rate limit table")
+
+        self.lanes = lanes
+        self.capacity = capacity
+        self._lane_stride = _LANE_HEADER_SIZE + capacity * _RECORD_SIZE
+
+    @classmethod
+    def create(cls, lanes: int, capacity: int = 16384, name: Optional[str] = None) -> "SharedRateLimitTable":
+        """
+        Create a new table.
+
+        Args:
+            lanes: Number of workers
+            capacity: Number of records each lane keeps
+            name: Optional shared memory name (generated if omitted)
+
+        Returns:
+            Owning SharedRateLimitTable instance
+        """
+        if lanes < 1 or capacity < 1:
+            raise ValueError("lanes and capacity must be positive")
+
+        size = _TABLE_HEADER_SIZE + lanes * (_LANE_HEADER_SIZE + capacity * _RECORD_SIZE)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _TABLE_HEADER.pack_into(shm.buf, 0, _TABLE_MAGIC, _TABLE_VERSION, lanes, capacity, _RECORD_SIZE)
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedRateLimitTable":
+        """
+        Attach to an existing table by name.
+
+        Args:
+            name: Shared memory name of the table
+
+        Returns:
+            Non-owning SharedRateLimitTable instance
+        """
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        """Shared memory name used by workers to attach."""
+        return self._shm.name
+
+    def _lane_offset(self, lane: int) -> int:
+        if not 0 <= lane < self.lanes:
+            raise IndexError(f"Lane {lane} out of range (table has {self.lanes} lanes)")
+        return _TABLE_HEADER_SIZE + lane * self._lane_stride
+
+    def write_seq(self, lane: int) -> int:
+        """
+        Get the number of records ever written to a lane.
+
+        Args:
+            lane: Lane index
+
+        Returns:
+            Write sequence of the lane
+        """
+        return struct.unpack_from("<Q", self._buf, self._lane_offset(lane))[0]
+
+    def append(self, lane: int, records: List[Tuple[bytes, float]]) -> int:
+        """
+        Append records to a lane.
+
+        Only the lane's worker may call this. At most ``capacity`` records are
+        written per call.
+
+        Args:
+            lane: Lane owned by the calling process
+            records: (encoded key, consumed seconds) pairs
+
+        Returns:
+            Number of records written
+        """
+        offset = self._lane_offset(lane)
+        buf = self._buf
+        write_seq = struct.unpack_from("<Q", buf, offset)[0]
+        records = records[:self.capacity]
+
+        for index, (key, delta) in enumerate(records):
+            seq = write_seq + index
+            slot = offset + _LANE_HEADER_SIZE + (seq % self.capacity) * _RECORD_SIZE
+            # Invalidate the slot while its body changes, then stamp it
+            _RECORD.pack_into(buf, slot, 0, delta, len(key), key)
+            struct.pack_into("<Q", buf, slot, seq + 1)
+
+        # Publish only after the record bodies are in place
+        struct.pack_into("<Q", buf, offset, write_seq + len(records))
+        return len(records)
+
+    def read(self, lane: int, cursor: int) -> Tuple[List[Tuple[bytes, float]], int, int]:
+        """
+        Read the records of a lane written after a cursor.
+
+        Args:
+            lane: Lane index
+            cursor: Write sequence up to which the caller has read
+
+        Returns:
+            Tuple of (records, new cursor, number of records lost because
+            they were overwritten)
+        """
+        offset = self._lane_offset(lane)
+        buf = self._buf
+        write_seq = struct.unpack_from("<Q", buf, offset)[0]
+
+        lost = 0
+        if write_seq - cursor > self.capacity:
+            lost = write_seq - self.capacity - cursor
+            cursor = write_seq - self.capacity
+
+        records = []
+        for seq in range(cursor, write_seq):
+            slot = offset + _LANE_HEADER_SIZE + (seq % self.capacity) * _RECORD_SIZE
+            record_seq, delta, length, key = _RECORD.unpack_from(buf, slot)
+
+            # Skip records the writer overwrote while they were being read
+            if record_seq == seq + 1 and struct.unpack_from("<Q", buf, slot)[0] == record_seq:
+                records.append((key[:length], delta))
+            else:
+                lost += 1
+
+        return records, write_seq, lost
+
+    def close(self) -> None:
+        """Detach from the table, unlinking it if this instance created it."""
+        if self._shm is None:
+            return
+
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+
+class RateLimitStore:
+    """
+    Base class for shared rate limit state.
+
+    Subclasses implement :meth:`sync`.
+    """
+
+    async def start(self) -> None:
+        """Connect to the shared state."""
+
+    async def stop(self) -> None:
+        """Disconnect from the shared state."""
+
+    async def sync(self,
+                   deltas: Dict[RateLimitKey, float],
+                   tat: Dict[RateLimitKey, float],
+                   now: float) -> None:
+        """
+        Publish local consumption and merge the consumption of other workers.
+
+        Args:
+            deltas: Seconds of emission interval granted locally per key since
+                the last sync
+            tat: The limiter's arrival times, updated in place
+            now: Current time
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary of counters
+        """
+        return {}
+
+
+class SharedMemoryRateLimitStore(RateLimitStore):
+    """Store exchanging deltas with the other workers of a host."""
+
+    def __init__(self, table_name: str, lane: int):
+        """
+        Initialize the store.
+
+        Args:
+            table_name: Shared memory name of the table
+            lane: This worker's lane
+        """
+        self.table_name = table_name
+        self.lane = lane
+        self.table: Optional[SharedRateLimitTable] = None
+        self._cursors: Dict[int, int] = {}
+
+        # Statistics
+        self.published = 0
+        self.received = 0
+        self.lost = 0
+        self.unshared = 0
+
+    async def start(self) -> None:
+        """Attach to the table, skipping records written before."""
+        self.table = SharedRateLimitTable.attach(self.table_name)
+        self._cursors = {
+            lane: self.table.write_seq(lane) for lane in range(self.table.lanes) if lane != self.lane
+        }
+
+    async def stop(self) -> None:
+        """Detach from the table."""
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    async def sync(self,
+                   deltas: Dict[RateLimitKey, float],
+                   tat: Dict[RateLimitKey, float],
+                   now: float) -> None:
+        """
+        Append local deltas to this worker's lane and apply the other lanes'.
+
+        Args:
+            deltas: Seconds of emission interval granted locally per key
+            tat: The limiter's arrival times, updated in place
+            now: Current time
+        """
+        records = []
+        for key, delta in deltas.items():
+            encoded = _encode_key(key)
+            if encoded is None:
+                self.unshared += 1
+            else:
+                records.append((encoded, delta))
+
+        written = self.table.append(self.lane, records)
+        self.published += written
+        self.lost += len(records) - written
+
+        for lane, cursor in self._cursors.items():
+            received, self._cursors[lane], lost = self.table.read(lane, cursor)
+            self.lost += lost
+            self.received += len(received)
+
+            for encoded, delta in received:
+                rule, _, scope_key = encoded.decode("utf-8").partition(_KEY_SEPARATOR)
+                _merge_delta(tat, (rule, scope_key), delta, now)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with published, received, lost and unshared records
+        """
+        return {
+            "published": self.published,
+            "received": self.received,
+            "lost": self.lost,
+            "unshared": self.unshared
+        }
+
+
+class LocalRateLimitHub:
+    """In-process delta log shared by :class:`LocalRateLimitStore` instances."""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the hub.
+
+        Args:
+            max_entries: Number of published batches kept for readers
+        """
+        self.entries: Deque[Tuple[int, str, Dict[RateLimitKey, float]]] = deque(maxlen=max_entries)
+        self.last_seq = 0
+
+    def publish(self, store_id: str, deltas: Dict[RateLimitKey, float]) -> None:
+        """Append a batch of deltas."""
+        self.last_seq += 1
+        self.entries.append((self.last_seq, store_id, deltas))
+
+
+class LocalRateLimitStore(RateLimitStore):
+    """
+    In-process stand-in for :class:`RedisRateLimitStore`.
+
+    Stores on one hub share their limits, e.g. limiters of several test
+    servers in one process.
+    """
+
+    def __init__(self, hub: LocalRateLimitHub):
+        """
+        Initialize the store.
+
+        Args:
+            hub: Hub shared with the other stores
+        """
+        self.hub = hub
+        self.store_id = uuid.uuid4().hex
+        self._cursor = 0
+
+    async def start(self) -> None:
+        """Skip batches published before."""
+        self._cursor = self.hub.last_seq
+
+    async def sync(self,
+                   deltas: Dict[RateLimitKey, float],
+                   tat: Dict[RateLimitKey, float],
+                   now: float) -> None:
+        """
+        Publish local deltas and apply the other stores' batches.
+
+        Args:
+            deltas: Seconds of emission interval granted locally per key
+            tat: The limiter's arrival times, updated in place
+            now: Current time
+        """
+        if deltas:
+            self.hub.publish(self.store_id, deltas)
+
+        for seq, store_id, batch in self.hub.entries:
+            if seq > self._cursor and store_id != self.store_id:
+                for key, delta in batch.items():
+                    _merge_delta(tat, key, delta, now)
+        self._cursor = self.hub.last_seq
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Store exchanging deltas through a stream on a Redis-compatible server.
+
+    Each sync adds one stream entry with the worker's deltas and reads the
+    entries of the other workers since the last sync. The stream is trimmed
+    to about ``max_entries`` entries.
+    """
+
+    def __init__(self,
+                 url: str = "redis://localhost:6379/0",
+                 stream: str = "rfm:ratelimit",
+                 max_entries: int = 10000):
+        """
+        Initialize the store.
+
+        Args:
+            url: Redis URL
+            stream: Stream key
+            max_entries: Approximate stream length
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("RedisRateLimitStore requires the 'redis' package")
+
+        self.url = url
+        self.stream = stream
+        self.max_entries = max_entries
+        self.store_id = uuid.uuid4().hex
+        self._redis = None
+        self._last_id = "0-0"
+
+    async def start(self) -> None:
+        """Connect to Redis, skipping entries added before."""
+        self._redis = aioredis.from_url(self.url)
+        latest = await self._redis.xrevrange(self.stream, count=1)
+        if latest:
+            self._last_id = latest[0][0]
+
+    async def stop(self) -> None:
+        """Close the Redis connection."""
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def sync(self,
+                   deltas: Dict[RateLimitKey, float],
+                   tat: Dict[RateLimitKey, float],
+                   now: float) -> None:
+        """
+        Publish local deltas and apply the other workers' entries.
+
+        Args:
+            deltas: Seconds of emission interval granted locally per key
+            tat: The limiter's arrival times, updated in place
+            now: Current time
+        """
+        if deltas:
+            payload = json.dumps([[rule, scope_key, delta] for (rule, scope_key), delta in deltas.items()])
+            await self._redis.xadd(
+                self.stream,
+                {"store": self.store_id, "deltas": payload},
+                maxlen=self.max_entries,
+                approximate=True
+            )
+
+        while True:
+            response = await self._redis.xread({self.stream: self._last_id}, count=1000)
+            if not response:
+                break
+
+            for entry_id, fields in response[0][1]:
+                self._last_id = entry_id
+                if fields[b"store"].decode() == self.store_id:
+                    continue
+                for rule, scope_key, delta in json.loads(fields[b"deltas"]):
+                    _merge_delta(tat, (rule, scope_key), delta, now)
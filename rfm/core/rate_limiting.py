@@ -3,8 +3,25 @@ Rate limiting module for WebSocket server.
 
 This module provides rate limiting capabilities for the WebSocket server
 to protect against abuse and ensure fair resource usage.
+
+Two algorithms are available:
+
+- ``sliding_window`` (default): counts the requests of the last ``period``
+  seconds exactly, at the cost of a request log per key.
+- ``gcra`` (opt-in): the generic cell rate algorithm, a token bucket holding
+  ``requests`` tokens that refills at ``requests / period`` per second. The
+  state per rule and scope key is a single float (the theoretical arrival
+  time), a check costs O(1) per rule, and keys whose bucket is full again
+  are evicted. Bursts are smoothed differently: a client that used up its
+  bucket gets one request every ``period / requests`` seconds instead of a
+  full window's worth once the window slides.
+
+With a :class:`~rfm.core.rate_limit_store.RateLimitStore`, GCRA limits are
+shared between server processes: checks stay local and a background task
+synchronizes the consumed tokens every ``sync_interval`` seconds.
 """
 
+import asyncio
 import logging
 import time
 from datetime import datetime
@@ -16,11 +33,22 @@ from collections import defaultdict
 from .logging_config import (
     get_logger, LogLevel, LogCategory
 )
+from .rate_limit_store import RateLimitStore
 
 
 # Configure logger
 logger = get_logger(__name__)
 
+# Allowance for float rounding of GCRA arrival times (seconds)
+_GCRA_TOLERANCE = 1e-6
+
+
+class RateLimitAlgorithm(str, Enum):
+    """Rate limit algorithm."""
+    
+    GCRA = "gcra"                      # Token bucket, O(1) state per key
+    SLIDING_WINDOW = "sliding_window"  # Exact request log per key
+
 
 class RateLimitScope(str, Enum):
     """Rate limit scope."""
@@ -88,29 +116,56 @@ class RateLimiter:
     
     Provides configurable rate limiting with:
     - Multiple scopes (global, client, user, IP)
-    - Time-window based tracking
+    - Token bucket (GCRA) or sliding window tracking
     - Action-specific limits
     """
     
-    def __init__(self, rules: Optional[List[RateLimitRule]] = None):
+    def __init__(self,
+                 rules: Optional[List[RateLimitRule]] = None,
+                 algorithm: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_WINDOW,
+                 eviction_interval: float = 10.0,
+                 store: Optional[RateLimitStore] = None,
+                 sync_interval: float = 0.1):
         """
         Initialize the rate limiter.
         
         Args:
             rules: List of rate limit rules
+            algorithm: Rate limit algorithm
+            eviction_interval: Seconds between sweeps of idle GCRA keys
+            store: Shared state to synchronize with (GCRA only)
+            sync_interval: Seconds between synchronizations with the store
         """
         self.rules = rules or []
+        self.algorithm = RateLimitAlgorithm(algorithm)
+        self.eviction_interval = eviction_interval
+        self.sync_interval = sync_interval
+        self.store: Optional[RateLimitStore] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self.syncs = 0
         
-        # Request tracking
+        # Emission intervals granted per key since the last sync (None
+        # without a store)
+        self._pending: Optional[Dict[Tuple[str, str], float]] = None
+        
+        # Request tracking (sliding window)
         # Structure: {rule_name: {scope_key: [(timestamp, count)]}}
         self.request_log: Dict[str, Dict[str, List[Tuple[float, int]]]] = defaultdict(lambda: defaultdict(list))
         
+        # Theoretical arrival time per (rule name, scope key) (GCRA). A key
+        # whose TAT has passed has a full bucket and needs no state.
+        self.tat: Dict[Tuple[str, str], float] = {}
+        self._next_eviction = time.time() + eviction_interval
+        
+        if store is not None:
+            self.set_store(store)
+        
         logger.structured_log(
             LogLevel.INFO,
             "Rate limiter initialized",
             LogCategory.SECURITY,
             component="rate_limiter",
-            context={"rule_count": len(self.rules)}
+            context={"rule_count": len(self.rules), "algorithm": self.algorithm.value}
         )
         
         # Log rules
@@ -163,6 +218,9 @@ class RateLimiter:
         """
         now = time.time()
         
+        if self.algorithm == RateLimitAlgorithm.GCRA:
+            return self._check_gcra(context, now)
+        
         # Check against each rule
         for rule in self.rules:
             # Skip rules for specific actions if they don't match
@@ -185,29 +243,170 @@ class RateLimiter:
             
             # Check if rate limit exceeded
             if total_requests >= rule.requests:
-                logger.structured_log(
-                    LogLevel.WARNING,
-                    f"Rate limit exceeded: {rule.name}",
-                    LogCategory.SECURITY,
-                    component="rate_limiter",
-                    context={
-                        "rule": rule.name,
-                        "requests": total_requests,
-                        "limit": rule.requests,
-                        "scope": rule.scope,
-                        "scope_key": scope_key,
-                        "client_id": context.client_id,
-                        "user_id": context.user_id,
-                        "ip_address": context.ip_address,
-                        "action": context.action
-                    }
-                )
+                self._log_exceeded(rule, scope_key, context, total_requests)
                 return False, rule
                 
         # Request is allowed, record it
         self._record_request(context)
         return True, None
     
+    def _check_gcra(self, context: RateLimitContext, now: float) -> Tuple[bool, Optional[RateLimitRule]]:
+        """
+        Check and record a request with the GCRA.
+        
+        A rule allows a request if its bucket holds a token, i.e. the
+        theoretical arrival time after the request is at most one period
+        ahead. The request is recorded only if every rule allows it.
+        
+        Args:
+            context: Rate limit context
+            now: Current time
+            
+        Returns:
+            Tuple of (is_allowed, rule_exceeded)
+        """
+        if now >= self._next_eviction:
+            self.evict_idle(now)
+        
+        tat = self.tat
+        updates = []
+        
+        for rule in self.rules:
+            # Skip rules for specific actions if they don't match
+            if rule.actions and context.action not in rule.actions:
+                continue
+            
+            key = (rule.name, context.get_key(rule.scope))
+            interval = rule.period / rule.requests
+            new_tat = max(tat.get(key, now), now) + interval
+            
+            if new_tat - now > rule.period + _GCRA_TOLERANCE:
+                self._log_exceeded(rule, key[1], context, rule.requests)
+                return False, rule
+            updates.append((key, new_tat, interval))
+        
+        pending = self._pending
+        for key, new_tat, interval in updates:
+            tat[key] = new_tat
+            if pending is not None:
+                pending[key] = pending.get(key, 0.0) + interval
+        return True, None
+    
+    def set_store(self, store: RateLimitStore) -> None:
+        """
+        Share GCRA limits through a store.
+        
+        Args:
+            store: Shared rate limit state
+        
+        Raises:
+            ValueError: If the limiter doesn't use the GCRA
+        """
+        if self.algorithm != RateLimitAlgorithm.GCRA:
+            raise ValueError("Shared rate limit state requires the gcra algorithm")
+        
+        self.store = store
+        self._pending = {}
+    
+    async def start_sync(self) -> None:
+        """Connect to the store and start periodic synchronization."""
+        if self.store is None or self._sync_task is not None:
+            return
+        
+        await self.store.start()
+        self._sync_task = asyncio.create_task(self._sync_loop())
+    
+    async def stop_sync(self) -> None:
+        """Stop periodic synchronization after a final sync."""
+        if self._sync_task is None:
+            return
+        
+        self._sync_task.cancel()
+        try:
+            await self._sync_task
+        except asyncio.CancelledError:
+            pass
+        self._sync_task = None
+        
+        try:
+            await self.synchronize()
+        finally:
+            await self.store.stop()
+    
+    async def synchronize(self) -> None:
+        """Publish the tokens granted since the last sync and merge other processes' tokens."""
+        if self.store is None:
+            return
+        
+        pending, self._pending = self._pending, {}
+        try:
+            await self.store.sync(pending, self.tat, time.time())
+        except Exception:
+            # Keep the tokens for the next attempt
+            for key, delta in pending.items():
+                self._pending[key] = self._pending.get(key, 0.0) + delta
+            raise
+        self.syncs += 1
+    
+    async def _sync_loop(self) -> None:
+        """Synchronize with the store every sync interval."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.synchronize()
+            except Exception as e:
+                logger.structured_log(
+                    LogLevel.ERROR,
+                    f"Failed to synchronize rate limits: {e}",
+                    LogCategory.SECURITY,
+                    component="rate_limiter",
+                    context={"store": type(self.store).__name__},
+                    error=str(e)
+                )
+                await asyncio.sleep(1.0)
+    
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        Drop the GCRA state of keys whose bucket has refilled.
+        
+        Args:
+            now: Current time (defaults to the current time)
+            
+        Returns:
+            Number of evicted keys
+        """
+        now = time.time() if now is None else now
+        idle = [key for key, tat in self.tat.items() if tat <= now]
+        for key in idle:
+            del self.tat[key]
+        
+        self._next_eviction = now + self.eviction_interval
+        return len(idle)
+    
+    def _log_exceeded(self,
+                      rule: RateLimitRule,
+                      scope_key: str,
+                      context: RateLimitContext,
+                      total_requests: int) -> None:
+        """Log a request denied by a rule."""
+        logger.structured_log(
+            LogLevel.WARNING,
+            f"Rate limit exceeded: {rule.name}",
+            LogCategory.SECURITY,
+            component="rate_limiter",
+            context={
+                "rule": rule.name,
+                "requests": total_requests,
+                "limit": rule.requests,
+                "scope": rule.scope,
+                "scope_key": scope_key,
+                "client_id": context.client_id,
+                "user_id": context.user_id,
+                "ip_address": context.ip_address,
+                "action": context.action
+            }
+        )
+    
     def _record_request(self, context: RateLimitContext) -> None:
         """
         Record a request for rate limiting.
@@ -258,6 +457,12 @@ class RateLimiter:
             # Get cache key for this rule and scope
             scope_key = context.get_key(rule.scope)
             
+            if self.algorithm == RateLimitAlgorithm.GCRA:
+                # Tokens left in the bucket
+                backlog = max(self.tat.get((rule.name, scope_key), now) - now, 0.0)
+                result[rule.name] = int((rule.period - backlog + _GCRA_TOLERANCE) * rule.requests / rule.period)
+                continue
+            
             # Get request log for this rule and scope
             request_log = self.request_log[rule.name][scope_key]
             
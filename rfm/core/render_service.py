@@ -0,0 +1,680 @@
+"""
+Server-side render jobs for the progress server.
+
+Clients submit fractal renders with ``submit_render``; the service queues them
+by priority, runs them on a worker pool and streams each finished band of
+rows to the requesting clients as a binary image frame (see
+:mod:`rfm.core.image_frame`). Jobs are reported as regular operations, so
+progress reaches every interested client.
+
+- At most ``max_jobs_per_user`` jobs of a user run at once; the user's other
+  jobs wait in the queue without blocking other users.
+- At most ``max_queued_per_user`` jobs of a user and ``max_queued`` jobs in
+  total wait in the queue; further requests are rejected with
+  :class:`RenderQueueFullError`.
+- An identical request (same kind and parameters) while a job is queued
+  joins that job instead of rendering again. Once a job runs, requests start
+  a new job, since the bands already streamed would be missing for them.
+- A job is canceled once no requester is left (``cancel_render`` or
+  disconnect). Queued jobs are dropped at once, running jobs after their
+  current band.
+- Bands are never dropped. Sending a frame waits until the connection can
+  take it; a connection that can't keep up is dropped from the job instead
+  (the frame callback returns False).
+
+Renderers take a parameter dictionary in the form of :func:`rfm.gpu_backend.mandelbrot`
+(``center_x``, ``center_y``, ``zoom``, ``width``, ``height``, ...) and return
+the image as a uint16 iteration array or a uint8 RGBA array. Requests choose
+the frame format: raw iteration counts, or RGBA colored with a matplotlib
+colormap in the worker. Each requester gets frames in the compression it
+asked for; a band is compressed once per compression in use.
+
+While the global sampling profiler runs, each band is sampled in its worker
+and the samples are added to the profiler, tagged with the job's operation
+ID and render parameters.
+
+Each job is a trace (see :mod:`rfm.core.tracing`): a ``render`` span with
+``validate``, ``queue``, and per band ``kernel``, ``colormap``,
+``serialize`` and ``send`` spans. A request may continue the trace of its
+sender; the trace ID is carried in the job's operation events.
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import json
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .. import gpu_backend
+from .image_frame import COMPRESSION_NONE, encode_image_frame
+from .logging_config import get_logger, LogLevel, LogCategory
+from .profiler import RENDER_TAGS, get_profiler, profile_call
+from .tracing import Span, get_tracer, valid_trace_id
+
+
+# Configure logger
+logger = get_logger(__name__)
+
+Renderer = Callable[[Dict[str, Any]], np.ndarray]
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+FrameCallback = Callable[[str, bytes], Awaitable[Optional[bool]]]
+
+DEFAULT_RENDERERS: Dict[str, Renderer] = {
+    "mandelbrot": gpu_backend.mandelbrot,
+    "julia": gpu_backend.julia,
+}
+
+# Defaults of the gpu_backend renderers, needed to split images into bands
+_DEFAULT_PARAMS: Dict[str, Dict[str, Any]] = {
+    "mandelbrot": {"center_x": -0.5, "center_y": 0.0, "zoom": 1.0, "max_iter": 100},
+    "julia": {"center_x": 0.0, "center_y": 0.0, "zoom": 1.5, "max_iter": 100, "c_real": -0.7, "c_imag": 0.27},
+}
+
+MAX_IMAGE_SIZE = 8192
+MAX_ITERATIONS = 65535
+
+PIXEL_FORMATS = ("iterations", "rgba")
+DEFAULT_COLORMAP = "viridis"
+
+
+class RenderRequestError(ValueError):
+    """Raised for invalid render requests."""
+
+
+class RenderQueueFullError(RenderRequestError):
+    """Raised when a render request would exceed the queue limits."""
+
+
+def colorize(iterations: np.ndarray, max_iter: int, colormap: str = DEFAULT_COLORMAP) -> np.ndarray:
+    """
+    Color iteration counts with a matplotlib colormap.
+
+    Points that reached ``max_iter`` (inside the set) are black.
+
+    Args:
+        iterations: Iteration counts
+        max_iter: Maximum iteration count of the render
+        colormap: Matplotlib colormap name
+
+    Returns:
+        uint8 RGBA image
+    """
+    from matplotlib import colormaps
+
+    lut = colormaps[colormap](np.linspace(0.0, 1.0, max_iter + 1), bytes=True)
+    lut[max_iter] = (0, 0, 0, 255)
+    return lut[np.minimum(iterations, max_iter)]
+
+
+def render_band(renderer: Renderer,
+                params: Dict[str, Any],
+                y: int,
+                rows: int,
+                colormap: Optional[str] = None) -> np.ndarray:
+    """
+    Render a band of rows of an image.
+
+    Runs in a worker; must stay a module-level function so it can be sent to
+    worker processes.
+
+    Args:
+        renderer: Renderer function
+        params: Parameters of the whole image
+        y: First row of the band
+        rows: Number of rows
+        colormap: Colormap to turn iteration counts into RGBA (None keeps
+            the renderer's output)
+
+    Returns:
+        Image of the band
+    """
+    return render_band_timed(renderer, params, y, rows, colormap)[0]
+
+
+def render_band_timed(renderer: Renderer,
+                      params: Dict[str, Any],
+                      y: int,
+                      rows: int,
+                      colormap: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, Tuple[float, float]]]:
+    """
+    Render a band of rows of an image, timing its stages.
+
+    Args:
+        renderer: Renderer function
+        params: Parameters of the whole image
+        y: First row of the band
+        rows: Number of rows
+        colormap: Colormap (see render_band)
+
+    Returns:
+        Tuple of (image of the band, stage name -> (start, end) wall-clock
+        times of the ``kernel`` and ``colormap`` stages)
+    """
+    width = params["width"]
+    height = params["height"]
+
+    # Same pixel size as the whole image: shift the center to the band
+    pixel_size = 4.0 / params["zoom"] / width
+    min_y = params["center_y"] - height * pixel_size / 2
+
+    band_params = dict(params, height=rows, center_y=min_y + (y + rows / 2) * pixel_size)
+    start = time.time()
+    image = renderer(band_params)
+    timings = {"kernel": (start, time.time())}
+    if colormap is not None and image.ndim == 2:
+        start = time.time()
+        image = colorize(image, params.get("max_iter") or int(image.max()), colormap)
+        timings["colormap"] = (start, time.time())
+    return image, timings
+
+
+def profiled_render_band(interval: float,
+                         renderer: Renderer,
+                         params: Dict[str, Any],
+                         y: int,
+                         rows: int,
+                         colormap: Optional[str] = None
+                         ) -> Tuple[np.ndarray, Dict[str, Tuple[float, float]], Dict[str, int]]:
+    """
+    Render a band while sampling the worker's stack.
+
+    Args:
+        interval: Seconds between samples
+        renderer: Renderer function
+        params: Parameters of the whole image
+        y: First row of the band
+        rows: Number of rows
+        colormap: Colormap (see render_band)
+
+    Returns:
+        Tuple of (image of the band, stage timings (see render_band_timed),
+        folded stack -> number of samples)
+    """
+    (image, timings), stacks = profile_call(
+        render_band_timed, renderer, params, y, rows, colormap, interval=interval
+    )
+    return image, timings, stacks
+
+
+class RenderJob:
+    """A queued or running render job."""
+
+    def __init__(self,
+                 job_id: str,
+                 key: str,
+                 kind: str,
+                 params: Dict[str, Any],
+                 priority: int,
+                 user_id: str,
+                 seq: int,
+                 colormap: Optional[str] = None,
+                 span: Optional[Span] = None):
+        self.job_id = job_id
+        self.key = key
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.user_id = user_id
+        self.seq = seq
+        self.colormap = colormap
+        # Connection ID -> frame compression
+        self.subscribers: Dict[str, int] = {}
+        self.status = "pending"
+        self.canceled = False
+        self.frames = 0
+        # Root span of the job's trace
+        self.span = span
+        self.queued_at = time.time()
+
+    @property
+    def trace_id(self) -> Optional[str]:
+        """Trace ID of the job."""
+        return self.span.trace_id if self.span is not None else None
+
+    def sort_key(self) -> Tuple[int, int]:
+        """Queue order: higher priority first, then submission order."""
+        return (-self.priority, self.seq)
+
+
+class RenderService:
+    """Priority-queued render jobs on a worker pool."""
+
+    def __init__(self,
+                 emit_event: EventCallback,
+                 send_frame: FrameCallback,
+                 max_workers: Optional[int] = None,
+                 max_jobs_per_user: int = 2,
+                 max_queued_per_user: int = 16,
+                 max_queued: int = 256,
+                 band_pixels: int = 262144,
+                 renderers: Optional[Dict[str, Renderer]] = None,
+                 executor: Optional[concurrent.futures.Executor] = None):
+        """
+        Initialize the render service.
+
+        Args:
+            emit_event: Coroutine function receiving operation events of jobs
+            send_frame: Coroutine function sending a frame to a connection;
+                returning False drops the connection from the job
+            max_workers: Number of jobs rendered at once (defaults to the CPU count)
+            max_jobs_per_user: Number of jobs of one user rendered at once
+            max_queued_per_user: Number of jobs of one user waiting in the queue
+            max_queued: Number of jobs waiting in the queue
+            band_pixels: Approximate number of pixels rendered per band
+            renderers: Renderer functions by kind (defaults to the gpu_backend
+                Mandelbrot and Julia renderers)
+            executor: Executor running the renderers (defaults to a process
+                pool created on first use)
+        """
+        self.emit_event = emit_event
+        self.send_frame = send_frame
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_jobs_per_user = max_jobs_per_user
+        self.max_queued_per_user = max_queued_per_user
+        self.max_queued = max_queued
+        self.band_pixels = band_pixels
+        self.renderers = renderers if renderers is not None else dict(DEFAULT_RENDERERS)
+
+        self._executor = executor
+        self._owns_executor = executor is None
+
+        self.jobs: Dict[str, RenderJob] = {}
+        self._by_key: Dict[str, RenderJob] = {}
+        self._queue: List[Tuple[Tuple[int, int], RenderJob]] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_per_user: Dict[str, int] = {}
+        self._queued_per_user: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+        # Statistics
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+
+    def _normalize(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate render parameters and fill in defaults.
+
+        Raises:
+            RenderRequestError: For unknown kinds or invalid parameters
+        """
+        if kind not in self.renderers:
+            raise RenderRequestError(f"Unknown render kind: {kind}")
+        if not isinstance(params, dict):
+            raise RenderRequestError("params must be an object")
+
+        normalized = dict(_DEFAULT_PARAMS.get(kind, {"center_x": 0.0, "center_y": 0.0, "zoom": 1.0}))
+        normalized.update({"width": 800, "height": 600})
+        normalized.update(params)
+
+        for name in ("width", "height"):
+            value = normalized[name]
+            if not isinstance(value, int) or not 1 <= value <= MAX_IMAGE_SIZE:
+                raise RenderRequestError(f"{name} must be an integer from 1 to {MAX_IMAGE_SIZE}")
+
+        max_iter = normalized.get("max_iter")
+        if max_iter is not None and (not isinstance(max_iter, int) or not 1 <= max_iter <= MAX_ITERATIONS):
+            raise RenderRequestError(f"max_iter must be an integer from 1 to {MAX_ITERATIONS}")
+
+        for name in ("center_x", "center_y", "zoom"):
+            if not isinstance(normalized[name], (int, float)) or isinstance(normalized[name], bool):
+                raise RenderRequestError(f"{name} must be a number")
+        if normalized["zoom"] <= 0:
+            raise RenderRequestError("zoom must be positive")
+
+        return normalized
+
+    @staticmethod
+    def _colormap(pixel_format: str, colormap: Optional[str]) -> Optional[str]:
+        """
+        Validate the frame format of a request.
+
+        Returns:
+            Colormap for RGBA frames, None for iteration counts
+
+        Raises:
+            RenderRequestError: For unknown formats or colormaps
+        """
+        if pixel_format not in PIXEL_FORMATS:
+            raise RenderRequestError(f"format must be one of {', '.join(PIXEL_FORMATS)}")
+        if pixel_format == "iterations":
+            return None
+
+        from matplotlib import colormaps
+
+        colormap = colormap or DEFAULT_COLORMAP
+        if colormap not in colormaps:
+            raise RenderRequestError(f"Unknown colormap: {colormap}")
+        return colormap
+
+    async def submit(self,
+                     connection_id: str,
+                     user_id: Optional[str],
+                     kind: str,
+                     params: Dict[str, Any],
+                     priority: int = 0,
+                     pixel_format: str = "iterations",
+                     colormap: Optional[str] = None,
+                     compression: int = COMPRESSION_NONE,
+                     trace_id: Optional[str] = None) -> Tuple[RenderJob, bool]:
+        """
+        Submit a render request.
+
+        Args:
+            connection_id: Requesting connection
+            user_id: Requesting user (the connection if unknown)
+            kind: Renderer kind (e.g. "mandelbrot")
+            params: Render parameters
+            priority: Higher priorities run first
+            pixel_format: "iterations" (uint16) or "rgba" (uint8) frames
+            colormap: Matplotlib colormap of RGBA frames
+            compression: COMPRESSION_* code of this requester's frames
+            trace_id: Trace of the requester to continue (a new trace is
+                started if omitted or not a valid trace ID)
+
+        Returns:
+            Tuple of (job, whether the request joined an identical queued job)
+
+        Raises:
+            RenderRequestError: If the request is invalid
+            RenderQueueFullError: If the user or the service has too many
+                queued jobs
+        """
+        validated_at = time.time()
+        params = self._normalize(kind, params)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise RenderRequestError("priority must be an integer")
+        colormap = self._colormap(pixel_format, colormap)
+        key = json.dumps([kind, params, colormap], sort_keys=True)
+
+        job = self._by_key.get(key)
+        if job is not None:
+            job.subscribers[connection_id] = compression
+            self.deduplicated += 1
+            return job, True
+
+        user_id = user_id or connection_id
+        if self._queued_per_user.get(user_id, 0) >= self.max_queued_per_user:
+            raise RenderQueueFullError(f"Too many queued render jobs (at most {self.max_queued_per_user} per user)")
+        if sum(self._queued_per_user.values()) >= self.max_queued:
+            raise RenderQueueFullError("Render queue is full")
+
+        tracer = get_tracer()
+        job_id = str(uuid.uuid4())
+        span = tracer.start_span("render", valid_trace_id(trace_id), start=validated_at, attributes={
+            "operation_id": job_id, "kind": kind, "width": params["width"], "height": params["height"]
+        })
+        job = RenderJob(
+            job_id, key, kind, params, priority,
+            user_id, next(self._seq), colormap, span
+        )
+        tracer.record_span("validate", validated_at, job.queued_at, span.trace_id, span.span_id)
+        job.subscribers[connection_id] = compression
+        self.jobs[job.job_id] = job
+        self._by_key[key] = job
+        heapq.heappush(self._queue, (job.sort_key(), job))
+        self._queued_per_user[user_id] = self._queued_per_user.get(user_id, 0) + 1
+        self.submitted += 1
+
+        await self.emit_event({
+            "type": "operation_started",
+            "operation": {
+                "operation_id": job.job_id,
+                "operation_type": "render",
+                "name": f"{kind.capitalize()} render {params['width']}x{params['height']}",
+                "status": "pending",
+                "progress": 0,
+                "start_time": time.time(),
+                "user_id": job.user_id,
+                "details": {"kind": kind, "priority": job.priority, "format": pixel_format}
+            },
+            "trace_id": job.trace_id,
+            "timestamp": time.time()
+        })
+
+        self._schedule()
+        return job, False
+
+    async def cancel(self, connection_id: str, job_id: str) -> bool:
+        """
+        Withdraw a connection's interest in a job.
+
+        The job is canceled when no requester is left.
+
+        Args:
+            connection_id: Connection
+            job_id: Job (operation) ID
+
+        Returns:
+            True if the connection had requested the job
+        """
+        job = self.jobs.get(job_id)
+        if job is None or connection_id not in job.subscribers:
+            return False
+
+        del job.subscribers[connection_id]
+        if not job.subscribers:
+            await self._cancel_job(job)
+        return True
+
+    async def connection_closed(self, connection_id: str) -> None:
+        """
+        Drop a closed connection from all jobs.
+
+        Args:
+            connection_id: Connection
+        """
+        for job in list(self.jobs.values()):
+            if connection_id in job.subscribers:
+                await self.cancel(connection_id, job.job_id)
+
+    async def stop(self) -> None:
+        """Cancel all jobs and shut down the worker pool."""
+        for job in list(self.jobs.values()):
+            job.subscribers.clear()
+            await self._cancel_job(job)
+
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get service statistics.
+
+        Returns:
+            Dictionary with queued and running jobs and request counters
+        """
+        return {
+            "queued": sum(1 for job in self.jobs.values() if job.status == "pending"),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed
+        }
+
+    async def _cancel_job(self, job: RenderJob) -> None:
+        """Cancel a job; running jobs stop after their current band."""
+        if job.canceled:
+            return
+
+        job.canceled = True
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+        # Queued jobs are skipped when they reach the head of the queue
+        if job.job_id not in self._running:
+            self._dequeued(job)
+            self.jobs.pop(job.job_id, None)
+            await self._emit_finished(job, "operation_canceled")
+
+    def _schedule(self) -> None:
+        """Start queued jobs while workers and per-user slots are free."""
+        deferred = []
+
+        while self._queue and len(self._running) < self.max_workers:
+            _, job = heapq.heappop(self._queue)
+            if job.canceled:
+                continue
+            if self._running_per_user.get(job.user_id, 0) >= self.max_jobs_per_user:
+                deferred.append(job)
+                continue
+
+            self._dequeued(job)
+            self._running_per_user[job.user_id] = self._running_per_user.get(job.user_id, 0) + 1
+            self._running[job.job_id] = asyncio.create_task(self._run(job))
+
+        for job in deferred:
+            heapq.heappush(self._queue, (job.sort_key(), job))
+
+    def _dequeued(self, job: RenderJob) -> None:
+        """Release a job's place in its user's queue."""
+        remaining = self._queued_per_user.get(job.user_id, 0) - 1
+        if remaining > 0:
+            self._queued_per_user[job.user_id] = remaining
+        else:
+            self._queued_per_user.pop(job.user_id, None)
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def _run(self, job: RenderJob) -> None:
+        """Render a job band by band, streaming each band as a frame."""
+        loop = asyncio.get_running_loop()
+        renderer = self.renderers[job.kind]
+        width, height = job.params["width"], job.params["height"]
+        rows = max(1, self.band_pixels // width)
+        outcome = "operation_completed"
+        error = None
+        tracer = get_tracer()
+        trace_id, parent_id = job.trace_id, job.span.span_id
+
+        job.status = "running"
+        tracer.record_span("queue", job.queued_at, time.time(), trace_id, parent_id)
+
+        # Late requesters would miss the bands streamed so far
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+        try:
+            for y in range(0, height, rows):
+                if job.canceled:
+                    outcome = "operation_canceled"
+                    break
+
+                band_rows = min(rows, height - y)
+                profiler = get_profiler()
+                if profiler.running:
+                    image, timings, stacks = await loop.run_in_executor(
+                        self._get_executor(), profiled_render_band, profiler.interval,
+                        renderer, job.params, y, band_rows, job.colormap
+                    )
+                    profiler.add_samples(stacks, self._profile_tags(job))
+                else:
+                    image, timings = await loop.run_in_executor(
+                        self._get_executor(), render_band_timed, renderer, job.params, y, band_rows, job.colormap
+                    )
+
+                band = {"band": job.frames, "y": y}
+                for stage, (start, end) in timings.items():
+                    tracer.record_span(stage, start, end, trace_id, parent_id, band)
+
+                frames: Dict[int, bytes] = {}
+                serialize_time = 0.0
+                sent_at = time.time()
+                for connection_id, compression in list(job.subscribers.items()):
+                    # Requesters may leave while an earlier one is being sent to
+                    if connection_id not in job.subscribers:
+                        continue
+                    if compression not in frames:
+                        start = time.time()
+                        frames[compression] = encode_image_frame(job.job_id, image, 0, y, compression)
+                        serialize_time += time.time() - start
+                    if await self.send_frame(connection_id, frames[compression]) is False:
+                        await self.cancel(connection_id, job.job_id)
+                job.frames += 1
+
+                if frames:
+                    end = time.time()
+                    tracer.record_span("serialize", sent_at, sent_at + serialize_time, trace_id, parent_id,
+                                       dict(band, compressions=len(frames)))
+                    tracer.record_span("send", sent_at + serialize_time, end, trace_id, parent_id,
+                                       dict(band, subscribers=len(job.subscribers)))
+
+                await self.emit_event({
+                    "type": "progress_update",
+                    "data": {
+                        "operation_id": job.job_id,
+                        "operation_type": "render",
+                        "status": "running",
+                        "progress": round(100.0 * (y + band_rows) / height, 2),
+                        "current_step": job.frames,
+                        "user_id": job.user_id,
+                        "trace_id": trace_id
+                    },
+                    "trace_id": trace_id,
+                    "timestamp": time.time()
+                })
+
+        except Exception as e:
+            outcome = "operation_failed"
+            error = str(e)
+
+            logger.structured_log(
+                LogLevel.ERROR,
+                f"Render job {job.job_id} failed: {e}",
+                LogCategory.OPERATION,
+                operation_id=job.job_id,
+                component="render_service",
+                context={"kind": job.kind, "user_id": job.user_id},
+                error=error
+            )
+
+        finally:
+            self._running.pop(job.job_id, None)
+            self._running_per_user[job.user_id] -= 1
+            if not self._running_per_user[job.user_id]:
+                del self._running_per_user[job.user_id]
+            self.jobs.pop(job.job_id, None)
+
+        if outcome == "operation_completed":
+            self.completed += 1
+        await self._emit_finished(job, outcome, error)
+        self._schedule()
+
+    @staticmethod
+    def _profile_tags(job: RenderJob) -> Dict[str, Any]:
+        """Get the profiler tags of a job's samples."""
+        tags = {"operation_id": job.job_id, "kind": job.kind}
+        tags.update((key, job.params[key]) for key in RENDER_TAGS if key in job.params)
+        return tags
+
+    async def _emit_finished(self, job: RenderJob, message_type: str, error: Optional[str] = None) -> None:
+        """Report the end of a job."""
+        job.status = message_type.rsplit("_", 1)[1]
+        details: Dict[str, Any] = {"frames": job.frames}
+        if error is not None:
+            details["error_message"] = error
+
+        if job.span is not None:
+            job.span.attributes.update(outcome=job.status, frames=job.frames)
+            get_tracer().end_span(job.span, error=error)
+
+        await self.emit_event({
+            "type": message_type,
+            "operation_id": job.job_id,
+            "details": details,
+            "trace_id": job.trace_id,
+            "timestamp": time.time()
+        })
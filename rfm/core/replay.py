@@ -0,0 +1,148 @@
+"""
+Replay ring for resumable client sessions.
+
+Every operation event the server relays gets a server-wide, monotonically
+increasing sequence number (``event_seq``) and is kept in a bounded ring. A
+reconnecting client presents the last sequence number it saw (and the epoch,
+i.e. the ID of the server that issued it); if the ring still holds every
+event after it, only those events are replayed. Otherwise the client falls
+back to a full operations snapshot.
+
+Replayed events are encoded at most once per codec, so a reconnect storm of
+clients missing the same events costs one serialization per event.
+"""
+
+import itertools
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from .codec import MessageCodec
+
+
+class ReplayEntry:
+    """One relayed event in the replay ring."""
+
+    __slots__ = ("seq", "message", "topics", "child_of", "_payloads")
+
+    def __init__(self,
+                 seq: int,
+                 message: Dict[str, Any],
+                 topics: Optional[List[str]] = None,
+                 child_of: Optional[str] = None):
+        self.seq = seq
+        self.message = message
+        self.topics = topics
+        self.child_of = child_of
+        self._payloads: Dict[str, Union[str, bytes]] = {}
+
+    def encode(self, codec: MessageCodec) -> Union[str, bytes]:
+        """
+        Get the event encoded with a codec, encoding it on first use.
+
+        Args:
+            codec: Message codec
+
+        Returns:
+            Encoded event
+        """
+        payload = self._payloads.get(codec.name)
+        if payload is None:
+            payload = codec.encode(self.message)
+            self._payloads[codec.name] = payload
+        return payload
+
+
+class ReplayBuffer:
+    """Bounded ring of the most recent relayed events."""
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Initialize the replay buffer.
+
+        Args:
+            capacity: Maximum number of events kept
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._entries: Deque[ReplayEntry] = deque(maxlen=capacity)
+        self.last_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest event still held (last_seq + 1 if empty)."""
+        return self._entries[0].seq if self._entries else self.last_seq + 1
+
+    def append(self,
+               message: Dict[str, Any],
+               topics: Optional[List[str]] = None,
+               child_of: Optional[str] = None) -> ReplayEntry:
+        """
+        Assign the next sequence number to an event and keep it.
+
+        Args:
+            message: Event message (not modified)
+            topics: Topics the event is published to
+            child_of: Parent operation ID for sub-operation events
+
+        Returns:
+            Entry whose message carries the ``event_seq``
+        """
+        self.last_seq += 1
+
+        # Copy the message bodies: the server keeps updating operation records
+        stamped = {key: dict(value) if isinstance(value, dict) else value for key, value in message.items()}
+        stamped["event_seq"] = self.last_seq
+
+        entry = ReplayEntry(self.last_seq, stamped, topics, child_of)
+        self._entries.append(entry)
+        return entry
+
+    def since(self, last_seq: int) -> Optional[List[ReplayEntry]]:
+        """
+        Get the events after a sequence number.
+
+        Args:
+            last_seq: Last sequence number the client saw
+
+        Returns:
+            Events after ``last_seq`` in order, or None if some of them are no
+            longer held (or ``last_seq`` was never issued)
+        """
+        if last_seq < 0 or last_seq > self.last_seq:
+            return None
+
+        start = last_seq + 1 - self.first_seq
+        if start < 0:
+            return None
+
+        return list(itertools.islice(self._entries, start, None))
+
+
+def compact(entries: List[ReplayEntry]) -> List[ReplayEntry]:
+    """
+    Drop progress updates that a later update of the same operation supersedes.
+
+    Args:
+        entries: Events in sequence order
+
+    Returns:
+        Events in sequence order, with only the latest progress update of
+        each operation
+    """
+    latest: Dict[str, int] = {}
+    for entry in entries:
+        if entry.message.get("type") == "progress_update":
+            operation_id = entry.message.get("data", {}).get("operation_id")
+            if operation_id:
+                latest[operation_id] = entry.seq
+
+    return [
+        entry for entry in entries
+        if entry.message.get("type") != "progress_update"
+        or latest.get(entry.message.get("data", {}).get("operation_id"), entry.seq) == entry.seq
+    ]
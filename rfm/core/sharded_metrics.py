@@ -0,0 +1,138 @@
+"""
+Per-thread sharded metric recorders.
+
+Hot paths that update metrics on every message should not take a lock per
+update. The recorders here give every thread its own shard, which only that
+thread writes, so recording is a plain attribute update. Readers sum the
+shards; :class:`~rfm.core.monitoring.MetricsRegistry` folds them into its
+metrics whenever metrics are read or exported.
+
+Shards of threads that have exited are folded into a base total and dropped
+(on reads and when a new shard is created), so thread churn in executors
+doesn't grow the shard list.
+"""
+
+import threading
+import weakref
+from typing import List, Tuple
+
+from .histogram import HistogramSnapshot
+
+
+class _CounterShard:
+    """Count of one thread."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+
+def _alive(thread_ref: "weakref.ref[threading.Thread]") -> bool:
+    """Whether the thread a shard belongs to may still write to it."""
+    thread = thread_ref()
+    return thread is not None and thread.is_alive()
+
+
+class ShardedCounter:
+    """Counter incremented without locking, one shard per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Tuple["weakref.ref[threading.Thread]", _CounterShard]] = []
+        self._base = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: float = 1) -> None:
+        """
+        Add to the counter.
+
+        Args:
+            amount: Amount to add
+        """
+        try:
+            self._local.shard.value += amount
+        except AttributeError:
+            self._new_shard().value += amount
+
+    def _new_shard(self) -> _CounterShard:
+        """Create the calling thread's shard."""
+        shard = _CounterShard()
+        with self._lock:
+            self._fold_exited()
+            self._shards.append((weakref.ref(threading.current_thread()), shard))
+        self._local.shard = shard
+        return shard
+
+    def _fold_exited(self) -> None:
+        """Move the counts of exited threads into the base (caller holds the lock)."""
+        live = []
+        for thread_ref, shard in self._shards:
+            if _alive(thread_ref):
+                live.append((thread_ref, shard))
+            else:
+                self._base += shard.value
+        self._shards = live
+
+    @property
+    def value(self) -> float:
+        """Total of all shards."""
+        with self._lock:
+            self._fold_exited()
+            return self._base + sum(shard.value for _, shard in self._shards)
+
+
+class ShardedHistogram:
+    """Histogram recorded without locking, one shard per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Tuple["weakref.ref[threading.Thread]", HistogramSnapshot]] = []
+        self._base = HistogramSnapshot()
+        self._lock = threading.Lock()
+
+    def record(self, value: float) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: Value
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.record(value)
+
+    def _new_shard(self) -> HistogramSnapshot:
+        """Create the calling thread's shard."""
+        shard = HistogramSnapshot()
+        with self._lock:
+            self._fold_exited()
+            self._shards.append((weakref.ref(threading.current_thread()), shard))
+        self._local.shard = shard
+        return shard
+
+    def _fold_exited(self) -> None:
+        """Merge the values of exited threads into the base (caller holds the lock)."""
+        live = []
+        for thread_ref, shard in self._shards:
+            if _alive(thread_ref):
+                live.append((thread_ref, shard))
+            else:
+                self._base.merge(shard)
+        self._shards = live
+
+    def snapshot(self) -> HistogramSnapshot:
+        """
+        Get all values recorded so far.
+
+        Returns:
+            New snapshot merging the shards
+        """
+        with self._lock:
+            self._fold_exited()
+            merged = self._base.copy()
+            for _, shard in self._shards:
+                merged.merge(shard.copy())
+        return merged
@@ -0,0 +1,253 @@
+"""
+Hashed timer wheel for RFM Architecture.
+
+This module provides a process-wide hashed timer wheel used for operation
+retention. Scheduling, rescheduling and canceling a timer are O(1), and expired
+timers are delivered in batches per callback, so thousands of finished
+operations cost one callback per tick instead of one sleeping task each.
+
+A single background task on the asyncio event loop drives the wheel. Owners
+that keep the wheel running (such as servers) ``acquire`` it on start and
+``release`` it on stop; the task stops when the last owner releases it.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from typing import Dict, Any, Optional, List, Callable, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Callback receiving the keys of all timers that expired in one batch
+ExpiryCallback = Callable[[List[Hashable]], Any]
+
+
+class _Timer:
+    """A scheduled timer."""
+
+    __slots__ = ("key", "callback", "deadline_tick", "slot")
+
+    def __init__(self, key: Hashable, callback: ExpiryCallback, deadline_tick: int, slot: int):
+        self.key = key
+        self.callback = callback
+        self.deadline_tick = deadline_tick
+        self.slot = slot
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel with batched expiry.
+
+    Timers are identified by ``(callback, key)``, so different owners can use
+    the same keys (e.g. operation IDs) without colliding. Scheduling an
+    existing timer again moves its deadline.
+    """
+
+    def __init__(self, tick_interval: float = 1.0, slots: int = 512):
+        """
+        Initialize the timer wheel.
+
+        Args:
+            tick_interval: Resolution of the wheel in seconds
+            slots: Number of wheel slots
+        """
+        if tick_interval <= 0 or slots < 1:
+            raise ValueError("tick_interval and slots must be positive")
+
+        self.tick_interval = tick_interval
+        self.slots = slots
+        self._wheel: List[Dict[Tuple[ExpiryCallback, Hashable], _Timer]] = [{} for _ in range(slots)]
+        self._timers: Dict[Tuple[ExpiryCallback, Hashable], _Timer] = {}
+        self._origin = time.monotonic()
+        self._next_tick = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._owners = 0
+
+    def _tick_at(self, when: float) -> int:
+        """Get the wheel tick containing a monotonic time."""
+        return int((when - self._origin) / self.tick_interval)
+
+    def schedule(self, key: Hashable, delay: float, callback: ExpiryCallback) -> None:
+        """
+        Schedule (or reschedule) a timer.
+
+        Args:
+            key: Timer key passed back to the callback on expiry
+            delay: Delay in seconds
+            callback: Function (or coroutine function) called with a list of expired keys
+        """
+        deadline_tick = math.ceil((time.monotonic() + max(0.0, delay) - self._origin) / self.tick_interval)
+
+        with self._lock:
+            deadline_tick = max(deadline_tick, self._next_tick)
+            slot = deadline_tick % self.slots
+            identity = (callback, key)
+
+            previous = self._timers.get(identity)
+            if previous is not None:
+                del self._wheel[previous.slot][identity]
+
+            timer = _Timer(key, callback, deadline_tick, slot)
+            self._wheel[slot][identity] = timer
+            self._timers[identity] = timer
+
+        self._ensure_running()
+
+    def cancel(self, key: Hashable, callback: ExpiryCallback) -> bool:
+        """
+        Cancel a timer.
+
+        Args:
+            key: Timer key
+            callback: Callback the timer was scheduled with
+
+        Returns:
+            True if a pending timer was canceled
+        """
+        identity = (callback, key)
+
+        with self._lock:
+            timer = self._timers.pop(identity, None)
+            if timer is None:
+                return False
+
+            del self._wheel[timer.slot][identity]
+            return True
+
+    def pending_count(self) -> int:
+        """
+        Get the number of pending timers.
+
+        Returns:
+            Number of scheduled timers that have not expired
+        """
+        return len(self._timers)
+
+    def collect_expired(self, now: Optional[float] = None) -> List[Tuple[ExpiryCallback, List[Hashable]]]:
+        """
+        Advance the wheel and remove all expired timers.
+
+        Args:
+            now: Monotonic time to advance to (defaults to the current time)
+
+        Returns:
+            List of (callback, expired keys) batches
+        """
+        target_tick = self._tick_at(time.monotonic() if now is None else now)
+        batches: Dict[ExpiryCallback, List[Hashable]] = {}
+
+        with self._lock:
+            if target_tick < self._next_tick:
+                return []
+
+            # Each slot needs visiting at most once, however far the wheel advances
+            ticks = min(target_tick - self._next_tick + 1, self.slots)
+            for tick in range(self._next_tick, self._next_tick + ticks):
+                bucket = self._wheel[tick % self.slots]
+                if not bucket:
+                    continue
+
+                expired = [identity for identity, timer in bucket.items()
+                           if timer.deadline_tick <= target_tick]
+                for identity in expired:
+                    timer = bucket.pop(identity)
+                    del self._timers[identity]
+                    batches.setdefault(timer.callback, []).append(timer.key)
+
+            self._next_tick = target_tick + 1
+
+        return list(batches.items())
+
+    async def advance(self, now: Optional[float] = None) -> int:
+        """
+        Advance the wheel and run callbacks for expired timers.
+
+        Args:
+            now: Monotonic time to advance to (defaults to the current time)
+
+        Returns:
+            Number of timers that expired
+        """
+        expired_count = 0
+
+        for callback, keys in self.collect_expired(now):
+            expired_count += len(keys)
+            try:
+                result = callback(keys)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in timer wheel expiry callback: {e}")
+
+        return expired_count
+
+    def _ensure_running(self) -> None:
+        """Start the background task if an event loop is running and no task serves it."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop in this thread; timers fire once the wheel is started
+            return
+
+        task = self._task
+        if task is not None and not task.done():
+            task_loop = task.get_loop()
+            if task_loop is loop or task_loop.is_running():
+                return
+
+        self._task = loop.create_task(self._run())
+
+    def start(self) -> None:
+        """Start the background task on the running event loop."""
+        self._ensure_running()
+
+    def acquire(self) -> None:
+        """Register an owner of the wheel and start the background task."""
+        with self._lock:
+            self._owners += 1
+        self._ensure_running()
+
+    async def release(self) -> None:
+        """Unregister an owner; the last owner stops the background task."""
+        with self._lock:
+            self._owners = max(0, self._owners - 1)
+            last = self._owners == 0
+        if last:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Stop the background task. Pending timers are kept."""
+        task, self._task = self._task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        """Background task driving the wheel."""
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            await self.advance()
+
+
+# Global timer wheel instance
+_timer_wheel = None
+
+
+def get_timer_wheel() -> TimerWheel:
+    """
+    Get the global timer wheel instance.
+
+    Returns:
+        TimerWheel instance
+    """
+    global _timer_wheel
+    if _timer_wheel is None:
+        _timer_wheel = TimerWheel()
+    return _timer_wheel
@@ -0,0 +1,144 @@
+"""
+Compact time series for metrics.
+
+A :class:`TimeSeries` keeps the most recent samples of a metric in
+preallocated numpy arrays of float64 timestamps and values, so recording
+a sample allocates no Python objects. Every sample is written twice, at
+``i`` and ``i + capacity``, which keeps the latest ``capacity`` samples
+contiguous: exports are read-only views of the buffers, without copying,
+and window aggregates are vectorized over them.
+"""
+
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+
+class TimeSeries:
+    """Ring buffer of (timestamp, value) samples."""
+
+    __slots__ = ("capacity", "_timestamps", "_values", "_next", "_count")
+
+    def __init__(self, capacity: int = 100):
+        """
+        Initialize the time series.
+
+        Args:
+            capacity: Number of most recent samples to keep
+
+        Raises:
+            ValueError: If the capacity is not positive
+        """
+        if capacity < 1:
+            raise ValueError(f"Time series capacity must be positive, got {capacity}")
+
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self._values = np.zeros(2 * capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: Union[int, float], timestamp: Optional[float] = None) -> None:
+        """
+        Record a sample, replacing the oldest one when full.
+
+        Args:
+            value: Sample value
+            timestamp: Sample time (defaults to the current time)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        index = self._next
+        mirror = index + self.capacity
+        self._timestamps[index] = self._timestamps[mirror] = timestamp
+        self._values[index] = self._values[mirror] = value
+
+        self._next = index + 1 if index + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def clear(self) -> None:
+        """Remove all samples."""
+        self._next = 0
+        self._count = 0
+
+    def arrays(self, window: Optional[float] = None, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the samples, oldest first, as read-only views of the buffers.
+
+        The views are only valid until the next append; copy them to keep
+        the samples.
+
+        Args:
+            window: Only include samples of the last this many seconds
+                (None for all samples)
+            now: End of the window (defaults to the current time)
+
+        Returns:
+            Tuple of (timestamps, values) arrays
+        """
+        end = self._next + self.capacity if self._count == self.capacity else self._next
+        start = end - self._count
+
+        timestamps = self._timestamps[start:end]
+        values = self._values[start:end]
+
+        if window is not None:
+            cutoff = (time.time() if now is None else now) - window
+            first = int(np.searchsorted(timestamps, cutoff, side="left"))
+            timestamps = timestamps[first:]
+            values = values[first:]
+
+        timestamps.flags.writeable = False
+        values.flags.writeable = False
+        return timestamps, values
+
+    def latest(self, count: int) -> np.ndarray:
+        """
+        Get the values of the most recent samples.
+
+        Args:
+            count: Maximum number of samples
+
+        Returns:
+            Read-only view of up to ``count`` values, oldest first
+        """
+        return self.arrays()[1][-count:]
+
+    def aggregate(self, window: Optional[float] = None, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Get statistics of the samples in a window.
+
+        Args:
+            window: Only include samples of the last this many seconds
+                (None for all samples)
+            now: End of the window (defaults to the current time)
+
+        Returns:
+            Dictionary with count, sum, mean, min, max and rate (sum per
+            second over the window, or over the span of the samples when no
+            window is given); None where there are no samples
+        """
+        now = time.time() if now is None else now
+        timestamps, values = self.arrays(window, now)
+        count = len(values)
+
+        if not count:
+            return {"count": 0, "sum": 0.0, "mean": None, "min": None, "max": None, "rate": None}
+
+        total = float(values.sum())
+        span = window if window is not None else now - float(timestamps[0])
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count,
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "rate": total / span if span > 0 else None
+        }
@@ -0,0 +1,222 @@
+"""
+Topic subscriptions for progress streams.
+
+Clients can narrow the operation events they receive to topics:
+
+- ``operation:<operation_id>``: one operation (and its sub-operations)
+- ``type:<operation_type>``: all operations of a type, e.g. ``type:render``
+- ``user:<user_id>``: all operations started by a user
+
+A client without subscriptions receives every event. The topic index maps
+each topic to the set of subscribed connections, so a broadcast only touches
+unfiltered clients and the subscribers of the event's topics.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Supported topic kinds
+TOPIC_KINDS = ("operation", "type", "user")
+
+
+def make_topic(kind: str, value: str) -> str:
+    """
+    Build a topic string.
+
+    Args:
+        kind: Topic kind (one of ``TOPIC_KINDS``)
+        value: Operation ID, operation type or user ID
+
+    Returns:
+        Topic string
+
+    Raises:
+        ValueError: If the kind is unknown or the value is empty
+    """
+    if kind not in TOPIC_KINDS:
+        raise ValueError(f"Unknown topic kind: {kind}")
+    if not value:
+        raise ValueError(f"Empty {kind} topic")
+
+    return f"{kind}:{value}"
+
+
+def parse_topic(topic: str) -> Tuple[str, str]:
+    """
+    Split a topic string into kind and value.
+
+    Args:
+        topic: Topic string
+
+    Returns:
+        Tuple of (kind, value)
+
+    Raises:
+        ValueError: If the topic is malformed
+    """
+    if not isinstance(topic, str) or ":" not in topic:
+        raise ValueError(f"Invalid topic: {topic!r}")
+
+    kind, value = topic.split(":", 1)
+    make_topic(kind, value)
+    return kind, value
+
+
+def operation_topics(operation_id: str,
+                     operation_type: Optional[str] = None,
+                     user_id: Optional[str] = None) -> List[str]:
+    """
+    Get the topics an operation's events are published to.
+
+    Args:
+        operation_id: Operation ID
+        operation_type: Optional operation type
+        user_id: Optional ID of the user who started the operation
+
+    Returns:
+        List of topics
+    """
+    topics = [make_topic("operation", operation_id)]
+
+    if operation_type:
+        topics.append(make_topic("type", operation_type))
+    if user_id:
+        topics.append(make_topic("user", user_id))
+
+    return topics
+
+
+class TopicIndex:
+    """
+    Index from topic to subscribed connections.
+
+    Connections are registered unfiltered and become filtered with their first
+    subscription; unsubscribing from everything makes them unfiltered again.
+    """
+
+    def __init__(self):
+        """Initialize the index."""
+        self._subscribers: Dict[str, Set[str]] = {}
+        self._topics: Dict[str, Set[str]] = {}
+        self._unfiltered: Set[str] = set()
+
+    def add_connection(self, connection_id: str) -> None:
+        """
+        Register a connection without subscriptions.
+
+        Args:
+            connection_id: Connection ID
+        """
+        if connection_id not in self._topics:
+            self._unfiltered.add(connection_id)
+
+    def remove_connection(self, connection_id: str) -> None:
+        """
+        Remove a connection and all its subscriptions.
+
+        Args:
+            connection_id: Connection ID
+        """
+        self.unsubscribe(connection_id)
+        self._unfiltered.discard(connection_id)
+
+    def subscribe(self, connection_id: str, topics: Iterable[str]) -> Set[str]:
+        """
+        Subscribe a connection to topics.
+
+        Args:
+            connection_id: Connection ID
+            topics: Topics to subscribe to
+
+        Returns:
+            All topics the connection is subscribed to
+        """
+        subscribed = self._topics.setdefault(connection_id, set())
+
+        for topic in topics:
+            subscribed.add(topic)
+            self._subscribers.setdefault(topic, set()).add(connection_id)
+
+        if subscribed:
+            self._unfiltered.discard(connection_id)
+        else:
+            del self._topics[connection_id]
+
+        return set(subscribed)
+
+    def unsubscribe(self, connection_id: str, topics: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Unsubscribe a connection from topics.
+
+        Args:
+            connection_id: Connection ID
+            topics: Topics to unsubscribe from, or None for all topics
+
+        Returns:
+            Topics the connection remains subscribed to
+        """
+        subscribed = self._topics.get(connection_id)
+        if subscribed is None:
+            return set()
+
+        for topic in list(subscribed if topics is None else topics):
+            if topic not in subscribed:
+                continue
+
+            subscribed.discard(topic)
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection_id)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+        if not subscribed:
+            del self._topics[connection_id]
+            self._unfiltered.add(connection_id)
+
+        return set(subscribed)
+
+    def topics_of(self, connection_id: str) -> Set[str]:
+        """
+        Get the topics a connection is subscribed to.
+
+        Args:
+            connection_id: Connection ID
+
+        Returns:
+            Set of topics (empty for unfiltered connections)
+        """
+        return set(self._topics.get(connection_id, ()))
+
+    def matches(self, connection_id: str, topics: Iterable[str]) -> bool:
+        """
+        Check whether a connection receives events published to topics.
+
+        Args:
+            connection_id: Connection ID
+            topics: Topics of the event
+
+        Returns:
+            True if the connection is unfiltered or subscribed to any of the topics
+        """
+        subscribed = self._topics.get(connection_id)
+        return subscribed is None or not subscribed.isdisjoint(topics)
+
+    def recipients(self, topics: Iterable[str]) -> Set[str]:
+        """
+        Get the connections receiving an event published to topics.
+
+        Args:
+            topics: Topics of the event
+
+        Returns:
+            Set of connection IDs
+        """
+        recipients = set(self._unfiltered)
+
+        for topic in topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers:
+                recipients |= subscribers
+
+        return recipients
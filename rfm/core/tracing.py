@@ -0,0 +1,592 @@
+"""
+Lightweight trace and span propagation.
+
+A trace follows one piece of work, such as a render, through the engine, the
+progress server and the clients. Its ID travels in
+:attr:`~rfm.core.progress.ProgressData.trace_id` and in the ``trace_id``
+field of WebSocket message envelopes, so each stage can record spans
+(validate, kernel, colormap, serialize, queue, send, ...) under the same
+trace and the latency of each stage becomes visible.
+
+Within a process the current span is held in a context variable, so it
+follows asyncio tasks and :meth:`Tracer.span` blocks nest. Timings measured
+elsewhere, e.g. in a worker process, are added with :meth:`Tracer.record_span`.
+
+Spans are exported in batches from a background thread, in the OTLP JSON
+encoding: :class:`FileSpanExporter` appends one ``ExportTraceServiceRequest``
+per line to a file, :class:`OTLPHttpSpanExporter` posts them to an
+OTLP/HTTP collector (``tools/trace_collector.py`` is a local stand-in).
+Without an exporter, spans are still created so trace IDs propagate, but
+nothing is recorded.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+from .logging_config import get_logger, LogCategory, LogLevel
+
+# Get logger
+logger = get_logger(__name__)
+
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+
+# W3C trace context trace ID: 32 lowercase hex digits
+_TRACE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# OTLP span status codes
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+def new_trace_id() -> str:
+    """Generate a trace ID (32 hex digits, as in W3C trace context)."""
+    return "%032x" % random.getrandbits(128)
+
+
+def valid_trace_id(value: Any) -> Optional[str]:
+    """
+    Check a trace ID received from outside the process.
+
+    Collectors reject export requests with malformed trace IDs, so IDs from
+    clients must be checked before spans are recorded under them.
+
+    Args:
+        value: Received value
+
+    Returns:
+        The trace ID if it is 32 lowercase hex digits and not all zeros,
+        else None
+    """
+    if isinstance(value, str) and _TRACE_ID_PATTERN.fullmatch(value) and value != "0" * 32:
+        return value
+    return None
+
+
+def new_span_id() -> str:
+    """Generate a span ID (16 hex digits)."""
+    return "%016x" % random.getrandbits(64)
+
+
+class Span:
+    """A timed stage of a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self,
+                 name: str,
+                 trace_id: str,
+                 parent_id: Optional[str] = None,
+                 start: Optional[float] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        """
+        Initialize a span.
+
+        Args:
+            name: Stage name
+            trace_id: Trace the span belongs to
+            parent_id: Span ID of the enclosing span
+            start: Start time in seconds since the epoch (defaults to now)
+            attributes: Span attributes
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """Duration in milliseconds, None while the span is open."""
+        return None if self.end is None else (self.end - self.start) * 1000
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        Convert to an OTLP JSON span.
+
+        Returns:
+            Span object of an ``ExportTraceServiceRequest``
+        """
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(int(self.start * 1e9)),
+            "endTimeUnixNano": str(int((self.start if self.end is None else self.end) * 1e9)),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": STATUS_UNSET} if self.error is None else {"code": STATUS_ERROR, "message": self.error}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode an attribute as an OTLP key-value pair."""
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def otlp_request(spans: Sequence[Span], service_name: str) -> Dict[str, Any]:
+    """
+    Build an OTLP ``ExportTraceServiceRequest``.
+
+    Args:
+        spans: Finished spans
+        service_name: Value of the ``service.name`` resource attribute
+
+    Returns:
+        Request in the OTLP JSON encoding
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.to_otlp() for span in spans]
+            }]
+        }]
+    }
+
+
+def otlp_spans(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten an OTLP ``ExportTraceServiceRequest``.
+
+    Args:
+        request: Request in the OTLP JSON encoding
+
+    Returns:
+        List of span dictionaries with ``service``, ``name``, ``trace_id``,
+        ``span_id``, ``parent_id``, ``start``, ``duration_ms`` and
+        ``attributes``
+    """
+    spans = []
+    for resource_spans in request.get("resourceSpans", []):
+        resource = {
+            attribute["key"]: next(iter(attribute["value"].values()))
+            for attribute in resource_spans.get("resource", {}).get("attributes", [])
+        }
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                start = int(span["startTimeUnixNano"])
+                spans.append({
+                    "service": resource.get("service.name"),
+                    "name": span["name"],
+                    "trace_id": span["traceId"],
+                    "span_id": span["spanId"],
+                    "parent_id": span.get("parentSpanId"),
+                    "start": start / 1e9,
+                    "duration_ms": (int(span["endTimeUnixNano"]) - start) / 1e6,
+                    "attributes": {
+                        attribute["key"]: next(iter(attribute["value"].values()))
+                        for attribute in span.get("attributes", [])
+                    }
+                })
+    return spans
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the spans of an OTLP JSON lines file.
+
+    Args:
+        path: File written by FileSpanExporter or the collector stand-in
+
+    Returns:
+        Flattened spans (see otlp_spans)
+    """
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.extend(otlp_spans(json.loads(line)))
+    return spans
+
+
+def latency_breakdown(spans: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Summarize span durations by stage.
+
+    Args:
+        spans: Flattened spans (see otlp_spans)
+
+    Returns:
+        Span name -> count, mean, p50, p95 and max duration in milliseconds
+    """
+    durations: Dict[str, List[float]] = {}
+    for span in spans:
+        durations.setdefault(span["name"], []).append(span["duration_ms"])
+
+    breakdown = {}
+    for name, values in durations.items():
+        values.sort()
+        breakdown[name] = {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": values[(len(values) - 1) // 2],
+            "p95_ms": values[min(len(values) - 1, int(0.95 * len(values)))],
+            "max_ms": values[-1]
+        }
+    return breakdown
+
+
+class SpanExporter:
+    """Destination of finished spans."""
+
+    def export(self, spans: Sequence[Span], service_name: str) -> None:
+        """
+        Export a batch of spans.
+
+        Args:
+            spans: Finished spans
+            service_name: Name of the reporting service
+        """
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Release resources."""
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends batches to a file as OTLP JSON lines."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: File to append to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span], service_name: str) -> None:
+        line = json.dumps(otlp_request(spans, service_name), separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts batches to an OTLP/HTTP collector in the JSON encoding."""
+
+    def __init__(self, endpoint: str = DEFAULT_OTLP_ENDPOINT, timeout: float = 2.0):
+        """
+        Initialize the exporter.
+
+        Args:
+            endpoint: Collector traces URL
+            timeout: Request timeout in seconds
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: Sequence[Span], service_name: str) -> None:
+        body = json.dumps(otlp_request(spans, service_name), separators=(",", ":")).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+# Span of the current task or thread
+_current_span: ContextVar[Optional[Span]] = ContextVar("rfm_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Get the innermost open span of the current context."""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Get the trace ID of the current context, if any."""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+class Tracer:
+    """Creates spans and exports finished ones in the background."""
+
+    def __init__(self,
+                 service_name: str = "rfm",
+                 exporter: Optional[SpanExporter] = None,
+                 max_queue: int = 10000,
+                 batch_size: int = 512,
+                 flush_interval: float = 1.0):
+        """
+        Initialize the tracer.
+
+        Args:
+            service_name: Name of this service in exported spans
+            exporter: Span destination (None records nothing)
+            max_queue: Finished spans buffered for export; further spans
+                are counted as dropped
+            batch_size: Maximum spans per export call
+            flush_interval: Seconds between background exports
+        """
+        self.service_name = service_name
+        self.exporter = exporter
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Deque[Span] = deque()
+        self._lock = threading.Lock()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.spans_exported = 0
+        self.spans_dropped = 0
+        self.export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether finished spans are recorded."""
+        return self.exporter is not None
+
+    def start_span(self,
+                   name: str,
+                   trace_id: Optional[str] = None,
+                   parent_id: Optional[str] = None,
+                   attributes: Optional[Dict[str, Any]] = None,
+                   start: Optional[float] = None) -> Span:
+        """
+        Open a span; finish it with end_span().
+
+        The span joins the given trace, or the trace of the current span, or
+        starts a new trace.
+
+        Args:
+            name: Stage name
+            trace_id: Trace to join
+            parent_id: Parent span ID (defaults to the current span if it
+                belongs to the same trace)
+            attributes: Span attributes
+            start: Start time (defaults to now)
+
+        Returns:
+            Open span
+        """
+        current = _current_span.get()
+        if trace_id is None:
+            trace_id = current.trace_id if current is not None else new_trace_id()
+        if parent_id is None and current is not None and current.trace_id == trace_id:
+            parent_id = current.span_id
+        return Span(name, trace_id, parent_id, start, attributes)
+
+    def end_span(self, span: Span, end: Optional[float] = None, error: Optional[str] = None) -> None:
+        """
+        Finish a span and queue it for export.
+
+        Args:
+            span: Open span
+            end: End time (defaults to now)
+            error: Error message if the stage failed
+        """
+        span.end = time.time() if end is None else end
+        if error is not None:
+            span.error = error
+        if self.exporter is None:
+            return
+
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.spans_dropped += 1
+                return
+            self._queue.append(span)
+            if self._flush_thread is None:
+                self._start_flush_thread()
+
+    def record_span(self,
+                    name: str,
+                    start: float,
+                    end: float,
+                    trace_id: str,
+                    parent_id: Optional[str] = None,
+                    attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """
+        Record a stage timed elsewhere, e.g. in a worker process.
+
+        Args:
+            name: Stage name
+            start: Start time in seconds since the epoch
+            end: End time in seconds since the epoch
+            trace_id: Trace the stage belongs to
+            parent_id: Parent span ID
+            attributes: Span attributes
+
+        Returns:
+            Finished span, or None if tracing is disabled
+        """
+        if self.exporter is None:
+            return None
+        span = Span(name, trace_id, parent_id, start, attributes)
+        self.end_span(span, end)
+        return span
+
+    @contextmanager
+    def span(self,
+             name: str,
+             trace_id: Optional[str] = None,
+             attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+        """
+        Time a block as a span of the current trace.
+
+        The span is the current span inside the block, so nested spans and
+        progress reporters created there join its trace.
+
+        Args:
+            name: Stage name
+            trace_id: Trace to join (defaults to the current trace)
+            attributes: Span attributes
+
+        Yields:
+            Open span
+        """
+        span = self.start_span(name, trace_id, attributes=attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, error=error)
+
+    def _start_flush_thread(self) -> None:
+        """Start the background export thread (lock held)."""
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True, name="SpanExporter")
+        self._flush_thread.start()
+
+    def _flush_loop(self) -> None:
+        """Export loop of the background thread."""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Export all queued spans."""
+        exporter = self.exporter
+        while exporter is not None:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                return
+
+            try:
+                exporter.export(batch, self.service_name)
+                self.spans_exported += len(batch)
+            except Exception as e:
+                self.export_errors += 1
+                self.spans_dropped += len(batch)
+                logger.structured_log(
+                    LogLevel.WARNING,
+                    f"Failed to export {len(batch)} spans: {e}",
+                    LogCategory.PERFORMANCE,
+                    component="tracing",
+                    context={"exporter": type(exporter).__name__},
+                    error=str(e)
+                )
+                return
+
+    def shutdown(self) -> None:
+        """Stop the export thread and export the remaining spans."""
+        thread = self._flush_thread
+        if thread is not None:
+            self._stop_event.set()
+            thread.join(timeout=self.flush_interval + 1.0)
+            self._flush_thread = None
+        self.flush()
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get tracer statistics.
+
+        Returns:
+            Dictionary with the export state and span counters
+        """
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._queue),
+            "exported": self.spans_exported,
+            "dropped": self.spans_dropped,
+            "export_errors": self.export_errors
+        }
+
+
+# Singleton instance
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the global tracer.
+
+    Returns:
+        Tracer instance (recording nothing until configure_tracing() is called)
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def configure_tracing(path: Optional[str] = None,
+                      endpoint: Optional[str] = None,
+                      service_name: Optional[str] = None) -> Tracer:
+    """
+    Set the exporter of the global tracer.
+
+    Args:
+        path: Append spans to this file as OTLP JSON lines
+        endpoint: Post spans to this OTLP/HTTP traces URL
+        service_name: Name of this service in exported spans
+
+    Returns:
+        Global tracer (disabled if neither path nor endpoint is given)
+    """
+    tracer = get_tracer()
+    tracer.flush()
+
+    if path is not None:
+        tracer.exporter = FileSpanExporter(path)
+    elif endpoint is not None:
+        tracer.exporter = OTLPHttpSpanExporter(endpoint)
+    else:
+        tracer.exporter = None
+
+    if service_name is not None:
+        tracer.service_name = service_name
+
+    logger.structured_log(
+        LogLevel.INFO,
+        "Configured tracing",
+        LogCategory.PERFORMANCE,
+        component="tracing",
+        context={"path": path, "endpoint": endpoint, "service_name": tracer.service_name}
+    )
+    return tracer
@@ -6,18 +6,19 @@ receiving real-time progress updates during long-running operations.
 """
 
 import asyncio
-import json
 import logging
 import time
 import traceback
 from typing import Dict, Any, Set, Optional, Callable, List, Union
 from dataclasses import asdict
+from urllib.parse import urlparse, parse_qs
 
 import websockets
 from websockets.server import WebSocketServerProtocol, serve
 from websockets.exceptions import ConnectionClosed
 
 from .progress import get_progress_manager, ProgressData, OperationStatus
+from .codec import MessageCodec, CodecError, JSON_CODEC, negotiate_codec, supported_subprotocols
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,7 @@ class ProgressWebSocketServer:
         self.host = host
         self.port = port
         self.clients: Set[WebSocketServerProtocol] = set()
+        self.client_codecs: Dict[WebSocketServerProtocol, MessageCodec] = {}
         self.server = None
         self.running = False
         self.progress_manager = get_progress_manager()
@@ -59,7 +61,8 @@ class ProgressWebSocketServer:
             self.server = await serve(
                 self._handle_client,
                 self.host,
-                self.port
+                self.port,
+                subprotocols=supported_subprotocols()
             )
             self.running = True
             logger.info(f"WebSocket server started on ws://{self.host}:{self.port}")
@@ -93,6 +96,7 @@ class ProgressWebSocketServer:
             
         self.running = False
         self.clients.clear()
+        self.client_codecs.clear()
         logger.info("WebSocket server stopped")
     
     async def _handle_client(self, websocket: WebSocketServerProtocol, path: str) -> None:
@@ -106,24 +110,31 @@ class ProgressWebSocketServer:
         # Add client to set
         self.clients.add(websocket)
         client_id = id(websocket)
-        logger.debug(f"Client connected: {client_id} from {websocket.remote_address}")
+        
+        # Negotiate the message codec (subprotocol first, then ?codec=)
+        codec = negotiate_codec(
+            websocket.subprotocol,
+            parse_qs(urlparse(path).query).get("codec", [None])[0]
+        )
+        self.client_codecs[websocket] = codec
+        logger.debug(f"Client connected: {client_id} from {websocket.remote_address} ({codec.name})")
         
         try:
             # Send list of current operations
             operations = await self.progress_manager.list_operations()
             if operations:
-                await websocket.send(json.dumps({
+                await self._send(websocket, {
                     "type": "operations_list",
                     "operations": operations
-                }))
+                })
             
             # Handle messages
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    data = codec.decode(message)
                     await self._handle_message(websocket, data)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON from client {client_id}: {message}")
+                except CodecError as e:
+                    logger.warning(f"Invalid message from client {client_id}: {e}")
                 except Exception as e:
                     logger.error(f"Error handling message from client {client_id}: {e}")
                     logger.debug(traceback.format_exc())
@@ -135,6 +146,18 @@ class ProgressWebSocketServer:
         finally:
             # Remove client from set
             self.clients.discard(websocket)
+            self.client_codecs.pop(websocket, None)
+    
+    async def _send(self, websocket: WebSocketServerProtocol, message: Dict[str, Any]) -> None:
+        """
+        Send a message to a client using its negotiated codec.
+        
+        Args:
+            websocket: WebSocket connection
+            message: Message to send
+        """
+        codec = self.client_codecs.get(websocket, JSON_CODEC)
+        await websocket.send(codec.encode(message))
     
     async def _handle_message(self, websocket: WebSocketServerProtocol, data: Dict[str, Any]) -> None:
         """
@@ -148,56 +171,56 @@ class ProgressWebSocketServer:
         
         if message_type == "ping":
             # Handle ping message
-            await websocket.send(json.dumps({
+            await self._send(websocket, {
                 "type": "pong",
                 "timestamp": time.time()
-            }))
+            })
             
         elif message_type == "list_operations":
             # Handle list operations request
             operations = await self.progress_manager.list_operations()
-            await websocket.send(json.dumps({
+            await self._send(websocket, {
                 "type": "operations_list",
                 "operations": operations
-            }))
+            })
             
         elif message_type == "cancel_operation":
             # Handle cancel operation request
             operation_id = data.get("operation_id")
             if not operation_id:
-                await websocket.send(json.dumps({
+                await self._send(websocket, {
                     "type": "error",
                     "error": "Missing operation_id"
-                }))
+                })
                 return
                 
             success = await self.progress_manager.cancel_operation(operation_id)
-            await websocket.send(json.dumps({
+            await self._send(websocket, {
                 "type": "cancel_result",
                 "operation_id": operation_id,
                 "success": success
-            }))
+            })
             
         elif message_type == "get_operation_details":
             # Handle get operation details request
             operation_id = data.get("operation_id")
             if not operation_id:
-                await websocket.send(json.dumps({
+                await self._send(websocket, {
                     "type": "error",
                     "error": "Missing operation_id"
-                }))
+                })
                 return
                 
             operation = await self.progress_manager.get_operation(operation_id)
             if not operation:
-                await websocket.send(json.dumps({
+                await self._send(websocket, {
                     "type": "error",
                     "error": f"Operation not found: {operation_id}"
-                }))
+                })
                 return
                 
             # Create response with operation details
-            await websocket.send(json.dumps({
+            await self._send(websocket, {
                 "type": "operation_details",
                 "operation_id": operation_id,
                 "details": {
@@ -212,14 +235,14 @@ class ProgressWebSocketServer:
                     "last_update_time": operation.last_update_time,
                     "details": operation.details
                 }
-            }))
+            })
             
         else:
             # Unknown message type
-            await websocket.send(json.dumps({
+            await self._send(websocket, {
                 "type": "error",
                 "error": f"Unknown message type: {message_type}"
-            }))
+            })
     
     def _on_progress_update(self, progress_data: ProgressData) -> None:
         """
@@ -234,15 +257,21 @@ class ProgressWebSocketServer:
             "timestamp": time.time(),
             "data": progress_data.to_dict()
         }
+        if progress_data.trace_id is not None:
+            message["trace_id"] = progress_data.trace_id
         
-        # Convert to JSON once for all clients
-        message_json = json.dumps(message)
+        # Encode once per codec for all clients
+        payloads: Dict[str, Union[str, bytes]] = {}
         
         # Broadcast to all clients
         for client in list(self.clients):
             try:
+                codec = self.client_codecs.get(client, JSON_CODEC)
+                if codec.name not in payloads:
+                    payloads[codec.name] = codec.encode(message)
+                
                 # Use ensure_future to avoid blocking
-                asyncio.ensure_future(client.send(message_json))
+                asyncio.ensure_future(client.send(payloads[codec.name]))
             except Exception as e:
                 logger.error(f"Error sending to client: {e}")
     
@@ -13,6 +13,7 @@ import asyncio
 import logging
 import signal
 import uuid
+import functools
 import threading
 import traceback
 import websockets
@@ -29,6 +30,20 @@ from .monitoring import (
     get_metrics_registry, get_connection_monitor,
     MetricType, HealthStatus, ConnectionMonitor
 )
+from .timer_wheel import get_timer_wheel
+from .progress_delta import ProgressDeltaEncoder
+from .fanout import ClientSendQueue, OverflowPolicy
+from .topics import TopicIndex, TOPIC_KINDS, make_topic, parse_topic, operation_topics
+from .conflation import UpdateConflator
+from .codec import MessageCodec, CodecError, JSON_CODEC, negotiate_codec, supported_subprotocols
+from .event_bus import EventBus
+from .replay import ReplayBuffer, compact
+from .event_log import EventLog
+from .render_service import RenderService, RenderRequestError, RenderQueueFullError
+from .image_frame import COMPRESSIONS, ImageFrameError, frame_operation_id, negotiate_compression
+from .openmetrics import CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE, OpenMetricsExporter
+from .profiler import get_profiler
+from .tracing import get_tracer, valid_trace_id
 
 
 # Configure logger
@@ -43,15 +58,34 @@ class MessageType(str, Enum):
     LIST_OPERATIONS = "list_operations"
     CANCEL_OPERATION = "cancel_operation"
     GET_OPERATION_DETAILS = "get_operation_details"
+    SET_CHILD_DETAIL = "set_child_detail"
+    RESYNC_OPERATION = "resync_operation"
+    SUBSCRIBE = "subscribe"
+    UNSUBSCRIBE = "unsubscribe"
+    RESUME = "resume"
+    SUBMIT_RENDER = "submit_render"
+    CANCEL_RENDER = "cancel_render"
+    
+    # Admin messages (accepted with enable_profiler)
+    START_PROFILER = "start_profiler"
+    STOP_PROFILER = "stop_profiler"
+    GET_PROFILE = "get_profile"
     
     # Server messages
     PONG = "pong"
     OPERATION_STARTED = "operation_started"
     PROGRESS_UPDATE = "progress_update"
+    PROGRESS_DELTA = "progress_delta"
+    BATCH = "batch"
     OPERATION_COMPLETED = "operation_completed"
     OPERATION_FAILED = "operation_failed"
     OPERATION_CANCELED = "operation_canceled"
     OPERATIONS_LIST = "operations_list"
+    SUBSCRIPTIONS = "subscriptions"
+    SESSION_RESUMED = "session_resumed"
+    RENDER_SUBMITTED = "render_submitted"
+    RENDER_FRAME = "render_frame"
+    PROFILE = "profile"
     
     # System messages
     CONNECTION_STATUS = "connection_status"
@@ -68,11 +102,31 @@ class ClientInfo:
     remote_address: Optional[str] = None
     user_agent: Optional[str] = None
     client_version: Optional[str] = None
+    user_id: Optional[str] = None
     connect_time: float = field(default_factory=time.time)
     last_activity_time: float = field(default_factory=time.time)
     messages_received: int = 0
     messages_sent: int = 0
     subscriptions: Set[str] = field(default_factory=set)
+    child_detail: bool = False
+    child_detail_parents: Set[str] = field(default_factory=set)
+    delta_updates: bool = False
+    batch_messages: bool = False
+    delta_seqs: Dict[str, int] = field(default_factory=dict)
+    send_queue: Optional[ClientSendQueue] = None
+    codec: MessageCodec = JSON_CODEC
+    
+    def wants_child_detail(self, parent_id: str) -> bool:
+        """
+        Check whether the client opted into sub-operation events of a parent.
+        
+        Args:
+            parent_id: Parent operation ID
+            
+        Returns:
+            True if sub-operation events should be sent to the client
+        """
+        return self.child_detail or parent_id in self.child_detail_parents
 
 
 class ProgressServer:
@@ -97,7 +151,27 @@ class ProgressServer:
                 connection_timeout: float = 300.0,  # 5 minutes
                 message_rate_limit: int = 100,      # messages per second
                 enable_authentication: bool = False,
-                api_keys: Optional[Dict[str, str]] = None):
+                api_keys: Optional[Dict[str, str]] = None,
+                operation_retention: float = 3600.0,
+                send_queue_size: int = 256,
+                overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.CONFLATE,
+                progress_flush_interval: float = 0.05,
+                batch_delay: float = 0.005,
+                batch_max_messages: int = 64,
+                batch_max_bytes: int = 65536,
+                event_bus: Optional[EventBus] = None,
+                reuse_port: bool = False,
+                replay_buffer_size: int = 4096,
+                persist_operations: bool = True,
+                event_log_dir: str = "events",
+                snapshot_interval: float = 60.0,
+                render_workers: Optional[int] = None,
+                render_jobs_per_user: int = 2,
+                render_queue_per_user: int = 16,
+                render_queue_size: int = 256,
+                render_frame_bytes: int = 8 * 1024 * 1024,
+                render_frame_timeout: float = 30.0,
+                enable_profiler: bool = False):
         """
         Initialize the progress server.
         
@@ -111,6 +185,39 @@ class ProgressServer:
             message_rate_limit: Rate limit for messages per client
             enable_authentication: Whether to enable API key authentication
             api_keys: Dictionary of API keys (client_id -> api_key)
+            operation_retention: Seconds finished operations are kept before cleanup
+            send_queue_size: Maximum number of messages queued per client
+            overflow_policy: What to do when a client's send queue is full
+                ("drop_oldest", "conflate" or "disconnect")
+            progress_flush_interval: Interval in seconds at which conflated progress
+                updates are relayed (0.05 for 20 Hz); 0 relays every update immediately
+            batch_delay: Maximum time in seconds messages are held for a batch frame
+                (clients opt into batching with ``batch=1``)
+            batch_max_messages: Number of queued messages that flushes a batch early
+            batch_max_bytes: Queued payload size that flushes a batch early
+            event_bus: Optional bus shared with the other workers of a
+                multi-worker server
+            reuse_port: Bind with SO_REUSEPORT so several workers can accept
+                connections on the same port
+            replay_buffer_size: Number of recent operation events kept for
+                clients resuming a session
+            persist_operations: Keep operations in an event log so they
+                survive a restart
+            event_log_dir: Event log directory, relative to data_dir
+            snapshot_interval: Minimum seconds between operation snapshots
+                in the event log
+            render_workers: Number of render jobs run at once (defaults to
+                the CPU count)
+            render_jobs_per_user: Number of render jobs of one user run at once
+            render_queue_per_user: Number of render jobs of one user waiting
+                to run; further requests are rejected (``render_queue_full``)
+            render_queue_size: Number of render jobs waiting to run
+            render_frame_bytes: Bytes of queued messages per client above which
+                render jobs wait before sending the client another image frame
+            render_frame_timeout: Seconds a render job waits for a client to
+                take a frame before dropping the client from the job
+            enable_profiler: Accept the sampling profiler admin messages
+                (``start_profiler``, ``stop_profiler``, ``get_profile``)
         """
         self.host = host
         self.port = port
@@ -121,6 +228,17 @@ class ProgressServer:
         self.message_rate_limit = message_rate_limit
         self.enable_authentication = enable_authentication
         self.api_keys = api_keys or {}
+        self.operation_retention = operation_retention
+        self.send_queue_size = send_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.progress_flush_interval = progress_flush_interval
+        self.batch_delay = batch_delay
+        self.batch_max_messages = batch_max_messages
+        self.batch_max_bytes = batch_max_bytes
+        self.event_bus = event_bus
+        self.reuse_port = reuse_port
+        self.render_frame_bytes = render_frame_bytes
+        self.render_frame_timeout = render_frame_timeout
         
         # Create data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
@@ -137,6 +255,7 @@ class ProgressServer:
         
         # Get metrics registry
         self.metrics_registry = get_metrics_registry("websocket_server")
+        self.openmetrics_exporter = OpenMetricsExporter(self.metrics_registry)
         
         # Get connection monitor
         self.connection_monitor = get_connection_monitor()
@@ -144,12 +263,73 @@ class ProgressServer:
         # Start system metrics collection
         self.metrics_registry.start_system_metrics_collection()
         
+        # Messages lost to send queue overflow
+        self.metrics_registry.register_metric(
+            "websocket.messages.dropped",
+            MetricType.COUNTER,
+            "WebSocket messages dropped on slow connections",
+            "count"
+        )
+        
+        # Session resumption outcomes
+        self.metrics_registry.register_metric(
+            "websocket.sessions.resumed",
+            MetricType.COUNTER,
+            "Reconnected sessions resumed from the replay buffer",
+            "count"
+        )
+        self.metrics_registry.register_metric(
+            "websocket.sessions.snapshot",
+            MetricType.COUNTER,
+            "Reconnected sessions that fell back to an operations snapshot",
+            "count"
+        )
+        
         # Set up server storage
         self.server = None
         self.clients: Dict[str, ClientInfo] = {}
         self.operations: Dict[str, Dict[str, Any]] = {}
         self.stop_event = asyncio.Event()
         
+        # Shared timer wheel for operation retention
+        self.retention_wheel = get_timer_wheel()
+        
+        # Per-operation progress state for delta-encoded updates
+        self.delta_encoder = ProgressDeltaEncoder()
+        
+        # Topic subscriptions and the topics of each operation
+        self.topic_index = TopicIndex()
+        self.operation_topics: Dict[str, List[str]] = {}
+        
+        # Recent operation events with their event sequence numbers
+        self.replay_buffer = ReplayBuffer(replay_buffer_size)
+        
+        # Durable operation state, recovered on start
+        self.event_log = (
+            EventLog(os.path.join(self.data_dir, event_log_dir), snapshot_interval=snapshot_interval)
+            if persist_operations else None
+        )
+        
+        # Render jobs submitted by clients, reported as operations
+        self.render_service = RenderService(
+            emit_event=functools.partial(self._handle_operation_event, None),
+            send_frame=self._send_frame,
+            max_workers=render_workers,
+            max_jobs_per_user=render_jobs_per_user,
+            max_queued_per_user=render_queue_per_user,
+            max_queued=render_queue_size
+        )
+        
+        # Sampling profiler, controlled through admin messages
+        self.enable_profiler = enable_profiler
+        self.profiler = get_profiler()
+        
+        # Latest pending progress update per operation, relayed on a tick
+        self.progress_conflator = (
+            UpdateConflator(self._flush_progress_update, progress_flush_interval)
+            if progress_flush_interval > 0 else None
+        )
+        
         # Operation event handlers
         self.operation_handlers: Dict[str, List[Callable]] = {
             "started": [],
@@ -206,19 +386,17 @@ class ProgressServer:
         )
         
         try:
+            await self._before_serve()
+            
             # Create WebSocket server
             self.server = await websockets.serve(
                 self._handle_client,
                 self.host,
                 self.port,
-                process_request=self._process_request
+                **self._serve_kwargs()
             )
             
-            # Reset stop event
-            self.stop_event.clear()
-            
-            # Start periodic tasks
-            asyncio.create_task(self._periodic_cleanup())
+            self._after_serve()
             
             # Log successful start
             logger.structured_log(
@@ -258,6 +436,37 @@ class ProgressServer:
             # Propagate exception
             raise
     
+    async def _before_serve(self) -> None:
+        """Prepare server state before accepting connections (shared by subclasses)."""
+        # Restore operations from before a restart
+        if self.event_log is not None:
+            await self._recover_operations()
+        
+        # Join the other workers before accepting connections
+        if self.event_bus is not None:
+            await self._start_event_bus()
+    
+    def _serve_kwargs(self) -> Dict[str, Any]:
+        """
+        Get the websockets.serve options shared by subclasses.
+        
+        Returns:
+            Keyword arguments for websockets.serve
+        """
+        return {
+            "process_request": self._process_request,
+            "subprotocols": supported_subprotocols(),
+            "reuse_port": self.reuse_port
+        }
+    
+    def _after_serve(self) -> None:
+        """Start background work once the server is listening (shared by subclasses)."""
+        # Reset stop event
+        self.stop_event.clear()
+        
+        # Start operation retention (released again in stop)
+        self.retention_wheel.acquire()
+    
     async def stop(self) -> None:
         """Stop the WebSocket server."""
         if not self.server:
@@ -282,6 +491,19 @@ class ProgressServer:
             {"server_id": self.server_id, "status": "stopping"}
         )
         
+        # Cancel render jobs
+        await self.render_service.stop()
+        
+        if self.enable_profiler:
+            self.profiler.stop()
+        
+        # Relay pending progress updates
+        if self.progress_conflator is not None:
+            await self.progress_conflator.stop()
+        
+        # Export the spans recorded so far
+        get_tracer().flush()
+        
         # Close all client connections
         client_connections = list(self.clients.items())
         for connection_id, client_info in client_connections:
@@ -290,7 +512,7 @@ class ProgressServer:
                 
                 # Remove client
                 if connection_id in self.clients:
-                    del self.clients[connection_id]
+                    self._unregister_client(connection_id)
                     
                     # Update connection monitor
                     self.connection_monitor.connection_closed(
@@ -308,6 +530,10 @@ class ProgressServer:
                     error=str(e)
                 )
         
+        # Persist the final operation state
+        if self.event_log is not None:
+            await self.event_log.stop()
+        
         # Stop connection monitor
         self.connection_monitor.stop()
         
@@ -318,6 +544,13 @@ class ProgressServer:
         self.server.close()
         await self.server.wait_closed()
         
+        # Leave the event bus
+        if self.event_bus is not None:
+            await self.event_bus.stop()
+        
+        # Stop operation retention unless other servers still use the wheel
+        await self.retention_wheel.release()
+        
         # Update health status
         self.metrics_registry.register_health_check(
             "websocket_server",
@@ -343,7 +576,10 @@ class ProgressServer:
         """
         Process HTTP request before WebSocket handshake.
         
-        This is used for authentication and path routing.
+        This is used for authentication and path routing. ``/healthz`` is
+        answered before authentication so that probes need no credentials;
+        ``/metrics`` serves OpenMetrics text, or the JSON report when the
+        client accepts ``application/json`` or asks for ``?format=json``.
         
         Args:
             path: Request path
@@ -358,6 +594,12 @@ class ProgressServer:
         path = parsed_url.path
         query_params = parse_qs(parsed_url.query)
         
+        # Liveness probe
+        if path == "/healthz":
+            status = self.metrics_registry.get_health_status()["status"]
+            healthy = status != HealthStatus.UNHEALTHY
+            return (200 if healthy else 503, {"Content-Type": "text/plain"}, f"{status.value}\n".encode("utf-8"))
+        
         # Get authentication parameters
         auth_token = query_params.get("token", [None])[0]
         client_id = query_params.get("client_id", [None])[0]
@@ -410,8 +652,13 @@ class ProgressServer:
                 
             elif path == "/metrics":
                 # Metrics endpoint
-                metrics = self.metrics_registry.get_metrics_report()
-                return (200, {"Content-Type": "application/json"}, json.dumps(metrics).encode("utf-8"))
+                accept = request_headers.get("Accept", "")
+                if query_params.get("format", [None])[0] == "json" or (
+                        "application/json" in accept and "openmetrics" not in accept):
+                    metrics = self.metrics_registry.get_metrics_report()
+                    return (200, {"Content-Type": "application/json"}, json.dumps(metrics).encode("utf-8"))
+                    
+                return (200, {"Content-Type": OPENMETRICS_CONTENT_TYPE}, self.openmetrics_exporter.render())
                 
             else:
                 # Unknown path
@@ -429,13 +676,14 @@ class ProgressServer:
         return None
     
     @log_timing("handle_client", LogLevel.DEBUG, LogCategory.CONNECTION, "websocket_server")
-    async def _handle_client(self, websocket, path: str) -> None:
+    async def _handle_client(self, websocket, path: Optional[str] = None) -> None:
         """
         Handle a client WebSocket connection.
         
         Args:
             websocket: WebSocket connection
-            path: Connection path
+            path: Connection path (taken from the connection if not given;
+                websockets passes only the connection to decorated handlers)
         """
         # Generate connection ID
         connection_id = str(uuid.uuid4())
@@ -446,17 +694,27 @@ class ProgressServer:
         # Extract client info from request
         request_headers = websocket.request_headers
         user_agent = request_headers.get("User-Agent", "unknown")
+        query_params = parse_qs(urlparse(path or websocket.path).query)
         
         # Create client info
         client_info = ClientInfo(
             connection_id=connection_id,
             websocket=websocket,
             remote_address=remote_address,
-            user_agent=user_agent
+            user_agent=user_agent,
+            user_id=query_params.get("user_id", query_params.get("client_id", [None]))[0],
+            delta_updates=query_params.get("delta", ["0"])[0].lower() in ("1", "true", "yes"),
+            batch_messages=query_params.get("batch", ["0"])[0].lower() in ("1", "true", "yes"),
+            codec=negotiate_codec(
+                getattr(websocket, "subprotocol", None),
+                query_params.get("codec", [None])[0]
+            )
         )
         
-        # Register client
-        self.clients[connection_id] = client_info
+        # Register client with a dedicated writer
+        client_info.send_queue = self._create_send_queue(client_info)
+        client_info.send_queue.start()
+        self._register_client(client_info)
         
         # Update connection monitor
         self.connection_monitor.connection_opened(
@@ -465,7 +723,8 @@ class ProgressServer:
             {
                 "user_agent": user_agent,
                 "client_info": {
-                    "remote_address": remote_address
+                    "remote_address": remote_address,
+                    "codec": client_info.codec.name
                 }
             }
         )
@@ -485,8 +744,10 @@ class ProgressServer:
         )
         
         try:
-            # Send initial operations list
-            await self._send_operations_list(connection_id)
+            # Send initial operations list, unless the client resumes its
+            # session (it then sends a resume request after subscribing)
+            if query_params.get("resume", ["0"])[0].lower() not in ("1", "true", "yes"):
+                await self._send_operations_list(connection_id)
             
             # Handle messages in a loop
             async for message in websocket:
@@ -507,7 +768,7 @@ class ProgressServer:
                     
                     # Parse message
                     try:
-                        data = json.loads(message)
+                        data = client_info.codec.decode(message)
                         message_type = data.get("type")
                         
                         # Update connection monitor with message type
@@ -533,16 +794,18 @@ class ProgressServer:
                         # Process message
                         await self._process_message(connection_id, data)
                         
-                    except json.JSONDecodeError:
-                        # Invalid JSON
+                    except CodecError as e:
+                        # Invalid JSON text frame or undecodable binary frame
+                        text_frame = isinstance(message, str)
                         logger.structured_log(
                             LogLevel.WARNING,
-                            f"Invalid JSON from client {connection_id}",
+                            f"Invalid {'JSON' if text_frame else client_info.codec.name} message from client {connection_id}",
                             LogCategory.CONNECTION,
                             component="websocket_server",
                             context={
                                 "connection_id": connection_id,
-                                "message": message[:100],  # Log first 100 chars
+                                "message": message[:100] if text_frame else message[:100].hex(),  # Log first 100 chars
+                                "error": str(e),
                                 "server_id": self.server_id
                             }
                         )
@@ -550,8 +813,8 @@ class ProgressServer:
                         # Send error message
                         await self._send_error(
                             connection_id,
-                            "invalid_json",
-                            "Invalid JSON message"
+                            "invalid_json" if text_frame else "invalid_message",
+                            "Invalid JSON message" if text_frame else "Invalid binary message"
                         )
                         
                 except Exception as e:
@@ -605,9 +868,15 @@ class ProgressServer:
             )
             
         finally:
+            # Stop the writer
+            await client_info.send_queue.stop()
+            
+            # Render jobs nobody else requested are canceled
+            await self.render_service.connection_closed(connection_id)
+            
             # Remove client
             if connection_id in self.clients:
-                del self.clients[connection_id]
+                self._unregister_client(connection_id)
                 
                 # Update connection monitor
                 self.connection_monitor.connection_closed(
@@ -662,6 +931,60 @@ class ProgressServer:
                 
             await self._send_operation_details(connection_id, operation_id)
             
+        elif message_type == MessageType.SET_CHILD_DETAIL:
+            # Sub-operation detail opt-in/opt-out
+            await self._set_child_detail(connection_id, message)
+            
+        elif message_type in (MessageType.SUBSCRIBE, MessageType.UNSUBSCRIBE):
+            # Topic subscription change
+            await self._update_subscriptions(connection_id, message)
+        
+        elif message_type == MessageType.RESYNC_OPERATION:
+            # Full progress state request after a missed delta
+            operation_id = message.get("operation_id")
+            
+            if not operation_id:
+                await self._send_error(
+                    connection_id,
+                    "missing_operation_id",
+                    "Missing operation_id parameter"
+                )
+                return
+                
+            await self._send_progress_resync(connection_id, operation_id)
+        
+        elif message_type == MessageType.SUBMIT_RENDER:
+            # Render job request
+            await self._submit_render(connection_id, message)
+        
+        elif message_type == MessageType.CANCEL_RENDER:
+            # Render job cancellation
+            operation_id = message.get("operation_id")
+            
+            if not operation_id:
+                await self._send_error(
+                    connection_id,
+                    "missing_operation_id",
+                    "Missing operation_id parameter"
+                )
+                return
+            
+            if not await self.render_service.cancel(connection_id, operation_id):
+                await self._send_error(
+                    connection_id,
+                    "unknown_render",
+                    f"No render job {operation_id} requested by this connection"
+                )
+        
+        elif message_type in (MessageType.START_PROFILER, MessageType.STOP_PROFILER, MessageType.GET_PROFILE):
+            # Sampling profiler control
+            await self._handle_profiler_message(connection_id, message)
+        
+        elif message_type == MessageType.RESUME:
+            # Session resumption after a reconnect
+            if not await self._resume_session(connection_id, message.get("last_seq"), message.get("epoch")):
+                await self._send_operations_list(connection_id)
+        
         elif message_type in (
             MessageType.OPERATION_STARTED,
             MessageType.PROGRESS_UPDATE,
@@ -669,11 +992,8 @@ class ProgressServer:
             MessageType.OPERATION_FAILED,
             MessageType.OPERATION_CANCELED
         ):
-            # Forward operation events to all clients
-            await self._broadcast_message(message, exclude_connection_ids={connection_id})
-            
-            # Process operation event
-            await self._process_operation_event(message)
+            # Operation event (progress updates are conflated per operation)
+            await self._handle_operation_event(connection_id, message)
             
         else:
             # Unknown message type
@@ -696,8 +1016,8 @@ class ProgressServer:
                 f"Unknown message type: {message_type}"
             )
     
-    async def _send_message(self, 
-                          connection_id: str, 
+    async def _send_message(self,
+                          connection_id: str,
                           message: Dict[str, Any]) -> None:
         """
         Send a message to a client.
@@ -715,31 +1035,15 @@ class ProgressServer:
                 context={"server_id": self.server_id}
             )
             return
-            
-        try:
-            # Get client info
-            client_info = self.clients[connection_id]
-            
-            # Serialize message
-            message_json = json.dumps(message)
-            
-            # Send message
-            await client_info.websocket.send(message_json)
-            
-            # Update metrics
-            client_info.messages_sent += 1
-            
-            # Update connection monitor
-            self.connection_monitor.message_sent(
-                connection_id,
-                message_json,
-                message.get("type")
-            )
-            
-            # Log message
+        
+        # Serialize message with the client's codec
+        payload = self.clients[connection_id].codec.encode(message)
+        
+        # Log message
+        if logger.isEnabledFor(logging.DEBUG):
             logger.structured_log(
                 LogLevel.DEBUG,
-                f"Sent message to {connection_id}: {message.get('type')}",
+                f"Sending message to {connection_id}: {message.get('type')}",
                 LogCategory.CONNECTION,
                 component="websocket_server",
                 context={
@@ -748,7 +1052,45 @@ class ProgressServer:
                     "server_id": self.server_id
                 }
             )
+        
+        await self._send_payload(connection_id, payload, message.get("type"))
+    
+    async def _send_payload(self,
+                          connection_id: str,
+                          payload: Union[str, bytes],
+                          message_type: Optional[str] = None,
+                          conflation_key: Optional[Tuple[str, str]] = None,
+                          standalone: bool = False,
+                          droppable: bool = True) -> None:
+        """
+        Send a serialized message to a client.
+        
+        The message is queued for the client's writer task; clients without
+        a send queue are written to directly.
+        
+        Args:
+            connection_id: Connection ID
+            payload: Serialized message
+            message_type: Message type
+            conflation_key: Optional key of messages that supersede each other
+            standalone: Never send the payload inside a batch frame
+            droppable: Whether the send queue may discard the message on overflow
+        """
+        client_info = self.clients.get(connection_id)
+        if client_info is None:
+            return
+        
+        if client_info.send_queue is not None:
+            client_info.send_queue.put(payload, message_type, conflation_key, standalone, droppable)
+            return
+        
+        try:
+            # Send message
+            await client_info.websocket.send(payload)
             
+            # Update metrics
+            self._message_delivered(connection_id, payload, message_type)
+        
         except websockets.exceptions.ConnectionClosed:
             # Connection already closed
             logger.structured_log(
@@ -764,14 +1106,14 @@ class ProgressServer:
             
             # Remove client
             if connection_id in self.clients:
-                del self.clients[connection_id]
+                self._unregister_client(connection_id)
                 
                 # Update connection monitor
                 self.connection_monitor.connection_closed(
                     connection_id,
                     {"reason": "closed_before_send"}
                 )
-                
+        
         except Exception as e:
             # Error sending message
             logger.structured_log(
@@ -786,25 +1128,910 @@ class ProgressServer:
                 error=str(e)
             )
     
-    async def _broadcast_message(self, 
+    def _create_send_queue(self, client_info: ClientInfo) -> ClientSendQueue:
+        """
+        Create the send queue of a new connection.
+        
+        Clients that opted into batching get messages framed in batch
+        envelopes by their codec.
+        
+        Args:
+            client_info: Client information
+        
+        Returns:
+            Send queue (not started)
+        """
+        connection_id = client_info.connection_id
+        return ClientSendQueue(
+            client_info.websocket,
+            max_size=self.send_queue_size,
+            overflow_policy=self.overflow_policy,
+            on_sent=functools.partial(self._message_delivered, connection_id),
+            on_overflow=functools.partial(self._send_queue_overflowed, connection_id),
+            batch_encoder=client_info.codec.encode_batch if client_info.batch_messages else None,
+            batch_delay=self.batch_delay,
+            batch_max_messages=self.batch_max_messages,
+            batch_max_bytes=self.batch_max_bytes
+        )
+    
+    def _message_delivered(self,
+                           connection_id: str,
+                           payload: Union[str, bytes],
+                           message_type: Optional[str],
+                           message_count: int = 1) -> None:
+        """
+        Update metrics after a frame was written to a client.
+        
+        Args:
+            connection_id: Connection ID
+            payload: Serialized message or batch
+            message_type: Message type ("batch" for batch frames)
+            message_count: Number of messages in the frame
+        """
+        client_info = self.clients.get(connection_id)
+        if client_info is not None:
+            client_info.messages_sent += message_count
+        
+        self.connection_monitor.message_sent(connection_id, payload, message_type)
+    
+    def _send_queue_overflowed(self, connection_id: str, policy: OverflowPolicy) -> None:
+        """
+        Handle a full client send queue.
+        
+        Args:
+            connection_id: Connection ID
+            policy: Overflow policy that was applied
+        """
+        self.metrics_registry.update_metric("websocket.messages.dropped", 1)
+        
+        if policy == OverflowPolicy.DISCONNECT:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Disconnecting slow client: {connection_id}",
+                LogCategory.CONNECTION,
+                component="websocket_server",
+                context={
+                    "connection_id": connection_id,
+                    "send_queue_size": self.send_queue_size,
+                    "server_id": self.server_id
+                }
+            )
+    
+    async def _broadcast_message(self,
                                message: Dict[str, Any],
-                               exclude_connection_ids: Optional[Set[str]] = None) -> None:
+                               exclude_connection_ids: Optional[Set[str]] = None,
+                               child_of: Optional[str] = None,
+                               topics: Optional[List[str]] = None) -> None:
         """
         Broadcast a message to all connected clients.
         
+        The message is serialized once per codec and queued for every recipient.
+        
         Args:
             message: Message to broadcast
             exclude_connection_ids: Optional set of connection IDs to exclude
+            child_of: Parent operation ID if the message is a sub-operation event;
+                such messages only go to clients that opted into child detail
+            topics: Topics the message is published to; clients with
+                subscriptions only receive it if they subscribed to one of them
+        """
+        recipients = self._broadcast_recipients(exclude_connection_ids, child_of, topics)
+        if not recipients:
+            return
+        
+        message_type = message.get("type")
+        payloads: Dict[str, Union[str, bytes]] = {}
+        
+        for connection_id, client_info in recipients:
+            codec = client_info.codec
+            if codec.name not in payloads:
+                payloads[codec.name] = codec.encode(message)
+            await self._send_payload(connection_id, payloads[codec.name], message_type)
+    
+    def _broadcast_recipients(self,
+                              exclude_connection_ids: Optional[Set[str]] = None,
+                              child_of: Optional[str] = None,
+                              topics: Optional[List[str]] = None) -> List[Tuple[str, ClientInfo]]:
+        """
+        Get the clients a broadcast should reach.
+        
+        Args:
+            exclude_connection_ids: Optional set of connection IDs to exclude
+            child_of: Parent operation ID if the message is a sub-operation event
+            topics: Optional topics the message is published to
+        
+        Returns:
+            List of (connection ID, client info) pairs
         """
         exclude_connection_ids = exclude_connection_ids or set()
         
-        # Get client connections
-        connections = list(self.clients.keys())
+        if topics is None:
+            candidates = list(self.clients.items())
+        else:
+            # Only unfiltered clients and subscribers of the topics
+            candidates = [
+                (connection_id, self.clients[connection_id])
+                for connection_id in self.topic_index.recipients(topics)
+                if connection_id in self.clients
+            ]
+        
+        return [
+            (connection_id, client_info)
+            for connection_id, client_info in candidates
+            if connection_id not in exclude_connection_ids
+            and (child_of is None or client_info.wants_child_detail(child_of))
+        ]
+    
+    async def _broadcast_progress_update(self,
+                                       message: Dict[str, Any],
+                                       exclude_connection_ids: Optional[Set[str]] = None,
+                                       child_of: Optional[str] = None,
+                                       topics: Optional[List[str]] = None) -> None:
+        """
+        Broadcast a progress update, delta-encoded for clients in delta mode.
+        
+        The first update of an operation a client receives is sent in full;
+        later updates only carry the changed fields and a sequence number.
+        Each message variant is serialized at most once per codec. Queued full updates
+        of the same operation are conflated for clients not in delta mode.
+        
+        Args:
+            message: Progress update message
+            exclude_connection_ids: Optional set of connection IDs to exclude
+            child_of: Parent operation ID if the message is a sub-operation event
+            topics: Optional topics the message is published to
+        """
+        data = message.get("data", {})
+        operation_id = data.get("operation_id")
+        
+        if not operation_id:
+            await self._broadcast_message(message, exclude_connection_ids, child_of, topics)
+            return
+        
+        seq, full_data, changes = self.delta_encoder.encode(data)
+        conflation_key = ("progress", operation_id)
+        payloads: Dict[Tuple[str, str], Union[str, bytes]] = {}
+        
+        def encode(variant: str, codec: MessageCodec) -> Union[str, bytes]:
+            # Serialize each variant once per codec, on first use
+            key = (variant, codec.name)
+            if key not in payloads:
+                if variant == "plain":
+                    payloads[key] = codec.encode(message)
+                elif variant == "full":
+                    payloads[key] = codec.encode(dict(message, seq=seq))
+                else:
+                    payloads[key] = codec.encode({
+                        "type": MessageType.PROGRESS_DELTA,
+                        "operation_id": operation_id,
+                        "seq": seq,
+                        "event_seq": message.get("event_seq"),
+                        "changes": changes,
+                        "trace_id": message.get("trace_id"),
+                        "timestamp": message.get("timestamp", time.time())
+                    })
+            return payloads[key]
+        
+        for connection_id, client_info in self._broadcast_recipients(exclude_connection_ids, child_of, topics):
+            codec = client_info.codec
+            if not client_info.delta_updates:
+                await self._send_payload(
+                    connection_id, encode("plain", codec), MessageType.PROGRESS_UPDATE, conflation_key
+                )
+                continue
+            
+            # Deltas only apply on top of the immediately preceding state
+            if changes is not None and client_info.delta_seqs.get(operation_id) == seq - 1:
+                await self._send_payload(connection_id, encode("delta", codec), MessageType.PROGRESS_DELTA)
+            else:
+                await self._send_payload(connection_id, encode("full", codec), MessageType.PROGRESS_UPDATE)
+            
+            client_info.delta_seqs[operation_id] = seq
+        
+        if data.get("status") in ("completed", "failed", "canceled"):
+            self._forget_progress_state(operation_id)
+    
+    async def _handle_operation_event(self, connection_id: str, message: Dict[str, Any]) -> None:
+        """
+        Relay an operation event, conflating progress updates.
+        
+        Progress updates of an operation are held back and only the latest
+        one is relayed on the next flush tick. Status transitions pass
+        through immediately; a pending progress update of the same operation
+        is relayed first, or dropped if the transition is itself a newer
+        progress update.
+        
+        Args:
+            connection_id: ID of the connection that reported the event
+            message: Operation event message
+        """
+        message_type = message.get("type")
+        conflator = self.progress_conflator
+        
+        if message_type == MessageType.PROGRESS_UPDATE:
+            operation_id = message.get("data", {}).get("operation_id")
+            
+            if conflator is not None and operation_id and not self._is_status_transition(message):
+                conflator.offer(operation_id, (connection_id, message))
+                return
+        else:
+            operation_id = message.get("operation_id") or message.get("operation", {}).get("operation_id")
+        
+        if conflator is not None and operation_id:
+            pending = conflator.take(operation_id)
+            if pending is not None and message_type != MessageType.PROGRESS_UPDATE:
+                await self._relay_operation_event(*pending)
+        
+        await self._relay_operation_event(connection_id, message)
+    
+    def _is_status_transition(self, message: Dict[str, Any]) -> bool:
+        """
+        Check whether a progress update changes the status of its operation.
+        
+        Args:
+            message: Progress update message
+        
+        Returns:
+            True if the status differs from the last known status, or the
+            operation is not known yet
+        """
+        data = message.get("data", {})
+        operation_id = data.get("operation_id")
+        
+        pending = self.progress_conflator.peek(operation_id)
+        if pending is not None:
+            previous = pending[1].get("data", {}).get("status")
+        else:
+            previous = self.operations.get(operation_id, {}).get("status")
+        
+        return previous is None or data.get("status", previous) != previous
+    
+    async def _flush_progress_update(self, operation_id: str, pending: Tuple[str, Dict[str, Any]]) -> None:
+        """
+        Relay a conflated progress update.
+        
+        Args:
+            operation_id: Operation ID
+            pending: Tuple of (reporting connection ID, progress update message)
+        """
+        connection_id, message = pending
+        await self._relay_operation_event(connection_id, message)
+    
+    @staticmethod
+    def _check_trace_id(message: Dict[str, Any]) -> None:
+        """
+        Remove invalid trace IDs from an operation event.
+        
+        Args:
+            message: Operation event message (modified in place)
+        """
+        for container in (message, message.get("data")):
+            if isinstance(container, dict) and "trace_id" in container:
+                if container["trace_id"] is not None and valid_trace_id(container["trace_id"]) is None:
+                    del container["trace_id"]
+    
+    async def _relay_operation_event(self,
+                                     connection_id: Optional[str],
+                                     message: Dict[str, Any],
+                                     publish: bool = True) -> None:
+        """
+        Forward an operation event to interested clients and record it.
+        
+        Sub-operation events only go to clients that opted into child detail.
+        Relayed events carry the next event sequence number (``event_seq``)
+        and are kept in the replay buffer for resuming clients.
+        
+        Events carrying a ``trace_id`` add a ``conflate`` span (from the
+        event's timestamp until it is relayed) and a ``broadcast`` span to
+        their trace. Trace IDs that are not 32 lowercase hex digits are
+        removed before the event is relayed.
+        
+        Args:
+            connection_id: ID of the connection that reported the event, or
+                None for events relayed from another worker
+            message: Operation event message
+            publish: Whether to publish the event to the other workers
+        """
+        self._check_trace_id(message)
+        
+        child_of = self._get_parent_id(message)
+        topics = self._get_operation_topics(connection_id, message, child_of)
+        relayed = self.replay_buffer.append(message, topics, child_of).message
+        
+        tracer = get_tracer()
+        trace_id = (message.get("trace_id") or message.get("data", {}).get("trace_id")) if tracer.enabled else None
+        if trace_id:
+            relayed_at = time.time()
+            attributes = {"operation_id": self._get_operation_id(message), "message_type": message.get("type")}
+            tracer.record_span("conflate", message.get("timestamp", relayed_at), relayed_at, trace_id,
+                               attributes=attributes)
+        
+        if message.get("type") == MessageType.PROGRESS_UPDATE:
+            await self._broadcast_progress_update(
+                relayed,
+                exclude_connection_ids={connection_id},
+                child_of=child_of,
+                topics=topics
+            )
+        else:
+            await self._broadcast_message(
+                relayed,
+                exclude_connection_ids={connection_id},
+                child_of=child_of,
+                topics=topics
+            )
+            
+            # Finished operations need no further deltas
+            self._forget_progress_state(message.get("operation_id"))
+        
+        if trace_id:
+            tracer.record_span("broadcast", relayed_at, time.time(), trace_id, attributes=attributes)
+        
+        # Process operation event
+        await self._process_operation_event(message)
+        
+        # Persist the new operation state (and the parent's child count)
+        if self.event_log is not None:
+            operation_id = self._get_operation_id(message)
+            if operation_id in self.operations:
+                self.event_log.record(operation_id, self.operations[operation_id])
+            if child_of in self.operations and message.get("type") == MessageType.OPERATION_STARTED:
+                self.event_log.record(child_of, self.operations[child_of])
+        
+        # Share the event with the other workers
+        if publish and self.event_bus is not None:
+            await self._publish_event(message, topics)
+    
+    async def _recover_operations(self) -> None:
+        """Restore operations from the event log and start persisting changes."""
+        operations = self.event_log.recover()
+        self.operations.update(operations)
+        
+        # Operations still in progress lost their reporters with the previous
+        # run, so they are failed rather than left running forever
+        interrupted = []
+        now = time.time()
+        for operation_id, operation in operations.items():
+            if operation.get("status") not in ("completed", "failed", "canceled"):
+                operation["status"] = "failed"
+                operation["end_time"] = now
+                if "start_time" in operation:
+                    operation["duration"] = now - operation["start_time"]
+                operation.setdefault("details", {})["error_message"] = "Interrupted by server restart"
+                self.event_log.record(operation_id, operation)
+                interrupted.append(operation_id)
+            
+            # Finished operations are still removed after their retention period
+            self._schedule_retention(operation_id)
+        
+        if interrupted:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Marked {len(interrupted)} interrupted operations as failed",
+                LogCategory.OPERATION,
+                component="websocket_server",
+                context={"operation_ids": interrupted[:20], "server_id": self.server_id}
+            )
+        
+        await self.event_log.start(lambda: self.operations)
+    
+    async def _start_event_bus(self) -> None:
+        """Connect to the event bus and replay the shared operation registry."""
+        await self.event_bus.start(self._on_bus_event)
+        
+        snapshot = await self.event_bus.snapshot()
+        for message in snapshot:
+            await self._process_operation_event(message)
+        
+        logger.structured_log(
+            LogLevel.INFO,
+            f"Joined event bus as worker {self.event_bus.worker_id}",
+            LogCategory.SYSTEM,
+            component="websocket_server",
+            context={
+                "worker_id": self.event_bus.worker_id,
+                "replayed_events": len(snapshot),
+                "server_id": self.server_id
+            }
+        )
+    
+    async def _publish_event(self, message: Dict[str, Any], topics: Optional[List[str]] = None) -> None:
+        """
+        Publish an event to the other workers.
+        
+        Args:
+            message: Operation event or cancellation request
+            topics: Topics of the operation
+        """
+        try:
+            await self.event_bus.publish(message, topics)
+        except Exception as e:
+            logger.structured_log(
+                LogLevel.ERROR,
+                f"Failed to publish event to other workers: {e}",
+                LogCategory.SYSTEM,
+                component="websocket_server",
+                context={"message_type": message.get("type"), "server_id": self.server_id},
+                error=str(e)
+            )
+    
+    async def _on_bus_event(self, message: Dict[str, Any], topics: Optional[List[str]]) -> None:
+        """
+        Handle an event published by another worker.
+        
+        Args:
+            message: Operation event or cancellation request
+            topics: Topics of the operation
+        """
+        if message.get("type") == MessageType.CANCEL_OPERATION:
+            operation = self.operations.get(message.get("operation_id"))
+            if operation is not None:
+                operation["cancellation_requested"] = True
+                operation["cancellation_time"] = message.get("timestamp", time.time())
+                if self.event_log is not None:
+                    self.event_log.record(message["operation_id"], operation)
+            await self._broadcast_message(message)
+            return
+        
+        operation_id = self._get_operation_id(message)
+        
+        # Keep the topics the publishing worker derived (it knows the reporter)
+        if operation_id and topics is not None:
+            self.operation_topics[operation_id] = topics
+        
+        await self._relay_operation_event(None, message, publish=False)
+    
+    async def _submit_render(self, connection_id: str, message: Dict[str, Any]) -> None:
+        """
+        Handle a render job request.
+        
+        The requester is told the operation ID of the job (which may be an
+        identical job already in progress); progress follows as operation
+        events and the image as binary frames.
+        
+        Args:
+            connection_id: Connection ID
+            message: Request with ``kind``, ``params``, optional ``priority``,
+                ``format`` ("iterations" or "rgba"), ``colormap``,
+                ``compression`` (name or names in order of preference) and
+                ``request_id``
+        """
+        client_info = self.clients.get(connection_id)
+        
+        try:
+            compression = negotiate_compression(message.get("compression"))
+            job, deduplicated = await self.render_service.submit(
+                connection_id,
+                client_info.user_id if client_info is not None else None,
+                message.get("kind", "mandelbrot"),
+                message.get("params", {}),
+                message.get("priority", 0),
+                pixel_format=message.get("format", "iterations"),
+                colormap=message.get("colormap"),
+                compression=compression,
+                trace_id=message.get("trace_id")
+            )
+        except RenderQueueFullError as e:
+            await self._send_error(connection_id, "render_queue_full", str(e))
+            return
+        except (RenderRequestError, ImageFrameError) as e:
+            await self._send_error(connection_id, "invalid_render_request", str(e))
+            return
+        
+        await self._send_message(connection_id, {
+            "type": MessageType.RENDER_SUBMITTED,
+            "operation_id": job.job_id,
+            "request_id": message.get("request_id"),
+            "deduplicated": deduplicated,
+            "compression": next(name for name, code in COMPRESSIONS.items() if code == compression),
+            "trace_id": job.trace_id,
+            "timestamp": time.time()
+        })
+    
+    async def _send_frame(self, connection_id: str, frame: bytes) -> bool:
+        """
+        Send a binary image frame to a client.
+        
+        Frames are never dropped from the send queue. The render job waits
+        until the client's queue has room for the frame; if it doesn't get
+        room within ``render_frame_timeout``, the client is sent a
+        ``render_backpressure`` error and dropped from the job.
+        
+        Args:
+            connection_id: Connection ID
+            frame: Encoded image frame
+        
+        Returns:
+            False if the client can't take the frame
+        """
+        client_info = self.clients.get(connection_id)
+        if client_info is None:
+            return False
+        
+        send_queue = client_info.send_queue
+        if send_queue is not None and not await send_queue.wait_for_space(
+            len(frame), self.render_frame_bytes, self.render_frame_timeout
+        ):
+            if connection_id in self.clients and not send_queue.closed:
+                operation_id = frame_operation_id(frame)
+                logger.structured_log(
+                    LogLevel.WARNING,
+                    f"Dropping slow client {connection_id} from render {operation_id}",
+                    LogCategory.CONNECTION,
+                    component="websocket_server",
+                    context={
+                        "connection_id": connection_id,
+                        "operation_id": operation_id,
+                        "queued_bytes": send_queue.queued_bytes(),
+                        "server_id": self.server_id
+                    }
+                )
+                await self._send_message(connection_id, {
+                    "type": MessageType.ERROR,
+                    "error_code": "render_backpressure",
+                    "error_message": f"Image frames not taken within {self.render_frame_timeout}s; render stopped",
+                    "operation_id": operation_id,
+                    "timestamp": time.time()
+                })
+            return False
+        
+        await self._send_payload(connection_id, frame, MessageType.RENDER_FRAME, standalone=True, droppable=False)
+        return True
+    
+    async def _resume_session(self, connection_id: str, last_seq: Any, epoch: Optional[str]) -> bool:
+        """
+        Resume a client session by replaying the events it missed.
+        
+        Only events the client would have received are replayed, and
+        superseded progress updates are skipped. Each replayed event is
+        serialized at most once per codec, however many clients resume.
+        
+        Args:
+            connection_id: Connection ID
+            last_seq: Last event sequence number the client received
+            epoch: Server ID the sequence number was issued by
+        
+        Returns:
+            True if the session was resumed, False if the client needs an
+            operations snapshot (other or restarted server, or a gap larger
+            than the replay buffer)
+        """
+        client_info = self.clients.get(connection_id)
+        entries = None
+        
+        if client_info is not None and epoch == self.server_id and isinstance(last_seq, int):
+            entries = self.replay_buffer.since(last_seq)
+        
+        if entries is None:
+            self.metrics_registry.update_metric("websocket.sessions.snapshot", 1)
+            return False
+        
+        entries = [
+            entry for entry in compact(entries)
+            if (entry.child_of is None or client_info.wants_child_detail(entry.child_of))
+            and self.topic_index.matches(connection_id, entry.topics or ())
+        ]
+        
+        await self._send_message(connection_id, {
+            "type": MessageType.SESSION_RESUMED,
+            "epoch": self.server_id,
+            "from_seq": last_seq,
+            "event_seq": self.replay_buffer.last_seq,
+            "replayed": len(entries),
+            "timestamp": time.time()
+        })
+        
+        for entry in entries:
+            await self._send_payload(connection_id, entry.encode(client_info.codec), entry.message.get("type"))
+        
+        self.metrics_registry.update_metric("websocket.sessions.resumed", 1)
+        
+        logger.structured_log(
+            LogLevel.DEBUG,
+            f"Resumed session of {connection_id} from event {last_seq}",
+            LogCategory.CONNECTION,
+            component="websocket_server",
+            context={
+                "connection_id": connection_id,
+                "from_seq": last_seq,
+                "replayed_events": len(entries),
+                "server_id": self.server_id
+            }
+        )
+        return True
+    
+    async def _send_progress_resync(self, connection_id: str, operation_id: str) -> None:
+        """
+        Send the full progress state of an operation to a client.
+        
+        Args:
+            connection_id: Connection ID
+            operation_id: Operation ID
+        """
+        snapshot = self.delta_encoder.snapshot(operation_id)
+        
+        if snapshot is None:
+            await self._send_error(
+                connection_id,
+                "unknown_operation",
+                f"No progress state for operation: {operation_id}"
+            )
+            return
+            
+        seq, data = snapshot
+        message = {
+            "type": MessageType.PROGRESS_UPDATE,
+            "data": data,
+            "seq": seq,
+            "timestamp": time.time()
+        }
+        
+        await self._send_message(connection_id, message)
+        
+        client_info = self.clients.get(connection_id)
+        if client_info is not None:
+            client_info.delta_seqs[operation_id] = seq
+    
+    def _forget_progress_state(self, operation_id: Optional[str]) -> None:
+        """
+        Drop delta-encoding state of a finished operation.
+        
+        Args:
+            operation_id: Operation ID
+        """
+        if not operation_id:
+            return
+            
+        self.delta_encoder.forget(operation_id)
+        
+        for client_info in list(self.clients.values()):
+            client_info.delta_seqs.pop(operation_id, None)
+    
+    def _get_operation_id(self, message: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the operation ID of an operation event.
+        
+        Args:
+            message: Operation event message
+        
+        Returns:
+            Operation ID, or None if the message has none
+        """
+        message_type = message.get("type")
+        
+        if message_type == MessageType.OPERATION_STARTED:
+            return message.get("operation", {}).get("operation_id")
+        if message_type == MessageType.PROGRESS_UPDATE:
+            return message.get("data", {}).get("operation_id")
+        return message.get("operation_id")
+    
+    def _get_parent_id(self, message: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the parent operation ID of an operation event, if any.
+        
+        Args:
+            message: Operation event message
+            
+        Returns:
+            Parent operation ID, or None for top-level operations
+        """
+        message_type = message.get("type")
+        
+        if message_type == MessageType.OPERATION_STARTED:
+            return message.get("operation", {}).get("parent_id")
+            
+        if message_type == MessageType.PROGRESS_UPDATE:
+            data = message.get("data", {})
+            operation_id = data.get("operation_id")
+        else:
+            data = message
+            operation_id = message.get("operation_id")
+            
+        parent_id = data.get("parent_id")
+        if parent_id is None and operation_id in self.operations:
+            parent_id = self.operations[operation_id].get("parent_id")
+            
+        return parent_id
+    
+    def _register_client(self, client_info: ClientInfo) -> None:
+        """
+        Register a connected client.
+        
+        Args:
+            client_info: Client information
+        """
+        self.clients[client_info.connection_id] = client_info
+        self.topic_index.add_connection(client_info.connection_id)
+    
+    def _unregister_client(self, connection_id: str) -> None:
+        """
+        Remove a client and its subscriptions.
+        
+        Args:
+            connection_id: Connection ID
+        """
+        self.clients.pop(connection_id, None)
+        self.topic_index.remove_connection(connection_id)
+    
+    def _get_operation_topics(self,
+                              connection_id: str,
+                              message: Dict[str, Any],
+                              parent_id: Optional[str] = None) -> List[str]:
+        """
+        Get the topics an operation event is published to.
+        
+        Topics are derived from the first event of an operation and cached.
+        The user is taken from the operation (``user_id``) or else from the
+        reporting connection. Sub-operations are also published to the topics
+        of their parent.
+        
+        Args:
+            connection_id: ID of the connection that reported the event
+            message: Operation event message
+            parent_id: Parent operation ID, if any
+        
+        Returns:
+            List of topics
+        """
+        message_type = message.get("type")
+        
+        if message_type == MessageType.OPERATION_STARTED:
+            record = message.get("operation", {})
+        elif message_type == MessageType.PROGRESS_UPDATE:
+            record = message.get("data", {})
+        else:
+            record = self.operations.get(message.get("operation_id"), {})
+        
+        operation_id = record.get("operation_id") or message.get("operation_id")
+        if not operation_id:
+            return []
+        
+        topics = self.operation_topics.get(operation_id)
+        if topics is not None:
+            return topics
+        
+        client_info = self.clients.get(connection_id)
+        user_id = (
+            record.get("user_id")
+            or (record.get("details") or {}).get("user_id")
+            or (client_info.user_id if client_info is not None else None)
+        )
+        
+        topics = operation_topics(operation_id, record.get("operation_type"), user_id)
+        if parent_id:
+            topics += [topic for topic in self.operation_topics.get(parent_id, ()) if topic not in topics]
+        
+        self.operation_topics[operation_id] = topics
+        return topics
+    
+    async def _update_subscriptions(self, connection_id: str, message: Dict[str, Any]) -> None:
+        """
+        Handle a subscribe or unsubscribe request.
+        
+        Topics are given as ``topics`` (e.g. ``["type:render", "user:alice"]``)
+        or with the ``operation_id``, ``operation_type`` and ``user_id``
+        shorthands. Unsubscribing without topics removes all subscriptions.
+        
+        Args:
+            connection_id: Connection ID
+            message: Request message
+        """
+        client_info = self.clients.get(connection_id)
+        if client_info is None:
+            return
+        
+        topics = list(message.get("topics") or [])
+        for kind, key in zip(TOPIC_KINDS, ("operation_id", "operation_type", "user_id")):
+            if message.get(key):
+                topics.append(make_topic(kind, message[key]))
+        
+        try:
+            for topic in topics:
+                parse_topic(topic)
+        except ValueError as e:
+            await self._send_error(connection_id, "invalid_topic", str(e))
+            return
+        
+        if message.get("type") == MessageType.SUBSCRIBE:
+            if not topics:
+                await self._send_error(connection_id, "missing_topics", "No topics to subscribe to")
+                return
+            
+            subscriptions = self.topic_index.subscribe(connection_id, topics)
+        else:
+            subscriptions = self.topic_index.unsubscribe(connection_id, topics or None)
+        
+        client_info.subscriptions = subscriptions
+        
+        await self._send_message(connection_id, {
+            "type": MessageType.SUBSCRIPTIONS,
+            "topics": sorted(subscriptions),
+            "timestamp": time.time()
+        })
+        
+        # Send a snapshot of the operations now visible to the client
+        await self._send_operations_list(connection_id)
+    
+    async def _set_child_detail(self, connection_id: str, message: Dict[str, Any]) -> None:
+        """
+        Handle a sub-operation detail opt-in/opt-out request.
+        
+        Args:
+            connection_id: Connection ID
+            message: Request message with ``enabled`` and an optional parent ``operation_id``
+        """
+        client_info = self.clients.get(connection_id)
+        if client_info is None:
+            return
+            
+        enabled = bool(message.get("enabled", True))
+        operation_id = message.get("operation_id")
+        
+        if operation_id:
+            if enabled:
+                client_info.child_detail_parents.add(operation_id)
+            else:
+                client_info.child_detail_parents.discard(operation_id)
+        else:
+            client_info.child_detail = enabled
+            if not enabled:
+                client_info.child_detail_parents.clear()
+                
+        # Send a snapshot including the newly visible sub-operations
+        if enabled:
+            await self._send_operations_list(connection_id)
+    
+    async def _handle_profiler_message(self, connection_id: str, message: Dict[str, Any]) -> None:
+        """
+        Start or stop the sampling profiler, or send its samples.
+        
+        ``start_profiler`` takes an optional ``interval`` in seconds and
+        ``reset`` to discard earlier samples; ``get_profile`` an optional
+        ``operation_id`` to select the samples of one operation. Every
+        message is answered with a ``profile`` message carrying the profiler
+        statistics; ``stop_profiler`` and ``get_profile`` answers also carry
+        the folded stacks.
+        
+        Args:
+            connection_id: Connection ID
+            message: Profiler message
+        """
+        if not self.enable_profiler:
+            await self._send_error(connection_id, "profiler_disabled", "The profiler is not enabled on this server")
+            return
+        
+        message_type = message.get("type")
+        
+        if message_type == MessageType.START_PROFILER:
+            if message.get("reset"):
+                self.profiler.reset()
+            try:
+                self.profiler.start(message.get("interval"))
+            except (TypeError, ValueError) as e:
+                await self._send_error(connection_id, "invalid_interval", str(e))
+                return
+        elif message_type == MessageType.STOP_PROFILER:
+            self.profiler.stop()
+        
+        logger.structured_log(
+            LogLevel.INFO,
+            f"Profiler request {message_type} from {connection_id}",
+            LogCategory.PERFORMANCE,
+            component="websocket_server",
+            context={"connection_id": connection_id, "server_id": self.server_id}
+        )
+        
+        response = {
+            "type": MessageType.PROFILE,
+            "stats": self.profiler.stats(),
+            "timestamp": time.time()
+        }
+        if message_type != MessageType.START_PROFILER:
+            operation_id = message.get("operation_id")
+            response["operation_id"] = operation_id
+            response["folded"] = self.profiler.folded(operation_id)
         
-        # Send message to each client
-        for connection_id in connections:
-            if connection_id not in exclude_connection_ids:
-                await self._send_message(connection_id, message)
+        await self._send_message(connection_id, response)
     
     async def _send_error(self, 
                         connection_id: str, 
@@ -854,13 +2081,24 @@ class ProgressServer:
         Args:
             connection_id: Connection ID
         """
-        # Get operations
-        operations = list(self.operations.values())
-        
-        # Create message
+        client_info = self.clients.get(connection_id)
+        
+        # Get operations (sub-operations only if the client opted in, and
+        # only the subscribed topics if the client has subscriptions)
+        operations = [
+            operation for operation_id, operation in self.operations.items()
+            if (operation.get("parent_id") is None
+                or (client_info is not None and client_info.wants_child_detail(operation["parent_id"])))
+            and self.topic_index.matches(connection_id, self.operation_topics.get(operation_id, ()))
+        ]
+        
+        # Create message (the epoch and event sequence number let the
+        # client resume its session from this snapshot)
         message = {
             "type": MessageType.OPERATIONS_LIST,
             "operations": operations,
+            "epoch": self.server_id,
+            "event_seq": self.replay_buffer.last_seq,
             "timestamp": time.time()
         }
         
@@ -949,6 +2187,8 @@ class ProgressServer:
         
         # Update operation in storage
         self.operations[operation_id] = operation
+        if self.event_log is not None:
+            self.event_log.record(operation_id, operation)
         
         # Broadcast cancellation request
         message = {
@@ -959,6 +2199,10 @@ class ProgressServer:
         
         await self._broadcast_message(message)
         
+        # The reporter may be connected to another worker
+        if self.event_bus is not None:
+            await self._publish_event(message)
+        
         # Update metrics
         self.metrics_registry.update_metric("operations.canceled", 1)
     
@@ -988,6 +2232,7 @@ class ProgressServer:
                 
             # Store operation
             self.operations[operation_id] = operation
+            self._link_child(operation)
             
             # Log operation started
             logger.structured_log(
@@ -1032,11 +2277,13 @@ class ProgressServer:
                 self.operations[operation_id] = {
                     "operation_id": operation_id,
                     "operation_type": data.get("operation_type", "unknown"),
+                    "parent_id": data.get("parent_id"),
                     "status": data.get("status", "running"),
                     "progress": data.get("progress", 0),
                     "start_time": data.get("timestamp", time.time()),
                     "last_update_time": data.get("timestamp", time.time())
                 }
+                self._link_child(self.operations[operation_id])
             
             # Update operation
             operation = self.operations[operation_id]
@@ -1044,6 +2291,8 @@ class ProgressServer:
             operation["progress"] = data.get("progress", operation.get("progress", 0))
             operation["current_step"] = data.get("current_step", operation.get("current_step"))
             operation["last_update_time"] = data.get("timestamp", time.time())
+            operation["estimated_time_remaining_ms"] = data.get("estimated_time_remaining_ms")
+            operation["progress_per_second"] = data.get("progress_per_second")
             
             # Update details if provided
             if "details" in data and data["details"]:
@@ -1151,6 +2400,9 @@ class ProgressServer:
             if "duration" in operation:
                 self.metrics_registry.update_metric("operations.duration", operation["duration"])
                 
+            # Schedule cleanup
+            self._schedule_retention(operation_id)
+            
             # Trigger handlers
             await self._trigger_operation_handlers("completed", operation)
             
@@ -1228,6 +2480,9 @@ class ProgressServer:
             self.metrics_registry.update_metric("operations.failed", 1)
             self.metrics_registry.update_metric("operations.active", len(self.operations))
             
+            # Schedule cleanup
+            self._schedule_retention(operation_id)
+            
             # Trigger handlers
             await self._trigger_operation_handlers("failed", operation)
             
@@ -1302,9 +2557,24 @@ class ProgressServer:
             self.metrics_registry.update_metric("operations.canceled", 1)
             self.metrics_registry.update_metric("operations.active", len(self.operations))
             
+            # Schedule cleanup
+            self._schedule_retention(operation_id)
+            
             # Trigger handlers
             await self._trigger_operation_handlers("canceled", operation)
     
+    def _link_child(self, operation: Dict[str, Any]) -> None:
+        """
+        Record a sub-operation on its parent operation.
+        
+        Args:
+            operation: Newly stored operation data
+        """
+        parent_id = operation.get("parent_id")
+        if parent_id and parent_id in self.operations:
+            parent = self.operations[parent_id]
+            parent["child_count"] = parent.get("child_count", 0) + 1
+    
     async def _trigger_operation_handlers(self, 
                                        event_type: str, 
                                        operation: Dict[str, Any]) -> None:
@@ -1400,61 +2670,62 @@ class ProgressServer:
         
         return {
             "server_id": self.server_id,
+            "worker_id": self.event_bus.worker_id if self.event_bus is not None else None,
             "start_time": getattr(self, "start_time", None),
             "active_clients": len(self.clients),
             "active_operations": active_operations,
             "total_operations": len(self.operations),
+            "render_jobs": self.render_service.stats(),
             "connection_stats": self.connection_monitor.get_connection_stats()
         }
     
-    async def _periodic_cleanup(self) -> None:
-        """Perform periodic cleanup tasks."""
-        while not self.stop_event.is_set():
-            try:
-                # Clean up completed operations
-                await self._cleanup_operations()
-                
-                # Wait before next cleanup
-                await asyncio.sleep(60)  # Cleanup every minute
-                
-            except asyncio.CancelledError:
-                # Task canceled
-                break
-            except Exception as e:
-                logger.structured_log(
-                    LogLevel.ERROR,
-                    f"Error in periodic cleanup: {e}",
-                    LogCategory.SYSTEM,
-                    component="websocket_server",
-                    context={"server_id": self.server_id},
-                    error=str(e)
-                )
-                
-                # Continue cleanup
-                await asyncio.sleep(60)
+    def _schedule_retention(self, operation_id: str) -> None:
+        """
+        Schedule cleanup of a finished operation.
+        
+        Args:
+            operation_id: Operation ID
+        """
+        self.retention_wheel.schedule(operation_id, self.operation_retention, self._expire_operations)
     
-    async def _cleanup_operations(self) -> None:
-        """Clean up old completed operations."""
-        # Current time
-        current_time = time.time()
+    async def _expire_operations(self, operation_ids: List[str]) -> None:
+        """
+        Clean up finished operations whose retention period has elapsed.
         
-        # Find old completed operations
+        Args:
+            operation_ids: IDs of the expired operations
+        """
         old_operations = []
         
-        for operation_id, operation in self.operations.items():
-            # Skip active operations
-            if operation.get("status") in ("pending", "running", "paused"):
-                continue
-                
-            # Get end time
-            end_time = operation.get("end_time")
+        for operation_id in operation_ids:
+            operation = self.operations.get(operation_id)
             
-            if end_time and (current_time - end_time) > 3600:  # 1 hour old
-                old_operations.append(operation_id)
+            # Skip operations that were removed or restarted in the meantime
+            if operation is None or operation.get("status") in ("pending", "running", "paused"):
+                continue
                 
-        # Remove old operations
-        for operation_id in old_operations:
             del self.operations[operation_id]
+            self.operation_topics.pop(operation_id, None)
+            self._forget_progress_state(operation_id)
+            old_operations.append(operation_id)
+            
+            if self.event_log is not None:
+                self.event_log.record(operation_id, None)
+        
+        # Drop expired operations from the shared registry
+        if self.event_bus is not None:
+            for operation_id in old_operations:
+                try:
+                    await self.event_bus.forget(operation_id)
+                except Exception as e:
+                    logger.structured_log(
+                        LogLevel.WARNING,
+                        f"Failed to remove operation {operation_id} from the shared registry: {e}",
+                        LogCategory.SYSTEM,
+                        component="websocket_server",
+                        context={"operation_id": operation_id, "server_id": self.server_id},
+                        error=str(e)
+                    )
             
         # Log cleanup
         if old_operations:
@@ -1483,7 +2754,8 @@ async def start_websocket_server(
     log_level: LogLevel = LogLevel.INFO,
     connection_timeout: float = 300.0,
     enable_authentication: bool = False,
-    api_keys: Optional[Dict[str, str]] = None
+    api_keys: Optional[Dict[str, str]] = None,
+    enable_profiler: bool = False
 ) -> ProgressServer:
     """
     Start the WebSocket server for progress reporting.
@@ -1497,6 +2769,7 @@ async def start_websocket_server(
         connection_timeout: Timeout for inactive connections
         enable_authentication: Whether to enable API key authentication
         api_keys: Dictionary of API keys (client_id -> api_key)
+        enable_profiler: Accept the sampling profiler admin messages
         
     Returns:
         ProgressServer instance
@@ -1513,7 +2786,8 @@ async def start_websocket_server(
             log_level=log_level,
             connection_timeout=connection_timeout,
             enable_authentication=enable_authentication,
-            api_keys=api_keys
+            api_keys=api_keys,
+            enable_profiler=enable_profiler
         )
         
         # Start server
@@ -5,7 +5,6 @@ This module provides a secure version of the WebSocket server with TLS/SSL suppo
 for encrypted connections.
 """
 
-import asyncio
 import json
 import logging
 import os
@@ -58,7 +57,9 @@ class SecureProgressServer(BaseProgressServer):
                 api_keys: Optional[Dict[str, str]] = None,
                 ssl_cert_file: Optional[str] = None,
                 ssl_key_file: Optional[str] = None,
-                client_auth: bool = False):
+                client_auth: bool = False,
+                enable_profiler: bool = False,
+                **kwargs: Any):
         """
         Initialize the secure progress server.
         
@@ -75,6 +76,9 @@ class SecureProgressServer(BaseProgressServer):
             ssl_cert_file: Path to SSL certificate file
             ssl_key_file: Path to SSL private key file
             client_auth: Whether to require client certificate authentication
+            enable_profiler: Accept the sampling profiler admin messages
+            **kwargs: Further ProgressServer options (e.g. ``event_bus`` and
+                ``reuse_port`` for multi-worker mode)
         """
         # Initialize base server
         super().__init__(
@@ -86,7 +90,9 @@ class SecureProgressServer(BaseProgressServer):
             connection_timeout=connection_timeout,
             message_rate_limit=message_rate_limit,
             enable_authentication=enable_authentication,
-            api_keys=api_keys
+            api_keys=api_keys,
+            enable_profiler=enable_profiler,
+            **kwargs
         )
         
         # SSL configuration
@@ -192,20 +198,18 @@ class SecureProgressServer(BaseProgressServer):
         )
         
         try:
+            await self._before_serve()
+            
             # Create WebSocket server with SSL context if available
             self.server = await websockets.serve(
                 self._handle_client,
                 self.host,
                 self.port,
-                process_request=self._process_request,
-                ssl=self.ssl_context
+                ssl=self.ssl_context,
+                **self._serve_kwargs()
             )
             
-            # Reset stop event
-            self.stop_event.clear()
-            
-            # Start periodic tasks
-            asyncio.create_task(self._periodic_cleanup())
+            self._after_serve()
             
             # Log successful start
             protocol = "wss" if self.ssl_context else "ws"
@@ -262,7 +266,8 @@ async def start_secure_websocket_server(
     api_keys: Optional[Dict[str, str]] = None,
     ssl_cert_file: Optional[str] = None,
     ssl_key_file: Optional[str] = None,
-    client_auth: bool = False
+    client_auth: bool = False,
+    enable_profiler: bool = False
 ) -> SecureProgressServer:
     """
     Start a secure WebSocket server for progress reporting.
@@ -279,6 +284,7 @@ async def start_secure_websocket_server(
         ssl_cert_file: Path to SSL certificate file
         ssl_key_file: Path to SSL private key file
         client_auth: Whether to require client certificate authentication
+        enable_profiler: Accept the sampling profiler admin messages
         
     Returns:
         SecureProgressServer instance
@@ -298,7 +304,8 @@ async def start_secure_websocket_server(
             api_keys=api_keys,
             ssl_cert_file=ssl_cert_file,
             ssl_key_file=ssl_key_file,
-            client_auth=client_auth
+            client_auth=client_auth,
+            enable_profiler=enable_profiler
         )
         
         # Start server
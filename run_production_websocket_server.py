@@ -16,6 +16,7 @@ import logging
 import argparse
 import asyncio
 import signal
+import time
 import json
 from typing import Dict, Any, Optional
 from pathlib import Path
@@ -36,8 +37,10 @@ try:
     from rfm.core.logging_config import configure_logging, LogLevel, LogCategory
     from rfm.core.websocket_server_secure import SecureProgressServer, start_secure_websocket_server
     from rfm.core.auth import JWTAuthenticator, set_authenticator
+    from rfm.core.monitoring import get_metrics_registry
+    from rfm.core.tracing import configure_tracing, get_tracer
     from rfm.core.rate_limiting import (
-        RateLimiter, RateLimitRule, RateLimitScope, set_rate_limiter
+        RateLimiter, RateLimitRule, RateLimitScope, RateLimitAlgorithm, set_rate_limiter
     )
 except ImportError:
     print("Failed to import required modules. Make sure you're running this script from the project root.")
@@ -123,7 +126,12 @@ def setup_rate_limiting(config: Dict[str, Any]) -> None:
         ]
     
     # Create and set rate limiter
-    rate_limiter = RateLimiter(rules)
+    try:
+        algorithm = RateLimitAlgorithm(rate_limit_config.get("algorithm", RateLimitAlgorithm.SLIDING_WINDOW.value))
+    except ValueError as e:
+        print(f"Unknown rate limit algorithm: {e}; using sliding_window")
+        algorithm = RateLimitAlgorithm.SLIDING_WINDOW
+    rate_limiter = RateLimiter(rules, algorithm=algorithm)
     set_rate_limiter(rate_limiter)
 
 def setup_authentication(config: Dict[str, Any]) -> None:
@@ -153,13 +161,35 @@ def setup_authentication(config: Dict[str, Any]) -> None:
         audience=auth_config.get("audience"),
         issuer=auth_config.get("issuer"),
         required_claims=auth_config.get("required_claims"),
-        env_secret_key=auth_config.get("env_secret_key", "JWT_SECRET_KEY")
+        env_secret_key=auth_config.get("env_secret_key", "JWT_SECRET_KEY"),
+        token_cache_size=auth_config.get("token_cache_size", 10000),
+        negative_cache_ttl=auth_config.get("negative_cache_ttl", 10.0),
+        metrics_registry=get_metrics_registry()
     )
     
     # Set global authenticator
     set_authenticator(authenticator)
 
-async def setup_resource_monitoring(config: Dict[str, Any], server_process_id: int) -> asyncio.Task:
+def setup_tracing(config: Dict[str, Any], args) -> None:
+    """
+    Set up span export from configuration and command-line arguments.
+    
+    Args:
+        config: Configuration dictionary
+        args: Command-line arguments
+    """
+    tracing_config = config.get("tracing", {})
+    path = args.trace_file or tracing_config.get("file")
+    endpoint = args.otlp_endpoint or tracing_config.get("otlp_endpoint")
+    
+    if path or endpoint:
+        configure_tracing(
+            path=path,
+            endpoint=endpoint,
+            service_name=tracing_config.get("service_name", "rfm-websocket-server")
+        )
+
+async def setup_resource_monitoring(config: Dict[str, Any], server_process_id: int) -> Optional[asyncio.Task]:
     """
     Set up resource monitoring task.
     
@@ -168,41 +198,52 @@ async def setup_resource_monitoring(config: Dict[str, Any], server_process_id: i
         server_process_id: Server process ID
         
     Returns:
-        Monitoring task
+        Monitoring task, or None if ResourceMonitor is not available
     """
     monitor_config = config.get("monitoring", {})
-    interval = monitor_config.get("interval", 60)  # Default to 60 seconds
+    interval = monitor_config.get("interval", 1)  # Seconds between samples
+    log_interval = monitor_config.get("log_interval", 60)  # Seconds between summaries
+    history = monitor_config.get("history", 3600)  # Samples kept
+    
+    try:
+        # Import here to avoid circular import
+        from tools.monitor_resources import ResourceMonitor
+    except ImportError:
+        logging.warning("ResourceMonitor not available for monitoring")
+        return None
+    
+    # One monitor for the server's lifetime, so CPU usage is measured between
+    # samples and history accumulates in its ring buffers
+    monitor = ResourceMonitor(
+        process_name="python",
+        port=args.port,
+        output_dir=os.path.join(script_dir, "reports", "resources"),
+        pid=server_process_id,
+        history=history
+    )
     
     async def monitor_resources():
+        last_log = time.time()
         while True:
             try:
-                # Import here to avoid circular import
-                from tools.monitor_resources import ResourceMonitor
-                
-                # Create monitor for this process
-                monitor = ResourceMonitor(
-                    process_name="python",
-                    port=args.port,
-                    output_dir=os.path.join(script_dir, "reports", "resources")
-                )
+                monitor.sample()
                 
-                # Collect a single sample
-                if hasattr(monitor, "collect_sample"):
-                    import psutil
-                    process = psutil.Process(server_process_id)
-                    cpu, memory, sockets = monitor.collect_sample(process)
-                    
-                    # Log resource usage
+                now = time.time()
+                if now - last_log >= log_interval:
+                    last_log = now
+                    summary = monitor.summary(window=log_interval)
                     logging.info(
-                        f"Resource usage - CPU: {cpu:.1f}%, Memory: {memory:.1f}MB, Sockets: {sockets}"
+                        f"Resource usage - CPU: {summary['cpu']['mean']:.1f}% "
+                        f"(max {summary['cpu']['max']:.1f}%), "
+                        f"Memory: {summary['memory']['latest']:.1f}MB, "
+                        f"Sockets: {summary['sockets']['latest']:.0f}, "
+                        f"FDs: {summary['fds']['latest']:.0f}, "
+                        f"Threads: {summary['threads']['latest']:.0f}"
                     )
-            except ImportError:
-                logging.warning("ResourceMonitor not available for monitoring")
-                break
             except Exception as e:
                 logging.error(f"Error monitoring resources: {e}")
                 
-            # Wait before next check
+            # Wait before next sample
             await asyncio.sleep(interval)
     
     # Start monitoring task
@@ -260,6 +301,9 @@ async def main(args):
         logger = logging.getLogger("websocket_server_production")
         logger.warning(f"Skipping authentication due to error: {e}")
     
+    # Set up tracing
+    setup_tracing(config, args)
+    
     # API keys for authentication
     api_keys = None
     if args.enable_auth:
@@ -321,7 +365,8 @@ async def main(args):
         "api_keys": api_keys,
         "ssl_cert_file": ssl_cert_file,
         "ssl_key_file": ssl_key_file,
-        "client_auth": args.client_auth
+        "client_auth": args.client_auth,
+        "enable_profiler": args.enable_profiler or config.get("profiler", {}).get("enabled", False)
     }
     
     # Set up signal handlers for graceful shutdown
@@ -356,6 +401,7 @@ async def main(args):
         # Stop the server
         logger.info("Stopping WebSocket server...")
         await server.stop()
+        get_tracer().shutdown()
         
         # Stop monitoring task if running
         if monitoring_task and not monitoring_task.done():
@@ -388,6 +434,10 @@ if __name__ == "__main__":
     parser.add_argument("--client-auth", action="store_true", help="Require client certificate authentication")
     parser.add_argument("--config", help="Path to configuration file")
     parser.add_argument("--monitor-resources", action="store_true", help="Enable resource monitoring")
+    parser.add_argument("--enable-profiler", action="store_true",
+                        help="Accept sampling profiler admin messages (or set profiler.enabled in the config)")
+    parser.add_argument("--trace-file", help="Append trace spans to this file (OTLP JSON lines)")
+    parser.add_argument("--otlp-endpoint", help="Post trace spans to this OTLP/HTTP traces URL")
     
     args = parser.parse_args()
     
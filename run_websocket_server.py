@@ -23,18 +23,21 @@ sys.path.insert(0, script_dir)
 try:
     from rfm.core.logging_config import configure_logging, LogLevel, LogCategory
     from rfm.core.websocket_server_enhanced import ProgressServer, start_websocket_server
+    from rfm.core.multi_worker import run_multi_worker_server
 except ImportError:
     print("Failed to import required modules. Make sure you're running this script from the project root.")
     sys.exit(1)
 
-async def main(args):
+def build_server_config(args) -> Dict[str, Any]:
     """
-    Main entry point.
+    Build the server configuration from command-line arguments.
     
     Args:
         args: Command-line arguments
+    
+    Returns:
+        Keyword arguments for the server
     """
-    # Set up logging
     log_level_map = {
         "debug": LogLevel.DEBUG,
         "info": LogLevel.INFO,
@@ -47,19 +50,6 @@ async def main(args):
     log_dir = args.log_dir or "logs"
     os.makedirs(log_dir, exist_ok=True)
     
-    # Configure logging
-    configure_logging(
-        app_name="websocket_server",
-        log_dir=log_dir,
-        console_level=log_level,
-        file_level=LogLevel.DEBUG,
-        json_format=True
-    )
-    
-    # Create logger
-    logger = logging.getLogger("websocket_server")
-    logger.info(f"Starting WebSocket server on {args.host}:{args.port}")
-    
     # API keys for authentication
     api_keys = None
     if args.enable_auth:
@@ -81,11 +71,37 @@ async def main(args):
         "log_level": log_level,
         "connection_timeout": args.connection_timeout,
         "enable_authentication": args.enable_auth,
-        "api_keys": api_keys
+        "api_keys": api_keys,
+        "enable_profiler": args.enable_profiler
     }
 
     # Note: message_rate_limit is not supported in the current server implementation
     
+    return server_config
+
+
+async def main(args):
+    """
+    Main entry point.
+    
+    Args:
+        args: Command-line arguments
+    """
+    server_config = build_server_config(args)
+    
+    # Configure logging
+    configure_logging(
+        app_name="websocket_server",
+        log_dir=server_config["log_dir"],
+        console_level=server_config["log_level"],
+        file_level=LogLevel.DEBUG,
+        json_format=True
+    )
+    
+    # Create logger
+    logger = logging.getLogger("websocket_server")
+    logger.info(f"Starting WebSocket server on {args.host}:{args.port}")
+    
     # Set up signal handlers for graceful shutdown
     stop_event = asyncio.Event()
 
@@ -127,11 +143,17 @@ if __name__ == "__main__":
     parser.add_argument("--log-dir", help="Log directory for server")
     parser.add_argument("--connection-timeout", type=float, default=300.0, help="Connection timeout in seconds")
     parser.add_argument("--enable-auth", action="store_true", help="Enable authentication")
+    parser.add_argument("--enable-profiler", action="store_true",
+                        help="Accept sampling profiler admin messages (start_profiler, stop_profiler, get_profile)")
     # Note: message-rate-limit is not used but kept for backward compatibility
     parser.add_argument("--message-rate-limit", type=int, default=100, help="Message rate limit per second (not currently used)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes sharing the port (SO_REUSEPORT)")
     
     args = parser.parse_args()
     
     # Run the server
-    exit_code = asyncio.run(main(args))
+    if args.workers > 1:
+        exit_code = run_multi_worker_server(workers=args.workers, **build_server_config(args))
+    else:
+        exit_code = asyncio.run(main(args))
     sys.exit(exit_code)
\ No newline at end of file
@@ -11,6 +11,7 @@ python${PY_VERSION} -m venv .venv
 source .venv/bin/activate
 pip install --upgrade pip
 pip install -r requirements.txt
+pip install -r requirements_dev.txt   # test tools and the optional extras their tests cover
 
 # ---------- Node (if applicable) ----------
 if [ -f package.json ]; then
@@ -0,0 +1,136 @@
+"""
+Tests for JWT authentication and the verified-token cache.
+"""
+
+import os
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:
+    from rfm.core import auth
+    from rfm.core.auth import JWTAuthenticator, InvalidTokenError
+    from rfm.core.monitoring import MetricsRegistry
+    JWT_AVAILABLE = True
+except ImportError:
+    JWT_AVAILABLE = False
+
+SECRET = "test-secret-key-of-at-least-32-bytes"
+
+
+@unittest.skipUnless(JWT_AVAILABLE, "PyJWT not installed")
+class TestTokenCache(unittest.TestCase):
+    """Test caching of verified and rejected tokens."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry("test")
+        self.authenticator = JWTAuthenticator(secret_key=SECRET, metrics_registry=self.registry,
+                                              metrics_interval=0)
+        self.token = self.authenticator.generate_token("alice")
+
+    def _count_decodes(self):
+        return mock.patch.object(auth.jwt, "decode", wraps=auth.jwt.decode)
+
+    def test_verified_token_cached(self):
+        """Test that a token is decoded once and its cached claims can't be altered."""
+        with self._count_decodes() as decode:
+            claims = self.authenticator.verify_token(self.token)
+            claims["sub"] = "mallory"
+            self.assertEqual(self.authenticator.verify_token(self.token)["sub"], "alice")
+            self.assertEqual(decode.call_count, 1)
+
+            # Verification without the expiry check is cached separately
+            self.authenticator.verify_token(self.token, verify_exp=False)
+            self.assertEqual(decode.call_count, 2)
+
+        stats = self.authenticator.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(self.registry.get_metric("auth.token_cache.hit_rate").value, 100 / 3)
+
+    def test_cached_token_expires(self):
+        """Test that a cached token is verified again from its expiry on."""
+        exp = self.authenticator.verify_token(self.token)["exp"]
+
+        with mock.patch.object(auth, "time", types.SimpleNamespace(time=lambda: exp)), self._count_decodes() as decode:
+            self.authenticator.verify_token(self.token, verify_exp=True)
+            self.assertEqual(decode.call_count, 1)
+
+    def test_rejected_token_cached(self):
+        """Test that a rejected token is rejected again without decoding."""
+        bad_token = self.token[:-2] + ("AA" if not self.token.endswith("AA") else "BB")
+
+        with self._count_decodes() as decode:
+            for _ in range(3):
+                with self.assertRaises(InvalidTokenError):
+                    self.authenticator.verify_token(bad_token)
+            self.assertEqual(decode.call_count, 1)
+
+        self.assertEqual(self.authenticator.cache_stats()["negative_hits"], 2)
+
+        # Rejections expire
+        later = time.time() + 60
+        with mock.patch.object(auth, "time", types.SimpleNamespace(time=lambda: later)):
+            with self._count_decodes() as decode, self.assertRaises(InvalidTokenError):
+                self.authenticator.verify_token(bad_token)
+            self.assertEqual(decode.call_count, 1)
+
+    def test_key_rotation_invalidates(self):
+        """Test that tokens must verify again after the key or settings change."""
+        self.authenticator.verify_token(self.token)
+
+        self.authenticator.rotate_key("rotated-" + SECRET)
+        with self.assertRaises(InvalidTokenError):
+            self.authenticator.verify_token(self.token)
+
+        # Changing validation settings directly also clears the cache
+        token = self.authenticator.generate_token("bob")
+        self.authenticator.verify_token(token)
+        self.authenticator.audience = "other"
+        with self.assertRaises(InvalidTokenError):
+            self.authenticator.verify_token(token)
+
+    def test_rotation_during_decode(self):
+        """Test that a verification racing a key rotation is not cached."""
+        decode = auth.jwt.decode
+
+        def rotate_then_decode(*args, **kwargs):
+            self.authenticator.rotate_key("rotated-" + SECRET)
+            return decode(*args, **kwargs)
+
+        # Decoded with the old key while the new key is already active
+        with mock.patch.object(auth.jwt, "decode", side_effect=rotate_then_decode):
+            self.authenticator.verify_token(self.token)
+        self.assertEqual(self.authenticator.cache_stats()["size"], 0)
+        with self.assertRaises(InvalidTokenError):
+            self.authenticator.verify_token(self.token)
+
+        # Nor is a rejection by the old key
+        token = self.authenticator.generate_token("bob")
+        self.authenticator.rotate_key(SECRET)
+        with mock.patch.object(auth.jwt, "decode", side_effect=rotate_then_decode):
+            with self.assertRaises(InvalidTokenError):
+                self.authenticator.verify_token(token)
+        self.assertEqual(self.authenticator.cache_stats()["negative_size"], 0)
+        self.assertEqual(self.authenticator.verify_token(token)["sub"], "bob")
+
+    def test_cache_bounded(self):
+        """Test that the least recently used tokens are evicted."""
+        authenticator = JWTAuthenticator(secret_key=SECRET, token_cache_size=2)
+        tokens = [authenticator.generate_token(f"user-{index}") for index in range(3)]
+        for token in tokens:
+            authenticator.verify_token(token)
+
+        self.assertEqual(authenticator.cache_stats()["size"], 2)
+        with self._count_decodes() as decode:
+            authenticator.verify_token(tokens[0])
+            authenticator.verify_token(tokens[2])
+            self.assertEqual(decode.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+"""
+Tests for message codecs and codec negotiation.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+import websockets
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.codec import (
+    MessageCodec, CodecError, JSON_CODEC, CBOR_AVAILABLE, MSGPACK_AVAILABLE,
+    pack_message, unpack_message, get_codec, negotiate_codec, supported_subprotocols
+)
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+from rfm.core.websocket_server_secure import SecureProgressServer
+
+
+class PackedJsonCodec(MessageCodec):
+    """Binary test codec: schema-packed messages as UTF-8 JSON."""
+
+    name = "packed-json"
+    binary = True
+
+    def encode(self, message):
+        return json.dumps(pack_message(message)).encode("utf-8")
+
+    def _loads(self, payload):
+        return json.loads(payload.decode("utf-8"))
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent payloads."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, payload):
+        self.sent.append(payload)
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+PROGRESS = {
+    "type": "progress_update",
+    "timestamp": 1700000000.5,
+    "seq": 7,
+    "data": {
+        "operation_id": "op1",
+        "operation_type": "render",
+        "progress": 42.5,
+        "status": "running",
+        "details": {"tile": 3},
+        "worker": "w1"
+    }
+}
+
+
+class TestSchemaPacking(unittest.TestCase):
+    """Test schema-aware packing of hot message types."""
+
+    def test_round_trip(self):
+        """Test that packing is lossless, including unknown fields."""
+        messages = [
+            PROGRESS,
+            {"type": "operation_started", "operation": {"operation_id": "op1", "start_time": 1.0}},
+            {"type": "pong", "timestamp": 2.0, "client_timestamp": 1.5, "server_id": "s"},
+        ]
+        for message in messages:
+            packed = pack_message(message)
+            self.assertIsInstance(packed, list)
+            self.assertEqual(unpack_message(json.loads(json.dumps(packed))), message)
+
+    def test_packed_form_is_positional(self):
+        """Test that known fields are sent by position, not by name."""
+        code, mask, values, body_extra, message_extra = pack_message(PROGRESS)
+
+        self.assertEqual(values, ["op1", "render", 42.5, "running", {"tile": 3}])
+        self.assertEqual(body_extra, {"worker": "w1"})
+        self.assertEqual(message_extra, {"timestamp": 1700000000.5, "seq": 7})
+        self.assertNotIn("operation_id", json.dumps(pack_message(
+            {"type": "progress_update", "data": {"operation_id": "x", "progress": 1}}
+        )))
+
+    def test_trace_id_packed(self):
+        """Test that trace IDs of progress payloads are schema fields."""
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        messages = [
+            {"type": "progress_update", "data": {"operation_id": "op1", "progress": 5, "trace_id": trace_id}},
+            {"type": "operation_started", "operation": {"operation_id": "op1", "start_time": 1.0, "trace_id": trace_id}},
+        ]
+        for message in messages:
+            packed = pack_message(message)
+            self.assertEqual(packed[2][-1], trace_id)
+            self.assertFalse(packed[3])
+            self.assertEqual(unpack_message(json.loads(json.dumps(packed))), message)
+
+    def test_unknown_types_unchanged(self):
+        """Test that messages without a schema are passed through."""
+        message = {"type": "operations_list", "operations": []}
+        self.assertIs(pack_message(message), message)
+
+    def test_malformed(self):
+        """Test that malformed packed content is rejected."""
+        for packed in ([99, 0, [], None, None], [1, 3, ["only one"], None, None], "text"):
+            with self.assertRaises(CodecError):
+                unpack_message(packed)
+
+
+class TestNegotiation(unittest.TestCase):
+    """Test codec lookup and negotiation."""
+
+    def test_json_fallback(self):
+        """Test that unknown or unavailable codecs fall back to JSON."""
+        self.assertIs(negotiate_codec(None, None), JSON_CODEC)
+        self.assertIs(negotiate_codec(None, "nonsense"), JSON_CODEC)
+        self.assertIs(get_codec("rfm.json"), JSON_CODEC)
+        self.assertEqual(supported_subprotocols()[-1], "rfm.json")
+
+        if not MSGPACK_AVAILABLE:
+            self.assertIs(negotiate_codec("rfm.msgpack", "msgpack"), JSON_CODEC)
+
+    def test_text_frames_are_json(self):
+        """Test that text frames decode as JSON whatever the codec."""
+        codec = PackedJsonCodec()
+        self.assertEqual(codec.decode('{"type": "ping"}'), {"type": "ping"})
+        self.assertEqual(codec.decode(codec.encode(PROGRESS)), PROGRESS)
+
+        with self.assertRaises(CodecError):
+            JSON_CODEC.decode("{not json")
+        with self.assertRaises(CodecError):
+            JSON_CODEC.decode("[1, 2]")
+
+    def test_batch_round_trip(self):
+        """Test that batch envelopes carry encoded messages unchanged."""
+        pong = {"type": "pong", "timestamp": 2.0}
+        for codec in (JSON_CODEC, PackedJsonCodec()):
+            batch = codec.encode_batch([codec.encode(PROGRESS), codec.encode(pong)])
+            self.assertEqual(codec.decode(batch), {"type": "batch", "messages": [PROGRESS, pong]})
+
+    @unittest.skipUnless(MSGPACK_AVAILABLE, "msgpack not installed")
+    def test_msgpack_round_trip(self):
+        """Test the MessagePack codec."""
+        codec = get_codec("msgpack")
+        payload = codec.encode(PROGRESS)
+
+        self.assertIsInstance(payload, bytes)
+        self.assertLess(len(payload), len(JSON_CODEC.encode(PROGRESS)))
+        self.assertEqual(codec.decode(payload), PROGRESS)
+        self.assertEqual(
+            codec.decode(codec.encode_batch([payload, payload])),
+            {"type": "batch", "messages": [PROGRESS, PROGRESS]}
+        )
+
+    @unittest.skipUnless(CBOR_AVAILABLE, "cbor2 not installed")
+    def test_cbor_round_trip(self):
+        """Test the CBOR codec, including batches with multi-byte array headers."""
+        codec = get_codec("cbor")
+        payload = codec.encode(PROGRESS)
+
+        self.assertIsInstance(payload, bytes)
+        self.assertLess(len(payload), len(JSON_CODEC.encode(PROGRESS)))
+        self.assertEqual(codec.decode(payload), PROGRESS)
+        for count in (2, 30, 300):
+            self.assertEqual(
+                codec.decode(codec.encode_batch([payload] * count)),
+                {"type": "batch", "messages": [PROGRESS] * count}
+            )
+
+
+class TestServerCodecs(unittest.TestCase):
+    """Test per-client codecs in the server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_secure_server_negotiates(self):
+        """Test that the secure server offers the same subprotocols."""
+        async def run():
+            server = SecureProgressServer(
+                host="localhost",
+                port=0,
+                data_dir=os.path.join(self.temp_dir.name, "secure"),
+                log_dir=os.path.join(self.temp_dir.name, "logs")
+            )
+            await server.start()
+            try:
+                port = server.server.sockets[0].getsockname()[1]
+                async with websockets.connect(f"ws://localhost:{port}",
+                                              subprotocols=supported_subprotocols()) as websocket:
+                    return websocket.subprotocol
+            finally:
+                await server.stop()
+
+        self.assertEqual(asyncio.run(run()), supported_subprotocols()[0])
+
+    def test_broadcast_encodes_once_per_codec(self):
+        """Test that broadcasts are encoded once per codec."""
+        binary_codec = PackedJsonCodec()
+
+        async def run():
+            sockets = {}
+            for connection_id, codec in (("json1", JSON_CODEC), ("json2", JSON_CODEC),
+                                         ("bin1", binary_codec), ("bin2", binary_codec)):
+                sockets[connection_id] = FakeWebSocket()
+                self.server._register_client(ClientInfo(
+                    connection_id=connection_id, websocket=sockets[connection_id], codec=codec
+                ))
+            await self.server._process_message("json1", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": "op1", "operation_type": "render", "progress": 10}
+            })
+            return sockets
+
+        sockets = asyncio.run(run())
+
+        self.assertIs(sockets["bin1"].sent[-1], sockets["bin2"].sent[-1])
+        self.assertIsInstance(sockets["bin1"].sent[-1], bytes)
+        self.assertIsInstance(sockets["json2"].sent[-1], str)
+        self.assertEqual(
+            binary_codec.decode(sockets["bin1"].sent[-1]),
+            json.loads(sockets["json2"].sent[-1])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for per-operation conflation of progress updates.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.conflation import UpdateConflator
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class TestUpdateConflator(unittest.TestCase):
+    """Test the latest-value-wins buffer."""
+
+    def test_latest_update_wins(self):
+        """Test that only the latest update per key is flushed, in first-seen order."""
+        async def run():
+            flushed = []
+
+            async def deliver(key, update):
+                flushed.append((key, update))
+
+            conflator = UpdateConflator(deliver, interval=60)
+            for n in range(5):
+                conflator.offer("a", n)
+                conflator.offer("b", n * 10)
+            conflator.offer("a", 99)
+
+            self.assertEqual(conflator.pending_count(), 2)
+            self.assertEqual(conflator.take("b"), 40)
+            conflator.offer("c", 1)
+
+            await conflator.stop()
+            return conflator, flushed
+
+        conflator, flushed = asyncio.run(run())
+
+        self.assertEqual(flushed, [("a", 99), ("c", 1)])
+        self.assertEqual(conflator.conflated, 9)
+
+    def test_tick_flush(self):
+        """Test that pending updates are flushed on the tick."""
+        async def run():
+            flushed = []
+
+            async def deliver(key, update):
+                flushed.append(update)
+
+            conflator = UpdateConflator(deliver, interval=0.01)
+            conflator.offer("a", 1)
+            await asyncio.sleep(0.05)
+            return flushed
+
+        self.assertEqual(asyncio.run(run()), [1])
+
+
+class TestServerConflation(unittest.TestCase):
+    """Test conflation of progress updates in the server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=60
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id):
+        websocket = FakeWebSocket()
+        self.server._register_client(ClientInfo(connection_id=connection_id, websocket=websocket))
+        return websocket
+
+    def _progress(self, progress, status="running"):
+        return self.server._process_message("renderer", {
+            "type": MessageType.PROGRESS_UPDATE,
+            "data": {"operation_id": "op", "operation_type": "render", "status": status, "progress": progress}
+        })
+
+    def test_progress_conflated_transitions_immediate(self):
+        """Test that bursts collapse while status transitions pass through."""
+        async def run():
+            self._add_client("renderer")
+            dashboard = self._add_client("dashboard")
+
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_STARTED,
+                "operation": {"operation_id": "op", "operation_type": "render"}
+            })
+
+            # First update sets the status, the rest of the burst is held back
+            for progress in range(0, 50):
+                await self._progress(progress)
+            after_burst = [m["type"] for m in dashboard.sent]
+
+            await self.server.progress_conflator.flush()
+            flushed = dashboard.sent[-1]["data"]["progress"]
+
+            # Pausing is a transition; the pending update is superseded
+            await self._progress(60)
+            await self._progress(61, status="paused")
+            await self._progress(62, status="paused")
+
+            # Completion relays the pending update first
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_COMPLETED, "operation_id": "op"
+            })
+            await self.server.progress_conflator.stop()
+            return after_burst, flushed, dashboard
+
+        after_burst, flushed, dashboard = asyncio.run(run())
+
+        self.assertEqual(after_burst, ["operation_started", "progress_update"])
+        self.assertEqual(flushed, 49)
+        self.assertEqual(
+            [m.get("data", {}).get("progress") for m in dashboard.sent[3:]],
+            [61, 62, None]
+        )
+        self.assertEqual(dashboard.sent[-1]["type"], "operation_completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+"""
+Tests for the shared event bus of the multi-worker server.
+"""
+
+import os
+import sys
+import json
+import socket
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.event_bus import (
+    OperationRegistry, LocalEventHub, LocalEventBus, UnixSocketEventBroker, UnixSocketEventBus
+)
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+from rfm.core.websocket_server_secure import SecureProgressServer
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def started(operation_id):
+    return {"type": "operation_started", "operation": {"operation_id": operation_id, "operation_type": "render"}}
+
+
+def progress(operation_id, value):
+    return {"type": "progress_update", "data": {"operation_id": operation_id, "progress": value, "status": "running"}}
+
+
+class TestOperationRegistry(unittest.TestCase):
+    """Test the shared operation registry."""
+
+    def test_latest_events_in_replay_order(self):
+        """Test that only the latest lifecycle events are kept."""
+        registry = OperationRegistry()
+        registry.record(started("a"))
+        registry.record(progress("a", 10))
+        registry.record(started("b"))
+        registry.record(progress("a", 20))
+        registry.record({"type": "operation_completed", "operation_id": "b"})
+        registry.record({"type": "cancel_operation", "operation_id": "a"})
+
+        self.assertEqual(registry.snapshot(), [
+            started("a"), progress("a", 20),
+            started("b"), {"type": "operation_completed", "operation_id": "b"}
+        ])
+
+        registry.forget("a")
+        self.assertEqual(len(registry), 1)
+
+    def test_bounded(self):
+        """Test that the least recently updated operations are evicted."""
+        registry = OperationRegistry(max_operations=2)
+        for operation_id in ("a", "b"):
+            registry.record(started(operation_id))
+        registry.record(progress("a", 5))
+        registry.record(started("c"))
+
+        self.assertEqual(
+            [m.get("operation", m.get("data", {})).get("operation_id") for m in registry.snapshot()],
+            ["a", "a", "c"]
+        )
+
+
+class TestUnixSocketBus(unittest.TestCase):
+    """Test the Unix-domain socket broker."""
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix-domain sockets not available")
+    def test_relay_and_snapshot(self):
+        """Test that events reach other workers and late joiners see the registry."""
+        async def run():
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, "bus.sock")
+                broker = UnixSocketEventBroker(path)
+                await broker.start()
+
+                received = {"a": [], "b": []}
+
+                def collector(name):
+                    async def callback(message, topics):
+                        received[name].append((message, topics))
+                    return callback
+
+                bus_a = UnixSocketEventBus(path, worker_id="a")
+                bus_b = UnixSocketEventBus(path, worker_id="b")
+                await bus_a.start(collector("a"))
+                await bus_b.start(collector("b"))
+
+                await bus_a.publish(started("op"), ["operation:op"])
+                await bus_a.publish(progress("op", 50))
+                await asyncio.sleep(0.05)
+
+                late = UnixSocketEventBus(path, worker_id="late")
+                await late.start(collector("late"))
+                snapshot = await late.snapshot()
+
+                await bus_b.forget("op")
+                await asyncio.sleep(0.05)
+                after_forget = await late.snapshot()
+
+                for bus in (bus_a, bus_b, late):
+                    await bus.stop()
+                await broker.stop()
+                return received, snapshot, after_forget
+
+        received, snapshot, after_forget = asyncio.run(run())
+
+        self.assertEqual(received["a"], [])
+        self.assertEqual(received["b"], [(started("op"), ["operation:op"]), (progress("op", 50), None)])
+        self.assertEqual(snapshot, [started("op"), progress("op", 50)])
+        self.assertEqual(after_forget, [])
+
+
+class TestServerWorkers(unittest.TestCase):
+    """Test operation sharing between server workers."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.hub = LocalEventHub()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _server(self, name):
+        server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, name, "logs"),
+            progress_flush_interval=0,
+            event_bus=LocalEventBus(self.hub, worker_id=name)
+        )
+        server.metrics_registry.stop_system_metrics_collection()
+        return server
+
+    def _add_client(self, server, connection_id, user_id=None):
+        websocket = FakeWebSocket()
+        server._register_client(ClientInfo(connection_id=connection_id, websocket=websocket, user_id=user_id))
+        return websocket
+
+    def test_events_shared_across_workers(self):
+        """Test that clients of one worker see operations reported to another."""
+        async def run():
+            worker_a = self._server("a")
+            worker_b = self._server("b")
+            await worker_a._start_event_bus()
+            await worker_b._start_event_bus()
+
+            self._add_client(worker_a, "renderer", user_id="alice")
+            dashboard = self._add_client(worker_b, "dashboard")
+            bob = self._add_client(worker_b, "bob_ui")
+            await worker_b._process_message("bob_ui", {"type": MessageType.SUBSCRIBE, "user_id": "bob"})
+            bob.sent.clear()
+
+            await worker_a._process_message("renderer", {
+                "type": MessageType.OPERATION_STARTED,
+                "operation": {"operation_id": "op", "operation_type": "render"}
+            })
+            await worker_a._process_message("renderer", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": "op", "operation_type": "render", "progress": 30, "status": "running"}
+            })
+
+            bob_events = list(bob.sent)
+
+            # Cancellation requested on worker B reaches the reporter on worker A
+            renderer = worker_a.clients["renderer"].websocket
+            await worker_b._cancel_operation("dashboard", "op")
+
+            # A worker joining later replays the registry
+            worker_c = self._server("c")
+            await worker_c._start_event_bus()
+            return worker_b, worker_c, dashboard, bob_events, renderer
+
+        worker_b, worker_c, dashboard, bob_events, renderer = asyncio.run(run())
+
+        self.assertEqual([m["type"] for m in dashboard.sent], ["operation_started", "progress_update", "cancel_operation"])
+        self.assertEqual(bob_events, [])
+        self.assertEqual(worker_b.operations["op"]["progress"], 30)
+        self.assertTrue(worker_b.operations["op"]["cancellation_requested"])
+        self.assertEqual(worker_b.operation_topics["op"], ["operation:op", "type:render", "user:alice"])
+        self.assertEqual(renderer.sent[-1]["type"], "cancel_operation")
+        self.assertEqual(worker_c.operations["op"]["progress"], 30)
+
+    @unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "SO_REUSEPORT not available")
+    def test_workers_share_port(self):
+        """Test that several workers (plain and secure) can listen on the same port."""
+        async def run():
+            with socket.socket() as probe:
+                probe.bind(("localhost", 0))
+                port = probe.getsockname()[1]
+
+            servers = []
+            for name, server_class in (("a", ProgressServer), ("b", SecureProgressServer)):
+                server = server_class(
+                    port=port,
+                    data_dir=os.path.join(self.temp_dir.name, name, "data"),
+                    log_dir=os.path.join(self.temp_dir.name, name, "logs"),
+                    event_bus=LocalEventBus(self.hub, worker_id=name),
+                    reuse_port=True
+                )
+                await server.start()
+                servers.append(server)
+
+            buses = len(self.hub.buses)
+            for server in servers:
+                await server.stop()
+
+            # The last server stops the shared retention wheel
+            return buses, servers[0].retention_wheel._task
+
+        buses, retention_task = asyncio.run(run())
+        self.assertEqual(buses, 2)
+        self.assertIsNone(retention_task)
+
+
+if __name__ == "__main__":
+    unittest.main()
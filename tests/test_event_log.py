@@ -0,0 +1,213 @@
+"""
+Tests for the durable operation event log.
+"""
+
+import os
+import sys
+import glob
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.event_log import EventLog
+from rfm.core.websocket_server_enhanced import ProgressServer, MessageType
+from rfm.core.websocket_server_secure import SecureProgressServer
+
+
+class TestEventLog(unittest.TestCase):
+    """Test group commit, snapshots and recovery."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _log(self, **kwargs):
+        return EventLog(self.directory, fsync=False, **kwargs)
+
+    def test_group_commit_coalesces_changes(self):
+        """Test that only the latest change of an operation per commit is written."""
+        async def run():
+            log = self._log()
+            operation = {"operation_id": "a", "progress": 0}
+            for progress in range(100):
+                operation["progress"] = progress
+                log.record("a", operation)
+            log.record("b", {"operation_id": "b", "progress": 5})
+            await log.flush()
+
+            log.record("b", None)
+            await log.flush()
+            return log
+
+        log = asyncio.run(run())
+
+        self.assertEqual(log.changes, 102)
+        self.assertEqual(log.records_written, 3)
+        self.assertEqual(log.commits, 2)
+        self.assertEqual(self._log().recover(), {"a": {"operation_id": "a", "progress": 99}})
+
+    def test_snapshot_replaces_segments(self):
+        """Test recovery from a snapshot plus the records after it."""
+        async def run():
+            operations = {}
+            log = self._log()
+            await log.start(lambda: operations)
+
+            for name in ("a", "b"):
+                operations[name] = {"operation_id": name, "status": "running"}
+                log.record(name, operations[name])
+            await log.flush()
+            await log.snapshot()
+            segments_after_snapshot = glob.glob(os.path.join(self.directory, "segment-*"))
+
+            operations["a"]["status"] = "completed"
+            log.record("a", operations["a"])
+            del operations["b"]
+            log.record("b", None)
+            await log.flush()
+
+            # Simulate a crash: no final snapshot
+            log._task.cancel()
+            log._segment.close()
+            return segments_after_snapshot
+
+        segments_after_snapshot = asyncio.run(run())
+
+        self.assertEqual(segments_after_snapshot, [])
+        recovered = self._log()
+        self.assertEqual(recovered.recover(), {"a": {"operation_id": "a", "status": "completed"}})
+        self.assertEqual((recovered.snapshot_lsn, recovered.last_lsn), (2, 4))
+
+    def test_torn_record_ignored(self):
+        """Test that a partially written record at the end of a segment is skipped."""
+        async def run():
+            log = self._log()
+            log.record("a", {"operation_id": "a"})
+            await log.flush()
+            log._segment.write(b'[2,"b",{"operation')
+            log._segment.close()
+
+            # New records after recovery go to a new segment
+            recovered = self._log()
+            operations = recovered.recover()
+            recovered.record("c", {"operation_id": "c"})
+            await recovered.flush()
+            recovered._segment.close()
+            return operations
+
+        self.assertEqual(asyncio.run(run()), {"a": {"operation_id": "a"}})
+        self.assertEqual(sorted(self._log().recover()), ["a", "c"])
+
+
+class TestServerRecovery(unittest.TestCase):
+    """Test that operations survive a server restart."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _server(self):
+        server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0
+        )
+        server.metrics_registry.stop_system_metrics_collection()
+        server.event_log.fsync = False
+        return server
+
+    def test_restart_restores_operations(self):
+        """Test that a restarted server knows the operations of the previous run."""
+        async def run():
+            server = self._server()
+            await server._recover_operations()
+            for operation_id in ("a", "b"):
+                await server._process_message("reporter", {
+                    "type": MessageType.OPERATION_STARTED,
+                    "operation": {"operation_id": operation_id, "operation_type": "render"}
+                })
+            await server._process_message("reporter", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": "a", "progress": 40, "status": "running"}
+            })
+            await server._process_message("reporter", {
+                "type": MessageType.OPERATION_COMPLETED, "operation_id": "b"
+            })
+            await server.event_log.stop()
+
+            restarted = self._server()
+            await restarted._recover_operations()
+            await restarted.event_log.stop()
+            return restarted
+
+        restarted = asyncio.run(run())
+
+        self.assertEqual(sorted(restarted.operations), ["a", "b"])
+        self.assertEqual(restarted.operations["a"]["progress"], 40)
+        self.assertEqual(restarted.operations["b"]["status"], "completed")
+
+    def test_interrupted_operations_failed(self):
+        """Test that operations running before a restart are failed and expire."""
+        async def run():
+            server = self._server()
+            await server._recover_operations()
+            await server._process_message("reporter", {
+                "type": MessageType.OPERATION_STARTED,
+                "operation": {"operation_id": "a", "operation_type": "render"}
+            })
+            await server.event_log.stop()
+
+            restarted = self._server()
+            await restarted._recover_operations()
+            scheduled = restarted.retention_wheel.cancel("a", restarted._expire_operations)
+            await restarted.event_log.stop()
+
+            # The failure is persisted, not re-derived on every restart
+            return restarted.operations["a"], scheduled, self._server().event_log.recover()["a"]
+
+        operation, scheduled, persisted = asyncio.run(run())
+
+        self.assertEqual(operation["status"], "failed")
+        self.assertEqual(operation["details"]["error_message"], "Interrupted by server restart")
+        self.assertTrue(scheduled)
+        self.assertEqual(persisted["status"], "failed")
+
+    def test_secure_server_recovers(self):
+        """Test that starting the secure server restores operations and commits changes."""
+        async def run():
+            log = EventLog(os.path.join(self.temp_dir.name, "data", "events"), fsync=False)
+            log.record("a", {"operation_id": "a", "status": "completed"})
+            await log.flush()
+            log._segment.close()
+
+            server = SecureProgressServer(
+                host="localhost",
+                port=0,
+                data_dir=os.path.join(self.temp_dir.name, "data"),
+                log_dir=os.path.join(self.temp_dir.name, "logs")
+            )
+            server.event_log.fsync = False
+            await server.start()
+            try:
+                operations = dict(server.operations)
+                committing = server.event_log._task is not None
+            finally:
+                await server.stop()
+            return operations, committing
+
+        operations, committing = asyncio.run(run())
+
+        self.assertEqual(operations["a"]["status"], "completed")
+        self.assertTrue(committing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,301 @@
+"""
+Tests for per-client send queues and serialize-once broadcast.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.codec import JSON_CODEC
+from rfm.core.fanout import ClientSendQueue, OverflowPolicy, OVERFLOW_CLOSE_CODE
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+from ui.rfm_ui.websocket_client_enhanced import WebSocketClient
+
+
+class FakeWebSocket:
+    """WebSocket stand-in that records sent messages and can be stalled."""
+
+    def __init__(self):
+        self.sent = []
+        self.raw = []
+        self.close_code = None
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send(self, message):
+        await self.gate.wait()
+        self.raw.append(message)
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+
+class TestClientSendQueue(unittest.TestCase):
+    """Test overflow policies of the send queue."""
+
+    def _fill(self, policy, count, key=None):
+        async def run():
+            websocket = FakeWebSocket()
+            websocket.gate.clear()
+            queue = ClientSendQueue(websocket, max_size=3, overflow_policy=policy)
+            queue.start()
+
+            # Let the writer pick up the first message and block on it
+            queue.put(json.dumps({"n": 0}), "test", key)
+            await asyncio.sleep(0)
+
+            for n in range(1, count):
+                queue.put(json.dumps({"n": n}), "test", key)
+
+            websocket.gate.set()
+            if not queue.closed:
+                await queue.join()
+            else:
+                await asyncio.sleep(0.01)
+            await queue.stop()
+            return websocket, queue
+
+        return asyncio.run(run())
+
+    def test_drop_oldest(self):
+        """Test that the oldest queued messages are dropped."""
+        websocket, queue = self._fill(OverflowPolicy.DROP_OLDEST, 10)
+
+        self.assertEqual([m["n"] for m in websocket.sent], [0, 7, 8, 9])
+        self.assertEqual(queue.dropped, 6)
+
+    def test_conflate(self):
+        """Test that queued messages with the same key are replaced in place."""
+        websocket, queue = self._fill(OverflowPolicy.CONFLATE, 10, key="op")
+
+        self.assertEqual([m["n"] for m in websocket.sent], [0, 9])
+        self.assertEqual(queue.conflated, 8)
+        self.assertEqual(queue.dropped, 0)
+
+    def test_disconnect(self):
+        """Test that an overflowing client is disconnected."""
+        websocket, queue = self._fill(OverflowPolicy.DISCONNECT, 10)
+
+        self.assertTrue(queue.closed)
+        self.assertEqual(websocket.close_code, OVERFLOW_CLOSE_CODE)
+        self.assertFalse(queue.put("{}"))
+
+    def test_undroppable_messages_survive_overflow(self):
+        """Test that overflow never discards undroppable messages."""
+        async def run():
+            websocket = FakeWebSocket()
+            websocket.gate.clear()
+            queue = ClientSendQueue(websocket, max_size=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+            queue.start()
+            queue.put(json.dumps({"n": 0}), "test")
+            await asyncio.sleep(0)
+
+            queue.put(json.dumps({"n": 1}), "frame", droppable=False)
+            queue.put(json.dumps({"n": 2}), "frame", droppable=False)
+            queue.put(json.dumps({"n": 3}), "test")
+            queue.put(json.dumps({"n": 4}), "test")
+
+            websocket.gate.set()
+            await queue.join()
+            await queue.stop()
+            return websocket, queue
+
+        websocket, queue = asyncio.run(run())
+
+        self.assertEqual([m["n"] for m in websocket.sent], [0, 1, 2, 4])
+        self.assertEqual(queue.dropped, 1)
+
+    def test_wait_for_space(self):
+        """Test waiting for room by message count and bytes."""
+        async def run():
+            websocket = FakeWebSocket()
+            websocket.gate.clear()
+            queue = ClientSendQueue(websocket, max_size=3)
+            queue.start()
+
+            # Payloads of 10 bytes
+            queue.put(json.dumps({"p": "x"}), "test")
+            await asyncio.sleep(0)
+            queue.put(json.dumps({"p": "y"}), "test")
+
+            # Within the byte budget right away
+            fits = await queue.wait_for_space(10, max_bytes=20)
+            # Over the budget while the writer is stalled
+            timed_out = not await queue.wait_for_space(20, max_bytes=20, timeout=0.01)
+
+            waiter = asyncio.ensure_future(queue.wait_for_space(20, max_bytes=20))
+            await asyncio.sleep(0.01)
+            waiting = not waiter.done()
+            websocket.gate.set()
+            drained = await asyncio.wait_for(waiter, timeout=1)
+
+            websocket.gate.clear()
+            queue.put(json.dumps({"p": "z"}), "test")
+            await asyncio.sleep(0)
+            queue.put(json.dumps({"p": "z"}), "test")
+            waiter = asyncio.ensure_future(queue.wait_for_space(20, max_bytes=20))
+            await asyncio.sleep(0)
+            await queue.stop()
+            stopped = not await waiter
+            return fits, timed_out, waiting, drained, stopped
+
+        self.assertEqual(asyncio.run(run()), (True, True, True, True, True))
+
+    def test_queued_bytes_are_encoded_size(self):
+        """Test that text payloads count with their UTF-8 size."""
+        queue = ClientSendQueue(FakeWebSocket(), max_size=10)
+        queue.put(json.dumps({"p": "é"}, ensure_ascii=False), "test")
+        queue.put(b"\x00\x01\x02", "frame")
+        self.assertEqual(queue.queued_bytes(), 11 + 3)
+
+
+class TestBatching(unittest.TestCase):
+    """Test batch framing in the send queue."""
+
+    def _send(self, count, **batch_options):
+        async def run():
+            websocket = FakeWebSocket()
+            queue = ClientSendQueue(
+                websocket, max_size=1000, batch_encoder=JSON_CODEC.encode_batch, **batch_options
+            )
+            queue.start()
+            for n in range(count):
+                queue.put(json.dumps({"n": n}), "test")
+            await queue.join()
+            await queue.stop()
+            return websocket, queue
+
+        return asyncio.run(run())
+
+    def test_burst_is_batched(self):
+        """Test that a burst is written as a few batch frames, in order."""
+        websocket, queue = self._send(200, batch_delay=0.01, batch_max_messages=64)
+
+        self.assertEqual([len(frame["messages"]) for frame in websocket.sent], [64, 64, 64, 8])
+        self.assertEqual(
+            [m["n"] for frame in websocket.sent for m in frame["messages"]], list(range(200))
+        )
+        self.assertEqual((queue.sent, queue.frames), (200, 4))
+
+    def test_size_threshold(self):
+        """Test that batches are split at the byte threshold."""
+        websocket, queue = self._send(10, batch_delay=0.01, batch_max_bytes=30)
+
+        self.assertTrue(all(len(json.dumps(frame)) < 120 for frame in websocket.sent))
+        self.assertEqual(queue.sent, 10)
+        self.assertGreater(queue.frames, 2)
+
+    def test_single_message_unwrapped(self):
+        """Test that a lone message is written as is after the deadline."""
+        websocket, queue = self._send(1, batch_delay=0.01)
+
+        self.assertEqual(websocket.sent, [{"n": 0}])
+
+    def test_client_unpacks_batches(self):
+        """Test that the client handles batched messages in order."""
+        client = WebSocketClient(batch_messages=True)
+        self.assertIn("batch=1", client.url)
+
+        asyncio.run(client._handle_message(json.loads(JSON_CODEC.encode_batch([
+            json.dumps({"type": "operation_started", "operation": {"operation_id": "a", "operation_type": "render"}}),
+            json.dumps({"type": "progress_update", "data": {"operation_id": "a", "progress": 40, "status": "running"}})
+        ]))))
+
+        self.assertEqual(client.operations["a"].progress, 40)
+
+
+class TestServerFanout(unittest.TestCase):
+    """Test broadcast through per-client send queues."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            send_queue_size=4
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id, batch_messages=False):
+        websocket = FakeWebSocket()
+        client_info = ClientInfo(connection_id=connection_id, websocket=websocket, batch_messages=batch_messages)
+        client_info.send_queue = self.server._create_send_queue(client_info)
+        client_info.send_queue.start()
+        self.server._register_client(client_info)
+        return websocket
+
+    def test_slow_client_does_not_stall_others(self):
+        """Test that a stalled client neither blocks nor receives stale progress."""
+        async def run():
+            fast = [self._add_client(f"fast{n}") for n in range(50)]
+            slow = self._add_client("slow")
+            slow.gate.clear()
+
+            for progress in range(0, 100, 10):
+                await self.server._broadcast_progress_update({
+                    "type": MessageType.PROGRESS_UPDATE,
+                    "data": {"operation_id": "op", "status": "running", "progress": progress}
+                })
+                await asyncio.sleep(0)
+
+            for n in range(len(fast)):
+                await self.server.clients[f"fast{n}"].send_queue.join()
+            fast_counts = [len(websocket.sent) for websocket in fast]
+
+            # One serialization per update, shared by all clients
+            shared_payloads = all(
+                websocket.raw[n] is fast[0].raw[n] for websocket in fast for n in range(10)
+            )
+
+            slow.gate.set()
+            await self.server.clients["slow"].send_queue.join()
+
+            for client_info in self.server.clients.values():
+                await client_info.send_queue.stop()
+            return fast_counts, shared_payloads, slow
+
+        fast_counts, shared_payloads, slow = asyncio.run(run())
+
+        self.assertTrue(shared_payloads)
+        self.assertEqual(fast_counts, [10] * 50)
+
+        # The stalled client only gets the first and the latest state
+        self.assertEqual([m["data"]["progress"] for m in slow.sent], [0, 90])
+
+    def test_batching_client(self):
+        """Test that events for a batching client are framed together."""
+        async def run():
+            plain = self._add_client("plain")
+            batching = self._add_client("batching", batch_messages=True)
+
+            for n in range(4):
+                await self.server._broadcast_message({
+                    "type": MessageType.OPERATION_STARTED,
+                    "operation": {"operation_id": f"op{n}"}
+                })
+
+            for client_info in self.server.clients.values():
+                await client_info.send_queue.join()
+                await client_info.send_queue.stop()
+            return plain, batching
+
+        plain, batching = asyncio.run(run())
+
+        self.assertEqual(len(plain.sent), 4)
+        self.assertEqual([m["type"] for m in batching.sent], ["batch"])
+        self.assertEqual(batching.sent[0]["messages"], plain.sent)
+        self.assertEqual(self.server.clients["batching"].messages_sent, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+Tests for metrics collection.
+"""
+
+import os
+import sys
+import json
+import random
+import threading
+import unittest
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.histogram import SUB_BUCKETS, HistogramSnapshot, WindowedHistogram
+from rfm.core.monitoring import ConnectionMonitor, MetricsRegistry
+from rfm.core.sharded_metrics import ShardedCounter, ShardedHistogram
+from rfm.core.timeseries import TimeSeries
+
+
+class TestHistogram(unittest.TestCase):
+    """Test the streaming-quantile histogram."""
+
+    def test_quantiles_within_error(self):
+        """Test that quantiles are within the bucket resolution."""
+        rng = random.Random(1)
+        values = [rng.lognormvariate(5, 2) for _ in range(20000)]
+        histogram = HistogramSnapshot()
+        for value in values:
+            histogram.record(value)
+
+        values.sort()
+        for q in (0.5, 0.9, 0.99, 0.999):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(histogram.quantile(q) / exact, 1.0, delta=1.0 / SUB_BUCKETS)
+        self.assertEqual((histogram.quantile(0), histogram.quantile(1)), (values[0], values[-1]))
+        self.assertLess(len(histogram.counts), 4000)
+
+    def test_merge_equals_combined(self):
+        """Test that merged snapshots equal one histogram of all values."""
+        parts = [HistogramSnapshot() for _ in range(3)]
+        combined = HistogramSnapshot()
+        for index in range(3000):
+            parts[index % 3].record(index * 0.5)
+            combined.record(index * 0.5)
+
+        # Snapshots survive a JSON round trip, e.g. from another process
+        merged = HistogramSnapshot()
+        for part in parts:
+            merged.merge(HistogramSnapshot.from_dict(json.loads(json.dumps(part.to_dict()))))
+
+        self.assertEqual(merged.counts, combined.counts)
+        self.assertEqual(merged.summary(), combined.summary())
+        self.assertEqual(HistogramSnapshot().quantile(0.5), None)
+
+    def test_windows(self):
+        """Test that windowed views only cover their recent slices."""
+        histogram = WindowedHistogram(slice_seconds=10.0, retention=3600.0)
+        now = 100000.0
+        histogram.record(1000.0, now - 1800)
+        histogram.record(100.0, now - 120)
+        histogram.record(10.0, now - 5)
+
+        windows = histogram.windows(now)
+        self.assertEqual([windows[name]["count"] for name in ("1m", "5m", "1h")], [1, 2, 3])
+        self.assertEqual(windows["1m"]["max"], 10.0)
+
+        # Slices older than the retention are dropped
+        histogram.record(1.0, now + 3500)
+        self.assertEqual(histogram.snapshot(7200.0, now + 3500).count, 2)
+        self.assertEqual(histogram.snapshot().count, 4)
+
+
+class TestTimeSeries(unittest.TestCase):
+    """Test the ring buffer of metric samples."""
+
+    def test_ring_keeps_latest(self):
+        """Test that the latest samples are exported in order without copying."""
+        series = TimeSeries(capacity=4)
+        self.assertEqual(len(series.arrays()[0]), 0)
+
+        for index in range(10):
+            series.append(float(index), timestamp=100.0 + index)
+
+        timestamps, values = series.arrays()
+        np.testing.assert_array_equal(values, [6.0, 7.0, 8.0, 9.0])
+        np.testing.assert_array_equal(timestamps, [106.0, 107.0, 108.0, 109.0])
+        self.assertTrue(np.shares_memory(values, series._values))
+        self.assertFalse(values.flags.writeable)
+        np.testing.assert_array_equal(series.latest(2), [8.0, 9.0])
+
+    def test_window_aggregate(self):
+        """Test statistics over a time window."""
+        series = TimeSeries(capacity=100)
+        for index in range(60):
+            series.append(2.0 if index % 2 else 4.0, timestamp=1000.0 + index)
+
+        stats = series.aggregate(window=10.0, now=1059.5)
+        self.assertEqual((stats["count"], stats["sum"], stats["min"], stats["max"]), (10, 30.0, 2.0, 4.0))
+        self.assertEqual((stats["mean"], stats["rate"]), (3.0, 3.0))
+        self.assertEqual(series.aggregate(window=10.0, now=2000.0)["count"], 0)
+        self.assertEqual(series.aggregate(now=1060.0)["count"], 60)
+
+        with self.assertRaises(ValueError):
+            TimeSeries(capacity=0)
+
+
+class TestMetricDistributions(unittest.TestCase):
+    """Test histogram and timer metrics."""
+
+    def test_percentiles_cover_all_values(self):
+        """Test that percentiles are not limited to the recent history."""
+        registry = MetricsRegistry("test")
+        for size in range(1, 1001):
+            registry.update_metric("websocket.messages.size", size)
+
+        metric = registry.get_metric("websocket.messages.size")
+        self.assertEqual(len(metric.history), metric.max_history)
+        self.assertAlmostEqual(metric.get_percentile(0.5), 500, delta=500 / SUB_BUCKETS)
+        self.assertEqual(metric.to_dict()["windows"]["1m"]["count"], 1000)
+
+    def test_registries_merge(self):
+        """Test that the distributions of worker registries can be combined."""
+        workers = [MetricsRegistry("worker") for _ in range(2)]
+        for index, registry in enumerate(workers):
+            for _ in range(10):
+                registry.update_metric("operations.duration", 100.0 * (index + 1))
+
+        total = MetricsRegistry("supervisor")
+        for registry in workers:
+            total.merge_histogram_snapshots(json.loads(json.dumps(registry.get_histogram_snapshots(window=60))))
+
+        snapshot = total.get_metric("operations.duration").get_snapshot()
+        self.assertEqual((snapshot.count, snapshot.min, snapshot.max), (20, 100.0, 200.0))
+
+        with self.assertRaises(ValueError):
+            total.get_metric("websocket.connections.active").merge_snapshot(snapshot)
+
+
+
+class TestShardedMetrics(unittest.TestCase):
+    """Test lock-free metric recorders."""
+
+    def test_threads_fold_into_metrics(self):
+        """Test that per-thread shards add up when metrics are read."""
+        registry = MetricsRegistry("test")
+        counter = registry.get_sharded_counter("operations.total")
+        durations = registry.get_sharded_histogram("operations.duration")
+
+        def work():
+            for _ in range(1000):
+                counter.add(1)
+                durations.record(0.25)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(registry.get_metric("operations.total").value, 4000)
+        self.assertEqual(registry.get_metric("operations.duration").get_snapshot().count, 4000)
+
+        # Only new additions are folded in on later reads
+        counter.add(5)
+        report = registry.get_metrics_report()["metrics"]
+        self.assertEqual(report["operations.total"]["value"], 4005)
+        self.assertEqual(report["operations.duration"]["percentiles"]["p50"], 0.25)
+        self.assertIs(registry.get_sharded_counter("operations.total"), counter)
+
+        with self.assertRaises(ValueError):
+            registry.get_sharded_counter("operations.duration")
+        with self.assertRaises(ValueError):
+            registry.get_sharded_histogram("operations.total")
+
+    def test_exited_threads_folded(self):
+        """Test that shards of exited threads are folded and dropped."""
+        counter = ShardedCounter()
+        histogram = ShardedHistogram()
+
+        def work():
+            counter.add(2)
+            histogram.record(1.5)
+
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        counter.add(1)
+
+        self.assertEqual(counter.value, 41)
+        self.assertEqual(histogram.snapshot().count, 20)
+        self.assertEqual(histogram.snapshot().max, 1.5)
+        self.assertEqual(len(counter._shards), 1)
+        self.assertEqual(len(histogram._shards), 0)
+
+    def test_connection_monitor_messages(self):
+        """Test that message metrics reach the registry."""
+        registry = MetricsRegistry("test")
+        monitor = ConnectionMonitor(metrics_registry=registry)
+        monitor.connection_opened("c1", object())
+
+        for _ in range(3):
+            monitor.message_received("c1", "x" * 100)
+        monitor.message_sent("c1", b"y" * 10)
+        monitor.message_received("unknown", "z")
+
+        self.assertEqual(registry.get_metric("websocket.messages.received").value, 3)
+        self.assertEqual(registry.get_metric("websocket.messages.sent").value, 1)
+        self.assertEqual(registry.get_metric("websocket.messages.size").get_percentile(0.5), 100)
+        self.assertEqual(monitor.get_connection_stats()["bytes_received"], 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for the OpenMetrics exposition endpoint.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.monitoring import MetricsRegistry, HealthStatus
+from rfm.core.openmetrics import OpenMetricsExporter, encode_histogram_buckets, metric_name
+from rfm.core.histogram import HistogramSnapshot
+from rfm.core.websocket_server_enhanced import ProgressServer
+
+
+def parse_samples(text):
+    """Get the sample lines of an exposition as {name{labels}: value}."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+class TestOpenMetricsExporter(unittest.TestCase):
+    """Test encoding a registry as OpenMetrics text."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry("test")
+        self.labels = '{application="test",host="%s"}' % self.registry.host
+
+    def test_encoding(self):
+        """Test counters, gauges and histograms."""
+        self.registry.update_metric("websocket.connections.total", 3)
+        self.registry.update_metric("websocket.connections.active", 2)
+        for size in (10, 100, 1000):
+            self.registry.update_metric("websocket.messages.size", size)
+
+        text = OpenMetricsExporter(self.registry).render().decode("utf-8")
+        samples = parse_samples(text)
+
+        self.assertIn("# TYPE websocket_connections counter", text)
+        self.assertEqual(samples["websocket_connections_total" + self.labels], 3)
+        self.assertEqual(samples["operations_completed_total" + self.labels], 0)
+        self.assertEqual(samples["websocket_connections_active" + self.labels], 2)
+
+        size = "websocket_messages_size_bucket" + self.labels[:-1]
+        self.assertIn("# TYPE websocket_messages_size histogram", text)
+        self.assertEqual(samples[size + ',le="20.0"}'], 1)
+        self.assertEqual(samples[size + ',le="1000.0"}'], 3)
+        self.assertEqual(samples[size + ',le="+Inf"}'], 3)
+        self.assertEqual(samples["websocket_messages_size_sum" + self.labels], 1110)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_cached_encoding(self):
+        """Test that scrapes reuse the body and unchanged families."""
+        exporter = OpenMetricsExporter(self.registry, max_age=1.0)
+        first = exporter.render(now=100.0)
+        self.assertIs(exporter.render(now=100.5), first)
+
+        encoded = exporter.families_encoded
+        self.registry.update_metric("websocket.connections.active", 7)
+        body = exporter.render(now=101.0).decode("utf-8")
+        self.assertEqual(exporter.families_encoded, encoded + 1)
+        self.assertIn("websocket_connections_active" + self.labels + " 7\n", body)
+
+    def test_names_and_buckets(self):
+        """Test name sanitizing and cumulative bucket counts."""
+        self.assertEqual(metric_name("auth.token-cache.hit_rate"), "auth_token_cache_hit_rate")
+        self.assertEqual(metric_name("5xx.count"), "_5xx_count")
+
+        snapshot = HistogramSnapshot()
+        for value in (0.5, 1.5, 1.5, 3.0):
+            snapshot.record(value)
+        self.assertEqual(encode_histogram_buckets(snapshot, (1.0, 2.0, 5.0)), [1, 3, 4])
+
+
+class TestMetricsEndpoints(unittest.TestCase):
+    """Test the HTTP routes of the server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            enable_authentication=True,
+            api_keys={"scraper": "secret"}
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _request(self, path, headers=None):
+        return asyncio.run(self.server._process_request(path, headers or {}))
+
+    def test_healthz_without_credentials(self):
+        """Test that probes reach /healthz without authenticating."""
+        status, headers, body = self._request("/healthz")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "text/plain")
+
+        self.server.metrics_registry.register_health_check("test_component", HealthStatus.UNHEALTHY)
+        try:
+            self.assertEqual(self._request("/healthz")[0], 503)
+        finally:
+            self.server.metrics_registry.register_health_check("test_component", HealthStatus.HEALTHY)
+
+    def test_metrics_formats(self):
+        """Test OpenMetrics and JSON responses of /metrics."""
+        self.assertEqual(self._request("/metrics")[0], 401)
+
+        status, headers, body = self._request("/metrics?client_id=scraper&token=secret")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("application/openmetrics-text"))
+        self.assertIn(b"# TYPE websocket_connections_active gauge", body)
+
+        status, headers, body = self._request("/metrics?client_id=scraper&token=secret",
+                                              {"Accept": "application/json"})
+        self.assertEqual(headers["Content-Type"], "application/json")
+        self.assertIn("websocket.connections.active", json.loads(body)["metrics"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the performance dashboard.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import importlib.util
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ui")))
+
+VISUALIZER_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "ui", "rfm_ui", "performance", "visualizer.py"
+))
+
+
+class FakeClient:
+    """WebSocket client stand-in that records callbacks."""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def add_callback(self, message_type, callback):
+        self.callbacks.setdefault(message_type, []).append(callback)
+
+
+class TestPerformanceVisualizer(unittest.TestCase):
+    """Test building the performance dashboard."""
+
+    @unittest.skipUnless(importlib.util.find_spec("pyflakes"), "pyflakes not installed")
+    def test_no_undefined_names(self):
+        """Test that the visualizer module has no undefined names."""
+        from pyflakes.api import check
+        from pyflakes.reporter import Reporter
+        from pyflakes.messages import UndefinedName
+
+        class Collector(Reporter):
+            def __init__(self):
+                self.messages = []
+
+            def flake(self, message):
+                self.messages.append(message)
+
+            def unexpectedError(self, filename, message):
+                self.messages.append(message)
+
+            def syntaxError(self, filename, message, lineno, offset, text):
+                self.messages.append(message)
+
+        collector = Collector()
+        with open(VISUALIZER_PATH, encoding="utf-8") as f:
+            check(f.read(), VISUALIZER_PATH, collector)
+
+        undefined = [str(m) for m in collector.messages if isinstance(m, UndefinedName)]
+        self.assertEqual(undefined, [])
+
+    @unittest.skipUnless(importlib.util.find_spec("dearpygui"), "dearpygui not installed")
+    def test_initialize_with_server_profiler(self):
+        """Test that the dashboard builds with a WebSocket client."""
+        import dearpygui.dearpygui as dpg
+        from rfm_ui.performance import PerformanceTracker, PerformanceVisualizer
+        from rfm_ui.websocket_client_enhanced import MessageType
+
+        client = FakeClient()
+        dpg.create_context()
+        try:
+            with tempfile.TemporaryDirectory() as log_dir:
+                visualizer = PerformanceVisualizer(PerformanceTracker(log_dir=log_dir),
+                                                   websocket_client=client)
+                visualizer.initialize()
+
+                self.assertEqual(dpg.get_item_configuration("profiler_source")["items"],
+                                 ["UI process", "Server"])
+                self.assertIn(MessageType.PROFILE, client.callbacks)
+        finally:
+            dpg.destroy_context()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Tests for the sampling profiler.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import unittest
+import concurrent.futures
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.profiler import SamplingProfiler, format_tags, get_profiler, parse_folded, profile_call
+from rfm.core.render_service import RenderService
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+def busy_wait(seconds):
+    """Spin for a while."""
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def slow_renderer(params):
+    """Renderer that takes a while per band."""
+    busy_wait(0.05)
+    return np.zeros((params["height"], params["width"]), dtype=np.uint16)
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records text messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Test sampling, tagging and folded output."""
+
+    def test_tagged_samples(self):
+        """Test that samples of a tagged thread carry its tags."""
+        profiler = SamplingProfiler(interval=0.001)
+
+        def work():
+            with profiler.tag(operation_id="op1", width=64, zoom=1.5):
+                busy_wait(0.2)
+
+        profiler.start()
+        thread = threading.Thread(target=work, name="worker")
+        thread.start()
+        thread.join()
+        profiler.stop()
+
+        self.assertFalse(profiler.running)
+        stats = profiler.stats()
+        self.assertGreater(stats["samples"], 0)
+        self.assertIsNotNone(stats["sample_cost_ms"])
+
+        stacks = profiler.stacks("op1")
+        self.assertTrue(stacks)
+        for stack in stacks:
+            self.assertTrue(stack.startswith("operation_id=op1;width=64;zoom=1.5;worker;"))
+        self.assertTrue(any(stack.endswith(":busy_wait") for stack in stacks))
+        self.assertEqual(profiler.stacks("op2"), {})
+
+        # The tag is removed when the block ends
+        self.assertNotIn(thread.ident, profiler._tags)
+
+    def test_profile_call_and_add_samples(self):
+        """Test sampling a call and merging its samples with tags."""
+        result, stacks = profile_call(busy_wait, 0.05, interval=0.001)
+        self.assertGreater(result, 0)
+        self.assertTrue(any(stack.endswith(":busy_wait") for stack in stacks))
+
+        profiler = SamplingProfiler(max_stacks=1)
+        profiler.add_samples({"a;b": 2, "a;c": 3}, {"operation_id": "job 1", "kind": None})
+        self.assertEqual(profiler.stacks(), {"operation_id=job_1;a;b": 2})
+        self.assertEqual(profiler.dropped, 3)
+
+        self.assertEqual(parse_folded(profiler.folded()), profiler.stacks())
+        self.assertEqual(format_tags({"params": "x;y"}), "params=x,y")
+
+        profiler.reset()
+        self.assertEqual((profiler.stacks(), profiler.dropped), ({}, 0))
+
+    def test_invalid_interval(self):
+        """Test that the interval must be positive."""
+        with self.assertRaises(ValueError):
+            SamplingProfiler().start(0)
+
+
+class TestProfilerIntegration(unittest.TestCase):
+    """Test profiling render jobs and controlling the profiler through the server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.profiler = get_profiler()
+        self.profiler.reset()
+
+    def tearDown(self):
+        self.profiler.stop()
+        self.profiler.reset()
+        self.temp_dir.cleanup()
+
+    def _server(self, **kwargs):
+        server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            **kwargs
+        )
+        server.metrics_registry.stop_system_metrics_collection()
+        websocket = FakeWebSocket()
+        server._register_client(ClientInfo(connection_id="admin", websocket=websocket))
+        return server, websocket
+
+    def test_render_samples_tagged(self):
+        """Test that render bands are sampled with the job's parameters."""
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        async def emit_event(message):
+            pass
+
+        async def send_frame(connection_id, frame):
+            pass
+
+        async def run():
+            service = RenderService(emit_event, send_frame, executor=executor,
+                                    renderers={"slow": slow_renderer}, band_pixels=40)
+            job, _ = await service.submit("c1", "alice", "slow", {"width": 10, "height": 8, "max_iter": 5})
+            await asyncio.gather(*service._running.values())
+            return job
+
+        self.profiler.start(0.001)
+        try:
+            job = asyncio.run(run())
+        finally:
+            executor.shutdown()
+            self.profiler.stop()
+
+        stacks = self.profiler.stacks(job.job_id)
+        self.assertTrue(stacks)
+        prefix = f"operation_id={job.job_id};kind=slow;width=10;height=8;zoom=1.0;max_iter=5;"
+        self.assertTrue(all(stack.startswith(prefix) for stack in stacks))
+        self.assertTrue(any("test_profiler:slow_renderer" in stack for stack in stacks))
+
+    def test_disabled_by_default(self):
+        """Test that servers reject profiler messages unless enabled."""
+        server, websocket = self._server()
+        asyncio.run(server._process_message("admin", {"type": MessageType.START_PROFILER}))
+
+        self.assertEqual(websocket.sent[-1]["error_code"], "profiler_disabled")
+        self.assertFalse(self.profiler.running)
+
+    def test_runner_flag(self):
+        """Test that --enable-profiler reaches the server built by the runner."""
+        from run_websocket_server import build_server_config
+        from rfm.core.websocket_server_secure import SecureProgressServer
+
+        args = argparse.Namespace(
+            host="localhost", port=0, log_level="info",
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            connection_timeout=60, enable_auth=False, enable_profiler=True
+        )
+        config = build_server_config(args)
+        self.assertTrue(config["enable_profiler"])
+
+        server = SecureProgressServer(**config)
+        server.metrics_registry.stop_system_metrics_collection()
+        self.assertTrue(server.enable_profiler)
+
+    def test_admin_messages(self):
+        """Test starting, querying and stopping the profiler."""
+        server, websocket = self._server(enable_profiler=True)
+
+        async def run():
+            await server._process_message("admin", {"type": MessageType.START_PROFILER, "interval": -1})
+            await server._process_message("admin", {"type": MessageType.START_PROFILER, "interval": 0.001})
+            with self.profiler.tag(operation_id="op1"):
+                busy_wait(0.05)
+            await server._process_message("admin", {"type": MessageType.GET_PROFILE, "operation_id": "op1"})
+            await server._process_message("admin", {"type": MessageType.STOP_PROFILER})
+
+        asyncio.run(run())
+
+        invalid, started, profile, stopped = websocket.sent[-4:]
+        self.assertEqual(invalid["error_code"], "invalid_interval")
+        self.assertEqual(started["type"], MessageType.PROFILE)
+        self.assertTrue(started["stats"]["running"])
+        self.assertNotIn("folded", started)
+
+        self.assertEqual(profile["operation_id"], "op1")
+        self.assertTrue(profile["folded"])
+        self.assertTrue(all(stack.startswith("operation_id=op1;") for stack in parse_folded(profile["folded"])))
+
+        self.assertFalse(stopped["stats"]["running"])
+        self.assertFalse(self.profiler.running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Tests for delta-encoded progress updates.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.progress_delta import (
+    diff_progress, apply_progress_delta, ProgressDeltaEncoder, ProgressDeltaDecoder
+)
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def _state(progress, **details):
+    return {
+        "operation_id": "op",
+        "operation_type": "render",
+        "status": "running",
+        "progress": progress,
+        "details": dict({"width": 1024, "height": 768}, **details)
+    }
+
+
+class TestDeltaEncoding(unittest.TestCase):
+    """Test diffing and applying progress states."""
+
+    def test_diff_only_changed_fields(self):
+        """Test that unchanged fields and details are left out."""
+        changes = diff_progress(_state(10), _state(20, tile=3))
+
+        self.assertEqual(changes, {"progress": 20, "details": {"tile": 3}})
+
+    def test_removed_field_needs_full_state(self):
+        """Test that removed fields can't be expressed as a delta."""
+        current = _state(20)
+        del current["details"]["height"]
+
+        self.assertIsNone(diff_progress(_state(10), current))
+
+    def test_round_trip(self):
+        """Test that applying a diff reproduces the new state."""
+        previous, current = _state(10), _state(55, tile=7)
+
+        self.assertEqual(apply_progress_delta(previous, diff_progress(previous, current)), current)
+        self.assertEqual(previous, _state(10))
+
+    def test_decoder_detects_gap(self):
+        """Test that a missed sequence number requires a resync."""
+        encoder = ProgressDeltaEncoder()
+        decoder = ProgressDeltaDecoder()
+
+        seq, full, _ = encoder.encode(_state(10))
+        decoder.apply_full("op", seq, full)
+
+        seq, _, changes = encoder.encode(_state(20))
+        self.assertEqual(decoder.apply_delta("op", seq, changes)["progress"], 20)
+
+        encoder.encode(_state(30))
+        seq, _, changes = encoder.encode(_state(40))
+        self.assertIsNone(decoder.apply_delta("op", seq, changes))
+
+
+class TestServerDeltaRouting(unittest.TestCase):
+    """Test that the server sends deltas only to clients in delta mode."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id, delta_updates=False):
+        websocket = FakeWebSocket()
+        self.server._register_client(ClientInfo(
+            connection_id=connection_id, websocket=websocket, delta_updates=delta_updates
+        ))
+        return websocket
+
+    def _progress(self, progress):
+        return self.server._process_message("renderer", {
+            "type": MessageType.PROGRESS_UPDATE, "data": _state(progress)
+        })
+
+    def test_delta_routing_and_resync(self):
+        """Test full updates, deltas and resync after a gap."""
+        async def run():
+            self._add_client("renderer")
+            plain = self._add_client("plain")
+            delta = self._add_client("delta", delta_updates=True)
+
+            await self._progress(10)
+            await self._progress(20)
+
+            # A client joining late gets a full update first
+            late = self._add_client("late", delta_updates=True)
+            await self._progress(30)
+
+            # Simulate the delta client missing an update
+            self.server.clients["delta"].delta_seqs["op"] = 1
+            await self._progress(40)
+
+            await self.server._process_message("delta", {
+                "type": MessageType.RESYNC_OPERATION, "operation_id": "op"
+            })
+            return plain, delta, late
+
+        plain, delta, late = asyncio.run(run())
+
+        self.assertEqual([m["type"] for m in plain.sent], ["progress_update"] * 4)
+        self.assertEqual(
+            [m["type"] for m in delta.sent],
+            ["progress_update", "progress_delta", "progress_delta", "progress_update", "progress_update"]
+        )
+        self.assertEqual(delta.sent[1]["changes"], {"progress": 20})
+        self.assertEqual(delta.sent[-1]["seq"], 4)
+        self.assertEqual([m["type"] for m in late.sent], ["progress_update", "progress_delta"])
+
+    def test_state_dropped_when_finished(self):
+        """Test that terminal events drop per-operation delta state."""
+        async def run():
+            delta = self._add_client("delta", delta_updates=True)
+            await self._progress(10)
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_COMPLETED, "operation_id": "op"
+            })
+            return delta
+
+        asyncio.run(run())
+
+        self.assertIsNone(self.server.delta_encoder.snapshot("op"))
+        self.assertEqual(self.server.clients["delta"].delta_seqs, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
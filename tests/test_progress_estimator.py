@@ -0,0 +1,136 @@
+"""
+Tests for progress rate and ETA estimation.
+"""
+
+import os
+import sys
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.fractal import CantorDust, JuliaSet, LSystem, MandelbrotSet
+from rfm.core.progress import ProgressEstimator, ProgressReporter
+
+
+class TestProgressEstimator(unittest.TestCase):
+    """Test the progress estimator."""
+
+    def setUp(self):
+        ProgressEstimator._profiles.clear()
+
+    def _run(self, estimator, samples, start=0.0):
+        estimator.start(start)
+        for timestamp, progress in samples:
+            estimator.update(progress, timestamp)
+
+    def test_linear_progress(self):
+        """Test the estimate for an operation advancing at a constant rate."""
+        estimator = ProgressEstimator("linear")
+        self._run(estimator, [(t, t * 2.0) for t in range(1, 11)])
+
+        self.assertAlmostEqual(estimator.progress_per_second, 2.0)
+        self.assertAlmostEqual(estimator.estimate_remaining_seconds(20.0), 40.0)
+
+    def test_no_estimate_without_progress(self):
+        """Test that no estimate is made before progress advances."""
+        estimator = ProgressEstimator("idle")
+        estimator.start(0.0)
+        estimator.update(0.0, 5.0)
+
+        self.assertIsNone(estimator.estimate_remaining_seconds(0.0))
+        self.assertIsNone(estimator.progress_per_second)
+
+    def test_profile_accounts_for_slow_phase(self):
+        """Test that a learned profile predicts a slow later phase."""
+        # 0-50% takes 10s, 50-100% takes 90s
+        samples = [(t, t * 5.0) for t in range(1, 11)]
+        samples += [(10 + t * 9, 50 + t * 5.0) for t in range(1, 11)]
+
+        first = ProgressEstimator("lsystem")
+        self._run(first, samples)
+        first.finish()
+
+        second = ProgressEstimator("lsystem")
+        self._run(second, samples[:6])
+
+        # 30% done after 6s: 4s left in the fast phase plus 90s for the slow one
+        self.assertAlmostEqual(second.estimate_remaining_seconds(30.0), 94.0, places=3)
+
+        # Without a profile the slow phase is invisible
+        naive = ProgressEstimator("other")
+        self._run(naive, samples[:6])
+        self.assertAlmostEqual(naive.estimate_remaining_seconds(30.0), 14.0, places=3)
+
+    def test_profile_scaled_to_current_run(self):
+        """Test that a run twice as slow as the profile gets twice the estimate."""
+        profile_run = ProgressEstimator("scaled")
+        self._run(profile_run, [(t, t * 10.0) for t in range(1, 11)])
+        profile_run.finish()
+
+        slow = ProgressEstimator("scaled")
+        self._run(slow, [(t * 2, t * 10.0) for t in range(1, 6)])
+
+        self.assertAlmostEqual(slow.estimate_remaining_seconds(50.0), 10.0, places=3)
+
+    def test_items_throughput(self):
+        """Test work item throughput estimation."""
+        estimator = ProgressEstimator("items")
+        estimator.start(0.0)
+        for t in range(1, 6):
+            estimator.update(t * 10.0, float(t), items_processed=t * 250)
+
+        self.assertAlmostEqual(estimator.items_rate, 250.0)
+
+
+class TestReporterEstimates(unittest.TestCase):
+    """Test that the reporter emits estimates automatically."""
+
+    def test_reporter_fills_estimates(self):
+        """Test that progress updates carry ETA and throughput."""
+        updates = []
+        reporter = ProgressReporter("estimate_test")
+        reporter.add_callback(updates.append)
+
+        reporter.report_progress(10, details={"items_processed": 10})
+        reporter.report_progress(20, details={"items_processed": 20})
+
+        self.assertIsNotNone(updates[-1].estimated_time_remaining_ms)
+        self.assertIsNotNone(updates[-1].progress_per_second)
+        self.assertIsNotNone(updates[-1].units_per_second)
+
+    def test_renderers_report_items(self):
+        """Test that the built-in renderers report work items, so throughput is filled."""
+        renders = {
+            "lsystem": lambda reporter: LSystem(
+                {"axiom": "F", "rules": {"F": "F+F-F-F+F"}, "depth": 4}
+            ).compute_coordinates(reporter),
+            "mandelbrot": lambda reporter: MandelbrotSet({"max_iter": 60}).compute(64, 48, reporter),
+            "julia": lambda reporter: JuliaSet({"max_iter": 60}).compute(64, 48, reporter),
+            "cantor": lambda reporter: CantorDust({"depth": 4}).generate(0, 1, 0, 1, 4, reporter),
+        }
+        for name, render in renders.items():
+            with self.subTest(name):
+                updates = []
+                reporter = ProgressReporter(name)
+                reporter.add_callback(updates.append)
+                render(reporter)
+
+                items = [u.details["items_processed"] for u in updates if "items_processed" in u.details]
+                self.assertGreater(len(items), 1)
+                self.assertGreater(max(items), 0)
+                self.assertTrue(any(u.units_per_second for u in updates))
+
+    def test_explicit_estimate_wins(self):
+        """Test that a caller-provided ETA is passed through unchanged."""
+        updates = []
+        reporter = ProgressReporter("estimate_test")
+        reporter.add_callback(updates.append)
+
+        reporter.report_progress(50, estimated_time_remaining_ms=1234)
+
+        self.assertEqual(updates[-1].estimated_time_remaining_ms, 1234)
+
+
+if __name__ == "__main__":
+    unittest.main()
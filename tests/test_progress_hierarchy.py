@@ -0,0 +1,180 @@
+"""
+Tests for hierarchical sub-operation progress aggregation.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.progress import OperationStatus, ProgressManager, ProgressReporter
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class TestReporterHierarchy(unittest.TestCase):
+    """Test progress roll-up from children to parents."""
+
+    def test_weighted_rollup(self):
+        """Test that parent progress is the weighted mean of its children."""
+        parent = ProgressReporter("batch")
+        parent.aggregate_interval = 0
+        small = parent.create_child(weight=1.0)
+        large = parent.create_child(weight=3.0)
+
+        small.report_progress(100)
+        self.assertAlmostEqual(parent.progress, 25.0)
+
+        large.report_progress(50)
+        self.assertAlmostEqual(parent.progress, 62.5)
+        self.assertEqual(parent.details["children_completed"], 1)
+
+        large.report_completed()
+        self.assertEqual(parent.status, OperationStatus.COMPLETED)
+
+    def test_expected_children(self):
+        """Test that declared total weight prevents premature completion."""
+        parent = ProgressReporter("export")
+        parent.aggregate_interval = 0
+        parent.expect_children(4)
+
+        child = parent.create_child()
+        child.report_completed()
+
+        self.assertAlmostEqual(parent.progress, 25.0)
+        self.assertFalse(parent.is_finished())
+
+    def test_aggregate_updates_rate_limited(self):
+        """Test that child progress does not flood parent listeners."""
+        parent = ProgressReporter("export")
+        parent.aggregate_interval = 60
+        updates = []
+        parent.add_callback(updates.append)
+        children = [parent.create_child() for _ in range(10)]
+
+        for step in range(1, 10):
+            for child in children:
+                child.report_progress(step * 10)
+
+        # The first update passes, the rest are rate-limited
+        self.assertEqual(len(updates), 1)
+
+        # Finishing children always propagate
+        children[0].report_completed()
+        self.assertEqual(len(updates), 2)
+
+    def test_child_sees_parent_cancellation(self):
+        """Test that children observe cancellation of their parent."""
+        parent = ProgressReporter("batch")
+        child = parent.create_child()
+
+        parent.report_canceled()
+
+        self.assertTrue(child.should_cancel())
+
+
+class TestManagerHierarchy(unittest.TestCase):
+    """Test sub-operation handling in the progress manager."""
+
+    def test_children_hidden_by_default(self):
+        """Test listing and callbacks only expose top-level operations by default."""
+        async def run():
+            manager = ProgressManager()
+            aggregate, detail = [], []
+            manager.add_callback(aggregate.append)
+            manager.add_callback(detail.append, include_children=True)
+
+            parent = ProgressReporter("batch")
+            await manager.add_operation(parent)
+            child = await manager.add_child_operation(parent.operation_id, "frame")
+            child.report_progress(50)
+
+            top_level = await manager.list_operations()
+            everything = await manager.list_operations(include_children=True)
+
+            await manager.cancel_operation(parent.operation_id)
+            return aggregate, detail, top_level, everything, child
+
+        aggregate, detail, top_level, everything, child = asyncio.run(run())
+
+        self.assertEqual(len(top_level), 1)
+        self.assertEqual(top_level[0]["child_count"], 1)
+        self.assertEqual(len(everything), 2)
+        self.assertTrue(all(update.parent_id is None for update in aggregate))
+        self.assertTrue(any(update.parent_id is not None for update in detail))
+        self.assertEqual(child.status, OperationStatus.CANCELED)
+
+
+class TestServerChildDetail(unittest.TestCase):
+    """Test that the server only sends sub-operation events to opted-in clients."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs")
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id):
+        websocket = FakeWebSocket()
+        self.server._register_client(ClientInfo(connection_id=connection_id, websocket=websocket))
+        return websocket
+
+    def test_child_events_filtered(self):
+        """Test routing of parent and child events."""
+        async def run():
+            renderer = self._add_client("renderer")
+            plain = self._add_client("plain")
+            detailed = self._add_client("detailed")
+
+            await self.server._process_message("detailed", {
+                "type": MessageType.SET_CHILD_DETAIL, "enabled": True
+            })
+            detailed.sent.clear()
+
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_STARTED,
+                "operation": {"operation_id": "parent", "operation_type": "batch"}
+            })
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_STARTED,
+                "operation": {"operation_id": "child", "operation_type": "frame", "parent_id": "parent"}
+            })
+            await self.server._process_message("renderer", {
+                "type": MessageType.OPERATION_COMPLETED, "operation_id": "child"
+            })
+            await self.server._send_operations_list("plain")
+            return renderer, plain, detailed
+
+        renderer, plain, detailed = asyncio.run(run())
+
+        self.assertEqual(renderer.sent, [])
+        self.assertEqual([m["type"] for m in plain.sent], ["operation_started", "operations_list"])
+        self.assertEqual(len(plain.sent[-1]["operations"]), 1)
+        self.assertEqual(plain.sent[-1]["operations"][0]["child_count"], 1)
+        self.assertEqual(len(detailed.sent), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Tests for the cross-process shared-memory progress channel.
+"""
+
+import os
+import sys
+import asyncio
+import multiprocessing
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.progress import OperationStatus, ProgressManager
+from rfm.core.progress_shm import SharedProgressRing, ProgressRingWriter, SharedProgressBridge
+
+
+def _render_worker(ring_name, lane, operation_id):
+    """Worker process that reports a short render through the ring."""
+    with ProgressRingWriter(ring_name, lane) as writer:
+        reporter = writer.create_reporter("fractal_render", operation_id)
+        with reporter:
+            for i in range(1, 10):
+                reporter.report_progress(i * 10, current_step="Rendering",
+                                         details={"items_processed": i, "items_total": 10})
+
+
+class TestSharedProgressRing(unittest.TestCase):
+    """Test the shared-memory progress ring."""
+
+    def setUp(self):
+        self.ring = SharedProgressRing.create(lanes=2, capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_write_and_read_roundtrip(self):
+        """Test that records are read back in order with all fields."""
+        operation_id = "5f0c6f5e-3b1a-4a53-9a55-0c1f4d6b7a10"
+        self.ring.write(0, operation_id, 12.5, current_step_progress=50.0, step_index=1,
+                        total_steps=3, items_processed=5, items_total=40, label="Generating")
+        self.ring.write(0, operation_id, 25.0)
+
+        records = self.ring.read(0)
+
+        self.assertEqual(len(records), 2)
+        first = records[0]
+        self.assertEqual(first.operation_id, operation_id)
+        self.assertEqual(first.progress, 12.5)
+        self.assertEqual(first.current_step_progress, 50.0)
+        self.assertEqual(first.status, OperationStatus.RUNNING)
+        self.assertEqual(first.step_index, 1)
+        self.assertEqual(first.total_steps, 3)
+        self.assertEqual((first.items_processed, first.items_total), (5, 40))
+        self.assertEqual(first.label, "Generating")
+        self.assertIsNone(records[1].current_step_progress)
+        self.assertIsNone(records[1].total_steps)
+        self.assertEqual(self.ring.read(0), [])
+        self.assertEqual(self.ring.read(1), [])
+
+    def test_full_lane_drops_progress(self):
+        """Test that progress records are dropped when a lane is full."""
+        operation_id = "5f0c6f5e-3b1a-4a53-9a55-0c1f4d6b7a10"
+        results = [self.ring.write(0, operation_id, i) for i in range(6)]
+
+        self.assertEqual(results, [True] * 4 + [False] * 2)
+        self.assertEqual(self.ring.dropped(0), 2)
+        self.assertEqual([r.progress for r in self.ring.read(0)], [0, 1, 2, 3])
+
+        # Space is available again after the reader caught up
+        self.assertTrue(self.ring.write(0, operation_id, 6))
+
+    def test_wraparound(self):
+        """Test reading across the end of the lane buffer."""
+        operation_id = "5f0c6f5e-3b1a-4a53-9a55-0c1f4d6b7a10"
+        seen = []
+        for i in range(10):
+            self.ring.write(1, operation_id, i)
+            if i % 3 == 2:
+                seen.extend(r.progress for r in self.ring.read(1))
+        seen.extend(r.progress for r in self.ring.read(1))
+
+        self.assertEqual(seen, list(range(10)))
+
+    def test_label_truncated_to_utf8_boundary(self):
+        """Test that long labels are truncated without splitting characters."""
+        operation_id = "5f0c6f5e-3b1a-4a53-9a55-0c1f4d6b7a10"
+        self.ring.write(0, operation_id, 1.0, label="é" * 40)
+
+        label = self.ring.read(0)[0].label
+        self.assertEqual(label, "é" * 24)
+
+
+class TestSharedProgressBridge(unittest.TestCase):
+    """Test draining the ring into a progress manager."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.ring = SharedProgressRing.create(lanes=2, capacity=64)
+        self.manager = ProgressManager()
+        self.bridge = SharedProgressBridge(self.ring, self.manager)
+        self.updates = []
+        self.manager.add_callback(self.updates.append)
+
+    def tearDown(self):
+        self.ring.close()
+        self.loop.close()
+
+    def test_drain_conflates_and_completes(self):
+        """Test that drained worker progress reaches the manager."""
+        async def run():
+            reporter = await self.bridge.register("fractal_render", "test")
+            writer = ProgressRingWriter(self.ring.name, 1)
+            worker = writer.create_reporter("fractal_render", reporter.operation_id)
+
+            worker.report_progress(10, current_step="Generating")
+            worker.report_progress(40, current_step="Generating")
+            self.assertEqual(self.bridge.drain(), 2)
+            self.assertEqual(reporter.progress, 40)
+            self.assertEqual(reporter.current_step, "Generating")
+
+            worker.report_completed()
+            self.bridge.drain()
+            writer.close()
+            return reporter
+
+        reporter = self.loop.run_until_complete(run())
+
+        self.assertEqual(reporter.status, OperationStatus.COMPLETED)
+        self.assertEqual(self.updates[-1].status, OperationStatus.COMPLETED)
+        # One conflated progress update and one completion
+        self.assertEqual(len(self.updates), 2)
+
+    def test_cancel_propagates_to_worker(self):
+        """Test that canceling in the parent is visible to the worker."""
+        async def run():
+            reporter = await self.bridge.register("fractal_render")
+            writer = ProgressRingWriter(self.ring.name, 0)
+            worker = writer.create_reporter("fractal_render", reporter.operation_id)
+
+            # Cancel before the worker's lane is known
+            await self.manager.cancel_operation(reporter.operation_id)
+            worker.report_progress(5)
+            self.bridge.drain()
+
+            canceled = worker.should_cancel()
+            writer.close()
+            return canceled
+
+        self.assertTrue(self.loop.run_until_complete(run()))
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork")
+    def test_worker_process(self):
+        """Test progress from a real worker process."""
+        async def run():
+            reporter = await self.bridge.register("fractal_render")
+            process = multiprocessing.get_context("fork").Process(
+                target=_render_worker, args=(self.ring.name, 0, reporter.operation_id)
+            )
+            process.start()
+            while process.is_alive() or not reporter.is_finished():
+                self.bridge.drain()
+                await asyncio.sleep(0.01)
+                if not process.is_alive() and process.exitcode:
+                    break
+            process.join()
+            self.bridge.drain()
+            return reporter
+
+        reporter = self.loop.run_until_complete(run())
+
+        self.assertEqual(reporter.status, OperationStatus.COMPLETED)
+        self.assertEqual(reporter.details.get("items_total"), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
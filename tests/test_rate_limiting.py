@@ -0,0 +1,188 @@
+"""
+Tests for the rate limiter.
+"""
+
+import os
+import sys
+import types
+import asyncio
+import unittest
+from unittest import mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core import rate_limiting
+from rfm.core.rate_limiting import (
+    RateLimiter, RateLimitRule, RateLimitScope, RateLimitContext, RateLimitAlgorithm
+)
+from rfm.core.rate_limit_store import (
+    LocalRateLimitHub, LocalRateLimitStore, RateLimitStore, SharedMemoryRateLimitStore, SharedRateLimitTable
+)
+
+
+class TestGCRARateLimiter(unittest.TestCase):
+    """Test the token bucket (GCRA) algorithm."""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(rate_limiting, "time", types.SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _limiter(self, *rules):
+        return RateLimiter(list(rules), algorithm=RateLimitAlgorithm.GCRA)
+
+    def test_burst_then_steady_rate(self):
+        """Test that a full bucket allows a burst, then refills at the rule rate."""
+        limiter = self._limiter(RateLimitRule("per_client", 3, 1, RateLimitScope.CLIENT))
+        context = RateLimitContext(client_id="c1")
+
+        self.assertEqual([limiter.check_rate_limit(context)[0] for _ in range(4)], [True, True, True, False])
+        self.assertEqual(limiter.get_remaining_requests(context), {"per_client": 0})
+
+        # One token per 1/3 s
+        self.now += 0.34
+        self.assertEqual(limiter.get_remaining_requests(context), {"per_client": 1})
+        self.assertEqual([limiter.check_rate_limit(context)[0] for _ in range(2)], [True, False])
+
+        # Other clients have their own bucket
+        self.assertTrue(limiter.check_rate_limit(RateLimitContext(client_id="c2"))[0])
+
+    def test_denied_request_not_recorded(self):
+        """Test that a request denied by one rule consumes no tokens of another."""
+        limiter = self._limiter(
+            RateLimitRule("per_client", 10, 60, RateLimitScope.CLIENT),
+            RateLimitRule("renders", 1, 60, RateLimitScope.GLOBAL, actions=["start_render"])
+        )
+        render = RateLimitContext(client_id="c1", action="start_render")
+
+        self.assertTrue(limiter.check_rate_limit(render)[0])
+        allowed, rule = limiter.check_rate_limit(render)
+        self.assertFalse(allowed)
+        self.assertEqual(rule.name, "renders")
+        self.assertEqual(limiter.get_remaining_requests(RateLimitContext(client_id="c1"))["per_client"], 9)
+
+    def test_idle_keys_evicted(self):
+        """Test that keys whose bucket refilled are dropped."""
+        limiter = self._limiter(RateLimitRule("per_ip", 5, 10, RateLimitScope.IP))
+        for index in range(100):
+            limiter.check_rate_limit(RateLimitContext(client_id="c", ip_address=f"10.0.0.{index}"))
+        self.assertEqual(len(limiter.tat), 100)
+
+        self.now += 1.0
+        self.assertEqual(limiter.evict_idle(), 0)
+
+        # Sweeps run from the check path once the eviction interval passed
+        self.now += limiter.eviction_interval
+        limiter.check_rate_limit(RateLimitContext(client_id="c", ip_address="10.0.1.1"))
+        self.assertEqual(list(limiter.tat), [("per_ip", "ip:10.0.1.1")])
+
+
+class FailingStore(RateLimitStore):
+    """Store whose synchronization always fails."""
+
+    async def sync(self, deltas, tat, now):
+        raise ConnectionError("store unavailable")
+
+
+class TestSharedRateLimits(unittest.TestCase):
+    """Test rate limits shared between limiters through a store."""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(rate_limiting, "time", types.SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _limiter(self, store):
+        return RateLimiter([RateLimitRule("per_ip", 10, 60, RateLimitScope.IP)],
+                           algorithm=RateLimitAlgorithm.GCRA, store=store)
+
+    def _allowed(self, limiter, count):
+        context = RateLimitContext(client_id="c", ip_address="10.0.0.1")
+        return sum(limiter.check_rate_limit(context)[0] for _ in range(count))
+
+    def _check_shared(self, first, second):
+        async def run():
+            for limiter in (first, second):
+                await limiter.start_sync()
+
+            allowed = [self._allowed(first, 6)]
+            await first.synchronize()
+            await second.synchronize()
+            allowed.append(self._allowed(second, 10))
+
+            # Tokens granted by the second limiter reach the first one
+            await second.synchronize()
+            await first.synchronize()
+            allowed.append(self._allowed(first, 1))
+
+            for limiter in (first, second):
+                await limiter.stop_sync()
+            return allowed
+
+        self.assertEqual(asyncio.run(run()), [6, 4, 0])
+
+    def test_shared_memory_store(self):
+        """Test that workers on one host share a limit through the table."""
+        with SharedRateLimitTable.create(lanes=2, capacity=64) as table:
+            self._check_shared(
+                self._limiter(SharedMemoryRateLimitStore(table.name, 0)),
+                self._limiter(SharedMemoryRateLimitStore(table.name, 1))
+            )
+
+    def test_local_store(self):
+        """Test the in-process stand-in for the Redis store."""
+        hub = LocalRateLimitHub()
+        self._check_shared(self._limiter(LocalRateLimitStore(hub)), self._limiter(LocalRateLimitStore(hub)))
+
+    def test_failed_sync_keeps_tokens(self):
+        """Test that tokens are published on the next sync after a failure."""
+        limiter = self._limiter(FailingStore())
+        self._allowed(limiter, 3)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(limiter.synchronize())
+        self.assertEqual(limiter._pending, {("per_ip", "ip:10.0.0.1"): 18.0})
+
+    def test_table_overrun(self):
+        """Test that readers more than a lane behind skip the lost records."""
+        with SharedRateLimitTable.create(lanes=1, capacity=4) as table:
+            table.append(0, [(b"k%d" % index, float(index)) for index in range(3)])
+            records, cursor, lost = table.read(0, 0)
+            self.assertEqual((records, cursor, lost), ([(b"k0", 0.0), (b"k1", 1.0), (b"k2", 2.0)], 3, 0))
+
+            for index in range(3, 9):
+                table.append(0, [(b"k%d" % index, float(index))])
+            records, cursor, lost = table.read(0, cursor)
+            self.assertEqual([key for key, _ in records], [b"k5", b"k6", b"k7", b"k8"])
+            self.assertEqual((cursor, lost), (9, 2))
+
+    def test_sliding_window_cannot_share(self):
+        """Test that only GCRA limits can be shared."""
+        with self.assertRaises(ValueError):
+            RateLimiter(algorithm=RateLimitAlgorithm.SLIDING_WINDOW, store=LocalRateLimitStore(LocalRateLimitHub()))
+
+
+class TestSlidingWindowRateLimiter(unittest.TestCase):
+    """Test the sliding window algorithm."""
+
+    def test_window_limit(self):
+        """Test that at most the rule's requests are allowed per window."""
+        limiter = RateLimiter(
+            [RateLimitRule("per_client", 2, 60, RateLimitScope.CLIENT)],
+            algorithm=RateLimitAlgorithm.SLIDING_WINDOW
+        )
+        context = RateLimitContext(client_id="c1")
+
+        self.assertEqual([limiter.check_rate_limit(context)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(limiter.get_remaining_requests(context), {"per_client": 0})
+
+    def test_default_algorithm(self):
+        """Test that GCRA is opt-in and the sliding window stays the default."""
+        self.assertEqual(RateLimiter().algorithm, RateLimitAlgorithm.SLIDING_WINDOW)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,479 @@
+"""
+Tests for server-side render jobs and image frames.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+import concurrent.futures
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm import gpu_backend
+from rfm.core.image_frame import (
+    COMPRESSION_LZ4, COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD, LZ4_AVAILABLE, ZSTD_AVAILABLE,
+    ImageFrameError, decode_image_frame, encode_image_frame, is_image_frame, negotiate_compression
+)
+from rfm.core.render_service import RenderService, RenderRequestError, RenderQueueFullError, colorize, render_band
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+def flat_renderer(params):
+    """Renderer filling the image with max_iter."""
+    return np.full((params["height"], params["width"]), params["max_iter"], dtype=np.uint16)
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records text and binary messages."""
+
+    def __init__(self):
+        self.sent = []
+        self.frames = []
+
+    async def send(self, message):
+        if isinstance(message, bytes):
+            self.frames.append(message)
+        else:
+            self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class TestImageFrame(unittest.TestCase):
+    """Test the binary image frame format."""
+
+    def test_round_trip(self):
+        """Test that frames carry the tile unchanged and aligned."""
+        iterations = np.arange(12, dtype=np.uint16).reshape(3, 4)
+        rgba = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
+
+        for array, x, y in ((iterations, 0, 8), (rgba, 16, 0)):
+            frame = encode_image_frame("op-1", array, x, y)
+            self.assertTrue(is_image_frame(frame))
+
+            decoded = decode_image_frame(frame)
+            self.assertEqual((decoded.operation_id, decoded.x, decoded.y), ("op-1", x, y))
+            self.assertEqual((decoded.height, decoded.width), array.shape[:2])
+            np.testing.assert_array_equal(decoded.data, array)
+            self.assertEqual((len(frame) - decoded.data.nbytes) % 8, 0)
+
+    def test_malformed(self):
+        """Test that truncated or foreign payloads are rejected."""
+        frame = encode_image_frame("op", np.zeros((2, 2), dtype=np.uint16))
+
+        self.assertFalse(is_image_frame('{"type": "ping"}'))
+        for payload in (frame[:10], frame[:-1], b"XXXX" + frame[4:]):
+            with self.assertRaises(ImageFrameError):
+                decode_image_frame(payload)
+        with self.assertRaises(ImageFrameError):
+            encode_image_frame("op", np.zeros((2, 2), dtype=np.float32))
+
+    def test_compression(self):
+        """Test compressed frames, and the raw fallback for incompressible tiles."""
+        compressions = [COMPRESSION_ZLIB]
+        if ZSTD_AVAILABLE:
+            compressions.append(COMPRESSION_ZSTD)
+        if LZ4_AVAILABLE:
+            compressions.append(COMPRESSION_LZ4)
+
+        image = np.repeat(np.arange(64, dtype=np.uint16), 64).reshape(64, 64)
+        for compression in compressions:
+            frame = encode_image_frame("op", image, 0, 32, compression)
+            decoded = decode_image_frame(frame)
+            self.assertEqual(decoded.compression, compression)
+            self.assertLess(len(frame), image.nbytes)
+            np.testing.assert_array_equal(decoded.data, image)
+
+        noise = np.random.default_rng(1).integers(0, 255, (4, 4, 4), dtype=np.uint8)
+        self.assertEqual(decode_image_frame(encode_image_frame("op", noise, compression=COMPRESSION_ZLIB)).compression,
+                         COMPRESSION_NONE)
+
+        corrupt = bytearray(encode_image_frame("op", image, compression=COMPRESSION_ZLIB))
+        corrupt[-8:] = b"\xff" * 8
+        with self.assertRaises(ImageFrameError):
+            decode_image_frame(bytes(corrupt))
+
+    def _check_codec_frames(self, compression):
+        """Round-trip iteration and RGBA frames, and reject corrupt ones."""
+        iterations = np.repeat(np.arange(64, dtype=np.uint16), 64).reshape(64, 64)
+        rgba = np.zeros((16, 32, 4), dtype=np.uint8)
+        rgba[..., 3] = 255
+        for image in (iterations, rgba):
+            frame = encode_image_frame("op", image, 8, 16, compression)
+            decoded = decode_image_frame(frame)
+            self.assertEqual((decoded.compression, decoded.x, decoded.y), (compression, 8, 16))
+            self.assertLess(len(frame), image.nbytes)
+            np.testing.assert_array_equal(decoded.data, image)
+
+        corrupt = bytearray(encode_image_frame("op", iterations, compression=compression))
+        corrupt[-16:] = b"\xff" * 16
+        with self.assertRaises(ImageFrameError):
+            decode_image_frame(bytes(corrupt))
+
+    @unittest.skipUnless(ZSTD_AVAILABLE, "zstandard not installed")
+    def test_zstd_frames(self):
+        """Test zstd-compressed frames."""
+        self._check_codec_frames(COMPRESSION_ZSTD)
+        self.assertEqual(negotiate_compression("zstd"), COMPRESSION_ZSTD)
+
+    @unittest.skipUnless(LZ4_AVAILABLE, "lz4 not installed")
+    def test_lz4_frames(self):
+        """Test LZ4-compressed frames."""
+        self._check_codec_frames(COMPRESSION_LZ4)
+        self.assertEqual(negotiate_compression(["lz4", "zlib"]), COMPRESSION_LZ4)
+
+    def test_negotiate_compression(self):
+        """Test that the first available requested compression is chosen."""
+        self.assertEqual(negotiate_compression(None), COMPRESSION_NONE)
+        self.assertEqual(negotiate_compression("zlib"), COMPRESSION_ZLIB)
+        self.assertEqual(negotiate_compression(["zstd", "zlib"]),
+                         COMPRESSION_ZSTD if ZSTD_AVAILABLE else COMPRESSION_ZLIB)
+        with self.assertRaises(ImageFrameError):
+            negotiate_compression(["brotli"])
+
+    def test_blit_tiles(self):
+        """Test that tiles copy into place in a whole image."""
+        image = np.arange(6 * 8 * 4, dtype=np.uint8).reshape(6, 8, 4)
+        texture = np.zeros_like(image)
+        for y in range(0, 6, 4):
+            for x in range(0, 8, 5):
+                decode_image_frame(encode_image_frame("op", image[y:y + 4, x:x + 5], x, y)).blit(texture)
+        np.testing.assert_array_equal(texture, image)
+
+
+class TestRenderService(unittest.TestCase):
+    """Test job scheduling in the render service."""
+
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.events = []
+        self.frames = []
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def _service(self, **kwargs):
+        async def emit_event(message):
+            self.events.append(message)
+
+        async def send_frame(connection_id, frame):
+            self.frames.append((connection_id, decode_image_frame(frame)))
+
+        kwargs.setdefault("renderers", {"flat": flat_renderer})
+        return RenderService(emit_event, send_frame, executor=self.executor, **kwargs)
+
+    def _finished(self):
+        return {m["operation_id"]: m["type"] for m in self.events if "operation_id" in m}
+
+    def test_bands_match_full_render(self):
+        """Test that rendering in bands gives the same image as one render."""
+        params = {"width": 40, "height": 30, "center_x": -0.5, "center_y": 0.1, "zoom": 1.3, "max_iter": 60}
+        bands = [render_band(gpu_backend.mandelbrot, params, y, min(7, 30 - y)) for y in range(0, 30, 7)]
+        np.testing.assert_array_equal(np.vstack(bands), gpu_backend.mandelbrot(params))
+
+    def test_streams_bands_and_reports_progress(self):
+        """Test that a job streams its image in bands and completes."""
+        async def run():
+            service = self._service(band_pixels=40)
+            job, deduplicated = await service.submit("c1", "alice", "flat", {"width": 10, "height": 9, "max_iter": 3})
+            await asyncio.gather(*service._running.values())
+            return job, deduplicated
+
+        job, deduplicated = asyncio.run(run())
+
+        self.assertFalse(deduplicated)
+        self.assertEqual([(cid, frame.y, frame.height) for cid, frame in self.frames],
+                         [("c1", 0, 4), ("c1", 4, 4), ("c1", 8, 1)])
+        self.assertTrue(all((frame.data == 3).all() for _, frame in self.frames))
+        self.assertEqual([m["type"] for m in self.events],
+                         ["operation_started"] + ["progress_update"] * 3 + ["operation_completed"])
+        self.assertEqual(self.events[-2]["data"]["progress"], 100.0)
+        self.assertEqual(self.events[0]["operation"]["user_id"], "alice")
+
+    def test_priority_and_user_caps(self):
+        """Test that jobs start by priority within per-user and pool limits."""
+        async def run():
+            service = self._service(max_workers=2, max_jobs_per_user=1)
+            low, _ = await service.submit("c1", "alice", "flat", {"max_iter": 1, "width": 4, "height": 4})
+            high, _ = await service.submit("c1", "alice", "flat", {"max_iter": 2, "width": 4, "height": 4}, priority=5)
+            other, _ = await service.submit("c2", "bob", "flat", {"max_iter": 3, "width": 4, "height": 4})
+
+            # The first job of each user started right away
+            first = set(service._running)
+            queued = [job.job_id for _, job in sorted(service._queue)]
+
+            while service._running:
+                await asyncio.gather(*list(service._running.values()))
+            return first, queued, low, high, other
+
+        first, queued, low, high, other = asyncio.run(run())
+
+        self.assertEqual(first, {low.job_id, other.job_id})
+        self.assertEqual(queued, [high.job_id])
+        self.assertEqual(self._finished()[high.job_id], "operation_completed")
+
+    def test_deduplication_and_cancellation(self):
+        """Test that identical requests share a job that runs until nobody wants it."""
+        async def run():
+            service = self._service(max_workers=1)
+            busy, _ = await service.submit("c0", None, "flat", {"max_iter": 9, "width": 4, "height": 4})
+            job, _ = await service.submit("c1", None, "flat", {"width": 4, "height": 4, "max_iter": 5})
+            same, deduplicated = await service.submit("c2", None, "flat", {"max_iter": 5, "height": 4, "width": 4})
+
+            await service.cancel("c1", job.job_id)
+            still_queued = job.job_id in service.jobs
+            await service.connection_closed("c2")
+
+            unknown = await service.cancel("c2", job.job_id)
+            await asyncio.gather(*service._running.values())
+            return busy, job, same, deduplicated, still_queued, unknown, service
+
+        busy, job, same, deduplicated, still_queued, unknown, service = asyncio.run(run())
+
+        self.assertIs(same, job)
+        self.assertTrue(deduplicated)
+        self.assertTrue(still_queued)
+        self.assertFalse(unknown)
+        self.assertEqual(self._finished(), {busy.job_id: "operation_completed", job.job_id: "operation_canceled"})
+        self.assertEqual(service.stats()["deduplicated"], 1)
+
+    def test_identical_request_during_render(self):
+        """Test that a request identical to a running job gets every band."""
+        params = {"width": 4, "height": 10, "max_iter": 5}
+        late = []
+
+        async def emit_event(message):
+            self.events.append(message)
+
+        async def send_frame(connection_id, frame):
+            self.frames.append((connection_id, decode_image_frame(frame)))
+            # Submit the same request while the third band is being sent
+            if len(self.frames) == 3:
+                late.append(await service.submit("c2", None, "flat", params))
+
+        async def run():
+            job, _ = await service.submit("c1", None, "flat", params)
+            while service._running:
+                await asyncio.gather(*list(service._running.values()))
+            return job
+
+        service = RenderService(emit_event, send_frame, executor=self.executor,
+                                renderers={"flat": flat_renderer}, band_pixels=4)
+        job = asyncio.run(run())
+        (late, deduplicated), = late
+
+        self.assertFalse(deduplicated)
+        self.assertNotEqual(late.job_id, job.job_id)
+        for cid in ("c1", "c2"):
+            rows = [frame.y for frame_cid, frame in self.frames if frame_cid == cid]
+            self.assertEqual(rows, list(range(10)))
+        self.assertEqual(self._finished(), {job.job_id: "operation_completed", late.job_id: "operation_completed"})
+        self.assertEqual(service._by_key, {})
+
+    def test_rgba_frames_per_subscriber_compression(self):
+        """Test colored frames, sent in each requester's compression."""
+        async def run():
+            service = self._service()
+            params = {"width": 6, "height": 2, "max_iter": 4}
+            job, _ = await service.submit("c1", None, "flat", params, pixel_format="rgba", colormap="gray")
+            await service.submit("c2", None, "flat", params, pixel_format="rgba", colormap="gray",
+                                 compression=COMPRESSION_ZLIB)
+            other, _ = await service.submit("c3", None, "flat", params)
+            await asyncio.gather(*service._running.values())
+            return job, other
+
+        job, other = asyncio.run(run())
+
+        self.assertNotEqual(job.job_id, other.job_id)
+        by_connection = {cid: frame for cid, frame in self.frames}
+        self.assertEqual(by_connection["c1"].compression, COMPRESSION_NONE)
+        self.assertEqual(by_connection["c2"].compression, COMPRESSION_ZLIB)
+        for cid in ("c1", "c2"):
+            self.assertEqual(by_connection[cid].data.shape, (2, 6, 4))
+            # Every point reached max_iter: black
+            self.assertTrue((by_connection[cid].data == (0, 0, 0, 255)).all())
+        self.assertEqual(by_connection["c3"].data.dtype, np.uint16)
+
+    def test_colorize(self):
+        """Test that iteration counts map through the colormap lookup table."""
+        rgba = colorize(np.array([[0, 2, 4]], dtype=np.uint16), 4, "gray")
+        self.assertEqual(rgba.dtype, np.uint8)
+        self.assertEqual(rgba[0, 0].tolist(), [0, 0, 0, 255])
+        self.assertEqual(rgba[0, 1].tolist()[:3], [128, 128, 128])
+        self.assertEqual(rgba[0, 2].tolist(), [0, 0, 0, 255])
+
+    def test_queue_limits(self):
+        """Test that queued jobs are limited per user and in total."""
+        def params(max_iter):
+            return {"width": 4, "height": 4, "max_iter": max_iter}
+
+        async def run():
+            service = self._service(max_workers=1, max_jobs_per_user=1, max_queued_per_user=2, max_queued=3)
+            await service.submit("c1", "alice", "flat", params(1))
+            queued = [(await service.submit("c1", "alice", "flat", params(i)))[0] for i in (2, 3)]
+
+            with self.assertRaises(RenderQueueFullError):
+                await service.submit("c1", "alice", "flat", params(4))
+
+            # Joining a queued job takes no place in the queue
+            _, deduplicated = await service.submit("c2", "alice", "flat", params(2))
+
+            await service.submit("c3", "bob", "flat", params(5))
+            with self.assertRaises(RenderQueueFullError):
+                await service.submit("c4", "carol", "flat", params(6))
+
+            # Canceled jobs free their place
+            await service.cancel("c1", queued[1].job_id)
+            await service.submit("c4", "carol", "flat", params(6))
+            await service.stop()
+            return deduplicated
+
+        self.assertTrue(asyncio.run(run()))
+
+    def test_invalid_requests(self):
+        """Test that invalid requests are rejected."""
+        async def run():
+            service = self._service()
+            for kind, params, priority in (("nope", {}, 0), ("flat", {"width": 0}, 0),
+                                           ("flat", {"zoom": "x"}, 0), ("flat", {}, "high")):
+                with self.assertRaises(RenderRequestError):
+                    await service.submit("c1", None, kind, params, priority)
+            for pixel_format, colormap in (("png", None), ("rgba", "no-such-map")):
+                with self.assertRaises(RenderRequestError):
+                    await service.submit("c1", None, "flat", {}, pixel_format=pixel_format, colormap=colormap)
+
+        asyncio.run(run())
+        self.assertEqual(self.events, [])
+
+
+class TestServerRendering(unittest.TestCase):
+    """Test render requests through the progress server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0,
+            persist_operations=False
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.server.render_service._executor = self.executor
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.temp_dir.cleanup()
+
+    def test_submit_render(self):
+        """Test that the requester gets the operation ID, progress and frames."""
+        async def run():
+            websocket = FakeWebSocket()
+            self.server._register_client(ClientInfo(connection_id="ui", websocket=websocket))
+            await self.server._process_message("ui", {
+                "type": MessageType.SUBMIT_RENDER,
+                "request_id": "r1",
+                "kind": "julia",
+                "params": {"width": 16, "height": 12, "max_iter": 20}
+            })
+            await asyncio.gather(*self.server.render_service._running.values())
+
+            await self.server._process_message("ui", {"type": MessageType.SUBMIT_RENDER, "kind": "spiral"})
+            return websocket
+
+        websocket = asyncio.run(run())
+
+        submitted = next(m for m in websocket.sent if m["type"] == "render_submitted")
+        self.assertEqual(submitted["request_id"], "r1")
+
+        frames = [decode_image_frame(frame) for frame in websocket.frames]
+        image = np.vstack([frame.data for frame in frames])
+        self.assertEqual({frame.operation_id for frame in frames}, {submitted["operation_id"]})
+        np.testing.assert_array_equal(
+            image, gpu_backend.julia({"width": 16, "height": 12, "max_iter": 20})
+        )
+
+        operation = self.server.operations[submitted["operation_id"]]
+        self.assertEqual((operation["operation_type"], operation["status"]), ("render", "completed"))
+        self.assertEqual(websocket.sent[-1]["error_code"], "invalid_render_request")
+
+    def test_queue_full(self):
+        """Test that requests beyond the queue limits get a render_queue_full error."""
+        self.server.render_service.max_queued = 0
+
+        async def run():
+            websocket = FakeWebSocket()
+            self.server._register_client(ClientInfo(connection_id="ui", websocket=websocket))
+            await self.server._process_message("ui", {"type": MessageType.SUBMIT_RENDER, "kind": "julia"})
+            return websocket
+
+        websocket = asyncio.run(run())
+
+        self.assertEqual(websocket.sent[-1]["error_code"], "render_queue_full")
+        self.assertEqual(self.server.render_service.jobs, {})
+
+    def test_slow_client_backpressure(self):
+        """Test that frames wait for slow clients, which are dropped rather than losing bands."""
+        self.server.render_frame_bytes = 1
+        self.server.render_frame_timeout = 0.05
+        self.server.render_service.band_pixels = 16
+
+        async def run():
+            clients = {}
+            for connection_id in ("fast", "slow"):
+                websocket = FakeWebSocket()
+                client_info = ClientInfo(connection_id=connection_id, websocket=websocket)
+                self.server._register_client(client_info)
+                client_info.send_queue = self.server._create_send_queue(client_info)
+                client_info.send_queue.start()
+                clients[connection_id] = (websocket, client_info.send_queue)
+
+            # The slow client never finishes writing
+            stalled = asyncio.Event()
+            slow_socket = clients["slow"][0]
+            original_send = slow_socket.send
+
+            async def stalled_send(message):
+                await stalled.wait()
+                await original_send(message)
+
+            slow_socket.send = stalled_send
+
+            request = {"type": MessageType.SUBMIT_RENDER, "kind": "julia",
+                       "params": {"width": 16, "height": 8, "max_iter": 20}}
+            await self.server._process_message("fast", request)
+            await self.server._process_message("slow", request)
+            while self.server.render_service._running:
+                await asyncio.gather(*list(self.server.render_service._running.values()))
+
+            stalled.set()
+            for websocket, queue in clients.values():
+                await queue.join()
+                await queue.stop()
+            return clients["fast"][0], slow_socket
+
+        fast, slow = asyncio.run(run())
+
+        submitted = next(m for m in fast.sent if m["type"] == "render_submitted")
+        self.assertEqual([decode_image_frame(frame).y for frame in fast.frames], list(range(8)))
+        operation = self.server.operations[submitted["operation_id"]]
+        self.assertEqual(operation["status"], "completed")
+
+        # The slow client got the frames it had room for, in order, and an error
+        rows = [decode_image_frame(frame).y for frame in slow.frames]
+        self.assertLess(len(rows), 8)
+        self.assertEqual(rows, list(range(len(rows))))
+        error = next(m for m in slow.sent if m["type"] == MessageType.ERROR)
+        self.assertEqual(error["error_code"], "render_backpressure")
+        self.assertEqual(error["operation_id"], submitted["operation_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
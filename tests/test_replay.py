@@ -0,0 +1,164 @@
+"""
+Tests for event sequence numbers and resumable sessions.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.replay import ReplayBuffer, compact
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def progress(operation_id, value):
+    return {"type": "progress_update", "data": {"operation_id": operation_id, "progress": value, "status": "running"}}
+
+
+class TestReplayBuffer(unittest.TestCase):
+    """Test the replay ring."""
+
+    def test_since(self):
+        """Test replay windows, including gaps larger than the ring."""
+        buffer = ReplayBuffer(capacity=3)
+        for value in range(5):
+            buffer.append(progress("op", value))
+
+        self.assertEqual(buffer.last_seq, 5)
+        self.assertEqual(buffer.first_seq, 3)
+        self.assertEqual([entry.seq for entry in buffer.since(2)], [3, 4, 5])
+        self.assertEqual([entry.seq for entry in buffer.since(4)], [5])
+        self.assertEqual(buffer.since(5), [])
+        self.assertIsNone(buffer.since(1))
+        self.assertIsNone(buffer.since(6))
+
+    def test_entries_are_stamped_copies(self):
+        """Test that entries carry the sequence number and keep their content."""
+        buffer = ReplayBuffer()
+        message = progress("op", 10)
+        entry = buffer.append(message)
+        message["data"]["progress"] = 20
+
+        self.assertNotIn("event_seq", message)
+        self.assertEqual(entry.message["event_seq"], 1)
+        self.assertEqual(entry.message["data"]["progress"], 10)
+
+    def test_compact(self):
+        """Test that only the latest progress update of an operation is replayed."""
+        buffer = ReplayBuffer()
+        buffer.append({"type": "operation_started", "operation": {"operation_id": "a"}})
+        buffer.append(progress("a", 10))
+        buffer.append(progress("b", 10))
+        buffer.append(progress("a", 20))
+        buffer.append({"type": "operation_completed", "operation_id": "b"})
+
+        self.assertEqual([entry.seq for entry in compact(buffer.since(0))], [1, 3, 4, 5])
+
+
+class TestSessionResume(unittest.TestCase):
+    """Test the resume handshake of the server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0,
+            replay_buffer_size=8
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id):
+        websocket = FakeWebSocket()
+        self.server._register_client(ClientInfo(connection_id=connection_id, websocket=websocket))
+        return websocket
+
+    async def _report(self, operation_id, values):
+        await self.server._process_message("reporter", {
+            "type": MessageType.OPERATION_STARTED,
+            "operation": {"operation_id": operation_id, "operation_type": "render"}
+        })
+        for value in values:
+            await self.server._process_message("reporter", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": operation_id, "operation_type": "render", "progress": value}
+            })
+
+    def test_resume_replays_missed_events(self):
+        """Test that a resuming client only gets the events it missed."""
+        async def run():
+            self._add_client("reporter")
+            viewer = self._add_client("viewer")
+            await self._report("a", [10])
+            last_seq = viewer.sent[-1]["event_seq"]
+
+            # Client drops; events go on without it
+            self.server._unregister_client("viewer")
+            await self._report("b", [5, 50])
+            await self.server._process_message("reporter", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": "a", "operation_type": "render", "progress": 20}
+            })
+
+            resumed = self._add_client("viewer2")
+            await self.server._process_message("viewer2", {
+                "type": MessageType.RESUME, "epoch": self.server.server_id, "last_seq": last_seq
+            })
+            return last_seq, viewer, resumed
+
+        last_seq, viewer, resumed = asyncio.run(run())
+
+        self.assertEqual([m["event_seq"] for m in viewer.sent], [1, 2])
+        self.assertEqual(last_seq, 2)
+        self.assertEqual(resumed.sent[0]["type"], "session_resumed")
+        self.assertEqual(resumed.sent[0]["event_seq"], 6)
+        self.assertEqual(resumed.sent[0]["replayed"], 3)
+        self.assertEqual(
+            [(m["type"], m["event_seq"]) for m in resumed.sent[1:]],
+            [("operation_started", 3), ("progress_update", 5), ("progress_update", 6)]
+        )
+
+    def test_snapshot_fallback(self):
+        """Test that stale or foreign sessions get an operations snapshot."""
+        async def run():
+            self._add_client("reporter")
+            await self._report("a", range(10))
+
+            client = self._add_client("viewer")
+            for epoch, last_seq in ((self.server.server_id, 1), ("other-server", 11), (self.server.server_id, 99)):
+                await self.server._process_message("viewer", {
+                    "type": MessageType.RESUME, "epoch": epoch, "last_seq": last_seq
+                })
+            return client
+
+        client = asyncio.run(run())
+
+        self.assertEqual([m["type"] for m in client.sent], ["operations_list"] * 3)
+        self.assertEqual(client.sent[0]["epoch"], self.server.server_id)
+        self.assertEqual(client.sent[0]["event_seq"], 11)
+        self.assertEqual(client.sent[0]["operations"][0]["operation_id"], "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for /proc based resource sampling.
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+
+from monitor_resources import ProcSampler, ResourceMonitor
+
+TCP_HEADER = (
+    "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt"
+    "   uid  timeout inode\n"
+)
+
+
+def tcp_line(slot, local, remote, state, inode):
+    """Format a /proc/net/tcp entry."""
+    return (f"{slot:4d}: {local} {remote} {state} 00000000:00000000 00:00000000 "
+            f"00000000  1000        0 {inode} 1 0000000000000000 100 0 0 10 0\n")
+
+
+class TestProcSampler(unittest.TestCase):
+    """Test parsing a fake /proc tree."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        process_dir = os.path.join(self.root, "42")
+        os.makedirs(os.path.join(process_dir, "fd"))
+        os.makedirs(os.path.join(self.root, "net"))
+        for fd in range(5):
+            open(os.path.join(process_dir, "fd", str(fd)), "w").close()
+
+        # Port 8765 is 0x223D
+        with open(os.path.join(self.root, "net", "tcp"), "w") as f:
+            f.write(TCP_HEADER)
+            f.write(tcp_line(0, "00000000:223D", "00000000:0000", "0A", 1001))
+            f.write(tcp_line(1, "0100007F:223D", "0100007F:C350", "01", 1002))
+            f.write(tcp_line(2, "0100007F:C350", "0100007F:223D", "01", 1003))
+            f.write(tcp_line(3, "0100007F:223D", "0100007F:C351", "06", 0))
+            f.write(tcp_line(4, "0100007F:1F90", "0100007F:223E", "01", 1004))
+            f.write(tcp_line(5, "0100007F:223D", "0100007F:C352", "08", 1005))
+        with open(os.path.join(self.root, "net", "tcp6"), "w") as f:
+            f.write(TCP_HEADER)
+            f.write(tcp_line(0, "00000000000000000000000000000000:223D",
+                             "00000000000000000000000000000000:0000", "0A", 1006))
+
+        self.write_stat(utime=100, stime=50)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_stat(self, utime, stime):
+        # Field 14 utime, 15 stime, 20 num_threads, 24 rss (pages)
+        fields = ["S", "1", "42", "42"] + ["0"] * 7 + [str(utime), str(stime)] + ["0"] * 4
+        fields += ["7", "0", "0", "1000000", "256"] + ["0"] * 20
+        with open(os.path.join(self.root, "42", "stat"), "w") as f:
+            f.write("42 (python (rfm) x) " + " ".join(fields) + "\n")
+
+    def test_sample(self):
+        """Test CPU, memory, descriptor and socket readings."""
+        sampler = ProcSampler(42, 8765, proc_root=self.root)
+        sampler.clock_ticks = 100
+        sampler.page_size = 4096
+
+        self.assertEqual(sampler.read_stat(), (1.5, 1.0, 7))
+        self.assertEqual(sampler.count_fds(), 5)
+        self.assertEqual(sampler.socket_states(), {"LISTEN": 2, "ESTABLISHED": 2, "CLOSE_WAIT": 1})
+
+        first = sampler.sample(now=10.0)
+        self.assertEqual(first, {"cpu": 0.0, "memory": 1.0, "sockets": 5.0, "fds": 5.0, "threads": 7.0})
+
+        # 50 ticks (0.5 s) of CPU over 2 s of wall time
+        self.write_stat(utime=130, stime=70)
+        self.assertAlmostEqual(sampler.sample(now=12.0)["cpu"], 25.0)
+
+        self.assertEqual(ProcSampler(42, None, proc_root=self.root).count_sockets(), 0)
+        self.assertIsNone(ProcSampler(43, 8765, proc_root=self.root).count_fds())
+
+    def test_monitor_ring_buffers(self):
+        """Test that a monitor keeps a bounded history of samples."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            monitor = ResourceMonitor(port=8765, output_dir=output_dir, pid=42, history=3)
+            monitor.use_proc = True
+            monitor._samplers[42] = ProcSampler(42, 8765, proc_root=self.root)
+            monitor.start_time = 100.0
+
+            for i in range(5):
+                monitor.sample(now=100.0 + i)
+
+            self.assertEqual(list(monitor.timestamps), [2.0, 3.0, 4.0])
+            self.assertEqual(list(monitor.socket_count), [5.0, 5.0, 5.0])
+            self.assertEqual(monitor.count_open_sockets(), 5)
+
+            summary = monitor.summary()
+            self.assertEqual(summary["fds"]["count"], 3)
+            self.assertEqual(summary["fds"]["latest"], 5.0)
+
+
+@unittest.skipUnless(ProcSampler.available(), "procfs not available")
+class TestLiveProc(unittest.TestCase):
+    """Test sampling this process."""
+
+    def test_own_listening_socket(self):
+        """Test that a listening socket of this process is counted."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+        try:
+            sampler = ProcSampler(port=port)
+            self.assertEqual(sampler.socket_states(), {"LISTEN": 1})
+            values = sampler.sample()
+            self.assertGreater(values["memory"], 0)
+            self.assertGreaterEqual(values["threads"], 1)
+            self.assertGreater(values["fds"], 0)
+        finally:
+            server.close()
+
+        self.assertEqual(ProcSampler(port=port).count_sockets(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
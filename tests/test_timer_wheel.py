@@ -0,0 +1,121 @@
+"""
+Tests for the hashed timer wheel used for operation retention.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.timer_wheel import TimerWheel
+from rfm.core.progress import ProgressManager, ProgressReporter
+
+
+class TestTimerWheel(unittest.TestCase):
+    """Test the hashed timer wheel."""
+
+    def setUp(self):
+        self.wheel = TimerWheel(tick_interval=1.0, slots=8)
+        self.expired = []
+
+    def _collect(self, keys):
+        self.expired.append(sorted(keys))
+
+    def _advance(self, seconds):
+        return asyncio.run(self.wheel.advance(time.monotonic() + seconds))
+
+    def test_batched_expiry(self):
+        """Test that timers due in the same tick are delivered in one batch."""
+        for key in ("a", "b", "c"):
+            self.wheel.schedule(key, 2.0, self._collect)
+        self.wheel.schedule("d", 5.0, self._collect)
+
+        self.assertEqual(self._advance(0.5), 0)
+        self.assertEqual(self._advance(3.0), 3)
+        self.assertEqual(self.expired, [["a", "b", "c"]])
+        self.assertEqual(self.wheel.pending_count(), 1)
+
+    def test_multiple_rounds(self):
+        """Test timers further away than one wheel revolution."""
+        self.wheel.schedule("far", 20.0, self._collect)
+
+        self.assertEqual(self._advance(10.0), 0)
+        self.assertEqual(self._advance(21.0), 1)
+        self.assertEqual(self.expired, [["far"]])
+
+    def test_reschedule_and_cancel(self):
+        """Test that rescheduling moves a timer and cancel removes it."""
+        self.wheel.schedule("a", 1.0, self._collect)
+        self.wheel.schedule("a", 6.0, self._collect)
+        self.wheel.schedule("b", 1.0, self._collect)
+
+        self.assertTrue(self.wheel.cancel("b", self._collect))
+        self.assertFalse(self.wheel.cancel("b", self._collect))
+        self.assertEqual(self._advance(3.0), 0)
+        self.assertEqual(self._advance(7.0), 1)
+
+    def test_same_key_different_owners(self):
+        """Test that different callbacks can use the same key."""
+        other = []
+        self.wheel.schedule("op", 1.0, self._collect)
+        self.wheel.schedule("op", 1.0, other.append)
+
+        self.assertEqual(self._advance(2.0), 2)
+        self.assertEqual(self.expired, [["op"]])
+        self.assertEqual(other, [["op"]])
+
+    def test_async_callback(self):
+        """Test that coroutine callbacks are awaited."""
+        async def expire(keys):
+            await asyncio.sleep(0)
+            self.expired.append(keys)
+
+        self.wheel.schedule("x", 0.0, expire)
+        self._advance(1.0)
+        self.assertEqual(self.expired, [["x"]])
+
+    def test_released_by_last_owner(self):
+        """Test that the background task runs until the last owner releases the wheel."""
+        async def run():
+            self.wheel.acquire()
+            self.wheel.acquire()
+            task = self.wheel._task
+            await self.wheel.release()
+            running = not task.done()
+            await self.wheel.release()
+            return running, task
+
+        running, task = asyncio.run(run())
+        self.assertTrue(running)
+        self.assertTrue(task.cancelled())
+        self.assertIsNone(self.wheel._task)
+
+
+class TestProgressManagerRetention(unittest.TestCase):
+    """Test operation retention in the progress manager."""
+
+    def test_finished_operations_expire(self):
+        """Test that finished operations are removed after the retention period."""
+        async def run():
+            manager = ProgressManager(retention_seconds=0.0)
+            finished = ProgressReporter("test")
+            running = ProgressReporter("test")
+            await manager.add_operation(finished)
+            await manager.add_operation(running)
+
+            finished.report_completed()
+            await asyncio.sleep(1.5)
+
+            return await manager.list_operations()
+
+        operations = asyncio.run(run())
+        self.assertEqual(len(operations), 1)
+        self.assertEqual(operations[0]["status"], "pending")
+
+
+if __name__ == "__main__":
+    unittest.main()
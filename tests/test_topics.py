@@ -0,0 +1,156 @@
+"""
+Tests for topic subscriptions and server-side filtering.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.topics import TopicIndex, parse_topic, operation_topics
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records sent messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+class TestTopicIndex(unittest.TestCase):
+    """Test the topic index."""
+
+    def setUp(self):
+        self.index = TopicIndex()
+        for connection_id in ("a", "b", "c"):
+            self.index.add_connection(connection_id)
+
+    def test_unfiltered_by_default(self):
+        """Test that connections without subscriptions receive everything."""
+        self.assertEqual(self.index.recipients(["type:render"]), {"a", "b", "c"})
+
+    def test_subscriptions_filter(self):
+        """Test that subscribed connections only receive matching topics."""
+        self.index.subscribe("a", ["user:alice"])
+        self.index.subscribe("b", ["type:render"])
+
+        self.assertEqual(self.index.recipients(operation_topics("op1", "render", "bob")), {"b", "c"})
+        self.assertEqual(self.index.recipients(operation_topics("op2", "export", "alice")), {"a", "c"})
+
+    def test_unsubscribe_all_restores_unfiltered(self):
+        """Test that removing the last subscription makes a connection unfiltered."""
+        self.index.subscribe("a", ["user:alice", "type:render"])
+        self.assertEqual(self.index.unsubscribe("a", ["user:alice"]), {"type:render"})
+        self.assertNotIn("a", self.index.recipients(["type:export"]))
+
+        self.assertEqual(self.index.unsubscribe("a"), set())
+        self.assertIn("a", self.index.recipients(["type:export"]))
+
+        self.index.remove_connection("a")
+        self.assertNotIn("a", self.index.recipients(["type:export"]))
+
+    def test_invalid_topics(self):
+        """Test topic validation."""
+        self.assertEqual(parse_topic("operation:a:b"), ("operation", "a:b"))
+        for topic in ("render", "colour:red", "user:"):
+            with self.assertRaises(ValueError):
+                parse_topic(topic)
+
+
+class TestServerTopicFiltering(unittest.TestCase):
+    """Test that the server only sends operation events to interested clients."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0
+        )
+        self.server.metrics_registry.stop_system_metrics_collection()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _add_client(self, connection_id, user_id=None):
+        websocket = FakeWebSocket()
+        self.server._register_client(ClientInfo(
+            connection_id=connection_id, websocket=websocket, user_id=user_id
+        ))
+        return websocket
+
+    def _start(self, connection_id, operation_id, operation_type):
+        return self.server._process_message(connection_id, {
+            "type": MessageType.OPERATION_STARTED,
+            "operation": {"operation_id": operation_id, "operation_type": operation_type}
+        })
+
+    def test_user_and_type_subscriptions(self):
+        """Test routing by reporting user and operation type."""
+        async def run():
+            self._add_client("alice_worker", user_id="alice")
+            self._add_client("bob_worker", user_id="bob")
+            alice = self._add_client("alice_ui")
+            renders = self._add_client("renders_ui")
+            everything = self._add_client("dashboard")
+
+            await self.server._process_message("alice_ui", {
+                "type": MessageType.SUBSCRIBE, "user_id": "alice"
+            })
+            await self.server._process_message("renders_ui", {
+                "type": MessageType.SUBSCRIBE, "topics": ["type:render"]
+            })
+            for websocket in (alice, renders):
+                websocket.sent.clear()
+
+            await self._start("alice_worker", "a1", "export")
+            await self._start("bob_worker", "b1", "render")
+            await self.server._process_message("bob_worker", {
+                "type": MessageType.PROGRESS_UPDATE,
+                "data": {"operation_id": "b1", "operation_type": "render", "progress": 50}
+            })
+            await self.server._process_message("alice_worker", {
+                "type": MessageType.OPERATION_COMPLETED, "operation_id": "a1"
+            })
+            await self.server._send_operations_list("alice_ui")
+            return alice, renders, everything
+
+        alice, renders, everything = asyncio.run(run())
+
+        self.assertEqual(
+            [m["type"] for m in alice.sent],
+            ["operation_started", "operation_completed", "operations_list"]
+        )
+        self.assertEqual([op["operation_id"] for op in alice.sent[-1]["operations"]], ["a1"])
+        self.assertEqual([m["type"] for m in renders.sent], ["operation_started", "progress_update"])
+        self.assertEqual(len(everything.sent), 4)
+
+    def test_invalid_subscription(self):
+        """Test that malformed topics are rejected."""
+        async def run():
+            websocket = self._add_client("ui")
+            await self.server._process_message("ui", {
+                "type": MessageType.SUBSCRIBE, "topics": ["colour:red"]
+            })
+            return websocket
+
+        websocket = asyncio.run(run())
+
+        self.assertEqual(websocket.sent[-1]["error_code"], "invalid_topic")
+        self.assertEqual(self.server.clients["ui"].subscriptions, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,289 @@
+"""
+Tests for trace and span propagation.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import threading
+import unittest
+import concurrent.futures
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools")))
+
+from rfm.core.progress import ProgressReporter
+from rfm.core.render_service import RenderService
+from rfm.core.tracing import (
+    FileSpanExporter, OTLPHttpSpanExporter, SpanExporter, Tracer,
+    current_trace_id, get_tracer, latency_breakdown, load_spans, otlp_request, otlp_spans, valid_trace_id
+)
+from rfm.core.websocket_server_enhanced import ProgressServer, ClientInfo, MessageType
+
+
+class ListExporter(SpanExporter):
+    """Exporter keeping spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans, service_name):
+        self.spans.extend(otlp_spans(otlp_request(spans, service_name)))
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that records text messages."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        if not isinstance(message, bytes):
+            self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def flat_renderer(params):
+    """Renderer filling the image with max_iter."""
+    return np.full((params["height"], params["width"]), params["max_iter"], dtype=np.uint16)
+
+
+class TestTracer(unittest.TestCase):
+    """Test spans, propagation and export."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "traces.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_nested_spans_exported_to_file(self):
+        """Test that nested spans share the trace and link to their parent."""
+        tracer = Tracer("test", FileSpanExporter(self.path))
+
+        with tracer.span("render", attributes={"width": 8}) as render:
+            self.assertEqual(current_trace_id(), render.trace_id)
+            with tracer.span("kernel"):
+                pass
+        with self.assertRaises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        tracer.record_span("deliver", 10.0, 10.25, render.trace_id, render.span_id)
+        tracer.shutdown()
+
+        self.assertIsNone(current_trace_id())
+        spans = {span["name"]: span for span in load_spans(self.path)}
+        self.assertEqual(set(spans), {"render", "kernel", "failing", "deliver"})
+        self.assertEqual(spans["kernel"]["trace_id"], render.trace_id)
+        self.assertEqual(spans["kernel"]["parent_id"], render.span_id)
+        self.assertIsNone(spans["render"]["parent_id"])
+        self.assertNotEqual(spans["failing"]["trace_id"], render.trace_id)
+        self.assertEqual(spans["render"]["attributes"], {"width": "8"})
+        self.assertEqual(spans["render"]["service"], "test")
+        self.assertAlmostEqual(spans["deliver"]["duration_ms"], 250.0, places=3)
+
+        breakdown = latency_breakdown(load_spans(self.path))
+        self.assertEqual(breakdown["deliver"]["count"], 1)
+        self.assertAlmostEqual(breakdown["deliver"]["p95_ms"], 250.0, places=3)
+        self.assertEqual(tracer.stats()["exported"], 4)
+
+    def test_disabled_and_bounded(self):
+        """Test that a tracer without exporter records nothing and the queue is bounded."""
+        tracer = Tracer()
+        with tracer.span("render") as span:
+            self.assertEqual(len(span.trace_id), 32)
+        self.assertIsNone(tracer.record_span("kernel", 0.0, 1.0, span.trace_id))
+        self.assertEqual(tracer.stats()["queued"], 0)
+
+        tracer = Tracer(exporter=ListExporter(), max_queue=2, flush_interval=60)
+        for _ in range(3):
+            tracer.record_span("kernel", 0.0, 1.0, span.trace_id)
+        self.assertEqual(tracer.spans_dropped, 1)
+        tracer.shutdown()
+        self.assertEqual(len(tracer.exporter.spans), 2)
+
+    def test_valid_trace_id(self):
+        """Test that only W3C trace IDs are accepted from outside."""
+        self.assertEqual(valid_trace_id("ab" * 16), "ab" * 16)
+        for value in (None, 42, "AB" * 16, "ab" * 15, "ab" * 17, "0" * 32, "xy" * 16, ["ab" * 16]):
+            self.assertIsNone(valid_trace_id(value))
+
+    def test_progress_carries_trace_id(self):
+        """Test that reporters take the trace of the current span."""
+        tracer = Tracer()
+        updates = []
+
+        with tracer.span("render") as span:
+            reporter = ProgressReporter("render")
+        reporter.add_callback(updates.append)
+        child = reporter.create_child()
+        reporter.report_progress(50)
+
+        self.assertEqual(reporter.trace_id, span.trace_id)
+        self.assertEqual(child.trace_id, span.trace_id)
+        self.assertEqual(updates[-1].to_dict()["trace_id"], span.trace_id)
+        self.assertIsNone(ProgressReporter("render").trace_id)
+
+    def test_otlp_http_export(self):
+        """Test posting spans to the collector stand-in."""
+        from http.server import ThreadingHTTPServer
+        from trace_collector import CollectorHandler
+
+        CollectorHandler.output_path = self.path
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            endpoint = "http://127.0.0.1:%d/v1/traces" % server.server_address[1]
+            tracer = Tracer("collector-test", OTLPHttpSpanExporter(endpoint))
+            with tracer.span("send"):
+                pass
+            tracer.shutdown()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        spans = load_spans(self.path)
+        self.assertEqual([(span["service"], span["name"]) for span in spans], [("collector-test", "send")])
+
+
+class TestRenderTracing(unittest.TestCase):
+    """Test spans of render jobs and relayed events."""
+
+    def setUp(self):
+        self.tracer = get_tracer()
+        self.exporter = ListExporter()
+        self.tracer.exporter = self.exporter
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tracer.flush()
+        self.tracer.exporter = None
+        self.temp_dir.cleanup()
+
+    def test_render_job_spans(self):
+        """Test that a job records its stages under the requester's trace."""
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        events = []
+        trace_id = "ab" * 16
+
+        async def emit_event(message):
+            events.append(message)
+
+        async def send_frame(connection_id, frame):
+            pass
+
+        async def run():
+            service = RenderService(emit_event, send_frame, executor=executor,
+                                    renderers={"flat": flat_renderer}, band_pixels=40)
+            job, _ = await service.submit("c1", "alice", "flat", {"width": 10, "height": 8, "max_iter": 5},
+                                          pixel_format="rgba", trace_id=trace_id)
+            await asyncio.gather(*service._running.values())
+            return job
+
+        try:
+            job = asyncio.run(run())
+        finally:
+            executor.shutdown()
+        self.tracer.flush()
+
+        self.assertEqual(job.trace_id, trace_id)
+        self.assertTrue(all(event["trace_id"] == trace_id for event in events))
+        self.assertEqual(events[1]["data"]["trace_id"], trace_id)
+
+        names = [span["name"] for span in self.exporter.spans]
+        self.assertEqual(names.count("render"), 1)
+        for stage in ("validate", "queue"):
+            self.assertEqual(names.count(stage), 1)
+        for stage in ("kernel", "colormap", "serialize", "send"):
+            self.assertEqual(names.count(stage), 2)
+
+        root = next(span for span in self.exporter.spans if span["name"] == "render")
+        self.assertEqual(root["attributes"]["outcome"], "completed")
+        for span in self.exporter.spans:
+            self.assertEqual(span["trace_id"], trace_id)
+            if span is not root:
+                self.assertEqual(span["parent_id"], root["span_id"])
+
+    def test_render_job_invalid_trace_id(self):
+        """Test that a job with a malformed trace ID starts a new trace."""
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        async def emit_event(message):
+            pass
+
+        async def send_frame(connection_id, frame):
+            pass
+
+        async def run():
+            service = RenderService(emit_event, send_frame, executor=executor,
+                                    renderers={"flat": flat_renderer})
+            job, _ = await service.submit("c1", "alice", "flat", {"width": 4, "height": 4, "max_iter": 5},
+                                          trace_id="not-a-trace")
+            await asyncio.gather(*service._running.values())
+            return job
+
+        try:
+            job = asyncio.run(run())
+        finally:
+            executor.shutdown()
+        self.tracer.flush()
+
+        self.assertIsNotNone(valid_trace_id(job.trace_id))
+        self.assertTrue(all(span["trace_id"] == job.trace_id for span in self.exporter.spans))
+
+    def test_relayed_progress_keeps_trace(self):
+        """Test that relayed progress updates carry the trace ID and add relay spans."""
+        server = ProgressServer(
+            data_dir=os.path.join(self.temp_dir.name, "data"),
+            log_dir=os.path.join(self.temp_dir.name, "logs"),
+            progress_flush_interval=0,
+            persist_operations=False
+        )
+        server.metrics_registry.stop_system_metrics_collection()
+        viewer = FakeWebSocket()
+        server._register_client(ClientInfo(connection_id="producer", websocket=FakeWebSocket()))
+        server._register_client(ClientInfo(connection_id="viewer", websocket=viewer))
+
+        trace_id = "cd" * 16
+        asyncio.run(server._process_message("producer", {
+            "type": MessageType.PROGRESS_UPDATE,
+            "data": {"operation_id": "op1", "progress": 10.0, "status": "running", "trace_id": trace_id},
+            "trace_id": trace_id
+        }))
+        self.tracer.flush()
+
+        update = next(m for m in viewer.sent if m["type"] == MessageType.PROGRESS_UPDATE)
+        self.assertEqual(update["trace_id"], trace_id)
+        self.assertEqual(update["data"]["trace_id"], trace_id)
+        self.assertEqual(
+            sorted(span["name"] for span in self.exporter.spans if span["trace_id"] == trace_id),
+            ["broadcast", "conflate"]
+        )
+
+        # Malformed trace IDs are neither recorded nor relayed
+        viewer.sent.clear()
+        recorded = len(self.exporter.spans)
+        asyncio.run(server._process_message("producer", {
+            "type": MessageType.PROGRESS_UPDATE,
+            "data": {"operation_id": "op1", "progress": 20.0, "status": "running", "trace_id": {"x": 1}},
+            "trace_id": "ZZ" * 16
+        }))
+        self.tracer.flush()
+
+        update = next(m for m in viewer.sent if m["type"] == MessageType.PROGRESS_UPDATE)
+        self.assertNotIn("trace_id", update)
+        self.assertNotIn("trace_id", update["data"])
+        self.assertEqual(len(self.exporter.spans), recorded)
+
+
+if __name__ == "__main__":
+    unittest.main()
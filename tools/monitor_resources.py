@@ -4,6 +4,12 @@ Resource Monitor for WebSocket Server and Clients
 
 This script monitors system resources (CPU, memory, sockets) for the
 WebSocket server and clients to detect resource leaks and verify cleanup.
+
+On Linux, samples are read directly from /proc (the process's stat and fd
+directory, and the TCP tables for the port) instead of running lsof or
+netstat, so a sample costs about a millisecond and a monitor can
+sample every second for the lifetime of a server. Samples are kept in
+fixed-size ring buffers.
 """
 
 import argparse
@@ -11,17 +17,21 @@ import json
 import logging
 import os
 import signal
-import subprocess
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Optional, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import psutil
 
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.timeseries import TimeSeries
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,6 +42,154 @@ logging.basicConfig(
 )
 logger = logging.getLogger("resource-monitor")
 
+# States of the kernel TCP tables (include/net/tcp_states.h)
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING", "0C": "NEW_SYN_RECV",
+}
+
+# Metrics of a sample, in ring buffer order
+SAMPLE_FIELDS = ("cpu", "memory", "sockets", "fds", "threads")
+
+
+class ProcSampler:
+    """Samples a process and the TCP sockets of a port from /proc."""
+
+    def __init__(self, pid: Optional[int] = None, port: Optional[int] = None, proc_root: str = "/proc"):
+        """
+        Initialize the sampler.
+
+        Args:
+            pid: Process to sample (None for the calling process)
+            port: TCP port whose sockets are counted (None to skip)
+            proc_root: Mount point of procfs
+        """
+        self.pid = pid
+        self.port = port
+        self.proc_root = proc_root
+        self.process_dir = os.path.join(proc_root, "self" if pid is None else str(pid))
+        # The TCP tables of the network namespace, so sockets are still seen
+        # (and their release verified) after the process exits
+        self.tcp_tables = [os.path.join(proc_root, "net", name) for name in ("tcp", "tcp6")]
+        self._port_hex = None if port is None else ":%04X" % port
+
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+        # CPU time and wall time of the previous sample
+        self._last_cpu: Optional[float] = None
+        self._last_time: Optional[float] = None
+
+    @staticmethod
+    def available(proc_root: str = "/proc") -> bool:
+        """Whether procfs with TCP tables is available."""
+        return os.path.exists(os.path.join(proc_root, "net", "tcp"))
+
+    def read_stat(self) -> Tuple[float, float, int]:
+        """
+        Read the process's /proc stat file.
+
+        Returns:
+            Tuple of (user + system CPU seconds, resident memory in MB,
+            number of threads)
+        """
+        with open(os.path.join(self.process_dir, "stat"), "rb") as f:
+            data = f.read()
+
+        # The command name may contain spaces; fields follow its closing parenthesis
+        fields = data[data.rindex(b")") + 2:].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        memory_mb = int(fields[21]) * self.page_size / (1024 * 1024)
+        return cpu_seconds, memory_mb, int(fields[17])
+
+    def count_fds(self) -> Optional[int]:
+        """
+        Count the process's open file descriptors.
+
+        Returns:
+            Number of descriptors, or None if the fd directory is not readable
+        """
+        try:
+            return len(os.listdir(os.path.join(self.process_dir, "fd")))
+        except OSError:
+            return None
+
+    def socket_states(self) -> Dict[str, int]:
+        """
+        Count the TCP sockets of the port by state.
+
+        Like ``lsof -i :port``, sockets with the port at either end are
+        counted, and sockets no longer owned by a descriptor (TIME_WAIT) are
+        not.
+
+        Returns:
+            State name -> number of sockets
+        """
+        states: Dict[str, int] = {}
+        if self._port_hex is None:
+            return states
+
+        port_hex = self._port_hex
+        for path in self.tcp_tables:
+            try:
+                with open(path, "r") as f:
+                    lines = f.read().splitlines()[1:]
+            except OSError:
+                continue
+
+            for line in lines:
+                if port_hex not in line:
+                    continue
+                fields = line.split()
+                if not (fields[1].endswith(port_hex) or fields[2].endswith(port_hex)) or fields[9] == "0":
+                    continue
+                state = TCP_STATES.get(fields[3], fields[3])
+                states[state] = states.get(state, 0) + 1
+
+        return states
+
+    def count_sockets(self) -> int:
+        """
+        Count the TCP sockets of the port.
+
+        Returns:
+            Number of sockets
+        """
+        return sum(self.socket_states().values())
+
+    def sample(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Take a sample.
+
+        CPU usage is the share of one core used since the previous sample
+        (0 for the first sample).
+
+        Args:
+            now: Sample time (defaults to the current time)
+
+        Returns:
+            Dictionary with cpu (percent), memory (MB), sockets, fds and
+            threads; NaN for values that could not be read
+        """
+        now = time.time() if now is None else now
+        cpu_seconds, memory_mb, threads = self.read_stat()
+
+        cpu_percent = 0.0
+        if self._last_cpu is not None and now > self._last_time:
+            cpu_percent = 100.0 * (cpu_seconds - self._last_cpu) / (now - self._last_time)
+        self._last_cpu = cpu_seconds
+        self._last_time = now
+
+        fds = self.count_fds()
+        return {
+            "cpu": cpu_percent,
+            "memory": memory_mb,
+            "sockets": float(self.count_sockets()),
+            "fds": float("nan") if fds is None else float(fds),
+            "threads": float(threads),
+        }
+
 
 class ResourceMonitor:
     """Monitor system resources for WebSocket server and clients."""
@@ -41,6 +199,8 @@ class ResourceMonitor:
         process_name: str = "python",
         port: int = 8765,
         output_dir: Optional[str] = None,
+        pid: Optional[int] = None,
+        history: int = 3600,
     ):
         """
         Initialize the resource monitor.
@@ -49,22 +209,51 @@ class ResourceMonitor:
             process_name: Process name to monitor
             port: WebSocket port to monitor
             output_dir: Directory for output files
+            pid: Process to monitor (found by name when monitoring starts
+                if omitted)
+            history: Number of most recent samples kept
         """
         self.process_name = process_name
         self.port = port
         self.output_dir = Path(output_dir or "reports/resources")
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Monitoring data
-        self.cpu_usage: List[float] = []
-        self.memory_usage: List[float] = []  # MB
-        self.socket_count: List[int] = []
-        self.timestamps: List[float] = []
+        # Monitoring data: one ring buffer per sample field
+        self.series: Dict[str, TimeSeries] = {name: TimeSeries(history) for name in SAMPLE_FIELDS}
+        self.use_proc = ProcSampler.available()
+        self._samplers: Dict[Optional[int], ProcSampler] = {}
 
         # State
         self.running = False
-        self.target_pid: Optional[int] = None
-        self.start_time = 0.0
+        self.target_pid: Optional[int] = pid
+        self.start_time = time.time()
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Sample times in seconds since monitoring started."""
+        return self.series["cpu"].arrays()[0] - self.start_time
+
+    @property
+    def cpu_usage(self) -> np.ndarray:
+        """CPU usage samples (percent of one core)."""
+        return self.series["cpu"].arrays()[1]
+
+    @property
+    def memory_usage(self) -> np.ndarray:
+        """Resident memory samples (MB)."""
+        return self.series["memory"].arrays()[1]
+
+    @property
+    def socket_count(self) -> np.ndarray:
+        """Samples of the number of sockets on the port."""
+        return self.series["sockets"].arrays()[1]
+
+    def _sampler(self, pid: Optional[int]) -> ProcSampler:
+        """Get the persistent /proc sampler of a process (None for this process)."""
+        sampler = self._samplers.get(pid)
+        if sampler is None:
+            sampler = self._samplers[pid] = ProcSampler(pid, self.port)
+        return sampler
 
     def find_target_process(self) -> Optional[psutil.Process]:
         """
@@ -93,24 +282,73 @@ class ResourceMonitor:
         Returns:
             Number of open sockets
         """
+        if self.use_proc:
+            return self._sampler(self.target_pid).count_sockets()
+
+        # No procfs (e.g. Windows, macOS): ask psutil
         try:
-            if os.name == "nt":  # Windows
-                output = subprocess.check_output(
-                    f"netstat -ano | findstr :{self.port}", shell=True
-                )
-                lines = output.decode().strip().split("\n")
-                return len(lines)
-            else:  # Linux/Unix
-                output = subprocess.check_output(
-                    f"lsof -i :{self.port} | wc -l", shell=True
-                )
-                # Subtract 1 for header line
-                count = int(output.decode().strip()) - 1
-                return max(0, count)
-        except subprocess.CalledProcessError:
-            # No connections or command failed
+            return sum(
+                1 for conn in psutil.net_connections(kind="tcp")
+                if (conn.laddr and conn.laddr.port == self.port)
+                or (conn.raddr and conn.raddr.port == self.port)
+            )
+        except psutil.AccessDenied:
             return 0
 
+    def sample(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Take a sample of the monitored process and record it.
+
+        Args:
+            now: Sample time (defaults to the current time)
+
+        Returns:
+            Dictionary with cpu (percent), memory (MB), sockets, fds and
+            threads
+        """
+        now = time.time() if now is None else now
+
+        if self.use_proc:
+            values = self._sampler(self.target_pid).sample(now)
+        else:
+            process = psutil.Process(self.target_pid)
+            with process.oneshot():
+                values = {
+                    "cpu": process.cpu_percent(),
+                    "memory": process.memory_info().rss / (1024 * 1024),
+                    "sockets": float(self.count_open_sockets()),
+                    "fds": float(process.num_fds()) if hasattr(process, "num_fds") else float("nan"),
+                    "threads": float(process.num_threads()),
+                }
+
+        for name in SAMPLE_FIELDS:
+            self.series[name].append(values[name], now)
+        return values
+
+    def summary(self, window: Optional[float] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get statistics of the recorded samples.
+
+        Args:
+            window: Only include samples of the last this many seconds
+                (None for all samples)
+
+        Returns:
+            Sample field -> count, mean, min, max and latest value
+        """
+        summary = {}
+        for name, series in self.series.items():
+            stats = series.aggregate(window)
+            latest = series.latest(1)
+            summary[name] = {
+                "count": stats["count"],
+                "mean": stats["mean"],
+                "min": stats["min"],
+                "max": stats["max"],
+                "latest": float(latest[0]) if len(latest) else None,
+            }
+        return summary
+
     def collect_sample(self, process: psutil.Process) -> Tuple[float, float, int]:
         """
         Collect a single sample of resource usage.
@@ -121,19 +359,11 @@ class ResourceMonitor:
         Returns:
             Tuple of (cpu_percent, memory_mb, socket_count)
         """
+        self.target_pid = process.pid
         try:
-            # CPU usage
-            cpu_percent = process.cpu_percent()
-
-            # Memory usage (convert to MB)
-            memory_info = process.memory_info()
-            memory_mb = memory_info.rss / (1024 * 1024)
-
-            # Socket count
-            socket_count = self.count_open_sockets()
-
-            return cpu_percent, memory_mb, socket_count
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            values = self.sample()
+            return values["cpu"], values["memory"], int(values["sockets"])
+        except (OSError, psutil.NoSuchProcess, psutil.AccessDenied):
             # Process no longer exists or can't be accessed
             return 0.0, 0.0, 0
 
@@ -148,7 +378,7 @@ class ResourceMonitor:
         self.start_time = time.time()
 
         # Find target process
-        process = self.find_target_process()
+        process = psutil.Process(self.target_pid) if self.target_pid else self.find_target_process()
         if not process:
             logger.error(
                 f"Cannot find process matching '{self.process_name}' running a WebSocket server"
@@ -186,15 +416,8 @@ class ResourceMonitor:
                     logger.warning("Target process no longer exists")
                     break
 
-                # Collect sample
+                # Collect and store sample
                 cpu, memory, sockets = self.collect_sample(process)
-                timestamp = time.time() - self.start_time
-
-                # Store data
-                self.cpu_usage.append(cpu)
-                self.memory_usage.append(memory)
-                self.socket_count.append(sockets)
-                self.timestamps.append(timestamp)
 
                 # Log periodic updates
                 if len(self.timestamps) % 10 == 0:
@@ -211,14 +434,14 @@ class ResourceMonitor:
 
     def generate_report(self) -> None:
         """Generate report with resource usage statistics and plots."""
-        if not self.timestamps:
+        if not len(self.series["cpu"]):
             logger.warning("No data collected, cannot generate report")
             return
 
         # Create timestamp for report files
         timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Convert lists to numpy arrays for analysis
+        # Snapshot the ring buffers for analysis
         timestamps = np.array(self.timestamps)
         cpu_usage = np.array(self.cpu_usage)
         memory_usage = np.array(self.memory_usage)
@@ -352,9 +575,11 @@ class ResourceMonitor:
 def main():
     parser = argparse.ArgumentParser(description="Monitor WebSocket server resources")
     parser.add_argument("--process", default="python", help="Process name to monitor")
+    parser.add_argument("--pid", type=int, help="Process ID to monitor (overrides --process)")
     parser.add_argument("--port", type=int, default=8765, help="WebSocket port to monitor")
     parser.add_argument("--interval", type=float, default=1.0, help="Sampling interval (seconds)")
     parser.add_argument("--output-dir", help="Output directory for reports and plots")
+    parser.add_argument("--history", type=int, default=3600, help="Number of samples to keep")
     parser.add_argument("--no-plots", action="store_true", help="Disable plot generation")
     parser.add_argument("--verify-cleanup", action="store_true", 
                        help="Verify resources are cleaned up after monitoring")
@@ -365,7 +590,9 @@ def main():
     monitor = ResourceMonitor(
         process_name=args.process,
         port=args.port,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        pid=args.pid,
+        history=args.history
     )
     
     # Start monitoring
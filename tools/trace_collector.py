@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Trace Collector Stand-in
+
+A minimal OTLP/HTTP collector for local latency analysis. It accepts
+``POST /v1/traces`` requests in the OTLP JSON encoding (as sent by
+rfm.core.tracing.OTLPHttpSpanExporter) and appends each request to a JSON
+lines file, the same format FileSpanExporter writes.
+
+It can also summarize such a file: per-stage latency percentiles, or the
+spans of one trace in start order.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rfm.core.tracing import latency_breakdown, load_spans, otlp_spans
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.StreamHandler(sys.stdout),
+    ]
+)
+logger = logging.getLogger("trace-collector")
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    """Stores OTLP JSON trace export requests."""
+
+    # Set by serve()
+    output_path = "traces.jsonl"
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != "/v1/traces":
+            self.send_error(404)
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            spans = otlp_spans(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_error(400, f"Invalid OTLP JSON: {e}")
+            return
+
+        with self.lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+        logger.debug(f"Stored {len(spans)} spans")
+
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve(host: str, port: int, output_path: str) -> None:
+    """
+    Run the collector until interrupted.
+
+    Args:
+        host: Address to bind
+        port: Port to bind (4318 is the OTLP/HTTP default)
+        output_path: JSON lines file to append requests to
+    """
+    CollectorHandler.output_path = output_path
+    server = ThreadingHTTPServer((host, port), CollectorHandler)
+    logger.info(f"Collecting traces on http://{host}:{port}/v1/traces into {output_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Collector stopped by user")
+    finally:
+        server.server_close()
+
+
+def print_breakdown(path: str) -> None:
+    """Print per-stage latency percentiles of a traces file."""
+    breakdown = latency_breakdown(load_spans(path))
+    print(f"{'Stage':<16}{'Count':>8}{'Mean ms':>12}{'P50 ms':>12}{'P95 ms':>12}{'Max ms':>12}")
+    for name, stats in sorted(breakdown.items(), key=lambda item: -item[1]["mean_ms"]):
+        print(f"{name:<16}{stats['count']:>8}{stats['mean_ms']:>12.3f}{stats['p50_ms']:>12.3f}"
+              f"{stats['p95_ms']:>12.3f}{stats['max_ms']:>12.3f}")
+
+
+def print_trace(path: str, trace_id: str) -> None:
+    """Print the spans of one trace, relative to its first span."""
+    spans = sorted((span for span in load_spans(path) if span["trace_id"] == trace_id),
+                   key=lambda span: span["start"])
+    if not spans:
+        print(f"No spans of trace {trace_id}")
+        return
+
+    origin = spans[0]["start"]
+    for span in spans:
+        offset = (span["start"] - origin) * 1000
+        print(f"{offset:>10.3f} ms  {span['duration_ms']:>10.3f} ms  {span['service']}/{span['name']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTLP/HTTP trace collector stand-in")
+    parser.add_argument("--host", default="localhost", help="Address to bind")
+    parser.add_argument("--port", type=int, default=4318, help="Port to bind")
+    parser.add_argument("--output", default="traces.jsonl", help="File to store traces in")
+    parser.add_argument("--summary", action="store_true",
+                       help="Print the latency breakdown of the output file and exit")
+    parser.add_argument("--trace", help="Print the spans of this trace ID and exit")
+
+    args = parser.parse_args()
+
+    if args.summary:
+        print_breakdown(args.output)
+    elif args.trace:
+        print_trace(args.output, args.trace)
+    else:
+        serve(args.host, args.port, args.output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,7 @@ import asyncio
 import uuid
 from rfm_ui.websocket_client import get_websocket_client, WebSocketClient
 from rfm.core.progress import ProgressReporter, get_progress_manager
+from rfm.core.tracing import current_span, get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -169,6 +170,8 @@ class ColorMapper:
         """
         Apply a colormap to iteration values.
         
+        Inside a traced render this is recorded as the ``colormap`` span.
+        
         Args:
             iterations: Array of iteration values
             max_iter: Maximum number of iterations
@@ -177,6 +180,17 @@ class ColorMapper:
         Returns:
             Array of RGBA values
         """
+        if current_span() is None:
+            return ColorMapper._apply_colormap(iterations, max_iter, cmap_name)
+            
+        with get_tracer().span("colormap", attributes={"colormap": cmap_name}):
+            return ColorMapper._apply_colormap(iterations, max_iter, cmap_name)
+        
+    @staticmethod
+    def _apply_colormap(iterations: np.ndarray, 
+                       max_iter: int,
+                       cmap_name: str) -> np.ndarray:
+        """Apply a colormap to iteration values (see apply_colormap)."""
         # Get colormap
         colormap = ColorMapper.get_colormap(cmap_name)
         
@@ -313,6 +327,18 @@ class FractalEngine:
         Raises:
             RenderError: If rendering fails
         """
+        # Trace the render; its progress updates carry the trace ID
+        with get_tracer().span("render", attributes={
+            "type": params.get("type", "mandelbrot"),
+            "width": params.get("width", 0),
+            "height": params.get("height", 0)
+        }):
+            return self._render(params)
+    
+    def _render(self, params: Dict[str, Any]) -> np.ndarray:
+        """Render a fractal inside the render span (see render)."""
+        tracer = get_tracer()
+        
         # Record rendering performance
         perf_ctx = self.performance_tracker.start_operation(
             "render_fractal_engine", params
@@ -325,14 +351,15 @@ class FractalEngine:
             # Create progress reporter
             progress_reporter = self._create_progress_reporter(fractal_type, params)
             
-            # Validate parameters
-            self._validate_params(fractal_type, params)
-            
-            # Apply defaults
-            params = self._apply_defaults(fractal_type, params)
+            with tracer.span("validate"):
+                # Validate parameters
+                self._validate_params(fractal_type, params)
+                
+                # Apply defaults
+                params = self._apply_defaults(fractal_type, params)
             
             # Render based on fractal type
-            with error_context(f"render_{fractal_type}", params):
+            with error_context(f"render_{fractal_type}", params), tracer.span("kernel"):
                 if fractal_type == "mandelbrot":
                     return self._render_mandelbrot(params, progress_reporter)
                 elif fractal_type == "julia":
@@ -547,6 +574,9 @@ class FractalEngine:
             # Track points that have escaped
             escaped = np.zeros((height, width), dtype=bool)
             
+            # Point iterations computed so far (the throughput unit)
+            points_iterated = 0
+            
             # Report start of calculation
             if progress_reporter:
                 progress_reporter.report_progress(
@@ -560,6 +590,7 @@ class FractalEngine:
             for i in range(max_iter):
                 # Update points that haven't escaped yet
                 mask = ~escaped
+                points_iterated += np.count_nonzero(mask)
                 z[mask] = z[mask] * z[mask] + c[mask]
                 
                 # Mark points that have escaped
@@ -583,7 +614,8 @@ class FractalEngine:
                         current_step_progress=(i + 1) / max_iter * 100,
                         details={
                             "escaped_points": int(escaped_points),
-                            "remaining_points": int(remaining_points)
+                            "remaining_points": int(remaining_points),
+                            "items_processed": points_iterated
                         }
                     )
                 
@@ -757,6 +789,9 @@ class FractalEngine:
             # Track points that have escaped
             escaped = np.zeros((height, width), dtype=bool)
             
+            # Point iterations computed so far (the throughput unit)
+            points_iterated = 0
+            
             # Report start of calculation
             if progress_reporter:
                 progress_reporter.report_progress(
@@ -770,6 +805,7 @@ class FractalEngine:
             for i in range(max_iter):
                 # Update points that haven't escaped yet
                 mask = ~escaped
+                points_iterated += np.count_nonzero(mask)
                 z[mask] = z[mask] * z[mask] + c
                 
                 # Mark points that have escaped
@@ -793,7 +829,8 @@ class FractalEngine:
                         current_step_progress=(i + 1) / max_iter * 100,
                         details={
                             "escaped_points": int(escaped_points),
-                            "remaining_points": int(remaining_points)
+                            "remaining_points": int(remaining_points),
+                            "items_processed": points_iterated
                         }
                     )
                 
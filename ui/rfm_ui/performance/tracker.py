@@ -17,6 +17,8 @@ from functools import wraps
 import numpy as np
 import psutil
 
+from rfm.core.profiler import RENDER_TAGS, get_profiler
+
 
 @dataclass
 class PerformanceRecord:
@@ -103,6 +105,15 @@ class PerformanceTracker:
             # Not critical, just log and continue without GPU metrics
             pass
             
+        # Tag profiler samples of this thread while the profiler runs
+        profile_tag = None
+        profiler = get_profiler()
+        if profiler.running:
+            tags = {"operation_id": params.get("operation_id", operation), "operation": operation}
+            tags.update((key, params[key]) for key in RENDER_TAGS if key in params)
+            profile_tag = profiler.tag(**tags)
+            profile_tag.__enter__()
+            
         return {
             "operation": operation,
             "params": params,
@@ -110,7 +121,8 @@ class PerformanceTracker:
             "memory_before": memory_before,
             "thread_id": threading.get_ident(),
             "cpu_percent": cpu_percent,
-            "gpu_memory": gpu_memory
+            "gpu_memory": gpu_memory,
+            "profile_tag": profile_tag
         }
     
     def end_operation(self, context: Dict[str, Any]) -> PerformanceRecord:
@@ -126,6 +138,9 @@ class PerformanceTracker:
         end_time = time.time()
         duration_ms = (end_time - context["start_time"]) * 1000
         
+        if context.get("profile_tag") is not None:
+            context["profile_tag"].__exit__(None, None, None)
+        
         # Get current process
         process = psutil.Process(os.getpid())
         
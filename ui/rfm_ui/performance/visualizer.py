@@ -13,19 +13,26 @@ import matplotlib.pyplot as plt
 from io import BytesIO
 import base64
 
+from rfm.core.profiler import DEFAULT_INTERVAL, get_profiler, parse_folded
+
 from .tracker import PerformanceTracker, PerformanceRecord
 
 
 class PerformanceVisualizer:
     """UI Component for displaying performance metrics."""
     
-    def __init__(self, performance_tracker: PerformanceTracker, update_interval_ms: int = 1000):
+    def __init__(self,
+                 performance_tracker: PerformanceTracker,
+                 update_interval_ms: int = 1000,
+                 websocket_client: Optional[Any] = None):
         """
         Initialize the performance visualizer.
         
         Args:
             performance_tracker: Performance tracker to visualize
             update_interval_ms: Interval for automatic updates
+            websocket_client: Enhanced WebSocket client used to control the
+                server's profiler (None to profile the UI process only)
         """
         self.tracker = performance_tracker
         self.update_interval = update_interval_ms
@@ -38,6 +45,15 @@ class PerformanceVisualizer:
         self.is_updating = False
         self.update_timer = None
         
+        # Sampling profiler of this process, and the last server profile
+        self.profiler = get_profiler()
+        self.websocket_client = websocket_client
+        self.server_profile: Dict[str, int] = {}
+        self.server_profile_stats: Dict[str, Any] = {}
+        if websocket_client is not None:
+            from rfm_ui.websocket_client_enhanced import MessageType
+            websocket_client.add_callback(MessageType.PROFILE, self._on_server_profile)
+        
     def initialize(self) -> None:
         """Initialize the performance view UI components."""
         # Create the window
@@ -163,6 +179,50 @@ class PerformanceVisualizer:
                         dpg.add_table_column(label="Baseline")
                         dpg.add_table_column(label="Current")
                         dpg.add_table_column(label="Regression (%)")
+                
+                # Profiler tab
+                with dpg.tab(label="Profiler", tag="tab_profiler"):
+                    dpg.add_text("Sampling Profiler")
+                    dpg.add_separator()
+                    
+                    # Controls
+                    with dpg.group(horizontal=True):
+                        dpg.add_combo(
+                            items=["UI process", "Server"] if self.websocket_client is not None else ["UI process"],
+                            default_value="UI process",
+                            callback=self._update_profiler,
+                            width=120,
+                            tag="profiler_source"
+                        )
+                        dpg.add_text("Interval (ms):")
+                        dpg.add_slider_float(
+                            default_value=DEFAULT_INTERVAL * 1000,
+                            min_value=1.0,
+                            max_value=50.0,
+                            width=120,
+                            tag="profiler_interval"
+                        )
+                        dpg.add_button(label="Start", callback=self._start_profiler)
+                        dpg.add_button(label="Stop", callback=self._stop_profiler)
+                        dpg.add_button(label="Export Folded", callback=self._export_profile)
+                    
+                    dpg.add_input_text(
+                        hint="Operation ID (empty for all)",
+                        callback=self._update_profiler,
+                        width=250,
+                        tag="profiler_operation"
+                    )
+                    dpg.add_text("", tag="profiler_status")
+                    
+                    # Hottest frames, by samples in which they are the leaf
+                    with dpg.table(header_row=True, resizable=True, 
+                                  policy=dpg.mvTable_SizingStretchProp,
+                                  borders_outerH=True, borders_innerH=True, 
+                                  borders_innerV=True, borders_outerV=True,
+                                  tag="profiler_table"):
+                        dpg.add_table_column(label="Frame")
+                        dpg.add_table_column(label="Samples")
+                        dpg.add_table_column(label="Share (%)")
             
             # Footer with controls
             with dpg.group(horizontal=True):
@@ -215,6 +275,8 @@ class PerformanceVisualizer:
                 self._update_hotspots()
             elif active_tab == 3:
                 self._update_regressions()
+            elif active_tab == 4:
+                self._update_profiler()
         finally:
             self.is_updating = False
         
@@ -429,6 +491,106 @@ class PerformanceVisualizer:
         except Exception as e:
             dpg.add_text(f"Failed to export report: {e}", color=[255, 0, 0], parent=self.window_tag)
             
+    def _profiling_server(self) -> bool:
+        """Whether the profiler tab shows the server's profiler."""
+        return self.websocket_client is not None and dpg.get_value("profiler_source") == "Server"
+        
+    def _start_profiler(self, sender=None, app_data=None) -> None:
+        """Start the selected profiler."""
+        interval = dpg.get_value("profiler_interval") / 1000
+        if self._profiling_server():
+            self.websocket_client.start_profiler(interval=interval, reset=True)
+        else:
+            self.profiler.reset()
+            self.profiler.start(interval)
+        self._update_profiler()
+        
+    def _stop_profiler(self, sender=None, app_data=None) -> None:
+        """Stop the selected profiler."""
+        if self._profiling_server():
+            self.websocket_client.stop_profiler()
+        else:
+            self.profiler.stop()
+        self._update_profiler()
+        
+    def _on_server_profile(self, data: Dict[str, Any]) -> None:
+        """Store a profile message of the server."""
+        self.server_profile_stats = data.get("stats", {})
+        if "folded" in data:
+            self.server_profile = parse_folded(data["folded"])
+        
+    def _current_profile(self) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """Get the statistics and stacks of the selected profiler."""
+        operation_id = dpg.get_value("profiler_operation") or None
+        if self._profiling_server():
+            stacks = self.server_profile
+            if operation_id is not None:
+                prefix = f"operation_id={operation_id}"
+                stacks = {
+                    stack: count for stack, count in stacks.items()
+                    if stack == prefix or stack.startswith(prefix + ";")
+                }
+            return self.server_profile_stats, stacks
+        return self.profiler.stats(), self.profiler.stacks(operation_id)
+        
+    def _update_profiler(self, sender=None, app_data=None) -> None:
+        """Update the profiler tab."""
+        if self._profiling_server():
+            # The answer arrives as a profile message and shows on the next refresh
+            self.websocket_client.request_profile(dpg.get_value("profiler_operation") or None)
+            
+        stats, stacks = self._current_profile()
+        
+        cost = stats.get("sample_cost_ms")
+        dpg.set_value(
+            "profiler_status",
+            f"{'Running' if stats.get('running') else 'Stopped'} - "
+            f"{stats.get('samples', 0)} samples, {stats.get('stacks', 0)} stacks, "
+            f"{stats.get('dropped', 0)} dropped"
+            + (f", {cost:.3f} ms per sample" if cost is not None else "")
+        )
+        
+        # Clear existing rows
+        for row in dpg.get_item_children("profiler_table", 1):
+            dpg.delete_item(row)
+            
+        # Count samples by leaf frame
+        leaves: Dict[str, int] = {}
+        for stack, count in stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        total = sum(leaves.values()) or 1
+        
+        for leaf, count in sorted(leaves.items(), key=lambda item: -item[1])[:50]:
+            with dpg.table_row(parent="profiler_table"):
+                dpg.add_text(leaf)
+                dpg.add_text(f"{count}")
+                dpg.add_text(f"{100.0 * count / total:.1f}")
+                
+    def _export_profile(self, sender=None, app_data=None) -> None:
+        """Export the selected profile as folded stacks for flame graph tools."""
+        _, stacks = self._current_profile()
+        
+        try:
+            import os
+            
+            timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+            source = "server" if self._profiling_server() else "ui"
+            
+            # Ensure log directory exists
+            log_dir = self.tracker._save_path
+            if not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+                
+            filepath = os.path.join(log_dir, f"profile_{source}_{timestamp}.folded")
+            with open(filepath, "w") as f:
+                for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {count}\n")
+                    
+            dpg.add_text(f"Profile exported to {filepath}", color=[0, 255, 0], parent=self.window_tag)
+        except Exception as e:
+            dpg.add_text(f"Failed to export profile: {e}", color=[255, 0, 0], parent=self.window_tag)
+            
     def _toggle_auto_refresh(self, sender=None, app_data=None) -> None:
         """Toggle auto refresh."""
         auto_refresh = dpg.get_value("auto_refresh")
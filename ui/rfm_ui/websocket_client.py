@@ -288,7 +288,12 @@ class WebSocketClient:
         """
         message_type = data.get("type")
         
-        if message_type == "progress_update":
+        if message_type == "batch":
+            # Unpack batch frames in order
+            for message in data.get("messages", []):
+                await self._handle_message(message)
+        
+        elif message_type == "progress_update":
             # Handle progress update
             update_data = data.get("data", {})
             operation_id = update_data.get("operation_id")
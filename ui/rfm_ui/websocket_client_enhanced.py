@@ -25,6 +25,10 @@ import socket
 from rfm.core.logging_config import (
     get_logger, configure_logging, LogLevel, LogCategory, log_timing, TimingContext
 )
+from rfm.core.progress_delta import ProgressDeltaDecoder
+from rfm.core.codec import CodecError, JSON_CODEC, get_codec, negotiate_codec
+from rfm.core.image_frame import ImageFrameError, decode_image_frame, is_image_frame
+from rfm.core.tracing import current_trace_id, get_tracer
 
 
 # Configure logger
@@ -60,15 +64,34 @@ class MessageType(str, Enum):
     LIST_OPERATIONS = "list_operations"
     CANCEL_OPERATION = "cancel_operation"
     GET_OPERATION_DETAILS = "get_operation_details"
+    SET_CHILD_DETAIL = "set_child_detail"
+    RESYNC_OPERATION = "resync_operation"
+    SUBSCRIBE = "subscribe"
+    UNSUBSCRIBE = "unsubscribe"
+    RESUME = "resume"
+    SUBMIT_RENDER = "submit_render"
+    CANCEL_RENDER = "cancel_render"
+    
+    # Admin messages (accepted by servers with the profiler enabled)
+    START_PROFILER = "start_profiler"
+    STOP_PROFILER = "stop_profiler"
+    GET_PROFILE = "get_profile"
     
     # Server messages
     PONG = "pong"
     OPERATION_STARTED = "operation_started"
     PROGRESS_UPDATE = "progress_update"
+    PROGRESS_DELTA = "progress_delta"
+    BATCH = "batch"
     OPERATION_COMPLETED = "operation_completed"
     OPERATION_FAILED = "operation_failed"
     OPERATION_CANCELED = "operation_canceled"
     OPERATIONS_LIST = "operations_list"
+    SUBSCRIPTIONS = "subscriptions"
+    SESSION_RESUMED = "session_resumed"
+    RENDER_SUBMITTED = "render_submitted"
+    RENDER_FRAME = "render_frame"
+    PROFILE = "profile"
     
     # System messages
     CONNECTION_STATUS = "connection_status"
@@ -89,7 +112,7 @@ class MessageStats:
     last_sent_time: Optional[float] = None
     message_types: Dict[str, int] = field(default_factory=dict)
     
-    def record_received(self, message: Union[str, Dict], message_type: Optional[str] = None) -> None:
+    def record_received(self, message: Union[str, bytes, Dict], message_type: Optional[str] = None) -> None:
         """
         Record a received message.
         
@@ -103,6 +126,8 @@ class MessageStats:
         # Calculate size
         if isinstance(message, str):
             self.received_bytes += len(message.encode('utf-8'))
+        elif isinstance(message, bytes):
+            self.received_bytes += len(message)
         elif isinstance(message, dict):
             self.received_bytes += len(json.dumps(message).encode('utf-8'))
         
@@ -113,7 +138,7 @@ class MessageStats:
                 
             self.message_types[message_type] += 1
     
-    def record_sent(self, message: Union[str, Dict], message_type: Optional[str] = None) -> None:
+    def record_sent(self, message: Union[str, bytes, Dict], message_type: Optional[str] = None) -> None:
         """
         Record a sent message.
         
@@ -127,6 +152,8 @@ class MessageStats:
         # Calculate size
         if isinstance(message, str):
             self.sent_bytes += len(message.encode('utf-8'))
+        elif isinstance(message, bytes):
+            self.sent_bytes += len(message)
         elif isinstance(message, dict):
             self.sent_bytes += len(json.dumps(message).encode('utf-8'))
         
@@ -159,6 +186,9 @@ class OperationInfo:
     duration: Optional[float] = None
     details: Dict[str, Any] = field(default_factory=dict)
     is_cancellable: bool = True
+    estimated_time_remaining_ms: Optional[int] = None
+    progress_per_second: Optional[float] = None
+    parent_id: Optional[str] = None
     
     @property
     def completion_percentage(self) -> float:
@@ -179,12 +209,20 @@ class OperationInfo:
         """
         Estimate completion time based on progress rate.
         
+        Uses the estimate reported by the operation when available, falling
+        back to linear extrapolation from the start time.
+        
         Returns:
             Estimated time to completion in seconds, or None if not estimable
         """
         if self.status not in (OperationStatus.PENDING, OperationStatus.RUNNING, OperationStatus.PAUSED):
             return 0
             
+        if self.estimated_time_remaining_ms is not None:
+            reported_at = self.last_update_time or time.time()
+            since_report = time.time() - reported_at if self.status == OperationStatus.RUNNING else 0
+            return max(0, self.estimated_time_remaining_ms / 1000 - since_report)
+            
         if self.progress <= 0 or self.start_time is None:
             return None
             
@@ -227,7 +265,10 @@ class OperationInfo:
             last_update_time=data.get("last_update_time") or data.get("timestamp"),
             end_time=data.get("end_time"),
             duration=data.get("duration"),
-            details=data.get("details", {})
+            details=data.get("details", {}),
+            estimated_time_remaining_ms=data.get("estimated_time_remaining_ms"),
+            progress_per_second=data.get("progress_per_second"),
+            parent_id=data.get("parent_id")
         )
 
 
@@ -280,7 +321,11 @@ class WebSocketClient:
                 reconnection_config: Optional[ReconnectionConfig] = None,
                 authentication: Optional[Dict[str, str]] = None,
                 log_level: LogLevel = LogLevel.INFO,
-                debug_mode: bool = False):
+                debug_mode: bool = False,
+                delta_updates: bool = False,
+                codec: str = "json",
+                batch_messages: bool = True,
+                resume_sessions: bool = True):
         """
         Initialize the WebSocket client.
         
@@ -290,6 +335,12 @@ class WebSocketClient:
             authentication: Optional authentication parameters (client_id and api_key)
             log_level: Log level for client logs
             debug_mode: Enable debug mode with additional logging
+            delta_updates: Request delta-encoded progress updates from the server
+            codec: Preferred message codec ("json", "msgpack" or "cbor"); binary
+                codecs are negotiated with the server and fall back to JSON
+            batch_messages: Let the server frame bursts of messages as batches
+            resume_sessions: After reconnecting to the same server, only ask
+                for the events missed instead of a full operations list
         """
         # Configuration
         self.base_url = url
@@ -297,6 +348,11 @@ class WebSocketClient:
         self.authentication = authentication or {}
         self.log_level = log_level
         self.debug_mode = debug_mode
+        self.delta_updates = delta_updates
+        self.requested_codec = codec
+        self.batch_messages = batch_messages
+        self.resume_sessions = resume_sessions
+        self.codec = JSON_CODEC
         
         # Create client ID if not provided
         if "client_id" not in self.authentication:
@@ -322,6 +378,15 @@ class WebSocketClient:
         # Operation tracking
         self.operations: Dict[str, OperationInfo] = {}
         self.operations_to_resurrect: Dict[str, Dict[str, Any]] = {}
+        self.delta_decoder = ProgressDeltaDecoder()
+        
+        # Topic subscriptions (restored after reconnecting)
+        self.subscriptions: Set[str] = set()
+        
+        # Session position: server epoch and last event sequence number seen
+        self.server_epoch: Optional[str] = None
+        self.last_event_seq = 0
+        self.resuming = False
         
         # Callbacks
         self.callbacks: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {
@@ -332,6 +397,9 @@ class WebSocketClient:
             MessageType.OPERATION_CANCELED: [],
             MessageType.OPERATIONS_LIST: [],
             MessageType.CONNECTION_STATUS: [],
+            MessageType.RENDER_SUBMITTED: [],
+            MessageType.RENDER_FRAME: [],
+            MessageType.PROFILE: [],
             MessageType.ERROR: []
         }
         
@@ -386,8 +454,61 @@ class WebSocketClient:
             # Remove trailing &
             url = url.rstrip("&")
             
+        # Request delta-encoded progress updates
+        if self.delta_updates:
+            url += "&delta=1" if "?" in url else "?delta=1"
+        
+        # Accept batch frames
+        if self.batch_messages:
+            url += "&batch=1" if "?" in url else "?batch=1"
+            
         return url
     
+    def _offered_subprotocols(self) -> Optional[List[str]]:
+        """
+        Get the subprotocols offered in the handshake.
+        
+        Returns:
+            Preferred codec followed by JSON, or None if only JSON is wanted
+            or the preferred codec is not available
+        """
+        codec = get_codec(self.requested_codec)
+        if codec is None or not codec.binary:
+            return None
+        
+        return [codec.subprotocol, JSON_CODEC.subprotocol]
+    
+    def _session_url(self) -> str:
+        """
+        Get the URL of the next connection.
+        
+        Returns:
+            URL, asking the server to hold back the operations list if the
+            session will be resumed
+        """
+        if not self.resuming:
+            return self.url
+        
+        return self.url + ("&resume=1" if "?" in self.url else "?resume=1")
+    
+    async def _restore_session(self) -> None:
+        """Restore subscriptions and resume the session on a new connection."""
+        # Subscriptions go first so only matching events are replayed
+        if self.subscriptions:
+            await self.send_message({
+                "type": MessageType.SUBSCRIBE,
+                "topics": sorted(self.subscriptions),
+                "timestamp": time.time()
+            })
+        
+        if self.resuming:
+            await self.send_message({
+                "type": MessageType.RESUME,
+                "epoch": self.server_epoch,
+                "last_seq": self.last_event_seq,
+                "timestamp": time.time()
+            })
+    
     def start(self) -> None:
         """Start the WebSocket client in a background thread."""
         if self.started:
@@ -572,16 +693,25 @@ class WebSocketClient:
                 
                 # Set connection timeout
                 try:
+                    self.resuming = self.resume_sessions and self.server_epoch is not None
                     self.websocket = await asyncio.wait_for(
-                        websockets.connect(self.url, close_timeout=2.0),
+                        websockets.connect(
+                            self._session_url(),
+                            close_timeout=2.0,
+                            subprotocols=self._offered_subprotocols()
+                        ),
                         timeout=10.0  # 10 second connection timeout
                     )
+                    self.codec = negotiate_codec(self.websocket.subprotocol)
                     self.connected = True
                     self.connecting = False
                     self.state = ConnectionState.CONNECTED
                     self.reconnect_attempt = 0  # Reset reconnect attempt on success
                     self.connection_error = None
                     
+                    # Delta state doesn't survive a new connection
+                    self.delta_decoder.clear()
+                    
                     # Notify about connection
                     await self._notify_connection_status(ConnectionState.CONNECTED)
                     
@@ -599,8 +729,13 @@ class WebSocketClient:
                     # Start ping task
                     self.ping_task = asyncio.create_task(self._send_pings())
                     
-                    # Start resurrection task if needed
-                    if self.operations_to_resurrect:
+                    # Restore topic subscriptions and resume the session
+                    if self.subscriptions or self.resuming:
+                        asyncio.create_task(self._restore_session())
+                    
+                    # Start resurrection task if needed (a resumed session
+                    # needs none; a snapshot fallback starts it)
+                    if self.operations_to_resurrect and not self.resuming:
                         self.resurrection_task = asyncio.create_task(self._resurrect_operations())
                     
                     # Wait for disconnect
@@ -791,9 +926,15 @@ class WebSocketClient:
         try:
             async for message in self.websocket:
                 try:
+                    # Render results arrive as binary image frames
+                    if is_image_frame(message):
+                        self.message_stats.record_received(message, MessageType.RENDER_FRAME)
+                        await self._handle_image_frame(message)
+                        continue
+                    
                     # Parse message
                     try:
-                        data = json.loads(message)
+                        data = self.codec.decode(message)
                         
                         # Update message stats
                         self.message_stats.record_received(message, data.get("type"))
@@ -801,11 +942,11 @@ class WebSocketClient:
                         # Handle message
                         await self._handle_message(data)
                         
-                    except json.JSONDecodeError:
-                        # Invalid JSON
+                    except CodecError:
+                        # Invalid JSON or undecodable binary frame
                         logger.structured_log(
                             LogLevel.WARNING,
-                            f"Invalid JSON from server: {message}",
+                            f"Invalid message from server: {message!r:.200}",
                             LogCategory.CONNECTION,
                             component="websocket_client",
                             context={"client_id": self.client_id}
@@ -968,7 +1109,19 @@ class WebSocketClient:
                 context={"client_id": self.client_id, "message": data}
             )
             return
-            
+        
+        # Unpack batch frames in order
+        if message_type == MessageType.BATCH:
+            for message in data.get("messages", []):
+                if isinstance(message, dict):
+                    await self._handle_message(message)
+            return
+        
+        # Track the session position for resuming after a reconnect
+        event_seq = data.get("event_seq")
+        if isinstance(event_seq, int) and event_seq > self.last_event_seq:
+            self.last_event_seq = event_seq
+        
         # Handle system messages
         if message_type == MessageType.PONG:
             # Pong response
@@ -1020,6 +1173,10 @@ class WebSocketClient:
             # Handle progress update
             await self._handle_progress_update(data)
             
+        elif message_type == MessageType.PROGRESS_DELTA:
+            # Handle delta-encoded progress update
+            await self._handle_progress_delta(data)
+            
         elif message_type == MessageType.OPERATION_STARTED:
             # Handle operation started
             await self._handle_operation_started(data)
@@ -1039,6 +1196,35 @@ class WebSocketClient:
         elif message_type == MessageType.OPERATIONS_LIST:
             # Handle operations list
             await self._handle_operations_list(data)
+        
+        elif message_type == MessageType.SUBSCRIPTIONS:
+            # Subscriptions confirmed by the server
+            self.subscriptions = set(data.get("topics", []))
+        
+        elif message_type == MessageType.RENDER_SUBMITTED:
+            # Render job accepted (or joined an identical job)
+            await self._notify_callbacks(MessageType.RENDER_SUBMITTED, data)
+        
+        elif message_type == MessageType.PROFILE:
+            # Server profiler state and samples
+            await self._notify_callbacks(MessageType.PROFILE, data)
+        
+        elif message_type == MessageType.SESSION_RESUMED:
+            # Missed events follow; operations are still known to the server
+            self.resuming = False
+            self.operations_to_resurrect.clear()
+            
+            logger.structured_log(
+                LogLevel.INFO,
+                f"Resumed session from event {data.get('from_seq')} ({data.get('replayed', 0)} events missed)",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={
+                    "client_id": self.client_id,
+                    "from_seq": data.get("from_seq"),
+                    "replayed": data.get("replayed", 0)
+                }
+            )
             
         else:
             # Unknown message type
@@ -1050,16 +1236,102 @@ class WebSocketClient:
                 context={"client_id": self.client_id, "message_type": message_type}
             )
     
+    async def _handle_image_frame(self, message: bytes) -> None:
+        """
+        Handle a binary image frame of a render job.
+        
+        Callbacks receive the decoded frame; its pixel array is a view of
+        the received message.
+        
+        Args:
+            message: Frame bytes
+        """
+        try:
+            frame = decode_image_frame(message)
+        except ImageFrameError as e:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Invalid image frame from server: {e}",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id},
+                error=str(e)
+            )
+            self.message_stats.record_error()
+            return
+        
+        await self._notify_callbacks(MessageType.RENDER_FRAME, {
+            "operation_id": frame.operation_id,
+            "frame": frame
+        })
+    
+    async def _handle_progress_delta(self, data: Dict[str, Any]) -> None:
+        """
+        Handle delta-encoded progress update message.
+        
+        Args:
+            data: Message data
+        """
+        operation_id = data.get("operation_id")
+        seq = data.get("seq")
+        
+        if not operation_id or seq is None:
+            logger.structured_log(
+                LogLevel.WARNING,
+                "Received progress delta without operation_id or seq",
+                LogCategory.OPERATION,
+                component="websocket_client",
+                context={"client_id": self.client_id}
+            )
+            return
+            
+        update_data = self.delta_decoder.apply_delta(operation_id, seq, data.get("changes", {}))
+        
+        if update_data is None:
+            # Missed an update; ask the server for the full state
+            logger.structured_log(
+                LogLevel.DEBUG,
+                f"Progress delta gap for operation {operation_id}, requesting resync",
+                LogCategory.OPERATION,
+                component="websocket_client",
+                context={"client_id": self.client_id, "operation_id": operation_id, "seq": seq}
+            )
+            
+            await self.send_message({
+                "type": MessageType.RESYNC_OPERATION,
+                "operation_id": operation_id
+            })
+            return
+            
+        await self._handle_progress_update({
+            "type": MessageType.PROGRESS_UPDATE,
+            "data": update_data,
+            "trace_id": data.get("trace_id"),
+            "timestamp": data.get("timestamp", time.time())
+        })
+    
     async def _handle_progress_update(self, data: Dict[str, Any]) -> None:
         """
         Handle progress update message.
         
+        Updates of a traced operation add a ``deliver`` span (from the
+        message timestamp until it arrived) to the trace.
+        
         Args:
             data: Message data
         """
         update_data = data.get("data", {})
         operation_id = update_data.get("operation_id")
         
+        tracer = get_tracer()
+        trace_id = data.get("trace_id") or update_data.get("trace_id")
+        if trace_id and tracer.enabled:
+            received_at = time.time()
+            tracer.record_span(
+                "deliver", data.get("timestamp", received_at), received_at, trace_id,
+                attributes={"operation_id": operation_id, "client_id": self.client_id}
+            )
+        
         if not operation_id:
             logger.structured_log(
                 LogLevel.WARNING,
@@ -1070,6 +1342,10 @@ class WebSocketClient:
             )
             return
             
+        # Full states in delta mode are the base for following deltas
+        if "seq" in data:
+            self.delta_decoder.apply_full(operation_id, data["seq"], update_data)
+            
         # Update operation info
         if operation_id not in self.operations:
             # Create new operation info
@@ -1083,13 +1359,18 @@ class WebSocketClient:
                 total_steps=update_data.get("total_steps"),
                 start_time=update_data.get("start_time", time.time()),
                 last_update_time=update_data.get("timestamp", time.time()),
-                details=update_data.get("details", {})
+                details=update_data.get("details", {}),
+                estimated_time_remaining_ms=update_data.get("estimated_time_remaining_ms"),
+                progress_per_second=update_data.get("progress_per_second"),
+                parent_id=update_data.get("parent_id")
             )
         else:
             # Update existing operation info
             op = self.operations[operation_id]
             op.progress = update_data.get("progress", op.progress)
             op.status = OperationStatus(update_data.get("status", op.status))
+            op.estimated_time_remaining_ms = update_data.get("estimated_time_remaining_ms")
+            op.progress_per_second = update_data.get("progress_per_second", op.progress_per_second)
             
             if "current_step" in update_data:
                 op.current_step = update_data["current_step"]
@@ -1153,7 +1434,8 @@ class WebSocketClient:
             progress=0.0,
             start_time=time.time(),
             last_update_time=time.time(),
-            details=operation_data.get("details", {})
+            details=operation_data.get("details", {}),
+            parent_id=operation_data.get("parent_id")
         )
         
         # Log operation started
@@ -1197,6 +1479,9 @@ class WebSocketClient:
             )
             return
             
+        # No further deltas for finished operations
+        self.delta_decoder.forget(operation_id)
+            
         # Check if operation exists
         if operation_id not in self.operations:
             logger.structured_log(
@@ -1277,6 +1562,9 @@ class WebSocketClient:
             )
             return
             
+        # No further deltas for finished operations
+        self.delta_decoder.forget(operation_id)
+            
         # Check if operation exists
         if operation_id not in self.operations:
             logger.structured_log(
@@ -1360,6 +1648,9 @@ class WebSocketClient:
             )
             return
             
+        # No further deltas for finished operations
+        self.delta_decoder.forget(operation_id)
+            
         # Check if operation exists
         if operation_id not in self.operations:
             logger.structured_log(
@@ -1429,6 +1720,17 @@ class WebSocketClient:
         """
         operations_data = data.get("operations", [])
         
+        # A snapshot restarts the session position
+        if "epoch" in data:
+            self.server_epoch = data["epoch"]
+            self.last_event_seq = data.get("event_seq", 0)
+        
+        # Resuming failed: re-announce our operations if the server lost them
+        if self.resuming:
+            self.resuming = False
+            if self.operations_to_resurrect:
+                self.resurrection_task = asyncio.create_task(self._resurrect_operations())
+        
         # Process each operation
         for op_data in operations_data:
             operation_id = op_data.get("operation_id")
@@ -1611,14 +1913,14 @@ class WebSocketClient:
             return False
             
         try:
-            # Serialize message
-            message_json = json.dumps(message)
+            # Serialize message with the negotiated codec
+            payload = self.codec.encode(message)
             
             # Send message
-            await self.websocket.send(message_json)
+            await self.websocket.send(payload)
             
             # Update message stats
-            self.message_stats.record_sent(message, message.get("type"))
+            self.message_stats.record_sent(payload, message.get("type"))
             
             # Log message (debug only)
             logger.structured_log(
@@ -1970,6 +2272,243 @@ class WebSocketClient:
                 context={"client_id": self.client_id, "operation_id": operation_id}
             )
     
+    def submit_render(self,
+                      kind: str = "mandelbrot",
+                      params: Optional[Dict[str, Any]] = None,
+                      priority: int = 0,
+                      pixel_format: str = "iterations",
+                      colormap: Optional[str] = None,
+                      compression: Optional[Union[str, List[str]]] = None,
+                      trace_id: Optional[str] = None) -> Optional[str]:
+        """
+        Submit a render job to the server.
+        
+        The server answers with a ``render_submitted`` message carrying the
+        request ID and the operation ID of the job; the image follows as
+        ``render_frame`` callbacks.
+        
+        Args:
+            kind: Fractal kind ("mandelbrot" or "julia")
+            params: Render parameters (width, height, center_x, center_y, zoom, max_iter, ...)
+            priority: Higher priorities run first
+            pixel_format: "iterations" (uint16 counts) or "rgba" (uint8, ready
+                to upload as a texture)
+            colormap: Matplotlib colormap of RGBA frames
+            compression: Frame compression name, or names in order of
+                preference (see ``available_compressions``); None for raw
+                frames, which decode without copying
+            trace_id: Trace the job continues (defaults to the trace of the
+                current span, if any)
+        
+        Returns:
+            Request ID, or None if the event loop is not running
+        """
+        if not (self.event_loop and self.event_loop.is_running()):
+            logger.structured_log(
+                LogLevel.WARNING,
+                "Cannot submit render: event loop not running",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id, "kind": kind}
+            )
+            return None
+        
+        request_id = uuid.uuid4().hex
+        asyncio.run_coroutine_threadsafe(
+            self.send_message({
+                "type": MessageType.SUBMIT_RENDER,
+                "request_id": request_id,
+                "kind": kind,
+                "params": params or {},
+                "priority": priority,
+                "format": pixel_format,
+                "colormap": colormap,
+                "compression": compression,
+                "trace_id": trace_id or current_trace_id(),
+                "timestamp": time.time()
+            }),
+            self.event_loop
+        )
+        return request_id
+    
+    def cancel_render(self, operation_id: str) -> None:
+        """
+        Withdraw a render job request.
+        
+        The job is canceled unless other clients requested it too.
+        
+        Args:
+            operation_id: Operation ID of the render job
+        """
+        if self.event_loop and self.event_loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                self.send_message({
+                    "type": MessageType.CANCEL_RENDER,
+                    "operation_id": operation_id,
+                    "timestamp": time.time()
+                }),
+                self.event_loop
+            )
+        else:
+            logger.structured_log(
+                LogLevel.WARNING,
+                "Cannot cancel render: event loop not running",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id, "operation_id": operation_id}
+            )
+    
+    def start_profiler(self, interval: Optional[float] = None, reset: bool = False) -> None:
+        """
+        Start the server's sampling profiler.
+        
+        The server answers with a ``profile`` message carrying the profiler
+        statistics, or an error if its profiler is not enabled.
+        
+        Args:
+            interval: Seconds between samples (None keeps the server's)
+            reset: Discard the samples collected so far
+        """
+        self._send_profiler_message({"type": MessageType.START_PROFILER, "interval": interval, "reset": reset})
+    
+    def stop_profiler(self) -> None:
+        """Stop the server's sampling profiler; the ``profile`` answer carries the folded stacks."""
+        self._send_profiler_message({"type": MessageType.STOP_PROFILER})
+    
+    def request_profile(self, operation_id: Optional[str] = None) -> None:
+        """
+        Request the server's profiler samples as folded stacks.
+        
+        Args:
+            operation_id: Only the samples of this operation (e.g. a render job)
+        """
+        self._send_profiler_message({"type": MessageType.GET_PROFILE, "operation_id": operation_id})
+    
+    def _send_profiler_message(self, message: Dict[str, Any]) -> None:
+        """Send a profiler admin message from any thread."""
+        if not (self.event_loop and self.event_loop.is_running()):
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Cannot send {message['type']}: event loop not running",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id}
+            )
+            return
+        
+        message["timestamp"] = time.time()
+        asyncio.run_coroutine_threadsafe(self.send_message(message), self.event_loop)
+    
+    def set_child_detail(self, enabled: bool = True, operation_id: Optional[str] = None) -> None:
+        """
+        Opt into (or out of) sub-operation events.
+        
+        By default the server only sends aggregate updates of top-level
+        operations.
+        
+        Args:
+            enabled: Whether to receive sub-operation events
+            operation_id: Optional parent operation to limit the opt-in to;
+                applies to all operations if omitted
+        """
+        if self.event_loop and self.event_loop.is_running():
+            message = {
+                "type": MessageType.SET_CHILD_DETAIL,
+                "enabled": enabled,
+                "timestamp": time.time()
+            }
+            
+            if operation_id:
+                message["operation_id"] = operation_id
+                
+            asyncio.run_coroutine_threadsafe(self.send_message(message), self.event_loop)
+        else:
+            logger.structured_log(
+                LogLevel.WARNING,
+                "Cannot set child detail: event loop not running",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id, "operation_id": operation_id}
+            )
+    
+    def subscribe(self,
+                  topics: Optional[List[str]] = None,
+                  operation_id: Optional[str] = None,
+                  operation_type: Optional[str] = None,
+                  user_id: Optional[str] = None) -> None:
+        """
+        Subscribe to operation events by topic.
+        
+        Once subscribed, the server only sends events of matching operations.
+        Topics are ``operation:<id>``, ``type:<operation_type>`` and
+        ``user:<user_id>``; the keyword arguments are shorthands for them.
+        
+        Args:
+            topics: Optional list of topics
+            operation_id: Optional operation ID to follow
+            operation_type: Optional operation type to follow
+            user_id: Optional user whose operations to follow
+        """
+        self._send_subscription(MessageType.SUBSCRIBE, topics, operation_id, operation_type, user_id)
+    
+    def unsubscribe(self,
+                    topics: Optional[List[str]] = None,
+                    operation_id: Optional[str] = None,
+                    operation_type: Optional[str] = None,
+                    user_id: Optional[str] = None) -> None:
+        """
+        Unsubscribe from topics.
+        
+        Without arguments all subscriptions are removed and the client
+        receives all operation events again.
+        
+        Args:
+            topics: Optional list of topics
+            operation_id: Optional operation ID
+            operation_type: Optional operation type
+            user_id: Optional user ID
+        """
+        self._send_subscription(MessageType.UNSUBSCRIBE, topics, operation_id, operation_type, user_id)
+    
+    def _send_subscription(self,
+                           message_type: MessageType,
+                           topics: Optional[List[str]],
+                           operation_id: Optional[str],
+                           operation_type: Optional[str],
+                           user_id: Optional[str]) -> None:
+        """
+        Send a subscribe or unsubscribe request.
+        
+        Args:
+            message_type: SUBSCRIBE or UNSUBSCRIBE
+            topics: Optional list of topics
+            operation_id: Optional operation ID
+            operation_type: Optional operation type
+            user_id: Optional user ID
+        """
+        if self.event_loop and self.event_loop.is_running():
+            message = {
+                "type": message_type,
+                "topics": list(topics or []),
+                "timestamp": time.time()
+            }
+            
+            for key, value in (("operation_id", operation_id),
+                               ("operation_type", operation_type),
+                               ("user_id", user_id)):
+                if value:
+                    message[key] = value
+            
+            asyncio.run_coroutine_threadsafe(self.send_message(message), self.event_loop)
+        else:
+            logger.structured_log(
+                LogLevel.WARNING,
+                f"Cannot {message_type.value}: event loop not running",
+                LogCategory.CONNECTION,
+                component="websocket_client",
+                context={"client_id": self.client_id, "topics": topics}
+            )
+    
     def get_operation_details(self, operation_id: str) -> None:
         """
         Request detailed information about an operation.